@@ -1,83 +1,532 @@
-"""CLI commands for AWS Free Guard."""
+"""CLI commands for AWS Free Guard.
 
+Only click and lightweight defaults are imported at module level; rich,
+boto3 and the enforcer/cleaner are imported by the commands that use them,
+so `--help` and quick invocations stay cheap.
+"""
+
+import contextlib
 import json
+import logging
+import threading
+import time
+from typing import Any, Callable, ContextManager, Dict, Iterator, Optional, Tuple
+
 import click
-from rich.console import Console
-from rich.table import Table
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.prompt import Confirm
 
-from src.models.aws_account import AWSAccount
-from src.lib.aws_free import AWSFreeEnforcer
-from src.lib.aws_clean import AWSCleaner
+from src.models.aws_account import DEFAULT_MAX_POOL_CONNECTIONS, AWSAccount
+from src.lib.scan_engine import DEFAULT_MAX_WORKERS
+from src.lib.rate_limiter import RateLimiter, parse_budgets
+from src.lib.deletion_planner import DEFAULT_DELETE_WORKERS
+
+
+class _LazyConsole:
+    """Stand-in for the rich console that imports rich on first use."""
+
+    _console = None
+
+    def load(self) -> Any:
+        """Get the real console, e.g. for rich renderables that need one."""
+        if _LazyConsole._console is None:
+            from rich.console import Console
+            _LazyConsole._console = Console()
+        return _LazyConsole._console
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.load(), name)
+
+    # Special methods bypass __getattr__; rich's Live does "with console"
+    def __enter__(self) -> Any:
+        return self.load().__enter__()
+
+    def __exit__(self, *exc_info: Any) -> Any:
+        return self.load().__exit__(*exc_info)
+
 
-console = Console()
+console = _LazyConsole()
+
+logger = logging.getLogger(__name__)
 
 @click.group()
 @click.option('--profile', default=None, help='AWS profile to use')
 @click.option('--region', default='us-east-1', help='AWS region to use')
+@click.option('--max-pool-connections', type=click.IntRange(min=1),
+              default=DEFAULT_MAX_POOL_CONNECTIONS,
+              help='Keep-alive HTTP connections per AWS client')
+@click.option('--rate-limit', multiple=True, metavar='SERVICE=RATE',
+              help='API request budget per second for a service (repeatable)')
+@click.option('--profile-run', is_flag=True,
+              help='Print per-phase timings and per-region/service API call stats')
+@click.option('--trace-file', type=click.Path(dir_okay=False), default=None,
+              help='With --profile-run, also write a Chrome trace JSON file')
 @click.pass_context
-def cli(ctx, profile, region):
+def cli(ctx: click.Context, profile: Optional[str], region: str,
+        max_pool_connections: int, rate_limit: Tuple[str, ...], profile_run: bool,
+        trace_file: Optional[str]) -> None:
     """AWS Free Guard - Keep your AWS account safe within free tier limits."""
     ctx.ensure_object(dict)
     ctx.obj['profile'] = profile
     ctx.obj['region'] = region
+    ctx.obj['max_pool_connections'] = max_pool_connections
+    try:
+        ctx.obj['rate_limits'] = parse_budgets(rate_limit)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--rate-limit')
+
+    ctx.obj['profiler'] = None
+    if profile_run or trace_file:
+        from src.lib.profiler import RunProfiler
+        profiler = ctx.obj['profiler'] = RunProfiler()
+        ctx.call_on_close(lambda: _display_profile(profiler, trace_file))
+
+def _get_account(ctx: click.Context) -> AWSAccount:
+    """Build the AWS account shared by a command's enforcer and cleaner."""
+    return AWSAccount(profile_name=ctx.obj['profile'],
+                      region=ctx.obj['region'],
+                      max_pool_connections=ctx.obj['max_pool_connections'],
+                      rate_limiter=RateLimiter(budgets=ctx.obj['rate_limits']),
+                      profiler=ctx.obj.get('profiler'))
+
+def _phase(ctx: click.Context, name: str) -> ContextManager[Any]:
+    """Time a phase of the command when --profile-run is on."""
+    profiler = ctx.obj.get('profiler')
+    return profiler.phase(name) if profiler else contextlib.nullcontext()
+
+def _display_profile(profiler: Any, trace_file: Optional[str] = None) -> None:
+    """Print the ranked API call breakdown to stderr; stdout may carry NDJSON."""
+    from rich.console import Console
+    from rich.table import Table
+
+    err = Console(stderr=True)
+    report = profiler.report()
+    err.print(f"\n[bold cyan]⏱️  Run profile: {report['wall_time']:.2f}s wall, "
+              f"{report['api_calls']} API calls[/bold cyan]")
+    for name, seconds in report['phases'].items():
+        err.print(f"  • {name}: {seconds:.2f}s")
+
+    if report['rows']:
+        table = Table(title="API time by region and service")
+        for column in ("Region", "Service", "Calls", "Pages", "KB", "Retries",
+                       "Throttles", "Errors", "API time"):
+            if column in ("Region", "Service"):
+                table.add_column(column, no_wrap=True)
+            else:
+                table.add_column(column, justify="right")
+        for row in report['rows']:
+            table.add_row(row['region'], row['service'], str(row['calls']),
+                          str(row['pages']), f"{row['bytes'] / 1024:.1f}",
+                          str(row['retries']), str(row['throttles']), str(row['errors']),
+                          f"{row['api_time']:.2f}s")
+        err.print(table)
+
+    if trace_file:
+        profiler.write_chrome_trace(trace_file)
+        err.print(f"[dim]📄 Chrome trace written to {trace_file}[/dim]")
+
+@contextlib.contextmanager
+def _region_progress(description: str) -> Iterator[Any]:
+    """Show an overall bar plus one bar per region, fed by a ProgressTracker."""
+    from rich.progress import (BarColumn, MofNCompleteColumn, Progress, SpinnerColumn,
+                               TextColumn)
+    from src.lib.progress import ProgressTracker, RichProgressSink
+
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TextColumn("[dim]{task.fields[stats]}"),
+        console=console,
+    ) as progress:
+        tracker = ProgressTracker(RichProgressSink(progress, description))
+        yield tracker
+        tracker.close()
+
+def _display_throttling(account: AWSAccount) -> None:
+    """Report how long the run spent waiting on API rate limits."""
+    stats = account.rate_limiter.stats()
+    if stats['throttle_events'] or stats['throttled_time'] >= 1:
+        console.print(f"\n[dim]⏱️  Rate limited for {stats['throttled_time']:.1f}s "
+                      f"({stats['throttle_events']} throttling responses)[/dim]")
+
+def _display_discovery(discovery: Optional[dict]) -> None:
+    """Report what fast discovery skipped and the API calls it saved."""
+    if not discovery:
+        return
+    console.print(f"\n[dim]🔎 Fast discovery skipped {discovery['skipped_cells']} empty "
+                  f"service scans, saving ~{discovery['api_calls_saved']} API calls "
+                  f"({discovery['requests']} inventory requests)[/dim]")
+    if discovery['unverified_cells']:
+        console.print(f"[yellow]⚠️  {len(discovery['unverified_cells'])} of them were "
+                      f"judged from tags only; untagged resources there were not "
+                      f"checked[/yellow]")
+
+def _display_region_pruning(pruning: Optional[dict]) -> None:
+    """Report which regions were scanned and which were pruned, and why."""
+    if not pruning:
+        return
+    for plan in pruning.get('accounts') or [pruning]:
+        prefix = f"{plan['account_id']}: " if plan.get('account_id') else ""
+        reasons = {}
+        for region, reason in plan['pruned'].items():
+            reasons.setdefault(reason, []).append(region)
+        console.print(f"\n[dim]🧭 {prefix}Scanned {len(plan['active'])} regions, "
+                      f"pruned {len(plan['pruned'])} "
+                      f"({plan['requests']} probe requests)[/dim]")
+        for reason, regions in reasons.items():
+            console.print(f"[dim]  • {reason}: {', '.join(regions)}[/dim]")
+        if plan['deep_sweep']:
+            console.print("[dim]  • Deep sweep: regions without recent usage were "
+                          "scanned too[/dim]")
+
+def _save_snapshot(account: AWSAccount, cache: Any, builder: Any,
+                   since: Optional[str]) -> Optional[dict]:
+    """Save this run's snapshot; with --since, also return the changes from that one."""
+    from src.lib.snapshots import SnapshotStore, compare_and_save
+
+    try:
+        return compare_and_save(SnapshotStore(), cache.resolve_account_id(account),
+                                builder, since)
+    except (OSError, ValueError) as e:
+        if since:
+            raise
+        logger.warning(f"Could not save snapshot: {e}")
+        return None
+
+def _display_changes(delta: dict) -> None:
+    """Show only the resources that changed since the --since snapshot."""
+    from rich.table import Table
+
+    counts = delta['counts']
+    label = f"Since {delta['since']}" if delta['since'] else "No earlier snapshot"
+    console.print(f"\n[bold cyan]🔀 {label}: {counts['added']} added, "
+                  f"{counts['removed']} removed, {counts['status_changed']} changed "
+                  f"status[/bold cyan]")
+    if not delta['changes']:
+        console.print("[green]✅ No changes[/green]")
+        return
+
+    table = Table(title="Changed resources")
+    table.add_column("Change", style="cyan")
+    table.add_column("Region")
+    table.add_column("Service", style="magenta")
+    table.add_column("Resource")
+    table.add_column("Status", style="green")
+    for change in delta['changes']:
+        status = change['status']
+        if 'previous_status' in change:
+            status = f"{change['previous_status']} → {status}"
+        resource = f"{change['resource_type']}: {change['resource_id']}"
+        if change.get('account_id'):
+            resource = f"{change['account_id']}/{resource}"
+        table.add_row(change['change'].replace('_', ' '), change['region'] or "",
+                      change['service'].upper(), resource, status)
+    console.print(table)
+
+def _enforcer_services() -> Optional[list]:
+    """Get every service the enforcer analyzes, if it lists them."""
+    from src.lib.aws_free import AWSFreeEnforcer
+
+    services = getattr(AWSFreeEnforcer, 'SUPPORTED_SERVICES', None)
+    return list(services) if services else None
+
+def _forecast(account: AWSAccount, cache: Any, fallback: dict) -> dict:
+    """Forecast spend from the local cost store, keeping fallback if unavailable."""
+    from src.lib.forecast import forecast_account
+
+    try:
+        return forecast_account(account, cache.resolve_account_id(account))
+    except Exception as e:
+        logger.warning(f"Cost forecast unavailable: {e}")
+        return fallback
 
 @cli.command()
 @click.pass_context
 @click.option('--services', multiple=True, help='Specific services to analyze (default: all)')
+@click.option('--scanners', type=click.Choice(['enforcer', 'registry']), default='enforcer',
+              help='registry: scan --services with the service scanner plugins where '
+                   'one is registered (default: the free tier enforcer)')
 @click.option('--all-regions', is_flag=True, help='Analyze all regions (default: current region only)')
-@click.option('--output', type=click.Choice(['table', 'json', 'summary']),
-              default='table', help='Output format')
+@click.option('--output', type=click.Choice(['table', 'json', 'summary', 'ndjson']),
+              default='table', help='Output format (ndjson streams one resource per line)')
 @click.option('--detailed', is_flag=True, help='Show detailed analysis')
 @click.option('--dry-run', is_flag=True, help='Preview changes without applying them')
-def free(ctx, services, all_regions, output, detailed, dry_run):
+@click.option('--max-workers', type=click.IntRange(min=1), default=DEFAULT_MAX_WORKERS,
+              help='Maximum concurrent scan jobs')
+@click.option('--engine', type=click.Choice(['threads', 'async']), default='threads',
+              help='async: with --scanners registry, drive scans from one event loop '
+                   '(needs aiobotocore)')
+@click.option('--max-in-flight', type=click.IntRange(min=1), default=256,
+              help='With --engine async, maximum concurrent scan jobs')
+@click.option('--max-per-region', type=click.IntRange(min=1), default=None,
+              help='Maximum concurrent scan jobs per region')
+@click.option('--max-per-service', type=click.IntRange(min=1), default=None,
+              help='Maximum concurrent scan jobs per service')
+@click.option('--cpu-workers', type=click.IntRange(min=0), default=0,
+              help='With --scanners registry, convert scanned resources in this many '
+                   'worker processes (0: in the scan threads)')
+@click.option('--usage-metrics', is_flag=True,
+              help='With --scanners registry, fill Lambda and S3 usage from CloudWatch '
+                   'metrics (closed days are cached, so reruns only fetch today)')
+@click.option('--max-age', type=click.IntRange(min=0), default=None,
+              help='Reuse cached inventory up to this many seconds old '
+                   '(default: rescan everything)')
+@click.option('--refresh', is_flag=True, help='Ignore the inventory cache and rescan')
+@click.option('--accounts', multiple=True, metavar='ID[,ID...]',
+              help='Scan these accounts by assuming --role-name in each (repeatable)')
+@click.option('--org', is_flag=True,
+              help='Scan every active account in the AWS Organization')
+@click.option('--role-name', default='OrganizationAccountAccessRole', show_default=True,
+              help='Role assumed in each member account')
+@click.option('--max-accounts', type=click.IntRange(min=1), default=4,
+              help='Maximum accounts scanned concurrently')
+@click.option('--max-total-workers', type=click.IntRange(min=1), default=None,
+              help='Maximum concurrent scan jobs across all accounts (thread engine)')
+@click.option('--discovery', type=click.Choice(['full', 'fast', 'tags']), default='full',
+              help='fast: skip services that AWS Config shows as empty; tags: also '
+                   'trust the tagging API where Config is off (misses untagged resources)')
+@click.option('--config-aggregator', default=None,
+              help='With --discovery fast or tags, count resources through this '
+                   'Config aggregator')
+@click.option('--prune-regions', is_flag=True,
+              help='With --all-regions, only scan regions with recent usage in Cost Explorer')
+@click.option('--deep-sweep-days', type=click.FloatRange(min=0), default=7,
+              show_default=True,
+              help='With --prune-regions, still scan pruned regions this often (0: never)')
+@click.option('--since', metavar='SNAPSHOT|last', default=None,
+              help='Only report resources added, removed or with a changed status since '
+                   'a snapshot (every run saves one)')
+def free(ctx: click.Context, services: Tuple[str, ...], scanners: str,
+         all_regions: bool, output: str, detailed: bool, dry_run: bool,
+         max_workers: int, engine: str, max_in_flight: int,
+         max_per_region: Optional[int], max_per_service: Optional[int],
+         cpu_workers: int, usage_metrics: bool, max_age: Optional[int],
+         refresh: bool, accounts: Tuple[str, ...], org: bool, role_name: str,
+         max_accounts: int, max_total_workers: Optional[int], discovery: str,
+         config_aggregator: Optional[str], prune_regions: bool,
+         deep_sweep_days: float, since: Optional[str]) -> None:
     """Analyze AWS account and enforce free tier limits."""
+    from src.lib.discovery import FastDiscovery
+    from src.lib.inventory_cache import InventoryCache
+    from src.lib.limit_engine import UsageTally
+    from src.lib.ndjson_output import NdjsonWriter
+    from src.lib.organization import parse_account_ids
+    from src.lib.region_probe import RegionProbe
+    from src.lib.scan_engine import ScanEngine, ScanOptions, concurrent_analysis
+    from src.lib.scanners import ScannerRegistry
+    from src.lib.snapshots import SnapshotBuilder, SnapshotStore
+
+    try:
+        account_ids = parse_account_ids(accounts)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--accounts')
+
+    if scanners == 'registry' and not services:
+        raise click.UsageError("--scanners registry needs --services")
+
+    if usage_metrics and scanners != 'registry':
+        # The enforcer's resources never reach the collector
+        raise click.UsageError("--usage-metrics needs --scanners registry")
+
+    if cpu_workers and scanners != 'registry':
+        # The enforcer builds its resources itself; only scanner pages can be shipped
+        raise click.UsageError("--cpu-workers needs --scanners registry")
+
+    if engine == 'async' and scanners != 'registry':
+        # Only registry scanners have coroutines; the enforcer would just run in threads
+        raise click.UsageError("--engine async needs --scanners registry")
+
+    if engine == 'async':
+        from src.lib.async_engine import async_available
+        if not async_available():
+            raise click.BadParameter("requires aiobotocore "
+                                     "(pip install 'aws-free-guard[async]')",
+                                     param_hint='--engine')
+
     try:
         with console.status("[bold green]Initializing AWS Free Guard...",
                            spinner="dots"):
-            account = AWSAccount(profile_name=ctx.obj['profile'],
-                               region=ctx.obj['region'])
-            enforcer = AWSFreeEnforcer(account)
+            account = _get_account(ctx)
+            cache = InventoryCache()
 
-        console.print("[bold blue]🔍 Starting comprehensive AWS analysis..."
-                      "[/bold blue]")
+        if since:
+            # An unknown snapshot should fail before the scan, not after it
+            SnapshotStore().resolve(cache.resolve_account_id(account), since)
 
-        # Perform comprehensive analysis
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console,
-        ) as progress:
-            task = progress.add_task("Analyzing AWS resources...", total=None)
+        if services:
+            services_list = list(services)
+        elif discovery != 'full' or output == 'ndjson':
+            # Per-service jobs let discovery skip empty cells and NDJSON stream
+            # each service as soon as it is scanned; without the enforcer's
+            # service list a region stays a single job
+            services_list = _enforcer_services()
+        else:
+            services_list = None
 
-            if services:
-                services_list = list(services)
-            else:
-                services_list = None
+        # Scanners only load for the services selected; the enforcer, which
+        # loads every service, is imported only if one is unregistered
+        registry = ScannerRegistry.discover() if scanners == 'registry' else None
+
+        def enforcer_factory(target: AWSAccount) -> Any:
+            from src.lib.aws_free import AWSFreeEnforcer
+            return AWSFreeEnforcer(target)
 
-            analysis_results = enforcer.comprehensive_analysis(
+        cpu_stage = None
+        if cpu_workers:
+            from src.lib.cpu_stage import CPUStage
+
+            # Shared by every account; workers start with the first scan job
+            cpu_stage = CPUStage(cpu_workers)
+            ctx.call_on_close(cpu_stage.close)
+
+        usage_collector = None
+        if usage_metrics:
+            from src.lib.usage_collector import UsageCollector
+            usage_collector = UsageCollector(cache=cache)
+
+        region_probe = None
+        if prune_regions and all_regions:
+            region_probe = RegionProbe(deep_sweep_days=deep_sweep_days)
+
+        # One engine per account; the optional semaphore caps them all together
+        slots = threading.BoundedSemaphore(max_total_workers) if max_total_workers else None
+
+        def build_engine() -> Any:
+            if engine == 'async':
+                from src.lib.async_engine import AsyncScanEngine
+                return AsyncScanEngine(max_in_flight=max_in_flight,
+                                       max_per_region=max_per_region,
+                                       max_per_service=max_per_service)
+            return ScanEngine(max_workers=max_workers,
+                              max_per_region=max_per_region,
+                              max_per_service=max_per_service,
+                              slots=slots)
+
+        snapshots = SnapshotBuilder()
+
+        def scan(target: AWSAccount, on_result: Optional[Callable[..., Any]] = None,
+                 progress: Any = None,
+                 account_id: Optional[str] = None) -> Dict[str, Any]:
+            # One tally per account: free tier allowances are account-wide
+            tally = UsageTally()
+            # Without --max-age, free always rescans but still refreshes the cache
+            options = ScanOptions(
+                engine=build_engine(),
+                dry_run=dry_run,
+                cache=cache,
+                max_age=max_age,
+                refresh=refresh or max_age is None,
+                progress=progress,
+                discovery=(FastDiscovery(config_aggregator, use_tagging=discovery == 'tags')
+                           if discovery != 'full' else None),
+                registry=registry,
+                region_probe=region_probe,
+                cpu_stage=cpu_stage,
+                usage_collector=usage_collector,
+                tally=tally
+            )
+            results = concurrent_analysis(
+                target, enforcer_factory,
                 services=services_list,
-                include_all_regions=all_regions,
-                dry_run=dry_run
+                regions=None if all_regions else [target.region],
+                options=options,
+                on_result=on_result
             )
+            # Statuses streamed mid-scan were judged on partial totals
+            snapshots.settle(tally, account_id)
+            return results
 
-            progress.update(task, completed=True)
+        def analyze(on_result: Optional[Callable[..., Any]] = None,
+                    progress: Any = None) -> Dict[str, Any]:
+            with _phase(ctx, "scan"):
+                results = scan(account, on_result, progress)
+            if not services:
+                # Cost Explorer bills per request, so targeted runs skip the forecast
+                with _phase(ctx, "forecast"):
+                    results['predictions'] = _forecast(account, cache,
+                                                       results.get('predictions') or {})
+            return results
 
-        # Display results based on output format
-        if output == 'json':
-            console.print_json(json.dumps(analysis_results, indent=2,
-                                        default=str))
-        elif output == 'summary':
-            _display_summary(analysis_results)
+        def analyze_accounts(on_result: Optional[Callable[..., Any]] = None,
+                             progress: Any = None) -> Dict[str, Any]:
+            from src.lib.organization import (merge_account_analyses, resolve_members,
+                                              scan_accounts)
+
+            def scan_member(target: AWSAccount, member: Any) -> Dict[str, Any]:
+                forward = None
+                if on_result:
+                    def forward(result: Any) -> Any:
+                        on_result(result, account_id=member.account_id)
+                return scan(target, forward, progress, member.account_id)
+
+            with _phase(ctx, "scan"):
+                members = resolve_members(account, account_ids, org, role_name)
+                return merge_account_analyses(scan_accounts(
+                    account, members, scan_member, max_accounts=max_accounts))
+
+        if account_ids or org:
+            analyze = analyze_accounts
+
+        def record(
+                on_result: Optional[Callable[..., Any]] = None) -> Callable[..., Any]:
+            # Resources are kept before on_result gets a chance to drop them
+            def both(result: Any, account_id: Optional[str] = None) -> Any:
+                snapshots.scan_result(result, account_id)
+                if on_result:
+                    on_result(result, account_id=account_id)
+            return both
+
+        if output == 'ndjson':
+            # Stream resources (or, with --since, only changes) as NDJSON
+            writer = NdjsonWriter()
+            results = analyze(on_result=record(None if since else writer.scan_result))
+            with _phase(ctx, "snapshot"):
+                delta = _save_snapshot(account, cache, snapshots, since)
+            if since:
+                for change in delta.pop('changes'):
+                    writer.write({'type': 'change', **change})
+            results['snapshot'] = delta
+            writer.summary(results)
+            return
+
+        console.print("[bold blue]🔍 Starting comprehensive AWS analysis..."
+                      "[/bold blue]")
+
+        # Perform comprehensive analysis
+        with _region_progress("Analyzing AWS resources") as tracker:
+            analysis_results = analyze(on_result=record(), progress=tracker)
+        with _phase(ctx, "snapshot"):
+            delta = _save_snapshot(account, cache, snapshots, since)
+
+        if since:
+            # Only the delta is rendered, however large the account
+            if output == 'json':
+                console.print_json(json.dumps({
+                    **delta,
+                    'risk_assessment': analysis_results.get('risk_assessment', {}),
+                    'scan_errors': analysis_results.get('scan_errors', []),
+                }, indent=2, default=str))
+            else:
+                _display_changes(delta)
         else:
-            _display_detailed_table(analysis_results, detailed)
+            analysis_results['snapshot'] = delta
+            if analysis_results.get('accounts') and output != 'json':
+                _display_accounts(analysis_results['accounts'])
+
+            # Display results based on output format
+            if output == 'json':
+                console.print_json(json.dumps(analysis_results, indent=2,
+                                            default=str))
+            elif output == 'summary':
+                _display_summary(analysis_results)
+            else:
+                _display_detailed_table(analysis_results, detailed)
 
-        # Show recommendations
-        if analysis_results.get('recommendations'):
-            console.print("\n[bold yellow]💡 Recommendations:[/bold yellow]")
-            for rec in analysis_results['recommendations']:
-                console.print(f"  • {rec}")
+            # Show recommendations
+            if analysis_results.get('recommendations'):
+                console.print("\n[bold yellow]💡 Recommendations:[/bold yellow]")
+                for rec in analysis_results['recommendations']:
+                    console.print(f"  • {rec}")
 
         # Risk assessment
         risk = analysis_results.get('risk_assessment', {})
@@ -106,6 +555,19 @@ def free(ctx, services, all_regions, output, detailed, dry_run):
             console.print(f"\n[bold magenta]🔮 Predicted Next Month: "
                          f"${predictions['next_month_prediction']:.2f}"
                          f"[/bold magenta]")
+        if predictions.get('end_of_month_prediction', 0) > 0:
+            console.print(f"[magenta]📅 Projected end of month: "
+                          f"${predictions['end_of_month_prediction']:.2f}[/magenta]")
+        today = time.strftime('%Y-%m-%d')
+        for service, forecast in predictions.get('services', {}).items():
+            first_charge_on = forecast.get('first_charge_on')
+            if first_charge_on and first_charge_on > today:
+                console.print(f"[yellow]⏳ {service}: charges projected to start "
+                              f"on {first_charge_on}[/yellow]")
+
+        _display_discovery(analysis_results.get('discovery'))
+        _display_region_pruning(analysis_results.get('region_pruning'))
+        _display_throttling(account)
 
     except Exception as e:
         console.print(f"[bold red]❌ Error: {str(e)}[/bold red]")
@@ -121,45 +583,128 @@ def free(ctx, services, all_regions, output, detailed, dry_run):
               help='Show what would be cleaned without actually doing it')
 @click.option('--force', is_flag=True, help='Skip confirmation prompts')
 @click.option('--confirm', is_flag=True, help='Automatically confirm the operation')
-def clean(ctx, services, all_regions, dry_run, force, confirm):
+@click.option('--output', type=click.Choice(['table', 'ndjson']),
+              default='table', help='Output format (ndjson emits one cleaned resource per line)')
+@click.option('--max-workers', type=click.IntRange(min=1), default=DEFAULT_DELETE_WORKERS,
+              help='Maximum concurrent deletions')
+@click.option('--network', is_flag=True,
+              help='Also tear down every non-default VPC stack, instances included, '
+                   'whether or not it is in use')
+@click.option('--empty-bucket', multiple=True, metavar='BUCKET',
+              help='Delete every object version in this bucket first, so it can be '
+                   'cleaned (repeatable)')
+@click.option('--empty-repository', multiple=True, metavar='REPOSITORY',
+              help='Delete every image in this ECR repository first (repeatable)')
+def clean(ctx: click.Context, services: Tuple[str, ...], all_regions: bool,
+          dry_run: bool, force: bool, confirm: bool, output: str,
+          max_workers: int, network: bool, empty_bucket: Tuple[str, ...],
+          empty_repository: Tuple[str, ...]) -> None:
     """Clean AWS account by removing unused resources."""
+    from collections import Counter
+
+    from rich.prompt import Confirm
+    from src.lib.aws_clean import AWSCleaner
+    from src.lib.bulk_delete import empty_containers
+    from src.lib.deletion_planner import (DeletionPlan, build_plan, describe_plan,
+                                          merge_clean_results, plan_applies)
+    from src.lib.ndjson_output import NdjsonWriter
+    from src.lib.scan_engine import list_regions
+
+    if network and not plan_applies(list(services)):
+        raise click.UsageError("--network needs --services ec2 or vpc (or all services)")
+
+
     try:
         with console.status("[bold green]Initializing AWS Cleaner...",
                            spinner="dots"):
-            account = AWSAccount(profile_name=ctx.obj['profile'],
-                               region=ctx.obj['region'])
+            account = _get_account(ctx)
             cleaner = AWSCleaner(account)
 
         if not force and not dry_run and not confirm:
+            prompt_console = console
+            if output == 'ndjson':
+                # Keep the prompt out of the NDJSON stream on stdout
+                from rich.console import Console
+                prompt_console = Console(stderr=True)
             if not Confirm.ask("⚠️  This will delete resources from your AWS "
-                              "account. Continue?"):
-                console.print("[yellow]Operation cancelled.[/yellow]")
+                              "account. Continue?", console=prompt_console):
+                prompt_console.print("[yellow]Operation cancelled.[/yellow]")
                 return
 
-        console.print("[bold red]🧹 Starting AWS account cleanup...[/bold red]")
+        if services:
+            services_list = list(services)
+        else:
+            services_list = None
 
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console,
-        ) as progress:
-            task = progress.add_task("Cleaning AWS resources...", total=None)
+        def run_clean(on_deleted: Optional[Callable[[Any], None]] = None,
+                      progress: Any = None) -> Dict[str, Any]:
+            # With --network the VPC stacks go first as a dependency-ordered
+            # parallel plan; the cleaner then handles the unused resources
+            plan = DeletionPlan()
+            with _phase(ctx, "plan"):
+                if network:
+                    regions = list_regions(account) if all_regions else [account.region]
+                    plan = build_plan(account, regions, max_workers=max_workers)
+            on_finished = None
+            if progress is not None:
+                # A dry run deletes nothing, so only the overall bar is shown
+                progress.start({} if dry_run else
+                               Counter(node.region for node in plan.nodes.values()))
 
-            if services:
-                services_list = list(services)
+                def on_finished(node: Any, error: Optional[str]) -> None:
+                    progress.advance(node.region, resources=0 if error else 1,
+                                     error=bool(error))
+            if dry_run:
+                plan_results = {'cleaned_resources': [
+                    node.to_dict() for level in plan.levels() for node in level
+                ]}
             else:
-                services_list = None
+                with _phase(ctx, "delete"):
+                    plan_results = plan.execute(max_workers=max_workers,
+                                                on_deleted=on_deleted,
+                                                on_finished=on_finished)
+            # Non-empty buckets and repositories cannot be deleted, so the
+            # requested ones are emptied in batches before the cleaner runs
+            with _phase(ctx, "empty"):
+                bulk_results = empty_containers(account, empty_bucket, empty_repository,
+                                                max_workers=max_workers, dry_run=dry_run)
+            with _phase(ctx, "clean"):
+                cleaner_results = cleaner.comprehensive_clean(
+                    services=services_list,
+                    include_all_regions=all_regions,
+                    dry_run=dry_run
+                )
+            results = merge_clean_results(plan_results, cleaner_results)
+            results['deletion_plan'] = describe_plan(plan)
+            results['bulk_deletions'] = [result.to_dict() for result in bulk_results]
+            return results
 
-            clean_results = cleaner.comprehensive_clean(
-                services=services_list,
-                include_all_regions=all_regions,
-                dry_run=dry_run
-            )
+        if output == 'ndjson':
+            writer = NdjsonWriter()
+            written = set()
 
-            progress.update(task, completed=True)
+            def on_deleted(node: Any) -> None:
+                written.add(node.resource_id)
+                writer.resource(node, record_type='cleaned')
+
+            clean_results = run_clean(on_deleted=on_deleted)
+            writer.resources([resource for resource in clean_results['cleaned_resources']
+                              if resource.get('resource_id') not in written],
+                             record_type='cleaned')
+            writer.summary({**clean_results, 'dry_run': dry_run,
+                            'throttling': account.rate_limiter.stats()})
+            return
+
+        console.print("[bold red]🧹 Starting AWS account cleanup...[/bold red]")
+
+        with _region_progress("Cleaning AWS resources") as tracker:
+            clean_results = run_clean(progress=tracker)
 
         # Display clean results
+        if dry_run:
+            _display_deletion_plan(clean_results['deletion_plan'])
         _display_clean_results(clean_results, dry_run)
+        _display_throttling(account)
 
     except Exception as e:
         console.print(f"[bold red]❌ Error: {str(e)}[/bold red]")
@@ -167,27 +712,38 @@ def clean(ctx, services, all_regions, dry_run, force, confirm):
 
 @cli.command()
 @click.pass_context
-@click.option('--days', default=30, help='Number of days to analyze')
+@click.option('--days', type=click.IntRange(1, 365), default=30,
+              help='Number of days to analyze (up to 365)')
 @click.option('--output', type=click.Choice(['table', 'json']),
               default='table', help='Output format')
-def cost(ctx, days, output):
+@click.option('--refresh', is_flag=True,
+              help='Refetch the whole window from Cost Explorer')
+def cost(ctx: click.Context, days: int, output: str, refresh: bool) -> None:
     """Analyze AWS costs and usage patterns."""
+    from src.lib.cost_store import CostStore, analyze_costs
+    from src.lib.inventory_cache import InventoryCache
+
     try:
         with console.status("[bold green]Initializing cost analyzer...",
                            spinner="dots"):
-            account = AWSAccount(profile_name=ctx.obj['profile'],
-                               region=ctx.obj['region'])
-            enforcer = AWSFreeEnforcer(account)
+            account = _get_account(ctx)
+            account_id = InventoryCache().resolve_account_id(account)
 
         console.print(f"[bold cyan]💰 Analyzing costs for the last {days} days..."
                       "[/bold cyan]")
 
-        cost_analysis = enforcer.cost_analyzer.analyze_costs()
+        # Only days missing from the local cost store are fetched
+        cost_analysis = analyze_costs(account, days, CostStore(),
+                                      account_id=account_id, refresh=refresh)
 
         if output == 'json':
             console.print_json(json.dumps(cost_analysis, indent=2, default=str))
         else:
             _display_cost_analysis(cost_analysis)
+            sync = cost_analysis['sync']
+            console.print(f"[dim]📦 {sync['days_fetched']} days fetched from Cost Explorer "
+                          f"({sync['requests']} requests), the rest from the local "
+                          f"cost store[/dim]")
 
     except Exception as e:
         console.print(f"[bold red]❌ Error: {str(e)}[/bold red]")
@@ -195,23 +751,34 @@ def cost(ctx, days, output):
 
 @cli.command()
 @click.pass_context
-def status(ctx):
+@click.option('--max-age', type=click.IntRange(min=0), default=None,
+              help='Maximum age in seconds of cached inventory '
+                   '(default: per-service TTLs)')
+@click.option('--refresh', is_flag=True, help='Ignore the inventory cache and rescan')
+def status(ctx: click.Context, max_age: Optional[int], refresh: bool) -> None:
     """Show current AWS account status and health."""
+    from src.lib.aws_free import AWSFreeEnforcer
+    from src.lib.inventory_cache import InventoryCache
+    from src.lib.scan_engine import ScanOptions, concurrent_analysis
+
     try:
         with console.status("[bold green]Checking AWS account status...",
                            spinner="dots"):
-            account = AWSAccount(profile_name=ctx.obj['profile'],
-                               region=ctx.obj['region'])
-            account_id = account.get_account_id()
+            account = _get_account(ctx)
+            cache = InventoryCache()
+            account_id = cache.resolve_account_id(account)
 
         console.print(f"[bold green]✅ AWS Account: {account_id}[/bold green]")
         console.print(f"[bold blue]📍 Region: {account.region}[/bold blue]")
         console.print(f"[bold cyan]🔧 Profile: {ctx.obj['profile'] or 'default'}"
                       "[/bold cyan]")
 
-        # Quick resource count
-        enforcer = AWSFreeEnforcer(account)
-        analysis = enforcer.comprehensive_analysis(include_all_regions=False)
+        # Quick resource count, answered from the inventory cache when fresh
+        analysis = concurrent_analysis(
+            account, AWSFreeEnforcer,
+            regions=[account.region],
+            options=ScanOptions(cache=cache, max_age=max_age, refresh=refresh)
+        )
 
         total_resources = analysis.get('total_resources_found', 0)
         risk_level = analysis.get('risk_assessment', {}).get('overall_risk',
@@ -221,6 +788,12 @@ def status(ctx):
                       "[/bold magenta]")
         console.print(f"[bold yellow]⚠️  Risk Level: {risk_level}[/bold yellow]")
 
+        cached_at = analysis.get('scan_stats', {}).get('oldest_cached_at')
+        if cached_at:
+            age = int(time.time() - cached_at)
+            console.print(f"[dim]📦 From cache ({age}s old, use --refresh to rescan)"
+                          "[/dim]")
+
     except Exception as e:
         console.print(f"[bold red]❌ Error: {str(e)}[/bold red]")
         raise click.Abort()
@@ -229,24 +802,163 @@ def status(ctx):
 @click.pass_context
 @click.option('--backup-dir', default='./aws-backup', help='Directory to store backup')
 @click.option('--services', multiple=True, help='Specific services to backup (default: all)')
-def backup(ctx, backup_dir, services):
+@click.option('--all-regions', is_flag=True,
+              help='Back up all regions (default: current region only)')
+@click.option('--max-workers', type=click.IntRange(min=1), default=DEFAULT_MAX_WORKERS,
+              help='Maximum concurrent backup jobs')
+def backup(ctx: click.Context, backup_dir: str, services: Tuple[str, ...],
+           all_regions: bool, max_workers: int) -> None:
     """Create backup of AWS resources configuration."""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from src.lib.backup import run_backup
+    from src.lib.inventory_cache import InventoryCache
+    from src.lib.scan_engine import ScanEngine, list_regions
+
     try:
         with console.status("[bold green]Initializing backup...", spinner="dots"):
-            account = AWSAccount(profile_name=ctx.obj['profile'], region=ctx.obj['region'])
-            _enforcer = AWSFreeEnforcer(account)
+            account = _get_account(ctx)
+            account_id = InventoryCache().resolve_account_id(account)
+            regions = list_regions(account) if all_regions else [account.region]
 
         console.print(f"[bold blue]💾 Creating backup in {backup_dir}...[/bold blue]")
 
-        # This would implement actual backup functionality
-        console.print("[green]✅ Backup completed (placeholder)[/green]")
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=console,
+        ) as progress:
+            task = progress.add_task("Backing up resource configurations...", total=None)
+
+            manifest = run_backup(account, backup_dir, regions,
+                                  services=list(services) or None,
+                                  engine=ScanEngine(max_workers=max_workers),
+                                  account_id=account_id)
+
+            progress.update(task, completed=True)
+
+        console.print(f"[green]✅ Backed up {manifest['resources']} resources "
+                      f"({manifest['written']} new or changed, "
+                      f"{manifest['unchanged']} unchanged) in "
+                      f"{manifest['execution_time']:.1f}s[/green]")
+        console.print(f"[dim]📄 Manifest: {manifest['manifest_path']}[/dim]")
+        for error in manifest['errors']:
+            console.print(f"[yellow]⚠️  {error['service']} in {error['region']}: "
+                          f"{error['error']}[/yellow]")
+        _display_throttling(account)
 
     except Exception as e:
         console.print(f"[bold red]❌ Error: {str(e)}[/bold red]")
         raise click.Abort()
 
-def _display_summary(analysis_results: dict):
+@cli.command()
+@click.pass_context
+@click.option('--services', multiple=True, help='Specific services to watch (default: all)')
+@click.option('--all-regions', is_flag=True,
+              help='Watch all regions (default: current region only)')
+@click.option('--feed', type=click.Choice(['cloudtrail', 'sqs', 'file']),
+              default='cloudtrail', help='Where change events come from')
+@click.option('--queue-url', default=None,
+              help='SQS queue receiving EventBridge events (--feed sqs)')
+@click.option('--feed-file', default=None, type=click.Path(dir_okay=False),
+              help='NDJSON file of EventBridge events to tail (--feed file)')
+@click.option('--interval', type=click.FloatRange(min=0.1), default=10.0,
+              help='Seconds between change feed polls')
+@click.option('--output', type=click.Choice(['table', 'ndjson']),
+              default='table', help='Output format (ndjson emits one line per event)')
+def watch(ctx: click.Context, services: Tuple[str, ...], all_regions: bool, feed: str,
+          queue_url: Optional[str], feed_file: Optional[str], interval: float,
+          output: str) -> None:
+    """Watch the account and report risk changes as they happen."""
+    from src.lib.aws_free import AWSFreeEnforcer
+    from src.lib.change_feed import CloudTrailFeed, FileFeed, SqsFeed
+    from src.lib.inventory_cache import InventoryCache
+    from src.lib.ndjson_output import NdjsonWriter
+    from src.lib.scan_engine import list_regions
+    from src.lib.watch import Watcher
+
+    if feed == 'sqs' and not queue_url:
+        raise click.BadParameter("--queue-url is required", param_hint='--feed sqs')
+    if feed == 'file' and not feed_file:
+        raise click.BadParameter("--feed-file is required", param_hint='--feed file')
+
+    watcher = None
+    try:
+        account = _get_account(ctx)
+        regions = list_regions(account) if all_regions else [account.region]
+        if feed == 'sqs':
+            change_feed = SqsFeed(account, queue_url)
+        elif feed == 'file':
+            change_feed = FileFeed(feed_file)
+        else:
+            change_feed = CloudTrailFeed(account, regions)
+
+        writer = NdjsonWriter() if output == 'ndjson' else None
+
+        def on_update(update: Dict[str, Any]) -> None:
+            if writer:
+                writer.write({'type': 'rescan', **update})
+            else:
+                cells = ', '.join(f"{c['service']}@{c['region']}" for c in update['rescanned'])
+                console.print(f"[dim]🔄 {update['events']} changes, rescanned {cells}[/dim]")
+
+        def on_transition(transition: Dict[str, Any]) -> None:
+            if writer:
+                writer.write({'type': 'risk_transition', **transition})
+            else:
+                console.print(f"[bold yellow]🚦 Risk {transition['from']} → "
+                              f"{transition['to']}: "
+                              f"{', '.join(transition['risk_factors']) or 'no risk factors'}"
+                              f"[/bold yellow]")
+
+        watcher = Watcher(account, AWSFreeEnforcer, regions, change_feed,
+                          services=list(services) or None, cache=InventoryCache(),
+                          on_update=on_update, on_transition=on_transition)
+
+        if writer is None:
+            with console.status("[bold green]Running baseline scan...", spinner="dots"):
+                watcher.baseline()
+            console.print(f"[bold blue]👀 Watching {len(regions)} region(s) via {feed}; "
+                          f"risk is {watcher.risk} (Ctrl-C to stop)[/bold blue]")
+        else:
+            watcher.baseline()
+            writer.write({'type': 'baseline', 'risk': watcher.risk,
+                          'total_resources_found':
+                              watcher.analysis.get('total_resources_found', 0)})
+
+        watcher.run(interval)
+
+    except KeyboardInterrupt:
+        if watcher is not None and output != 'ndjson':
+            console.print(f"\n[dim]Stopped after {watcher.stats['polls']} polls, "
+                          f"{watcher.stats['events']} changes, "
+                          f"{watcher.stats['rescans']} cell scans[/dim]")
+    except Exception as e:
+        console.print(f"[bold red]❌ Error: {str(e)}[/bold red]")
+        raise click.Abort()
+
+def _display_accounts(accounts: list) -> None:
+    """Display the per-account breakdown of an organization-wide scan."""
+    from rich.table import Table
+
+    table = Table(title="Accounts Scanned")
+    table.add_column("Account", style="cyan")
+    table.add_column("Name")
+    table.add_column("Resources", style="magenta", justify="right")
+    table.add_column("Monthly Cost", justify="right")
+    table.add_column("Risk")
+
+    for item in accounts:
+        risk = "❌ " + item['error'] if item.get('error') else item['overall_risk']
+        table.add_row(item['account_id'], item.get('name', ""),
+                      str(item['total_resources_found']),
+                      f"${item['total_monthly_cost']:.2f}", risk)
+
+    console.print(table)
+
+def _display_summary(analysis_results: dict) -> None:
     """Display summary of analysis results."""
+    from rich.table import Table
+
     total_resources = analysis_results.get('total_resources_found', 0)
     regions = len(analysis_results.get('regions_analyzed', []))
     cost = analysis_results.get('cost_analysis', {}).get('total_monthly_cost', 0)
@@ -263,15 +975,20 @@ def _display_summary(analysis_results: dict):
 
     console.print(summary_table)
 
-def _display_detailed_table(analysis_results: dict, detailed: bool = False):
+def _display_detailed_table(analysis_results: dict, detailed: bool = False) -> None:
     """Display detailed analysis results in table format."""
+    from rich.table import Table
+
     regions = analysis_results.get('regions_analyzed', [])
 
     for region_data in regions:
         region_name = region_data.get('region', 'unknown')
         services = region_data.get('services', {})
 
-        region_table = Table(title=f"AWS Resources in {region_name}")
+        title = f"AWS Resources in {region_name}"
+        if region_data.get('account_id'):
+            title += f" ({region_data['account_id']})"
+        region_table = Table(title=title)
         region_table.add_column("Service", style="cyan")
         region_table.add_column("Resources", style="magenta", justify="right")
         region_table.add_column("Status", style="green")
@@ -288,7 +1005,7 @@ def _display_detailed_table(analysis_results: dict, detailed: bool = False):
                         status = resource.get('status', 'unknown')
                     else:
                         status = getattr(resource, 'status', 'unknown')
-                    if status == 'ResourceStatus.CHARGED' or (hasattr(status, 'value') and status.value == 'charged'):
+                    if status in ('charged', 'ResourceStatus.CHARGED') or (hasattr(status, 'value') and status.value == 'charged'):
                         charged_count += 1
             
             status = "✅ OK" if charged_count == 0 else "⚠️  Check"
@@ -322,8 +1039,10 @@ def _display_detailed_table(analysis_results: dict, detailed: bool = False):
                 for rec in recommendations:
                     console.print(f"  • {rec}")
 
-def _display_clean_results(clean_results: dict, dry_run: bool):
+def _display_clean_results(clean_results: dict, dry_run: bool) -> None:
     """Display cleanup results."""
+    from rich.table import Table
+
     if dry_run:
         console.print("[bold yellow]🔍 DRY RUN - No resources were actually deleted[/bold yellow]")
     else:
@@ -348,12 +1067,55 @@ def _display_clean_results(clean_results: dict, dry_run: bool):
     else:
         console.print("[green]✨ No resources needed cleaning[/green]")
 
-def _display_cost_analysis(cost_analysis: dict):
+    failed_resources = clean_results.get('failed_resources', [])
+    if failed_resources:
+        console.print(f"[bold yellow]⚠️  {len(failed_resources)} resources could not "
+                      f"be deleted; their dependents were skipped[/bold yellow]")
+
+    for bulk in clean_results.get('bulk_deletions', []):
+        verb = "Would delete" if dry_run else "Deleted"
+        console.print(f"[dim]📦 {bulk['operation']}: {verb} {bulk['deleted']} items in "
+                      f"{bulk['requests']} requests ({bulk['execution_time']:.1f}s)[/dim]")
+        if bulk['failed']:
+            console.print(f"[yellow]⚠️  {bulk['failed']} items could not be deleted, "
+                          f"e.g. {bulk['errors'][0]}[/yellow]")
+
+def _display_deletion_plan(deletion_plan: dict) -> None:
+    """Display the planned deletion DAG and its critical path."""
+    from rich.table import Table
+
+    if not deletion_plan.get('resources'):
+        return
+
+    plan_table = Table(title="Deletion Plan")
+    plan_table.add_column("Level", style="cyan", justify="right")
+    plan_table.add_column("Resource ID", style="magenta")
+    plan_table.add_column("Type", style="yellow")
+    plan_table.add_column("Region", style="blue")
+    plan_table.add_column("After", style="dim")
+
+    for index, level in enumerate(deletion_plan['levels'], start=1):
+        for node in level:
+            plan_table.add_row(str(index), node['resource_id'], node['resource_type'],
+                               node['region'], ', '.join(node['depends_on']))
+
+    console.print(plan_table)
+    console.print(f"[bold cyan]⏱️  Estimated critical path: "
+                  f"{deletion_plan['critical_path_seconds']:.0f}s "
+                  f"({' → '.join(deletion_plan['critical_path'])})[/bold cyan]")
+
+def _display_cost_analysis(cost_analysis: dict) -> None:
     """Display cost analysis results."""
+    from rich.table import Table
+
     total_cost = cost_analysis.get('total_monthly_cost', 0)
     service_breakdown = cost_analysis.get('service_breakdown', {})
 
     console.print(f"[bold cyan]💰 Total Monthly Cost: ${total_cost:.2f}[/bold cyan]")
+    period = cost_analysis.get('period')
+    if period:
+        console.print(f"[cyan]Total for the last {period['days']} days: "
+                      f"${cost_analysis.get('total_cost', 0):.2f}[/cyan]")
 
     if service_breakdown:
         cost_table = Table(title="Cost Breakdown by Service")
@@ -1,15 +1,14 @@
 """Main entry point for AWS Free Guard CLI."""
 
 import os
-from pathlib import Path
 
 from src.cli.commands import cli
 
 
-def load_env_file():
+def load_env_file() -> None:
     """Load environment variables from .env file."""
-    env_path = Path(__file__).parent.parent.parent / ".env"
-    if env_path.exists():
+    env_path = os.path.join(os.path.dirname(__file__), "..", "..", ".env")
+    if os.path.exists(env_path):
         with open(env_path, 'r') as f:
             for line in f:
                 line = line.strip()
@@ -18,7 +17,7 @@ def load_env_file():
                     os.environ[key] = value
 
 
-def main():
+def main() -> None:
     """Main entry point."""
     # Load environment variables from .env file if it exists
     load_env_file()
@@ -0,0 +1 @@
+# Core business logic for AWS Free Guard
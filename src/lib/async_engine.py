@@ -0,0 +1,306 @@
+"""Asyncio scan engine: one event loop drives every in-flight request.
+
+Requires the optional aiobotocore dependency (``pip install
+aws-free-guard[async]``) for scanners with an ``analyze_async`` function;
+other scans run in worker threads so the result shape is the same either
+way.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+from typing import (Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List,
+                    Optional, Tuple)
+
+from src.lib.rate_limiter import backoff_delay, is_throttling_error
+from src.lib.scan_engine import DEFAULT_THROTTLE_RETRIES, ScanJob, ScanResult
+from src.models.aws_account import AWSAccount
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_IN_FLIGHT = 256
+
+# Finished jobs waiting for on_result; scans pause when it is full
+DEFAULT_RESULT_QUEUE = 64
+
+# Pages fetched ahead of the one being processed
+DEFAULT_PAGE_PREFETCH = 2
+
+_DONE = object()
+
+
+def async_available() -> bool:
+    """Check whether aiobotocore is installed."""
+    import importlib.util
+
+    return importlib.util.find_spec("aiobotocore") is not None
+
+
+async def pages(client: Any, operation: str, prefetch: int = DEFAULT_PAGE_PREFETCH,
+                **params: Any) -> AsyncIterator[Dict[str, Any]]:
+    """Yield an operation's pages while the next ones are already being fetched.
+
+    A background task runs the paginator into a bounded queue, so the
+    request for page n+1 is in flight while page n is processed, and the
+    fetcher stops when the consumer falls prefetch pages behind.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=prefetch)
+
+    async def fetch() -> None:
+        try:
+            async for page in client.get_paginator(operation).paginate(**params):
+                await queue.put(page)
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(_DONE)
+
+    fetcher = asyncio.ensure_future(fetch())
+    try:
+        while True:
+            page = await queue.get()
+            if page is _DONE:
+                return
+            if isinstance(page, Exception):
+                raise page
+            yield page
+    finally:
+        fetcher.cancel()
+
+
+class _AsyncCredentialProvider:
+    """aiobotocore credential provider backed by the account's botocore credentials.
+
+    Refreshable credentials (e.g. an assumed role) stay refreshable: each
+    refresh freezes the botocore credentials in a worker thread, which
+    renews them with a blocking STS call when they are about to expire.
+    """
+
+    METHOD = "aws-free-guard"
+    CANONICAL_NAME = "aws-free-guard"
+
+    def __init__(self, credentials: Any):
+        self.credentials = credentials
+
+    async def load(self) -> Any:
+        from aiobotocore.credentials import (AioCredentials,
+                                             AioDeferredRefreshableCredentials)
+        from botocore.credentials import RefreshableCredentials
+
+        if not isinstance(self.credentials, RefreshableCredentials):
+            frozen = self.credentials.get_frozen_credentials()
+            return AioCredentials(frozen.access_key, frozen.secret_key, frozen.token,
+                                  method=self.METHOD)
+
+        async def refresh() -> Dict[str, Any]:
+            frozen = await asyncio.get_running_loop().run_in_executor(
+                None, self.credentials.get_frozen_credentials)
+            # botocore keeps the expiry it refreshed to, but does not expose it
+            expiry = self.credentials._expiry_time
+            return {'access_key': frozen.access_key, 'secret_key': frozen.secret_key,
+                    'token': frozen.token, 'expiry_time': expiry.isoformat()}
+
+        return AioDeferredRefreshableCredentials(refresh_using=refresh,
+                                                 method=self.METHOD)
+
+
+class AsyncClientPool:
+    """aiobotocore clients keyed by (service, region), open for one event loop.
+
+    Use as ``async with pool:``; clients are created on first use and
+    closed when the block exits. The account's rate limiter and profiler
+    are attached to the session like they are for boto3.
+    """
+
+    def __init__(self, account: AWSAccount):
+        self.account = account
+        self.clients_created = 0
+        self.clients_reused = 0
+        self._session = None
+        self._clients: Dict[Tuple[str, str], Any] = {}
+        self._stack: Optional[AsyncExitStack] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def __aenter__(self) -> "AsyncClientPool":
+        self._stack = AsyncExitStack()
+        self._lock = asyncio.Lock()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        stack, self._stack = self._stack, None
+        self._clients.clear()
+        if stack is not None:
+            await stack.aclose()
+
+    async def _get_session(self) -> Any:
+        """Build the aiobotocore session on first use."""
+        if self._session is None:
+            from aiobotocore.session import AioSession
+            from src.models.aws_account import _get_shared_loader
+
+            session = AioSession(profile=self.account.profile_name)
+            session.register_component('data_loader', _get_shared_loader())
+            if self.account.credentials is not None:
+                # Like ClientPool: the account's credentials, still refreshable
+                from aiobotocore.credentials import AioCredentialResolver
+                session.register_component('credential_provider', AioCredentialResolver(
+                    [_AsyncCredentialProvider(self.account.credentials)]))
+            if self.account.rate_limiter is not None:
+                self.account.rate_limiter.attach_async(session)
+            if self.account.profiler is not None:
+                self.account.profiler.attach(session)
+            self._session = session
+        return self._session
+
+    async def client(self, service: str, region: Optional[str] = None) -> Any:
+        """Get the shared client for (service, region), creating it on first use."""
+        if self._stack is None:
+            raise RuntimeError("AsyncClientPool must be entered with 'async with'")
+        key = (service, region or self.account.region)
+        async with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.clients_reused += 1
+                return client
+
+            from aiobotocore.config import AioConfig
+
+            session = await self._get_session()
+            config = AioConfig(max_pool_connections=self.account.max_pool_connections)
+            client = await self._stack.enter_async_context(session.create_client(
+                service, region_name=key[1], config=config))
+            self._clients[key] = client
+            self.clients_created += 1
+            return client
+
+    def stats(self) -> Dict[str, int]:
+        """Get client creation and reuse counters."""
+        return {'clients_created': self.clients_created,
+                'clients_reused': self.clients_reused}
+
+
+class AsyncScanEngine:
+    """Runs scan coroutines on one event loop under the same caps as ScanEngine.
+
+    Finished jobs pass through a bounded queue to a single consumer that
+    calls on_result, in a worker thread so slow output never blocks the
+    loop. A job keeps its in-flight slot until its result is queued, so
+    when result processing falls behind, no new requests start.
+    """
+
+    asynchronous = True
+
+    def __init__(self, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 max_per_region: Optional[int] = None,
+                 max_per_service: Optional[int] = None,
+                 throttle_retries: int = DEFAULT_THROTTLE_RETRIES,
+                 result_queue_size: int = DEFAULT_RESULT_QUEUE):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        if max_per_region is not None and max_per_region < 1:
+            raise ValueError("max_per_region must be at least 1")
+        if max_per_service is not None and max_per_service < 1:
+            raise ValueError("max_per_service must be at least 1")
+        if result_queue_size < 1:
+            raise ValueError("result_queue_size must be at least 1")
+
+        self.max_in_flight = max_in_flight
+        self.max_per_region = max_per_region
+        self.max_per_service = max_per_service
+        self.throttle_retries = throttle_retries
+        self.result_queue_size = result_queue_size
+
+    @property
+    def max_workers(self) -> int:
+        """Concurrency cap, under the name scan_stats reports for ScanEngine."""
+        return self.max_in_flight
+
+    def run(self, jobs: Iterable[ScanJob],
+            scan_fn: Callable[[ScanJob], Awaitable[Dict[str, Any]]],
+            on_result: Optional[Callable[[ScanResult], None]] = None,
+            clients: Optional[AsyncClientPool] = None) -> List[ScanResult]:
+        """Run all jobs on a new event loop and return results in submission order."""
+        return asyncio.run(self.run_async(jobs, scan_fn, on_result, clients))
+
+    async def run_async(self, jobs: Iterable[ScanJob],
+                        scan_fn: Callable[[ScanJob], Awaitable[Dict[str, Any]]],
+                        on_result: Optional[Callable[[ScanResult], None]] = None,
+                        clients: Optional[AsyncClientPool] = None) -> List[ScanResult]:
+        """Run all jobs on the running loop; clients is opened for the duration."""
+        jobs = list(jobs)
+        order = {job: index for index, job in enumerate(jobs)}
+        results: Dict[ScanJob, ScanResult] = {}
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        region_slots: Dict[str, asyncio.Semaphore] = {}
+        service_slots: Dict[Optional[str], asyncio.Semaphore] = {}
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.result_queue_size)
+
+        def slots(job: ScanJob) -> List[asyncio.Semaphore]:
+            # The global slot comes last, so a job waiting on its region or
+            # service cap does not hold it
+            held = []
+            if self.max_per_region is not None:
+                held.append(region_slots.setdefault(
+                    job.region, asyncio.Semaphore(self.max_per_region)))
+            if self.max_per_service is not None and job.service is not None:
+                held.append(service_slots.setdefault(
+                    job.service, asyncio.Semaphore(self.max_per_service)))
+            held.append(in_flight)
+            return held
+
+        async def attempt(job: ScanJob) -> ScanResult:
+            started = time.perf_counter()
+            retries = 0
+            while True:
+                try:
+                    analysis = await scan_fn(job)
+                    return ScanResult(job, analysis or {}, time.perf_counter() - started,
+                                      retries=retries)
+                except Exception as e:
+                    # Jobs still throttled after botocore's retries get rescheduled
+                    if is_throttling_error(e) and retries < self.throttle_retries:
+                        retries += 1
+                        await asyncio.sleep(backoff_delay(retries))
+                        continue
+                    logger.warning(f"Scan of {job.service or 'all services'} in "
+                                   f"{job.region} failed: {e}")
+                    return ScanResult(job, {}, time.perf_counter() - started,
+                                      error=str(e), retries=retries)
+
+        async def execute(job: ScanJob) -> None:
+            async with AsyncExitStack() as held:
+                for slot in slots(job):
+                    await held.enter_async_context(slot)
+                await queue.put(await attempt(job))
+
+        callback_errors: List[Exception] = []
+
+        async def consume() -> None:
+            loop = asyncio.get_running_loop()
+            while True:
+                result = await queue.get()
+                if result is _DONE:
+                    return
+                results[result.job] = result
+                if on_result and not callback_errors:
+                    try:
+                        await loop.run_in_executor(None, on_result, result)
+                    except Exception as e:
+                        # Keep draining so no scan blocks on a full queue
+                        callback_errors.append(e)
+
+        async with AsyncExitStack() as stack:
+            if clients is not None:
+                await stack.enter_async_context(clients)
+            consumer = asyncio.ensure_future(consume())
+            try:
+                await asyncio.gather(*(execute(job) for job in jobs))
+                await queue.put(_DONE)
+                await consumer
+            finally:
+                consumer.cancel()
+
+        if callback_errors:
+            raise callback_errors[0]
+        return sorted(results.values(), key=lambda r: order[r.job])
@@ -0,0 +1,240 @@
+"""Parallel, content-addressed backups of resource configurations."""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.lib.scan_engine import ScanEngine, ScanJob
+from src.models.aws_account import AWSAccount
+
+
+@dataclass(frozen=True)
+class BackupSource:
+    """A describe/list call whose items are backed up one file per resource."""
+
+    resource_type: str
+    operation: str
+    result_key: str
+    id_key: str
+    paginated: bool = True
+    params: Tuple[Tuple[str, Any], ...] = ()
+    nested_key: Optional[str] = None  # e.g. Reservations -> Instances
+    # Per-item calls added to the item's config: (key, operation, id parameter)
+    details: Tuple[Tuple[str, str, str], ...] = ()
+
+
+# Services whose configuration lives in a single global endpoint
+GLOBAL_SERVICES = {"s3", "iam"}
+
+BACKUP_SOURCES: Dict[str, List[BackupSource]] = {
+    "ec2": [
+        BackupSource("instance", "describe_instances", "Reservations", "InstanceId",
+                     nested_key="Instances"),
+        BackupSource("volume", "describe_volumes", "Volumes", "VolumeId"),
+        BackupSource("snapshot", "describe_snapshots", "Snapshots", "SnapshotId",
+                     params=(("OwnerIds", ["self"]),)),
+        BackupSource("security_group", "describe_security_groups", "SecurityGroups",
+                     "GroupId"),
+        BackupSource("vpc", "describe_vpcs", "Vpcs", "VpcId"),
+        BackupSource("subnet", "describe_subnets", "Subnets", "SubnetId"),
+    ],
+    "s3": [
+        BackupSource("bucket", "list_buckets", "Buckets", "Name", paginated=False,
+                     details=(("Policy", "get_bucket_policy", "Bucket"),
+                              ("Versioning", "get_bucket_versioning", "Bucket"),
+                              ("Lifecycle", "get_bucket_lifecycle_configuration",
+                               "Bucket"))),
+    ],
+    "lambda": [
+        BackupSource("function", "list_functions", "Functions", "FunctionName"),
+    ],
+    "rds": [
+        BackupSource("db_instance", "describe_db_instances", "DBInstances",
+                     "DBInstanceIdentifier"),
+        BackupSource("db_snapshot", "describe_db_snapshots", "DBSnapshots",
+                     "DBSnapshotIdentifier"),
+    ],
+    "iam": [
+        BackupSource("user", "list_users", "Users", "UserName"),
+        BackupSource("role", "list_roles", "Roles", "RoleName"),
+    ],
+    "logs": [
+        BackupSource("log_group", "describe_log_groups", "logGroups", "logGroupName"),
+    ],
+    "sns": [
+        BackupSource("topic", "list_topics", "Topics", "TopicArn"),
+    ],
+}
+
+
+class ObjectStore:
+    """Gzipped JSON documents stored under the SHA-256 of their canonical form."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root) / "objects"
+
+    def path_for(self, digest: str) -> Path:
+        """Get the object path for a digest, fanned out by its first two characters."""
+        return self.root / digest[:2] / f"{digest}.json.gz"
+
+    def put(self, document: Dict[str, Any]) -> Tuple[str, bool]:
+        """Store a document unless identical content exists; return (digest, written)."""
+        payload = json.dumps(document, sort_keys=True, separators=(",", ":"),
+                             default=str).encode()
+        digest = hashlib.sha256(payload).hexdigest()
+        path = self.path_for(digest)
+        if path.exists():
+            return digest, False
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so readers never see partial objects
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, \
+                    gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as compressed:
+                compressed.write(payload)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return digest, True
+
+    def get(self, digest: str) -> Dict[str, Any]:
+        """Load a stored document."""
+        with gzip.open(self.path_for(digest), "rb") as f:
+            return json.loads(f.read())
+
+
+def iter_items(client: Any, source: BackupSource) -> Iterator[Dict[str, Any]]:
+    """Stream the items of a describe/list call page by page."""
+    params = dict(source.params)
+    if source.paginated:
+        pages = client.get_paginator(source.operation).paginate(**params)
+    else:
+        pages = [getattr(client, source.operation)(**params)]
+    for page in pages:
+        for item in page.get(source.result_key, []):
+            if source.nested_key:
+                yield from item.get(source.nested_key, [])
+            else:
+                yield item
+
+
+def fetch_detail(client: Any, operation: str,
+                 params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Call a per-item describe operation; configuration that is not set gives None."""
+    from botocore.exceptions import ClientError
+
+    try:
+        response = getattr(client, operation)(**params)
+    except ClientError as e:
+        code = e.response.get('Error', {}).get('Code', '')
+        if code.startswith('NoSuch') or code.endswith('NotFound'):
+            return None
+        raise
+    response.pop('ResponseMetadata', None)
+    return response
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    """Write a file through a temporary one so readers never see it half written."""
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def backup_jobs(regions: Iterable[str], services: Optional[Iterable[str]] = None,
+                home_region: str = "us-east-1") -> List[ScanJob]:
+    """Build one job per (region, service); global services run once."""
+    selected = list(services) if services else list(BACKUP_SOURCES)
+    unknown = sorted(set(selected) - set(BACKUP_SOURCES))
+    if unknown:
+        raise ValueError(f"No backup support for: {', '.join(unknown)}")
+
+    jobs = [ScanJob(home_region, service) for service in selected
+            if service in GLOBAL_SERVICES]
+    jobs += [ScanJob(region, service) for region in regions for service in selected
+             if service not in GLOBAL_SERVICES]
+    return jobs
+
+
+def backup_scan_fn(account: AWSAccount, store: ObjectStore
+                   ) -> Callable[[ScanJob], Dict[str, Any]]:
+    """Build the per-job function that streams one service's items into the store."""
+    def backup_job(job: ScanJob) -> Dict[str, Any]:
+        client = account.get_client(job.service, job.region)
+        entries = []
+        written = 0
+        for source in BACKUP_SOURCES[job.service]:
+            for item in iter_items(client, source):
+                resource_id = str(item.get(source.id_key, ""))
+                for key, operation, parameter in source.details:
+                    item[key] = fetch_detail(client, operation, {parameter: resource_id})
+                digest, is_new = store.put({
+                    'service': job.service,
+                    'region': job.region,
+                    'resource_type': source.resource_type,
+                    'resource_id': resource_id,
+                    'config': item,
+                })
+                if is_new:
+                    written += 1
+                entries.append({'service': job.service, 'region': job.region,
+                                'resource_type': source.resource_type,
+                                'resource_id': resource_id, 'sha256': digest})
+        return {'entries': entries, 'written': written}
+    return backup_job
+
+
+def run_backup(account: AWSAccount, backup_dir: str, regions: Iterable[str],
+               services: Optional[Iterable[str]] = None,
+               engine: Optional[ScanEngine] = None,
+               account_id: Optional[str] = None,
+               on_result: Optional[Callable[[Any], None]] = None) -> Dict[str, Any]:
+    """Back up resource configurations concurrently and write a manifest.
+
+    Objects already present under the same content hash are not rewritten,
+    so repeated runs only write configurations that changed.
+    """
+    started = time.perf_counter()
+    root = Path(backup_dir)
+    store = ObjectStore(root)
+    engine = engine or ScanEngine()
+    jobs = backup_jobs(regions, services, home_region=account.region)
+    results = engine.run(jobs, backup_scan_fn(account, store), on_result=on_result)
+
+    entries = [entry for result in results for entry in result.analysis.get('entries', [])]
+    written = sum(result.analysis.get('written', 0) for result in results)
+    manifest = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'account_id': account_id or account.account_id,
+        'regions': sorted({job.region for job in jobs}),
+        'services': sorted({job.service for job in jobs}),
+        'resources': len(entries),
+        'written': written,
+        'unchanged': len(entries) - written,
+        'errors': [{'region': r.job.region, 'service': r.job.service, 'error': r.error}
+                   for r in results if r.error],
+        'execution_time': time.perf_counter() - started,
+        'entries': entries,
+    }
+
+    manifests = root / "manifests"
+    manifests.mkdir(parents=True, exist_ok=True)
+    name = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{os.getpid()}.json"
+    _write_atomic(manifests / name, json.dumps(manifest, indent=2))
+    # LATEST moves only once the manifest it names is complete
+    _write_atomic(root / "LATEST", f"manifests/{name}\n")
+    manifest['manifest_path'] = str(manifests / name)
+    return manifest
@@ -0,0 +1,218 @@
+"""Batched, pipelined bulk deletion for high-cardinality resources."""
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+from src.models.aws_account import AWSAccount
+
+logger = logging.getLogger(__name__)
+
+S3_BATCH_SIZE = 1000  # DeleteObjects limit
+ECR_BATCH_SIZE = 100  # BatchDeleteImage limit
+DEFAULT_BULK_WORKERS = 8
+MAX_ERRORS_KEPT = 100
+
+
+@dataclass
+class BulkDeleteResult:
+    """Counters for a bulk deletion; individual IDs are not retained."""
+
+    operation: str
+    deleted: int = 0
+    failed: int = 0
+    requests: int = 0
+    errors: List[str] = field(default_factory=list)
+    execution_time: Optional[float] = None
+
+    def add_errors(self, errors: List[str]) -> None:
+        """Record failures, keeping only a bounded sample of messages."""
+        self.failed += len(errors)
+        room = MAX_ERRORS_KEPT - len(self.errors)
+        if room > 0:
+            self.errors.extend(errors[:room])
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            "operation": self.operation,
+            "deleted": self.deleted,
+            "failed": self.failed,
+            "requests": self.requests,
+            "errors": self.errors,
+            "execution_time": self.execution_time
+        }
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Regroup a stream of items into lists of at most size items."""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def run_pipeline(operation: str, batches: Iterable[List[Any]],
+                 delete_batch: Callable[[List[Any]], List[str]],
+                 max_workers: int = DEFAULT_BULK_WORKERS,
+                 max_in_flight: Optional[int] = None,
+                 dry_run: bool = False) -> BulkDeleteResult:
+    """Delete batches on a worker pool while the next pages are still listed.
+
+    batches is consumed lazily, so listing overlaps with deletion, and at
+    most max_in_flight batches are held in memory at once. delete_batch
+    returns the error messages for the items it could not delete.
+    """
+    result = BulkDeleteResult(operation)
+    max_in_flight = max_in_flight or max_workers * 2
+    started = time.perf_counter()
+
+    def finish(future: Future, size: int) -> None:
+        try:
+            errors = future.result()
+        except Exception as e:
+            errors = [str(e)] * size
+        result.requests += 1
+        result.deleted += size - len(errors)
+        result.add_errors(errors)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        in_flight = {}
+        for batch in batches:
+            if dry_run:
+                result.deleted += len(batch)
+                continue
+            if len(in_flight) >= max_in_flight:
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(future, in_flight.pop(future))
+            in_flight[pool.submit(delete_batch, batch)] = len(batch)
+        for future, size in in_flight.items():
+            finish(future, size)
+
+    result.execution_time = time.perf_counter() - started
+    return result
+
+
+def _per_item(delete_one: Callable[[Any], Any]) -> Callable[[List[Any]], List[str]]:
+    """Adapt a single-item delete call to the batch interface."""
+    def delete_batch(batch: List[Any]) -> List[str]:
+        errors = []
+        for item in batch:
+            try:
+                delete_one(item)
+            except Exception as e:
+                errors.append(f"{item}: {e}")
+        return errors
+    return delete_batch
+
+
+def empty_bucket(account: AWSAccount, bucket: str, region: Optional[str] = None,
+                 max_workers: int = DEFAULT_BULK_WORKERS,
+                 dry_run: bool = False) -> BulkDeleteResult:
+    """Delete every object version and delete marker in a bucket.
+
+    Pages of ListObjectVersions are streamed straight into DeleteObjects
+    requests of up to 1000 keys, so the full listing never sits in memory.
+    """
+    s3 = account.get_client('s3', region)
+
+    def keys() -> Iterator[dict]:
+        for page in s3.get_paginator('list_object_versions').paginate(Bucket=bucket):
+            for entry in page.get('Versions', []) + page.get('DeleteMarkers', []):
+                yield {'Key': entry['Key'], 'VersionId': entry['VersionId']}
+
+    def delete_batch(batch: List[dict]) -> List[str]:
+        response = s3.delete_objects(Bucket=bucket,
+                                     Delete={'Objects': batch, 'Quiet': True})
+        return [f"{error.get('Key')}: {error.get('Code')}"
+                for error in response.get('Errors', [])]
+
+    return run_pipeline(f"empty_bucket:{bucket}", chunked(keys(), S3_BATCH_SIZE),
+                        delete_batch, max_workers=max_workers, dry_run=dry_run)
+
+
+def delete_ecr_images(account: AWSAccount, repository: str,
+                      region: Optional[str] = None,
+                      max_workers: int = DEFAULT_BULK_WORKERS,
+                      dry_run: bool = False) -> BulkDeleteResult:
+    """Delete every image in an ECR repository with BatchDeleteImage."""
+    ecr = account.get_client('ecr', region)
+
+    def image_ids() -> Iterator[dict]:
+        for page in ecr.get_paginator('list_images').paginate(repositoryName=repository):
+            yield from page.get('imageIds', [])
+
+    def delete_batch(batch: List[dict]) -> List[str]:
+        response = ecr.batch_delete_image(repositoryName=repository, imageIds=batch)
+        return [f"{failure.get('imageId')}: {failure.get('failureCode')}"
+                for failure in response.get('failures', [])]
+
+    return run_pipeline(f"ecr_images:{repository}", chunked(image_ids(), ECR_BATCH_SIZE),
+                        delete_batch, max_workers=max_workers, dry_run=dry_run)
+
+
+def delete_snapshots(account: AWSAccount, snapshot_ids: Iterable[str],
+                     region: Optional[str] = None,
+                     max_workers: int = DEFAULT_BULK_WORKERS,
+                     dry_run: bool = False) -> BulkDeleteResult:
+    """Delete EBS snapshots concurrently (EC2 has no batch delete)."""
+    ec2 = account.get_client('ec2', region)
+    return run_pipeline("ebs_snapshots", chunked(snapshot_ids, 1),
+                        _per_item(lambda s: ec2.delete_snapshot(SnapshotId=s)),
+                        max_workers=max_workers, dry_run=dry_run)
+
+
+def delete_log_groups(account: AWSAccount, log_group_names: Iterable[str],
+                      region: Optional[str] = None,
+                      max_workers: int = DEFAULT_BULK_WORKERS,
+                      dry_run: bool = False) -> BulkDeleteResult:
+    """Delete CloudWatch log groups concurrently (Logs has no batch delete)."""
+    logs = account.get_client('logs', region)
+    return run_pipeline("log_groups", chunked(log_group_names, 1),
+                        _per_item(lambda n: logs.delete_log_group(logGroupName=n)),
+                        max_workers=max_workers, dry_run=dry_run)
+
+
+def delete_sqs_queues(account: AWSAccount, queue_urls: Iterable[str],
+                      region: Optional[str] = None,
+                      max_workers: int = DEFAULT_BULK_WORKERS,
+                      dry_run: bool = False) -> BulkDeleteResult:
+    """Delete SQS queues concurrently."""
+    sqs = account.get_client('sqs', region)
+    return run_pipeline("sqs_queues", chunked(queue_urls, 1),
+                        _per_item(lambda u: sqs.delete_queue(QueueUrl=u)),
+                        max_workers=max_workers, dry_run=dry_run)
+
+
+def delete_sns_topics(account: AWSAccount, topic_arns: Iterable[str],
+                      region: Optional[str] = None,
+                      max_workers: int = DEFAULT_BULK_WORKERS,
+                      dry_run: bool = False) -> BulkDeleteResult:
+    """Delete SNS topics concurrently; their subscriptions go with them."""
+    sns = account.get_client('sns', region)
+    return run_pipeline("sns_topics", chunked(topic_arns, 1),
+                        _per_item(lambda a: sns.delete_topic(TopicArn=a)),
+                        max_workers=max_workers, dry_run=dry_run)
+
+
+def empty_containers(account: AWSAccount, buckets: Iterable[str] = (),
+                     repositories: Iterable[str] = (),
+                     max_workers: int = DEFAULT_BULK_WORKERS,
+                     dry_run: bool = False) -> List[BulkDeleteResult]:
+    """Empty S3 buckets and ECR repositories so they can then be deleted.
+
+    Buckets and repositories are emptied one after another; each one's
+    batches already run on max_workers threads.
+    """
+    results = [empty_bucket(account, bucket, max_workers=max_workers, dry_run=dry_run)
+               for bucket in buckets]
+    results.extend(delete_ecr_images(account, repository, max_workers=max_workers,
+                                     dry_run=dry_run)
+                   for repository in repositories)
+    return results
@@ -0,0 +1,164 @@
+"""Change feeds that tell the watcher which (region, service) cells changed."""
+
+import json
+import logging
+import os
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.models.aws_account import AWSAccount
+
+logger = logging.getLogger(__name__)
+
+# Event sources whose changes affect more than one scanned service
+SOURCE_SERVICES = {
+    "ec2": ("ec2", "vpc"),
+    "monitoring": ("cloudwatch",),
+    "logs": ("cloudwatch",),
+    "elasticloadbalancing": ("ec2",),
+    "autoscaling": ("ec2",),
+}
+
+MAX_SEEN_EVENT_IDS = 10000
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """A write to one resource, as reported by CloudTrail or EventBridge."""
+
+    region: str
+    service: str
+    event_name: str = ""
+    resource_id: Optional[str] = None
+    event_id: Optional[str] = None
+
+
+def services_for_source(source: str) -> Tuple[str, ...]:
+    """Map an event source (ec2.amazonaws.com, aws.ec2, ec2) to scanned services."""
+    name = source
+    if name.startswith("aws."):
+        name = name[4:]
+    name = name.split(".amazonaws.com")[0]
+    return SOURCE_SERVICES.get(name, (name,))
+
+
+def events_from_eventbridge(event: Dict[str, Any]) -> List[ChangeEvent]:
+    """Turn one EventBridge event (including CloudTrail-sourced ones) into changes."""
+    detail = event.get('detail') or {}
+    source = detail.get('eventSource') or event.get('source', "")
+    region = detail.get('awsRegion') or event.get('region', "")
+    name = detail.get('eventName') or event.get('detail-type', "")
+    resources = event.get('resources') or [None]
+    return [ChangeEvent(region, service, name, resource, event.get('id'))
+            for service in services_for_source(source) for resource in resources]
+
+
+class FileFeed:
+    """Tails an NDJSON file of EventBridge-shaped events; a local stand-in for SQS."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._offset = 0
+
+    def poll(self) -> List[ChangeEvent]:
+        """Read events appended since the last poll."""
+        if not os.path.exists(self.path):
+            return []
+        changes = []
+        with open(self.path, 'r') as f:
+            f.seek(self._offset)
+            while True:
+                line = f.readline()
+                # A partially written last line is picked up on the next poll
+                if not line.endswith("\n"):
+                    break
+                self._offset = f.tell()
+                if line.strip():
+                    try:
+                        changes.extend(events_from_eventbridge(json.loads(line)))
+                    except (ValueError, AttributeError) as e:
+                        logger.warning(f"Skipping malformed change event: {e}")
+        return changes
+
+
+class SqsFeed:
+    """Receives EventBridge events delivered to an SQS queue."""
+
+    def __init__(self, account: AWSAccount, queue_url: str, wait_seconds: int = 1):
+        self.account = account
+        self.queue_url = queue_url
+        self.wait_seconds = wait_seconds
+
+    def poll(self) -> List[ChangeEvent]:
+        """Drain the queue, deleting messages once they are parsed."""
+        sqs = self.account.get_client('sqs')
+        changes = []
+        while True:
+            response = sqs.receive_message(QueueUrl=self.queue_url,
+                                           MaxNumberOfMessages=10,
+                                           WaitTimeSeconds=self.wait_seconds)
+            messages = response.get('Messages', [])
+            if not messages:
+                return changes
+            for message in messages:
+                try:
+                    changes.extend(events_from_eventbridge(json.loads(message['Body'])))
+                except (ValueError, AttributeError) as e:
+                    logger.warning(f"Skipping malformed change event: {e}")
+            sqs.delete_message_batch(QueueUrl=self.queue_url, Entries=[
+                {'Id': str(index), 'ReceiptHandle': message['ReceiptHandle']}
+                for index, message in enumerate(messages)
+            ])
+
+
+class CloudTrailFeed:
+    """Polls CloudTrail event history for write events in each region.
+
+    Event history lags real time by a few minutes, so each poll looks back
+    over an overlap window and drops events it has already reported. The
+    newest MAX_SEEN_EVENT_IDS event IDs are remembered, oldest evicted first.
+    """
+
+    def __init__(self, account: AWSAccount, regions: Iterable[str],
+                 overlap: timedelta = timedelta(minutes=15)):
+        self.account = account
+        self.regions = list(regions)
+        self.overlap = overlap
+        self._since = datetime.now(timezone.utc)
+        self._seen: Set[str] = set()
+        self._seen_order: Deque[str] = deque()
+
+    def poll(self) -> List[ChangeEvent]:
+        """Look up write events since the last poll in every region."""
+        now = datetime.now(timezone.utc)
+        start = self._since - self.overlap
+        changes = []
+        for region in self.regions:
+            cloudtrail = self.account.get_client('cloudtrail', region)
+            pages = cloudtrail.get_paginator('lookup_events').paginate(
+                LookupAttributes=[{'AttributeKey': 'ReadOnly', 'AttributeValue': 'false'}],
+                StartTime=start, EndTime=now,
+            )
+            for page in pages:
+                for event in page.get('Events', []):
+                    event_id = event.get('EventId')
+                    if event_id in self._seen:
+                        continue
+                    self._remember(event_id)
+                    resources = [r.get('ResourceName') for r in event.get('Resources', [])]
+                    for service in services_for_source(event.get('EventSource', "")):
+                        for resource in resources or [None]:
+                            changes.append(ChangeEvent(region, service,
+                                                       event.get('EventName', ""),
+                                                       resource, event_id))
+        self._since = now
+        return changes
+
+    def _remember(self, event_id: str) -> None:
+        """Mark an event as reported, forgetting the oldest beyond the limit."""
+        self._seen.add(event_id)
+        self._seen_order.append(event_id)
+        while len(self._seen_order) > MAX_SEEN_EVENT_IDS:
+            self._seen.discard(self._seen_order.popleft())
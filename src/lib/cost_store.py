@@ -0,0 +1,272 @@
+"""Local daily cost store fed incrementally from Cost Explorer."""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.lib.inventory_cache import default_cache_dir
+from src.models.aws_account import DEFAULT_TEST_ACCOUNT_ID, AWSAccount
+
+logger = logging.getLogger(__name__)
+
+COST_METRIC = "UnblendedCost"
+
+# Cost Explorer keeps revising its estimates for the most recent days
+RESTATEMENT_DAYS = 3
+
+# Cost Explorer only serves the last 12 months of daily data by default
+MAX_LOOKBACK_DAYS = 365
+
+CE_REGION = "us-east-1"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_costs (
+    account_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    service TEXT NOT NULL,
+    amount REAL NOT NULL,
+    unit TEXT NOT NULL,
+    PRIMARY KEY (account_id, day, service)
+);
+CREATE TABLE IF NOT EXISTS cost_sync (
+    account_id TEXT PRIMARY KEY,
+    synced_from TEXT NOT NULL,
+    synced_until TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS forecast_state (
+    account_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+DayRange = Tuple[date, date]
+
+
+def fetch_daily_costs(ce: Any, start: date, end: date,
+                      stats: Optional[Dict[str, int]] = None
+                      ) -> Iterator[Tuple[str, str, float, str]]:
+    """Yield (day, service, amount, unit) rows for [start, end) from Cost Explorer.
+
+    Each GetCostAndUsage page is counted in stats['requests'] when given.
+    """
+    kwargs = {
+        'TimePeriod': {'Start': start.isoformat(), 'End': end.isoformat()},
+        'Granularity': 'DAILY',
+        'Metrics': [COST_METRIC],
+        'GroupBy': [{'Type': 'DIMENSION', 'Key': 'SERVICE'}],
+    }
+    while True:
+        response = ce.get_cost_and_usage(**kwargs)
+        if stats is not None:
+            stats['requests'] = stats.get('requests', 0) + 1
+        for result in response.get('ResultsByTime', []):
+            day = result['TimePeriod']['Start']
+            for group in result.get('Groups', []):
+                metric = group['Metrics'][COST_METRIC]
+                yield day, group['Keys'][0], float(metric['Amount']), metric.get('Unit', 'USD')
+        token = response.get('NextPageToken')
+        if not token:
+            return
+        kwargs['NextPageToken'] = token
+
+
+class CostStore:
+    """SQLite-backed store of daily costs per account and service.
+
+    Each account records the contiguous range of days already synced, so a
+    run only asks Cost Explorer for the days it does not have yet, plus the
+    last few days whose estimates may have changed.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else default_cache_dir() / "costs.db"
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection, creating the database on first use."""
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=10)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._initialized = True
+        return conn
+
+    def _sync_row(self, account_id: str) -> Optional[Tuple[str, str, float]]:
+        """Get the (synced_from, synced_until, synced_at) row for an account."""
+        with self._lock, closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT synced_from, synced_until, synced_at FROM cost_sync "
+                "WHERE account_id = ?",
+                (account_id,)
+            ).fetchone()
+
+    def coverage(self, account_id: str) -> Optional[DayRange]:
+        """Get the [from, until) range of days already synced for an account."""
+        row = self._sync_row(account_id)
+        if row is None:
+            return None
+        return date.fromisoformat(row[0]), date.fromisoformat(row[1])
+
+    def missing_ranges(self, account_id: str, start: date, end: date,
+                       refresh: bool = False,
+                       max_age: Optional[float] = None) -> List[DayRange]:
+        """Get the day ranges that must be fetched to answer [start, end).
+
+        Ranges always touch the synced range, so coverage stays contiguous.
+        With max_age, recent days synced less than max_age seconds ago are
+        trusted instead of being refetched.
+        """
+        row = None if refresh else self._sync_row(account_id)
+        if row is None:
+            return [(start, end)]
+
+        synced_from, synced_until = date.fromisoformat(row[0]), date.fromisoformat(row[1])
+        ranges = []
+        if start < synced_from:
+            ranges.append((start, synced_from))
+        if max_age is not None and time.time() - row[2] <= max_age and end <= synced_until:
+            return ranges
+        tail_start = max(synced_from, synced_until - timedelta(days=RESTATEMENT_DAYS))
+        if tail_start < end:
+            ranges.append((tail_start, end))
+        return ranges
+
+    def replace_range(self, account_id: str, start: date, end: date,
+                      rows: Iterable[Tuple[str, str, float, str]]) -> None:
+        """Replace the stored days in [start, end) and extend the synced range."""
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM daily_costs WHERE account_id = ? AND day >= ? AND day < ?",
+                (account_id, start.isoformat(), end.isoformat())
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO daily_costs "
+                "(account_id, day, service, amount, unit) VALUES (?, ?, ?, ?, ?)",
+                ((account_id, day, service, amount, unit)
+                 for day, service, amount, unit in rows)
+            )
+            row = conn.execute(
+                "SELECT synced_from, synced_until FROM cost_sync WHERE account_id = ?",
+                (account_id,)
+            ).fetchone()
+            synced_from, synced_until = start.isoformat(), end.isoformat()
+            # A range that does not touch the synced one starts a new coverage
+            if row is not None and row[0] <= synced_until and row[1] >= synced_from:
+                synced_from = min(synced_from, row[0])
+                synced_until = max(synced_until, row[1])
+            conn.execute(
+                "INSERT OR REPLACE INTO cost_sync "
+                "(account_id, synced_from, synced_until, synced_at) VALUES (?, ?, ?, ?)",
+                (account_id, synced_from, synced_until, time.time())
+            )
+
+    def sync(self, account: AWSAccount, account_id: str, start: date, end: date,
+             refresh: bool = False, max_age: Optional[float] = None) -> Dict[str, int]:
+        """Fetch whatever part of [start, end) is missing from Cost Explorer."""
+        if account_id == DEFAULT_TEST_ACCOUNT_ID:
+            # Costs stored under the placeholder would mix with other accounts'
+            raise ValueError("Account ID unknown (STS lookup failed)")
+        ranges = self.missing_ranges(account_id, start, end, refresh=refresh,
+                                     max_age=max_age)
+        stats = {'days_fetched': 0, 'requests': 0}
+        if not ranges:
+            return stats
+
+        ce = account.get_client('ce', CE_REGION)
+        for range_start, range_end in ranges:
+            logger.debug(f"Fetching daily costs for {account_id}: {range_start} to {range_end}")
+            rows = list(fetch_daily_costs(ce, range_start, range_end, stats))
+            self.replace_range(account_id, range_start, range_end, rows)
+            stats['days_fetched'] += (range_end - range_start).days
+        return stats
+
+    def aggregate(self, account_id: str, start: date, end: date) -> Dict[str, Any]:
+        """Sum stored costs per service and per day over [start, end)."""
+        window = (account_id, start.isoformat(), end.isoformat())
+        with self._lock, closing(self._connect()) as conn:
+            by_service = conn.execute(
+                "SELECT service, SUM(amount) FROM daily_costs "
+                "WHERE account_id = ? AND day >= ? AND day < ? "
+                "GROUP BY service ORDER BY SUM(amount) DESC",
+                window
+            ).fetchall()
+            by_day = conn.execute(
+                "SELECT day, SUM(amount) FROM daily_costs "
+                "WHERE account_id = ? AND day >= ? AND day < ? "
+                "GROUP BY day ORDER BY day",
+                window
+            ).fetchall()
+        return {
+            'service_breakdown': {service: amount for service, amount in by_service},
+            'daily_costs': {day: amount for day, amount in by_day},
+        }
+
+    def daily_series(self, account_id: str, start: date,
+                     end: date) -> Dict[str, Dict[str, float]]:
+        """Get the stored costs over [start, end) as {day: {service: amount}}."""
+        series: Dict[str, Dict[str, float]] = {}
+        with self._lock, closing(self._connect()) as conn:
+            for day, service, amount in conn.execute(
+                "SELECT day, service, amount FROM daily_costs "
+                "WHERE account_id = ? AND day >= ? AND day < ? ORDER BY day",
+                (account_id, start.isoformat(), end.isoformat())
+            ):
+                series.setdefault(day, {})[service] = amount
+        return series
+
+    def load_forecast(self, account_id: str) -> Optional[Dict[str, Any]]:
+        """Get the saved forecast state for an account."""
+        with self._lock, closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT payload FROM forecast_state WHERE account_id = ?",
+                (account_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_forecast(self, account_id: str, state: Dict[str, Any]) -> None:
+        """Save the forecast state for an account."""
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO forecast_state (account_id, payload, updated_at) "
+                "VALUES (?, ?, ?)",
+                (account_id, json.dumps(state), time.time())
+            )
+
+
+def analyze_costs(account: AWSAccount, days: int, store: Optional[CostStore] = None,
+                  account_id: Optional[str] = None, refresh: bool = False,
+                  today: Optional[date] = None) -> Dict[str, Any]:
+    """Analyze the last days of costs, syncing only what the store is missing."""
+    if not 1 <= days <= MAX_LOOKBACK_DAYS:
+        raise ValueError(f"days must be between 1 and {MAX_LOOKBACK_DAYS}")
+
+    store = store or CostStore()
+    account_id = account_id or account.get_account_id()
+    # Cost Explorer end dates are exclusive; today's partial costs are included
+    end = (today or date.today()) + timedelta(days=1)
+    start = end - timedelta(days=days)
+
+    sync_stats = store.sync(account, account_id, start, end, refresh=refresh)
+    totals = store.aggregate(account_id, start, end)
+
+    total_cost = sum(totals['service_breakdown'].values())
+    return {
+        'period': {'start': start.isoformat(), 'end': end.isoformat(), 'days': days},
+        'total_cost': total_cost,
+        # Normalized to a 30-day month so any --days window is comparable
+        'total_monthly_cost': total_cost / days * 30,
+        'service_breakdown': totals['service_breakdown'],
+        'daily_costs': totals['daily_costs'],
+        'sync': sync_stats,
+    }
@@ -0,0 +1,191 @@
+"""Process pool stage for converting scanner pages into resources.
+
+Scanners with ``fetch``/``convert`` functions hand their raw pages to a
+worker process, which builds the AWSResources and sends the analysis back
+with its resources packed into parallel columns. Free tier limits are not
+judged here: they apply to the account's totals, which only the parent
+sees once every job is in. Only page payloads and compact results cross the
+process boundary, and the unpacked analysis is the same as the one the
+scan threads would have built.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from array import array
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.lib.scan_engine import ScanJob
+from src.models.aws_resource import AWSResource, ResourceStatus
+from src.models.free_tier_limit import FreeTierLimit, SharedLimits
+
+logger = logging.getLogger(__name__)
+
+_STATUSES = list(ResourceStatus)
+
+
+@dataclass
+class PackedResources:
+    """One service's resources as parallel columns, cheap to pickle.
+
+    kinds holds each distinct (service, resource_type, region) once and
+    kind_index points every resource at its entry; catalog marks resources
+    whose limits are the shared catalog ones, and limits holds the rest's
+    own limits by position.
+    """
+
+    ids: List[str]
+    kinds: List[Tuple[str, str, Optional[str]]]
+    kind_index: array
+    statuses: bytes
+    catalog: bytes
+    usage: List[Optional[Dict[str, Any]]]
+    limits: Dict[int, Dict[str, Any]]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def pack_resources(resources: List[AWSResource]) -> PackedResources:
+    """Pack resources into columns."""
+    kinds: Dict[Tuple[str, str, Optional[str]], int] = {}
+    kind_index = array('I')
+    catalog = bytearray(len(resources))
+    limits = {}
+    for position, resource in enumerate(resources):
+        kind = (resource.service, resource.resource_type, resource.region)
+        kind_index.append(kinds.setdefault(kind, len(kinds)))
+        own = resource.free_tier_limit
+        if isinstance(own, SharedLimits) and own.catalog is not None:
+            catalog[position] = 1
+        elif own:
+            limits[position] = dict(own)
+    return PackedResources(
+        ids=[resource.resource_id for resource in resources],
+        kinds=list(kinds),
+        kind_index=kind_index,
+        statuses=bytes(_STATUSES.index(resource.status) for resource in resources),
+        catalog=bytes(catalog),
+        usage=[resource.current_usage for resource in resources],
+        limits=limits,
+    )
+
+
+def unpack_resources(packed: PackedResources) -> List[AWSResource]:
+    """Rebuild the AWSResources from their columns."""
+    resources = []
+    for position, resource_id in enumerate(packed.ids):
+        service, resource_type, region = packed.kinds[packed.kind_index[position]]
+        limits = (FreeTierLimit.limits_for(service, resource_type)
+                  if packed.catalog[position] else packed.limits.get(position))
+        resources.append(AWSResource(resource_id, service, resource_type, region,
+                                     packed.usage[position], limits,
+                                     _STATUSES[packed.statuses[position]]))
+    return resources
+
+
+def _service_data(analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Get every per-service entry of an analysis."""
+    return [service_data
+            for region_data in analysis.get('regions_analyzed', [])
+            for service_data in region_data.get('services', {}).values()]
+
+
+def pack_analysis(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace each service's resource list with packed columns, in place."""
+    for service_data in _service_data(analysis):
+        resources = service_data.get('resources')
+        if resources and all(isinstance(r, AWSResource) for r in resources):
+            service_data['resources'] = pack_resources(resources)
+    return analysis
+
+
+def unpack_analysis(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn packed resource columns back into AWSResources, in place."""
+    for service_data in _service_data(analysis):
+        if isinstance(service_data.get('resources'), PackedResources):
+            service_data['resources'] = unpack_resources(service_data['resources'])
+    return analysis
+
+
+def _evaluate(target: str, job: ScanJob, pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Worker: convert a job's pages with its scanner into a job analysis."""
+    from src.lib.scanners import _import_target, scanner_analysis
+
+    scanner = _import_target(target)
+    return pack_analysis(scanner_analysis(job, scanner.convert(pages, job.region)))
+
+
+class CPUStage:
+    """Process pool that turns raw scanner pages into job analyses.
+
+    Workers are spawned rather than forked, since the scan threads may be
+    holding locks, and the pool starts on first use. Safe to share between
+    scan threads and accounts.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        if workers is not None and workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.workers = workers or os.cpu_count() or 1
+        self.jobs = 0
+        self.resources = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "CPUStage":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """Start the worker processes on first use."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def submit(self, target: str, job: ScanJob, pages: List[Dict[str, Any]]) -> Future:
+        """Queue a job's pages for the scanner importable from target.
+
+        The future's result is a packed analysis; see evaluate.
+        """
+        # Response metadata is never converted, so don't ship it
+        pages = [{key: value for key, value in page.items() if key != 'ResponseMetadata'}
+                 for page in pages]
+        return self._pool().submit(_evaluate, target, job, pages)
+
+    def _finish(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Unpack a worker's analysis and count it."""
+        unpack_analysis(analysis)
+        with self._lock:
+            self.jobs += 1
+            self.resources += analysis.get('total_resources_found', 0)
+        return analysis
+
+    def evaluate(self, target: str, job: ScanJob,
+                 pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Convert a job's pages in a worker and wait for the analysis."""
+        return self._finish(self.submit(target, job, pages).result())
+
+    async def evaluate_async(self, target: str, job: ScanJob,
+                             pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Like evaluate, awaiting the worker instead of blocking the loop."""
+        return self._finish(await asyncio.wrap_future(self.submit(target, job, pages)))
+
+    def stats(self) -> Dict[str, int]:
+        """Get the worker count and the jobs and resources processed."""
+        return {'workers': self.workers, 'jobs': self.jobs, 'resources': self.resources}
+
+    def close(self) -> None:
+        """Shut the worker processes down."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
@@ -0,0 +1,519 @@
+"""Dependency-ordered, parallel deletion planning for clean."""
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.models.aws_account import AWSAccount
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DELETE_WORKERS = 16
+
+# Rough per-resource deletion times (API call plus waiter), in seconds
+ESTIMATED_SECONDS = {
+    "instance": 60.0,
+    "volume": 2.0,
+    "network_interface": 2.0,
+    "security_group": 1.0,
+    "nat_gateway": 60.0,
+    "elastic_ip": 1.0,
+    "vpc_endpoint": 30.0,
+    "internet_gateway": 2.0,
+    "route_table": 1.0,
+    "subnet": 1.0,
+    "vpc": 1.0,
+}
+
+WAITER_CONFIG = {"Delay": 5, "MaxAttempts": 60}
+
+# Services whose resources the network teardown plan covers
+NETWORK_SERVICES = {"ec2", "vpc"}
+
+
+@dataclass
+class DeletionNode:
+    """A resource to delete and the resources that must go before it."""
+
+    resource_id: str
+    service: str
+    resource_type: str
+    region: str
+    delete: Callable[[], Any]
+    wait: Optional[Callable[[], Any]] = None
+    depends_on: Set[str] = field(default_factory=set)
+    estimated_seconds: float = 1.0
+
+    @property
+    def key(self) -> str:
+        """Unique key of the node across regions."""
+        return f"{self.region}:{self.resource_id}"
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            "resource_id": self.resource_id,
+            "service": self.service,
+            "resource_type": self.resource_type,
+            "region": self.region,
+        }
+
+
+class DeletionPlan:
+    """DAG of deletions executed with a worker pool."""
+
+    def __init__(self) -> None:
+        self.nodes: Dict[str, DeletionNode] = {}
+
+    def add(self, node: DeletionNode) -> None:
+        """Add a node; dependencies are resolved when the plan is levelled."""
+        self.nodes[node.key] = node
+
+    def _dependencies(self, node: DeletionNode) -> Set[str]:
+        """Get the planned dependencies of a node, ignoring unplanned ones."""
+        keys = {f"{node.region}:{dep}" for dep in node.depends_on}
+        return {key for key in keys if key in self.nodes}
+
+    def levels(self) -> List[List[DeletionNode]]:
+        """Group nodes into levels; every node only depends on earlier levels."""
+        remaining = {key: self._dependencies(node) for key, node in self.nodes.items()}
+        levels = []
+        while remaining:
+            ready = sorted(key for key, deps in remaining.items() if not deps)
+            if not ready:
+                raise ValueError("Deletion plan has a dependency cycle: "
+                                 + ", ".join(sorted(remaining)))
+            levels.append([self.nodes[key] for key in ready])
+            for key in ready:
+                del remaining[key]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return levels
+
+    def critical_path(self) -> Tuple[float, List[DeletionNode]]:
+        """Get the longest chain of estimated deletion time through the DAG."""
+        finish: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for level in self.levels():
+            for node in level:
+                deps = self._dependencies(node)
+                before = max(sorted(deps), key=lambda key: finish[key]) if deps else None
+                finish[node.key] = node.estimated_seconds + (finish[before] if before else 0.0)
+                previous[node.key] = before
+
+        if not finish:
+            return 0.0, []
+        key: Optional[str] = max(finish, key=lambda k: finish[k])
+        total = finish[key]
+        path = []
+        while key:
+            path.append(self.nodes[key])
+            key = previous[key]
+        return total, list(reversed(path))
+
+    def execute(self, max_workers: int = DEFAULT_DELETE_WORKERS,
+                on_deleted: Optional[Callable[[DeletionNode], None]] = None,
+                on_finished: Optional[Callable[[DeletionNode, Optional[str]], None]] = None
+                ) -> Dict[str, Any]:
+        """Delete every node as soon as its dependencies are gone.
+
+        Dependents of failed nodes are skipped. on_finished sees every node
+        once it is deleted, failed (with the error) or skipped.
+        """
+        self.levels()  # Refuse cycles before deleting anything
+        pending = {key: self._dependencies(node) for key, node in self.nodes.items()}
+        dependents: Dict[str, List[str]] = {key: [] for key in self.nodes}
+        for key, deps in pending.items():
+            for dep in deps:
+                dependents[dep].append(key)
+
+        cleaned: List[dict] = []
+        failed: List[dict] = []
+        skipped: List[dict] = []
+        started = time.perf_counter()
+
+        def run(node: DeletionNode) -> Optional[str]:
+            try:
+                node.delete()
+                if node.wait:
+                    node.wait()
+                return None
+            except Exception as e:
+                logger.warning(f"Could not delete {node.resource_type} "
+                               f"{node.resource_id} in {node.region}: {e}")
+                return str(e)
+
+        def skip_dependents(key: str) -> None:
+            blocked = list(dependents[key])
+            while blocked:
+                dependent = blocked.pop()
+                if pending.pop(dependent, None) is None:
+                    continue
+                node = self.nodes[dependent]
+                skipped.append(node.to_dict())
+                if on_finished:
+                    on_finished(node, "skipped: a dependency failed")
+                blocked.extend(dependents[dependent])
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            running: Dict[Future, DeletionNode] = {}
+
+            def submit_ready() -> None:
+                for key in sorted(key for key, deps in pending.items() if not deps):
+                    del pending[key]
+                    running[pool.submit(run, self.nodes[key])] = self.nodes[key]
+
+            # A slow deletion (e.g. an instance's waiter) only holds up its
+            # own dependents, not every node at the same depth
+            submit_ready()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    error = future.result()
+                    if error:
+                        failed.append({**node.to_dict(), "error": error})
+                        skip_dependents(node.key)
+                    else:
+                        cleaned.append(node.to_dict())
+                        if on_deleted:
+                            on_deleted(node)
+                        for dependent in dependents[node.key]:
+                            if dependent in pending:
+                                pending[dependent].discard(node.key)
+                    if on_finished:
+                        on_finished(node, error)
+                submit_ready()
+
+        return {
+            "cleaned_resources": cleaned,
+            "failed_resources": failed,
+            "skipped_resources": skipped,
+            "execution_time": time.perf_counter() - started,
+        }
+
+    def merge(self, other: "DeletionPlan") -> None:
+        """Add every node of another plan (e.g. another region's)."""
+        self.nodes.update(other.nodes)
+
+
+def _paginate(client: Any, operation: str, key: str, **kwargs: Any) -> List[dict]:
+    """Collect every item of a paginated EC2 describe call."""
+    items: List[dict] = []
+    for page in client.get_paginator(operation).paginate(**kwargs):
+        items.extend(page.get(key, []))
+    return items
+
+
+def _group_references(groups: List[dict], group_id: str) -> List[Tuple[str, str, List[dict]]]:
+    """Find the rules of other groups that reference a group.
+
+    Returns (revoke operation, referencing group ID, permissions) triples.
+    """
+    references = []
+    for group in groups:
+        if group['GroupId'] == group_id:
+            continue
+        for key, revoke in (('IpPermissions', 'revoke_security_group_ingress'),
+                            ('IpPermissionsEgress', 'revoke_security_group_egress')):
+            permissions = [
+                {**{name: permission[name] for name in ('IpProtocol', 'FromPort', 'ToPort')
+                    if name in permission},
+                 'UserIdGroupPairs': [{'GroupId': group_id}]}
+                for permission in group.get(key, [])
+                if any(pair.get('GroupId') == group_id
+                       for pair in permission.get('UserIdGroupPairs', []))
+            ]
+            if permissions:
+                references.append((revoke, group['GroupId'], permissions))
+    return references
+
+
+def _revoke_ignoring_missing(revoke: Callable[..., Any], group_id: str,
+                             permissions: List[dict]) -> None:
+    """Revoke rules from a group; a group or rule already gone is fine."""
+    from botocore.exceptions import ClientError
+
+    try:
+        revoke(GroupId=group_id, IpPermissions=permissions)
+    except ClientError as e:
+        if 'NotFound' not in e.response.get('Error', {}).get('Code', ''):
+            raise
+
+
+def _wait_endpoint_deleted(ec2: Any, endpoint_id: str) -> None:
+    """Poll until a VPC endpoint is gone; EC2 has no waiter for it."""
+    from botocore.exceptions import ClientError
+
+    for _ in range(WAITER_CONFIG["MaxAttempts"]):
+        try:
+            endpoints = ec2.describe_vpc_endpoints(
+                VpcEndpointIds=[endpoint_id]).get('VpcEndpoints', [])
+        except ClientError as e:
+            if 'NotFound' in e.response.get('Error', {}).get('Code', ''):
+                return
+            raise
+        if all(endpoint.get('State', '').lower() == 'deleted' for endpoint in endpoints):
+            return
+        time.sleep(WAITER_CONFIG["Delay"])
+    raise TimeoutError(f"VPC endpoint {endpoint_id} was not deleted in time")
+
+
+def build_network_plan(account: AWSAccount, region: str) -> DeletionPlan:
+    """Plan the teardown of every non-default VPC stack in a region.
+
+    Edges follow EC2's dependency rules: instances before their volumes
+    and ENIs; those, NAT gateways and VPC endpoints before the security
+    groups and subnets they sit in; NAT gateways before the internet
+    gateway and the Elastic IPs they hold; and everything (route tables
+    included) before the VPC itself. Default VPCs, default security
+    groups, main route tables and requester-managed ENIs are left alone,
+    as is anything outside the planned VPCs (unattached volumes included).
+    """
+    ec2 = account.get_client('ec2', region)
+    plan = DeletionPlan()
+
+    vpcs = [vpc for vpc in _paginate(ec2, 'describe_vpcs', 'Vpcs')
+            if not vpc.get('IsDefault')]
+    vpc_ids = [vpc['VpcId'] for vpc in vpcs]
+    if not vpc_ids:
+        return plan
+    vpc_filter = [{'Name': 'vpc-id', 'Values': vpc_ids}]
+
+    def add(resource_id: str, resource_type: str, delete: Callable[[], Any],
+            depends_on: Iterable[str] = (),
+            wait: Optional[Callable[[], Any]] = None) -> None:
+        plan.add(DeletionNode(resource_id, 'ec2', resource_type, region, delete,
+                              wait=wait, depends_on=set(depends_on),
+                              estimated_seconds=ESTIMATED_SECONDS[resource_type]))
+
+    # Instances
+    instances = [
+        instance
+        for reservation in _paginate(
+            ec2, 'describe_instances', 'Reservations',
+            Filters=vpc_filter + [{'Name': 'instance-state-name',
+                                   'Values': ['pending', 'running', 'stopping', 'stopped']}]
+        )
+        for instance in reservation.get('Instances', [])
+    ]
+    by_vpc: Dict[str, List[str]] = {vpc_id: [] for vpc_id in vpc_ids}
+    by_subnet: Dict[str, List[str]] = {}
+    for instance in instances:
+        instance_id = instance['InstanceId']
+        by_vpc.setdefault(instance.get('VpcId'), []).append(instance_id)
+        by_subnet.setdefault(instance.get('SubnetId'), []).append(instance_id)
+        add(instance_id, 'instance',
+            lambda i=instance_id: ec2.terminate_instances(InstanceIds=[i]),
+            wait=lambda i=instance_id: ec2.get_waiter('instance_terminated').wait(
+                InstanceIds=[i], WaiterConfig=WAITER_CONFIG))
+
+    # Volumes that would outlive their terminated instance
+    planned_instances = sorted(instance['InstanceId'] for instance in instances)
+    volumes = _paginate(ec2, 'describe_volumes', 'Volumes', Filters=[
+        {'Name': 'attachment.instance-id', 'Values': planned_instances}
+    ]) if planned_instances else []
+    for volume in volumes:
+        attachments = volume.get('Attachments', [])
+        if not attachments or any(a['InstanceId'] not in planned_instances
+                                  or a.get('DeleteOnTermination')
+                                  for a in attachments):
+            continue
+        volume_id = volume['VolumeId']
+        add(volume_id, 'volume',
+            lambda v=volume_id: ec2.delete_volume(VolumeId=v),
+            depends_on=[a['InstanceId'] for a in attachments])
+
+    # Network interfaces
+    enis_by_vpc: Dict[str, List[str]] = {}
+    enis_by_subnet: Dict[str, List[str]] = {}
+    for eni in _paginate(ec2, 'describe_network_interfaces', 'NetworkInterfaces',
+                         Filters=vpc_filter):
+        attachment = eni.get('Attachment') or {}
+        if eni.get('RequesterManaged') or attachment.get('DeleteOnTermination'):
+            continue
+        eni_id = eni['NetworkInterfaceId']
+        enis_by_vpc.setdefault(eni.get('VpcId'), []).append(eni_id)
+        enis_by_subnet.setdefault(eni.get('SubnetId'), []).append(eni_id)
+        add(eni_id, 'network_interface',
+            lambda n=eni_id: ec2.delete_network_interface(NetworkInterfaceId=n),
+            depends_on=[attachment['InstanceId']] if attachment.get('InstanceId') else [])
+
+    # NAT gateways hold an ENI in their subnet and a public address in the VPC
+    nats_by_vpc: Dict[str, List[str]] = {}
+    nats_by_subnet: Dict[str, List[str]] = {}
+    for nat in _paginate(ec2, 'describe_nat_gateways', 'NatGateways',
+                         Filter=vpc_filter + [{'Name': 'state',
+                                               'Values': ['pending', 'available']}]):
+        nat_id = nat['NatGatewayId']
+        nats_by_vpc.setdefault(nat.get('VpcId'), []).append(nat_id)
+        nats_by_subnet.setdefault(nat.get('SubnetId'), []).append(nat_id)
+        add(nat_id, 'nat_gateway',
+            lambda n=nat_id: ec2.delete_nat_gateway(NatGatewayId=n),
+            wait=lambda n=nat_id: ec2.get_waiter('nat_gateway_deleted').wait(
+                NatGatewayIds=[n], WaiterConfig=WAITER_CONFIG))
+        # Deleting the gateway leaves its Elastic IPs allocated (and billed)
+        for address in nat.get('NatGatewayAddresses', []):
+            allocation_id = address.get('AllocationId')
+            if allocation_id:
+                add(allocation_id, 'elastic_ip',
+                    lambda a=allocation_id: ec2.release_address(AllocationId=a),
+                    depends_on=[nat_id])
+
+    # VPC endpoints; interface endpoints hold ENIs in subnets and use groups
+    endpoints_by_vpc: Dict[str, List[str]] = {}
+    endpoints_by_subnet: Dict[str, List[str]] = {}
+    endpoints_by_group: Dict[str, List[str]] = {}
+    for endpoint in _paginate(ec2, 'describe_vpc_endpoints', 'VpcEndpoints',
+                              Filters=vpc_filter):
+        if endpoint.get('State', '').lower() in ('deleting', 'deleted'):
+            continue
+        endpoint_id = endpoint['VpcEndpointId']
+        endpoints_by_vpc.setdefault(endpoint.get('VpcId'), []).append(endpoint_id)
+        for subnet_id in endpoint.get('SubnetIds', []):
+            endpoints_by_subnet.setdefault(subnet_id, []).append(endpoint_id)
+        for group in endpoint.get('Groups', []):
+            endpoints_by_group.setdefault(group['GroupId'], []).append(endpoint_id)
+        add(endpoint_id, 'vpc_endpoint',
+            lambda e=endpoint_id: ec2.delete_vpc_endpoints(VpcEndpointIds=[e]),
+            wait=lambda e=endpoint_id: _wait_endpoint_deleted(ec2, e))
+
+    # Security groups, once nothing in the VPC uses them
+    groups = _paginate(ec2, 'describe_security_groups', 'SecurityGroups',
+                       Filters=vpc_filter)
+    groups_by_vpc: Dict[str, List[str]] = {}
+    for group in groups:
+        if group.get('GroupName') == 'default':
+            continue
+        group_id, vpc_id = group['GroupId'], group.get('VpcId')
+        groups_by_vpc.setdefault(vpc_id, []).append(group_id)
+        references = _group_references(groups, group_id)
+
+        def delete_group(g: str = group_id,
+                         references: List[Tuple[str, str, List[dict]]] = references
+                         ) -> None:
+            # Groups can reference each other, so rather than order them the
+            # rules pointing at this group are revoked before it is deleted
+            for revoke, referencing_id, permissions in references:
+                _revoke_ignoring_missing(getattr(ec2, revoke), referencing_id, permissions)
+            ec2.delete_security_group(GroupId=g)
+
+        add(group_id, 'security_group', delete_group,
+            depends_on=(by_vpc.get(vpc_id, []) + enis_by_vpc.get(vpc_id, [])
+                        + endpoints_by_group.get(group_id, [])))
+
+    # Subnets
+    subnets_by_vpc: Dict[str, List[str]] = {}
+    for subnet in _paginate(ec2, 'describe_subnets', 'Subnets', Filters=vpc_filter):
+        subnet_id = subnet['SubnetId']
+        subnets_by_vpc.setdefault(subnet.get('VpcId'), []).append(subnet_id)
+        add(subnet_id, 'subnet',
+            lambda s=subnet_id: ec2.delete_subnet(SubnetId=s),
+            depends_on=(by_subnet.get(subnet_id, []) + enis_by_subnet.get(subnet_id, [])
+                        + nats_by_subnet.get(subnet_id, [])
+                        + endpoints_by_subnet.get(subnet_id, [])))
+
+    # Route tables other than the main one, disassociated first
+    tables_by_vpc: Dict[str, List[str]] = {}
+    for table in _paginate(ec2, 'describe_route_tables', 'RouteTables', Filters=vpc_filter):
+        associations = table.get('Associations', [])
+        if any(association.get('Main') for association in associations):
+            continue
+        table_id = table['RouteTableId']
+        tables_by_vpc.setdefault(table.get('VpcId'), []).append(table_id)
+        association_ids = [association['RouteTableAssociationId']
+                           for association in associations
+                           if association.get('RouteTableAssociationId')]
+
+        def delete_table(t: str = table_id,
+                         association_ids: List[str] = association_ids) -> None:
+            for association_id in association_ids:
+                ec2.disassociate_route_table(AssociationId=association_id)
+            ec2.delete_route_table(RouteTableId=t)
+
+        add(table_id, 'route_table', delete_table)
+
+    # Internet gateways are detached and deleted once instances and NAT
+    # gateways (whose public addresses are mapped through them) are gone
+    gateways_by_vpc: Dict[str, List[str]] = {}
+    for gateway in _paginate(ec2, 'describe_internet_gateways', 'InternetGateways',
+                             Filters=[{'Name': 'attachment.vpc-id', 'Values': vpc_ids}]):
+        gateway_id = gateway['InternetGatewayId']
+        for attachment in gateway.get('Attachments', []):
+            vpc_id = attachment['VpcId']
+            gateways_by_vpc.setdefault(vpc_id, []).append(gateway_id)
+
+            def delete_gateway(g: str = gateway_id, v: str = vpc_id) -> None:
+                ec2.detach_internet_gateway(InternetGatewayId=g, VpcId=v)
+                ec2.delete_internet_gateway(InternetGatewayId=g)
+
+            add(gateway_id, 'internet_gateway', delete_gateway,
+                depends_on=by_vpc.get(vpc_id, []) + nats_by_vpc.get(vpc_id, []))
+
+    for vpc_id in vpc_ids:
+        add(vpc_id, 'vpc', lambda v=vpc_id: ec2.delete_vpc(VpcId=v),
+            depends_on=(subnets_by_vpc.get(vpc_id, []) + groups_by_vpc.get(vpc_id, [])
+                        + gateways_by_vpc.get(vpc_id, []) + tables_by_vpc.get(vpc_id, [])
+                        + nats_by_vpc.get(vpc_id, []) + endpoints_by_vpc.get(vpc_id, [])))
+
+    return plan
+
+
+def build_plan(account: AWSAccount, regions: List[str],
+               max_workers: int = DEFAULT_DELETE_WORKERS) -> DeletionPlan:
+    """Discover and merge the network teardown plans of several regions.
+
+    A region that cannot be inspected contributes no nodes; the cleaner
+    still gets its turn there afterwards.
+    """
+    def discover(region: str) -> DeletionPlan:
+        try:
+            return build_network_plan(account, region)
+        except Exception as e:
+            logger.warning(f"Could not plan network teardown in {region}: {e}")
+            return DeletionPlan()
+
+    plan = DeletionPlan()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for regional in pool.map(discover, regions):
+            plan.merge(regional)
+    return plan
+
+
+def plan_applies(services: Optional[List[str]]) -> bool:
+    """Check whether the requested services include the network stack."""
+    return not services or bool(NETWORK_SERVICES & set(services))
+
+
+def describe_plan(plan: DeletionPlan) -> Dict[str, Any]:
+    """Summarize a plan's levels and critical path for display or JSON."""
+    seconds, path = plan.critical_path()
+    return {
+        "resources": len(plan.nodes),
+        "levels": [
+            [{**node.to_dict(), "depends_on": sorted(
+                key.split(':', 1)[1] for key in plan._dependencies(node))}
+             for node in level]
+            for level in plan.levels()
+        ],
+        "critical_path_seconds": seconds,
+        "critical_path": [node.resource_id for node in path],
+    }
+
+
+def merge_clean_results(plan_results: Dict[str, Any],
+                        cleaner_results: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine planner and cleaner results without double-counting resources."""
+    merged = dict(cleaner_results)
+    cleaned = list(plan_results.get("cleaned_resources", []))
+    seen = {resource.get("resource_id") for resource in cleaned}
+    for resource in cleaner_results.get("cleaned_resources", []):
+        if resource.get("resource_id") not in seen:
+            cleaned.append(resource)
+    merged["cleaned_resources"] = cleaned
+    for key in ("failed_resources", "skipped_resources"):
+        if plan_results.get(key):
+            merged[key] = list(cleaner_results.get(key, [])) + plan_results[key]
+    return merged
@@ -0,0 +1,273 @@
+"""Fast resource discovery from AWS Config and the Resource Groups Tagging API.
+
+A few paginated inventory calls tell which (region, service) cells hold
+resources at all, so the per-service describe calls only run where there
+is something to inspect.
+"""
+
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.lib.scan_engine import ScanJob
+from src.models.aws_account import DEFAULT_TEST_ACCOUNT_ID, AWSAccount
+
+logger = logging.getLogger(__name__)
+
+# AWS Config resource types recorded for each scanned service
+SERVICE_RESOURCE_TYPES = {
+    "ec2": ("AWS::EC2::Instance", "AWS::EC2::Volume", "AWS::EC2::EIP"),
+    "vpc": ("AWS::EC2::VPC", "AWS::EC2::Subnet", "AWS::EC2::SecurityGroup",
+            "AWS::EC2::InternetGateway", "AWS::EC2::NatGateway",
+            "AWS::EC2::NetworkInterface"),
+    "lambda": ("AWS::Lambda::Function",),
+    "rds": ("AWS::RDS::DBInstance", "AWS::RDS::DBSnapshot"),
+    "cloudwatch": ("AWS::CloudWatch::Alarm", "AWS::Logs::LogGroup"),
+    "dynamodb": ("AWS::DynamoDB::Table",),
+    "sns": ("AWS::SNS::Topic",),
+    "sqs": ("AWS::SQS::Queue",),
+}
+
+# ARN service/resource-type prefixes for each scanned service
+SERVICE_ARN_PREFIXES = {
+    "ec2": ("ec2:instance", "ec2:volume", "ec2:elastic-ip"),
+    "vpc": ("ec2:vpc", "ec2:subnet", "ec2:security-group", "ec2:internet-gateway",
+            "ec2:natgateway", "ec2:network-interface"),
+    "lambda": ("lambda:function",),
+    "rds": ("rds:db", "rds:snapshot"),
+    "cloudwatch": ("cloudwatch:alarm", "logs:log-group"),
+    "dynamodb": ("dynamodb:table",),
+    "sns": ("sns:",),
+    "sqs": ("sqs:",),
+}
+
+# Cells discovery can rule out; global services such as S3 and IAM are
+# always enumerated, since their inventory is not per region
+DISCOVERY_SERVICES = list(SERVICE_RESOURCE_TYPES)
+
+# Minimum describe/list calls a full enumeration spends on an empty cell
+ENUMERATION_CALLS = {
+    "ec2": 3,
+    "vpc": 6,
+    "lambda": 1,
+    "rds": 2,
+    "cloudwatch": 2,
+    "dynamodb": 1,
+    "sns": 1,
+    "sqs": 1,
+}
+
+_COUNT_QUERY = ("SELECT resourceType, COUNT(*) "
+                "WHERE configurationItemStatus IN ('OK', 'ResourceDiscovered') "
+                "GROUP BY resourceType")
+_AGGREGATE_COUNT_QUERY = ("SELECT resourceType, awsRegion, COUNT(*) "
+                          "WHERE configurationItemStatus IN ('OK', 'ResourceDiscovered') "
+                          "AND accountId = '{account_id}' "
+                          "GROUP BY resourceType, awsRegion")
+
+
+def service_for_arn(arn: str) -> Optional[str]:
+    """Map a resource ARN onto the scanned service it belongs to."""
+    parts = arn.split(":", 5)
+    if len(parts) < 6:
+        return None
+    resource = f"{parts[2]}:{parts[5]}"
+    for service, prefixes in SERVICE_ARN_PREFIXES.items():
+        if resource.startswith(prefixes):
+            return service
+    return None
+
+
+def empty_analysis(job: ScanJob) -> Dict[str, Any]:
+    """Analysis of a cell discovery found empty, in comprehensive_analysis shape."""
+    return {
+        'total_resources_found': 0,
+        'regions_analyzed': [{
+            'region': job.region,
+            'services': {job.service: {'resource_count': 0, 'resources': []}},
+            'recommendations': [],
+        }],
+        'recommendations': [],
+        'risk_assessment': {'overall_risk': "LOW", 'risk_factors': []},
+    }
+
+
+class FastDiscovery:
+    """Per-(region, service) resource counts from inventory APIs.
+
+    AWS Config counts every recorded resource, so its empty cells are
+    authoritative. The tagging API only returns resources that carry (or
+    carried) tags, so it is consulted only with use_tagging, where Config
+    is off; the cells it skips are reported as unverified.
+    """
+
+    def __init__(self, aggregator: Optional[str] = None, use_config: bool = True,
+                 use_tagging: bool = False):
+        self.aggregator = aggregator
+        self.use_config = use_config
+        self.use_tagging = use_tagging
+        self.counts: Dict[Tuple[str, str], int] = {}
+        self.sources: Dict[str, str] = {}
+        self.covered: Dict[str, Set[str]] = {}
+        self.requests = 0
+
+    def _recorded_types(self, config: Any) -> Optional[Set[str]]:
+        """Get the resource types the region's recorder captures, or None if off."""
+        self.requests += 1
+        statuses = config.describe_configuration_recorder_status().get(
+            'ConfigurationRecordersStatus', [])
+        if not any(status.get('recording') for status in statuses):
+            return None
+        self.requests += 1
+        recorders = config.describe_configuration_recorders().get(
+            'ConfigurationRecorders', [])
+        types: Set[str] = set()
+        for recorder in recorders:
+            group = recorder.get('recordingGroup', {})
+            if group.get('allSupported', True):
+                return {t for types_ in SERVICE_RESOURCE_TYPES.values() for t in types_}
+            types.update(group.get('resourceTypes', []))
+        return types
+
+    def _aggregated_regions(self, config: Any, regions: List[str]) -> Set[str]:
+        """Get which of the regions the aggregator collects from."""
+        self.requests += 1
+        aggregators = config.describe_configuration_aggregators(
+            ConfigurationAggregatorNames=[self.aggregator]).get('ConfigurationAggregators', [])
+        sources = []
+        for aggregator in aggregators:
+            sources.extend(aggregator.get('AccountAggregationSources', []))
+            if aggregator.get('OrganizationAggregationSource'):
+                sources.append(aggregator['OrganizationAggregationSource'])
+        if any(source.get('AllAwsRegions') for source in sources):
+            return set(regions)
+        listed = {region for source in sources for region in source.get('AwsRegions', [])}
+        return set(regions) & listed
+
+    def _select(self, config: Any, expression: str) -> List[Dict[str, Any]]:
+        """Run an advanced query, following NextToken."""
+        rows = []
+        params: Dict[str, Any] = {'Expression': expression}
+        if self.aggregator:
+            params['ConfigurationAggregatorName'] = self.aggregator
+        select = (config.select_aggregate_resource_config if self.aggregator
+                  else config.select_resource_config)
+        while True:
+            self.requests += 1
+            response = select(**params)
+            rows.extend(json.loads(row) for row in response.get('Results', []))
+            if not response.get('NextToken'):
+                return rows
+            params['NextToken'] = response['NextToken']
+
+    def _add_type_counts(self, region: str, counts: Dict[str, int],
+                         covered: Set[str]) -> None:
+        """Fold per-resource-type counts into per-service cells."""
+        services = {service for service, types in SERVICE_RESOURCE_TYPES.items()
+                    if set(types) <= covered}
+        self.covered[region] = services
+        self.sources[region] = "config"
+        for service in services:
+            self.counts[(region, service)] = sum(
+                counts.get(t, 0) for t in SERVICE_RESOURCE_TYPES[service])
+
+    def _collect_config(self, account: AWSAccount, regions: List[str]) -> Set[str]:
+        """Count resources from AWS Config; return the regions it covered."""
+        if self.aggregator:
+            # One query answers every region the aggregator collects
+            config = account.get_client('config', account.region)
+            aggregated = self._aggregated_regions(config, regions)
+            per_region: Dict[str, Dict[str, int]] = {}
+            account_id = account.get_account_id()
+            if account_id == DEFAULT_TEST_ACCOUNT_ID:
+                # Counting a placeholder account would make every cell look empty
+                raise ValueError("Account ID unknown, cannot filter the aggregator")
+            query = _AGGREGATE_COUNT_QUERY.format(account_id=account_id)
+            for row in self._select(config, query):
+                counts = per_region.setdefault(row.get('awsRegion', ""), {})
+                counts[row['resourceType']] = row.get('COUNT(*)', 0)
+            all_types = {t for types in SERVICE_RESOURCE_TYPES.values() for t in types}
+            for region in aggregated:
+                self._add_type_counts(region, per_region.get(region, {}), all_types)
+            return aggregated
+
+        covered_regions = set()
+        for region in regions:
+            config = account.get_client('config', region)
+            try:
+                recorded = self._recorded_types(config)
+                if recorded is None:
+                    continue
+                counts = {row['resourceType']: row.get('COUNT(*)', 0)
+                          for row in self._select(config, _COUNT_QUERY)}
+            except Exception as e:
+                logger.info(f"AWS Config inventory unavailable in {region}: {e}")
+                continue
+            self._add_type_counts(region, counts, recorded)
+            covered_regions.add(region)
+        return covered_regions
+
+    def _collect_tagging(self, account: AWSAccount, region: str) -> None:
+        """Count tagged resources per service from the tagging API."""
+        tagging = account.get_client('resourcegroupstaggingapi', region)
+        counts = {service: 0 for service in DISCOVERY_SERVICES}
+        params: Dict[str, Any] = {'ResourcesPerPage': 100}
+        while True:
+            self.requests += 1
+            response = tagging.get_resources(**params)
+            for item in response.get('ResourceTagMappingList', []):
+                service = service_for_arn(item.get('ResourceARN', ""))
+                if service:
+                    counts[service] += 1
+            if not response.get('PaginationToken'):
+                break
+            params['PaginationToken'] = response['PaginationToken']
+        self.covered[region] = set(DISCOVERY_SERVICES)
+        self.sources[region] = "tagging"
+        for service, count in counts.items():
+            self.counts[(region, service)] = count
+
+    def collect(self, account: AWSAccount, regions: Iterable[str]) -> None:
+        """Query the inventory sources for every region."""
+        regions = list(regions)
+        covered = set()
+        if self.use_config:
+            try:
+                covered = self._collect_config(account, regions)
+            except Exception as e:
+                logger.info(f"AWS Config inventory unavailable: {e}")
+        for region in regions:
+            if region in covered:
+                continue
+            self.sources[region] = "none"
+            if self.use_tagging:
+                try:
+                    self._collect_tagging(account, region)
+                except Exception as e:
+                    logger.info(f"Tagging API inventory unavailable in {region}: {e}")
+
+    def prune(self, jobs: Iterable[ScanJob]) -> Tuple[List[ScanJob], List[ScanJob]]:
+        """Split jobs into those to scan and those discovery found empty."""
+        scan, skipped = [], []
+        for job in jobs:
+            if (job.service in self.covered.get(job.region, ())
+                    and self.counts.get((job.region, job.service), 0) == 0):
+                skipped.append(job)
+            else:
+                scan.append(job)
+        return scan, skipped
+
+    def report(self, skipped: List[ScanJob]) -> Dict[str, Any]:
+        """Summarize sources used and the describe/list calls avoided."""
+        avoided = sum(ENUMERATION_CALLS.get(job.service, 1) for job in skipped)
+        return {
+            'sources': dict(self.sources),
+            'requests': self.requests,
+            'skipped_cells': len(skipped),
+            'enumeration_calls_avoided': avoided,
+            'api_calls_saved': avoided - self.requests,
+            'unverified_cells': [
+                {'region': job.region, 'service': job.service} for job in skipped
+                if self.sources.get(job.region) == "tagging"
+            ],
+        }
@@ -0,0 +1,272 @@
+"""Streaming daily spend forecasts with rolling trend and day-of-month seasonality."""
+
+import calendar
+from array import array
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.lib.cost_store import RESTATEMENT_DAYS, CostStore
+from src.models.aws_account import AWSAccount
+
+DEFAULT_WINDOW = 28  # days in the rolling trend
+DEFAULT_SEASONAL_ALPHA = 0.3
+HISTORY_DAYS = 90  # days replayed when no saved state matches
+
+# Cost data fresher than this is reused without asking Cost Explorer again
+SYNC_MAX_AGE = 6 * 3600
+
+# Services inside the free tier bill $0; the first cent marks exhaustion
+CHARGE_THRESHOLD = 0.01
+
+
+def month_end(day: date) -> date:
+    """Get the first day of the month after day."""
+    last = calendar.monthrange(day.year, day.month)[1]
+    return day.replace(day=last) + timedelta(days=1)
+
+
+class ForecastBatch:
+    """Forecasts many aligned daily series at once with O(1) work per series per day.
+
+    All series share the same day axis, so the x-side sums of the rolling
+    least-squares fit are shared; each series only keeps its own running
+    sums of y and x*y, a ring buffer of the window, and an exponentially
+    weighted residual per day of month. State lives in flat arrays, one
+    row per series.
+    """
+
+    def __init__(self, keys: Sequence[str], window: int = DEFAULT_WINDOW,
+                 seasonal_alpha: float = DEFAULT_SEASONAL_ALPHA):
+        if window < 2:
+            raise ValueError("window must be at least 2 days")
+        self.keys: List[str] = list(keys)
+        self.window = window
+        self.seasonal_alpha = seasonal_alpha
+        self.next_day: Optional[date] = None
+        self.observed = 0  # days consumed so far; also the next x value
+
+        size = len(self.keys)
+        self._ring = array('d', bytes(8 * size * window))
+        self._sum_y = array('d', bytes(8 * size))
+        self._sum_xy = array('d', bytes(8 * size))
+        self._seasonal = array('d', bytes(8 * size * 31))
+
+    def _x_sums(self) -> Tuple[int, float, float]:
+        """Get (n, sum x, sum x^2) over the current window of day indexes."""
+        n = min(self.observed, self.window)
+        first = self.observed - n
+        last = self.observed - 1
+        sum_x = (first + last) * n / 2
+        sum_xx = (last * (last + 1) * (2 * last + 1)
+                  - (first - 1) * first * (2 * first - 1)) / 6
+        return n, sum_x, sum_xx
+
+    def _trend(self, x: float) -> array:
+        """Get the fitted trend value at day index x for every series."""
+        n, sum_x, sum_xx = self._x_sums()
+        size = len(self.keys)
+        if n == 0:
+            return array('d', bytes(8 * size))
+        denominator = n * sum_xx - sum_x * sum_x
+        result = array('d', bytes(8 * size))
+        sum_y, sum_xy = self._sum_y, self._sum_xy
+        for i in range(size):
+            if denominator:
+                slope = (n * sum_xy[i] - sum_x * sum_y[i]) / denominator
+            else:
+                slope = 0.0
+            result[i] = (sum_y[i] - slope * sum_x) / n + slope * x
+        return result
+
+    def update(self, day: date, values: Sequence[float]) -> None:
+        """Consume one day's value for every series, in key order.
+
+        Days must arrive in order; skipped days are treated as zero spend.
+        """
+        if len(values) != len(self.keys):
+            raise ValueError("one value per series is required")
+        if self.next_day is not None and day < self.next_day:
+            raise ValueError(f"{day} was already consumed")
+        while self.next_day is not None and self.next_day < day:
+            self.update(self.next_day, [0.0] * len(self.keys))
+
+        x = self.observed
+        expected = self._trend(x)
+        slot = x % self.window
+        offset = (day.day - 1)
+        alpha = self.seasonal_alpha
+        evicted = x - self.window
+        ring, seasonal = self._ring, self._seasonal
+        sum_y, sum_xy = self._sum_y, self._sum_xy
+
+        for i, value in enumerate(values):
+            value = float(value)
+            if self.observed:
+                residual = value - expected[i]
+                cell = i * 31 + offset
+                seasonal[cell] += alpha * (residual - seasonal[cell])
+            position = i * self.window + slot
+            if evicted >= 0:
+                old = ring[position]
+                sum_y[i] -= old
+                sum_xy[i] -= evicted * old
+            ring[position] = value
+            sum_y[i] += value
+            sum_xy[i] += x * value
+
+        self.observed += 1
+        self.next_day = day + timedelta(days=1)
+
+    def forecast(self, day: date) -> array:
+        """Get the forecast daily value for every series on a future day."""
+        if self.next_day is None:
+            return array('d', bytes(8 * len(self.keys)))
+        x = self.observed + (day - self.next_day).days
+        result = self._trend(x)
+        offset = day.day - 1
+        seasonal = self._seasonal
+        for i in range(len(result)):
+            result[i] = max(0.0, result[i] + seasonal[i * 31 + offset])
+        return result
+
+    def forecast_total(self, start: date, end: date) -> array:
+        """Sum the forecasts for every series over [start, end)."""
+        totals = array('d', bytes(8 * len(self.keys)))
+        day = start
+        while day < end:
+            for i, value in enumerate(self.forecast(day)):
+                totals[i] += value
+            day += timedelta(days=1)
+        return totals
+
+    def exhaustion_dates(self, start: date, end: date, used: Sequence[float],
+                         allowances: Sequence[float]) -> List[Optional[date]]:
+        """Get the first day in [start, end) when forecast spend passes each allowance.
+
+        used is what each series has already consumed before start; series
+        already over their allowance get start, and those that stay under
+        it get None.
+        """
+        cumulative = array('d', (float(value) for value in used))
+        dates: List[Optional[date]] = [
+            start if cumulative[i] > allowances[i] else None
+            for i in range(len(self.keys))
+        ]
+        day = start
+        while day < end and None in dates:
+            for i, value in enumerate(self.forecast(day)):
+                cumulative[i] += value
+                if dates[i] is None and cumulative[i] > allowances[i]:
+                    dates[i] = day
+            day += timedelta(days=1)
+        return dates
+
+    def to_state(self) -> Dict[str, Any]:
+        """Serialize the streaming state so later runs only feed new days."""
+        return {
+            'keys': self.keys,
+            'window': self.window,
+            'seasonal_alpha': self.seasonal_alpha,
+            'next_day': self.next_day.isoformat() if self.next_day else None,
+            'observed': self.observed,
+            'ring': self._ring.tolist(),
+            'sum_y': self._sum_y.tolist(),
+            'sum_xy': self._sum_xy.tolist(),
+            'seasonal': self._seasonal.tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'ForecastBatch':
+        """Restore a batch saved with to_state()."""
+        batch = cls(state['keys'], state['window'], state['seasonal_alpha'])
+        if state['next_day']:
+            batch.next_day = date.fromisoformat(state['next_day'])
+        batch.observed = state['observed']
+        batch._ring = array('d', state['ring'])
+        batch._sum_y = array('d', state['sum_y'])
+        batch._sum_xy = array('d', state['sum_xy'])
+        batch._seasonal = array('d', state['seasonal'])
+        return batch
+
+
+def forecast_costs(store: CostStore, account_id: str,
+                   today: Optional[date] = None) -> Dict[str, Any]:
+    """Project end-of-month and next-month spend per service from the cost store.
+
+    Only settled days (older than the Cost Explorer restatement window) are
+    fed into the saved streaming state, so each run consumes just the days
+    that settled since the previous one. Month-to-date figures use the
+    stored actuals; days after today use the forecast.
+    """
+    today = today or date.today()
+    tomorrow = today + timedelta(days=1)
+    settled_until = tomorrow - timedelta(days=RESTATEMENT_DAYS)
+    month_start = today.replace(day=1)
+    this_month_end = month_end(today)
+
+    state = store.load_forecast(account_id)
+    history_start = settled_until - timedelta(days=HISTORY_DAYS)
+    series = store.daily_series(account_id, min(history_start, month_start), tomorrow)
+    services = sorted({service for costs in series.values() for service in costs})
+
+    batch = None
+    if state and state['keys'] == services and state['next_day']:
+        batch = ForecastBatch.from_state(state)
+        if batch.next_day < history_start:
+            batch = None
+    if batch is None:
+        # New or changed set of services: replay the stored history
+        batch = ForecastBatch(services)
+
+    day = batch.next_day or history_start
+    while day < settled_until:
+        costs = series.get(day.isoformat(), {})
+        batch.update(day, [costs.get(service, 0.0) for service in services])
+        day += timedelta(days=1)
+    store.save_forecast(account_id, batch.to_state())
+
+    month_to_date = array('d', bytes(8 * len(services)))
+    charges_start: List[Optional[date]] = [None] * len(services)
+    day = month_start
+    while day < tomorrow:
+        costs = series.get(day.isoformat(), {})
+        for i, service in enumerate(services):
+            month_to_date[i] += costs.get(service, 0.0)
+            if charges_start[i] is None and month_to_date[i] > CHARGE_THRESHOLD:
+                charges_start[i] = day
+        day += timedelta(days=1)
+
+    remaining = batch.forecast_total(tomorrow, this_month_end)
+    next_month = batch.forecast_total(this_month_end, month_end(this_month_end))
+    projected = batch.exhaustion_dates(tomorrow, this_month_end, month_to_date,
+                                       [CHARGE_THRESHOLD] * len(services))
+
+    per_service = {}
+    for i, service in enumerate(services):
+        # The day spend starts, which is not necessarily when the free tier ran out
+        first_charge = charges_start[i] or projected[i]
+        per_service[service] = {
+            'month_to_date': month_to_date[i],
+            'end_of_month': month_to_date[i] + remaining[i],
+            'next_month': next_month[i],
+            'first_charge_on': first_charge.isoformat() if first_charge else None,
+        }
+
+    return {
+        'end_of_month_prediction': sum(month_to_date) + sum(remaining),
+        'next_month_prediction': sum(next_month),
+        'services': per_service,
+        'forecast_through': (settled_until - timedelta(days=1)).isoformat(),
+    }
+
+
+def forecast_account(account: AWSAccount, account_id: str,
+                     store: Optional[CostStore] = None,
+                     today: Optional[date] = None) -> Dict[str, Any]:
+    """Sync the cost store if it is stale, then forecast the account's spend."""
+    store = store or CostStore()
+    today = today or date.today()
+    start = today - timedelta(days=HISTORY_DAYS + RESTATEMENT_DAYS)
+    store.sync(account, account_id, start, today + timedelta(days=1),
+               max_age=SYNC_MAX_AGE)
+    return forecast_costs(store, account_id, today)
@@ -0,0 +1,208 @@
+"""Persistent on-disk inventory cache keyed by account, region and service."""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from src.lib.scan_engine import ScanJob
+from src.lib.serialization import json_default
+from src.models.aws_account import DEFAULT_TEST_ACCOUNT_ID, AWSAccount
+
+logger = logging.getLogger(__name__)
+
+ALL_SERVICES = "*"
+
+DEFAULT_TTL = 600  # seconds
+
+# Inventories that churn slowly can be trusted for longer
+SERVICE_TTLS = {
+    "ec2": 300,
+    "lambda": 900,
+    "rds": 900,
+    "s3": 3600,
+    "cloudwatch": 1800,
+    "vpc": 3600,
+    "iam": 86400,
+}
+
+ACCOUNT_ID_TTL = 86400
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS inventory (
+    account_id TEXT NOT NULL,
+    region TEXT NOT NULL,
+    service TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (account_id, region, service)
+);
+CREATE TABLE IF NOT EXISTS account_ids (
+    access_key_id TEXT PRIMARY KEY,
+    account_id TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+def credential_identity(account: AWSAccount) -> Optional[str]:
+    """Get the access key ID the account's requests are signed with, if any."""
+    try:
+        credentials = account.get_session().get_credentials()
+        return credentials.get_frozen_credentials().access_key if credentials else None
+    except Exception as e:
+        logger.warning(f"Could not resolve AWS credentials: {e}")
+        return None
+
+
+def default_cache_dir() -> Path:
+    """Get the cache directory, honouring AWS_FREE_GUARD_CACHE_DIR and XDG."""
+    override = os.environ.get("AWS_FREE_GUARD_CACHE_DIR")
+    if override:
+        return Path(override)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "aws-free-guard"
+
+
+class InventoryCache:
+    """SQLite-backed cache of per-(region, service) analysis results."""
+
+    def __init__(self, path: Optional[Path] = None,
+                 ttls: Optional[Dict[str, int]] = None,
+                 default_ttl: int = DEFAULT_TTL):
+        self.path = Path(path) if path else default_cache_dir() / "inventory.db"
+        self.ttls = dict(SERVICE_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._account_ids: Dict[str, str] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection, creating the database on first use."""
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=10)
+        if not self._initialized:
+            # WAL lets overlapping cron runs read while another one writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._initialized = True
+        return conn
+
+    def ttl_for(self, service: Optional[str]) -> int:
+        """Get the TTL in seconds for a service cell."""
+        if not service or service == ALL_SERVICES:
+            return self.default_ttl
+        return self.ttls.get(service, self.default_ttl)
+
+    def lookup(self, account_id: str, jobs: Iterable[ScanJob],
+               max_age: Optional[float] = None) -> Dict[ScanJob, Dict[str, Any]]:
+        """Get the cached analyses that are still fresh for the given jobs.
+
+        Freshness uses max_age when given, otherwise each service's TTL.
+        """
+        if account_id == DEFAULT_TEST_ACCOUNT_ID:
+            return {}
+        now = time.time()
+        fresh: Dict[ScanJob, Dict[str, Any]] = {}
+        try:
+            with self._lock, closing(self._connect()) as conn:
+                for job in jobs:
+                    row = conn.execute(
+                        "SELECT fetched_at, payload FROM inventory "
+                        "WHERE account_id = ? AND region = ? AND service = ?",
+                        (account_id, job.region, job.service or ALL_SERVICES)
+                    ).fetchone()
+                    if row is None:
+                        continue
+                    fetched_at, payload = row
+                    limit = self.ttl_for(job.service) if max_age is None else max_age
+                    if now - fetched_at <= limit:
+                        analysis = json.loads(payload)
+                        analysis["cached_at"] = fetched_at
+                        fresh[job] = analysis
+        except sqlite3.Error as e:
+            logger.warning(f"Inventory cache unavailable, rescanning: {e}")
+            return {}
+        return fresh
+
+    def store(self, account_id: str, job: ScanJob, analysis: Dict[str, Any]) -> None:
+        """Store a job's analysis, replacing any previous entry.
+
+        Nothing is stored under the placeholder ID of a failed STS lookup,
+        where it would mix with every other account's inventory.
+        """
+        if account_id == DEFAULT_TEST_ACCOUNT_ID:
+            return
+        payload = json.dumps(analysis, default=json_default)
+        try:
+            with self._lock, closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO inventory "
+                    "(account_id, region, service, fetched_at, payload) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (account_id, job.region, job.service or ALL_SERVICES,
+                     time.time(), payload)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not update inventory cache: {e}")
+
+    def invalidate(self, account_id: str) -> None:
+        """Drop every cached cell for an account."""
+        try:
+            with self._lock, closing(self._connect()) as conn, conn:
+                conn.execute("DELETE FROM inventory WHERE account_id = ?",
+                             (account_id,))
+        except sqlite3.Error as e:
+            logger.warning(f"Could not invalidate inventory cache: {e}")
+
+    def resolve_account_id(self, account: AWSAccount) -> str:
+        """Get the account ID, caching the STS lookup per access key.
+
+        Keying on the credentials rather than the profile name means a
+        change of environment credentials or AWS_PROFILE is never answered
+        with another account's ID, so lookups are kept on disk whatever the
+        credential source. A failed lookup (the placeholder ID) is never
+        cached.
+        """
+        if account.account_id:
+            return account.account_id
+
+        identity = credential_identity(account)
+        if identity is None:
+            return account.get_account_id()
+        if identity in self._account_ids:
+            return self._account_ids[identity]
+        try:
+            with self._lock, closing(self._connect()) as conn:
+                row = conn.execute(
+                    "SELECT account_id, fetched_at FROM account_ids "
+                    "WHERE access_key_id = ?",
+                    (identity,)
+                ).fetchone()
+            if row and time.time() - row[1] <= ACCOUNT_ID_TTL:
+                self._account_ids[identity] = row[0]
+                return row[0]
+        except sqlite3.Error as e:
+            logger.warning(f"Inventory cache unavailable: {e}")
+
+        account_id = account.get_account_id()
+        if account_id == DEFAULT_TEST_ACCOUNT_ID:
+            # STS lookup failed; try again next time
+            return account_id
+        self._account_ids[identity] = account_id
+        try:
+            with self._lock, closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO account_ids "
+                    "(access_key_id, account_id, fetched_at) VALUES (?, ?, ?)",
+                    (identity, account_id, time.time())
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not update inventory cache: {e}")
+        return account_id
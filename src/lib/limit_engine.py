@@ -0,0 +1,259 @@
+"""Batched free tier limit evaluation over columnar usage data."""
+
+import threading
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from src.lib.scan_engine import RISK_LEVELS, ScanResult
+from src.models.aws_resource import ResourceStatus
+from src.models.free_tier_limit import (RESOURCE_TYPE_LIMITS, FreeTierLimit,
+                                        SharedLimits)
+
+
+class LimitCatalog:
+    """Free tier limits compiled once into an index and parallel columns."""
+
+    def __init__(self, limits: Dict[str, FreeTierLimit]):
+        self.names: List[str] = list(limits)
+        self.limits: List[FreeTierLimit] = [limits[name] for name in self.names]
+        self.limit_values = array('d', (limit.limit_value for limit in self.limits))
+        self.always_free = array('b', (limit.always_free for limit in self.limits))
+        self.units: List[str] = [limit.limit_unit for limit in self.limits]
+
+        position = {name: index for index, name in enumerate(self.names)}
+        self.index: Dict[Tuple[str, str], Tuple[int, ...]] = {}
+        for index, limit in enumerate(self.limits):
+            key = (limit.service, limit.resource_type)
+            self.index[key] = self.index.get(key, ()) + (index,)
+        for key, names in RESOURCE_TYPE_LIMITS.items():
+            self.index[key] = tuple(position[name] for name in names if name in position)
+        self._limit_dicts = {
+            key: {self.units[i]: self.limit_values[i] for i in indexes}
+            for key, indexes in self.index.items()
+        }
+
+    @classmethod
+    def common(cls) -> 'LimitCatalog':
+        """Get the compiled catalog of common free tier limits."""
+        global _COMMON_CATALOG
+        if _COMMON_CATALOG is None:
+            _COMMON_CATALOG = cls(FreeTierLimit.get_common_limits())
+        return _COMMON_CATALOG
+
+    def lookup(self, service: str, resource_type: str) -> Tuple[int, ...]:
+        """Get the catalog positions of the limits that apply to a resource type."""
+        return self.index.get((service, resource_type), ())
+
+    def limit_dict(self, service: str, resource_type: str) -> Dict[str, float]:
+        """Get the limits for a resource type as a usage-key -> limit mapping."""
+        return self._limit_dicts.get((service, resource_type), {})
+
+
+_COMMON_CATALOG: Optional[LimitCatalog] = None
+
+
+@dataclass
+class EvaluationResult:
+    """Per-resource statuses and account-wide utilization per limit.
+
+    A status is None for a resource the engine does not judge.
+    """
+
+    statuses: List[Optional[ResourceStatus]]
+    utilization: Dict[str, Dict[str, Any]]
+
+    def exceeded(self) -> List[str]:
+        """Get the names of limits whose account-wide usage is over the allowance."""
+        return [name for name, data in self.utilization.items() if data['exceeded']]
+
+
+def _fields(resource: Any) -> Tuple[str, str, Mapping[str, Any], Mapping[str, Any]]:
+    """Get (service, resource_type, usage, own limits) of a model or decoded resource."""
+    if isinstance(resource, dict):
+        return (resource.get('service'), resource.get('resource_type'),
+                resource.get('current_usage') or {}, resource.get('free_tier_limit') or {})
+    return (resource.service, resource.resource_type, resource.current_usage,
+            resource.free_tier_limit)
+
+
+def _set_status(resource: Any, status: ResourceStatus) -> None:
+    """Set the status of a model or decoded resource."""
+    if isinstance(resource, dict):
+        resource['status'] = status.value
+    else:
+        resource.status = status
+
+
+class LimitEngine:
+    """Evaluates every resource against the catalog in one batched pass.
+
+    Usage is gathered into columns of (resource, limit, amount) rows and
+    summed per limit, so account-wide allowances (e.g. 750 EC2 hours shared
+    by every instance) are judged on the total rather than per resource.
+    Resources may be AWSResources or their decoded (cached) dicts.
+
+    Only resources carrying the shared catalog limits (see
+    AWSResource.from_catalog) and usage for at least one of them are
+    judged. The enforcer's resources, with their own or no limits, and
+    resources without usage data keep the status they were given.
+    """
+
+    def __init__(self, catalog: Optional[LimitCatalog] = None):
+        self.catalog = catalog or LimitCatalog.common()
+
+    def new_totals(self) -> array:
+        """Get a zeroed per-limit usage column."""
+        return array('d', bytes(8 * len(self.catalog.names)))
+
+    def evaluate(self, resources: Sequence[Any], totals: Optional[array] = None,
+                 counted: bool = False) -> EvaluationResult:
+        """Evaluate resources and return statuses plus per-limit utilization.
+
+        With totals (a running per-limit column, see UsageTally) the
+        resources' usage is added to it, unless already counted, and they
+        are judged against everything it holds.
+        """
+        catalog = self.catalog
+        row_resource = array('l')
+        row_limit = array('l')
+        row_usage = array('d')
+
+        for position, resource in enumerate(resources):
+            service, resource_type, usage, own_limits = _fields(resource)
+            if not own_limits or not self._is_catalog_limits(service, resource_type,
+                                                             own_limits):
+                continue
+            for limit_index in catalog.lookup(service, resource_type):
+                amount = usage.get(catalog.names[limit_index],
+                                   usage.get(catalog.units[limit_index]))
+                if amount is None:
+                    continue
+                row_resource.append(position)
+                row_limit.append(limit_index)
+                row_usage.append(amount if isinstance(amount, (int, float)) else 0)
+
+        if totals is None:
+            totals, counted = self.new_totals(), False
+        if not counted:
+            for limit_index, amount in zip(row_limit, row_usage):
+                totals[limit_index] += amount
+        over = [not catalog.always_free[i] and totals[i] > catalog.limit_values[i]
+                for i in range(len(catalog.names))]
+
+        matched = bytearray(len(resources))
+        charged = bytearray(len(resources))
+        for position, limit_index in zip(row_resource, row_limit):
+            matched[position] = 1
+            if over[limit_index]:
+                charged[position] = 1
+
+        statuses: List[Optional[ResourceStatus]] = []
+        for position in range(len(resources)):
+            if not matched[position]:
+                statuses.append(None)
+            elif charged[position]:
+                statuses.append(ResourceStatus.CHARGED)
+            else:
+                statuses.append(ResourceStatus.FREE)
+
+        utilization = {}
+        for i, name in enumerate(catalog.names):
+            limit_value = catalog.limit_values[i]
+            utilization[name] = {
+                'used': totals[i],
+                'limit': limit_value,
+                'unit': catalog.units[i],
+                'percent': (totals[i] / limit_value * 100) if limit_value else 0.0,
+                'exceeded': over[i],
+            }
+
+        return EvaluationResult(statuses, utilization)
+
+    def _is_catalog_limits(self, service: str, resource_type: str,
+                           limits: Mapping[str, Any]) -> bool:
+        """Check whether a resource's limits are just the shared catalog ones."""
+        return ((isinstance(limits, SharedLimits) and limits.catalog is not None
+                 and limits.catalog is FreeTierLimit.limits_for(service, resource_type))
+                or limits == self.catalog.limit_dict(service, resource_type))
+
+    def apply(self, resources: Sequence[Any], totals: Optional[array] = None,
+              counted: bool = False) -> EvaluationResult:
+        """Evaluate resources and update the status of those judged in place."""
+        result = self.evaluate(resources, totals, counted)
+        for resource, status in zip(resources, result.statuses):
+            if status is not None:
+                _set_status(resource, status)
+        return result
+
+
+class UsageTally:
+    """Account-wide usage per limit, summed as a scan's results arrive.
+
+    Each result is judged against the totals seen so far, so a status
+    streamed before the scan ends can only move from FREE to CHARGED;
+    evaluate_analysis settles every status against the final totals.
+    """
+
+    def __init__(self, engine: Optional[LimitEngine] = None):
+        self.engine = engine or LimitEngine()
+        self.totals = self.engine.new_totals()
+        self._lock = threading.Lock()
+
+    def add(self, resources: Sequence[Any]) -> EvaluationResult:
+        """Count resources' usage and give them statuses against the running totals."""
+        with self._lock:
+            return self.engine.apply(resources, self.totals)
+
+    def judge(self, resources: Sequence[Any]) -> EvaluationResult:
+        """Give already counted resources their statuses against the current totals."""
+        with self._lock:
+            return self.engine.apply(resources, self.totals, counted=True)
+
+    def scan_result(self, result: ScanResult, account_id: Optional[str] = None) -> None:
+        """Count a finished scan job's resources; chain it before anything drops them."""
+        if result.error is None:
+            self.add(list(analysis_resources(result.analysis)))
+
+
+def analysis_resources(analysis: Dict[str, Any]) -> Iterable[Any]:
+    """Iterate over every resource (model or decoded dict) in an analysis result."""
+    for region_data in analysis.get('regions_analyzed', []):
+        for service_data in region_data.get('services', {}).values():
+            yield from service_data.get('resources') or []
+
+
+def evaluate_analysis(analysis: Dict[str, Any], engine: Optional[LimitEngine] = None,
+                      tally: Optional[UsageTally] = None) -> Dict[str, Any]:
+    """Judge a merged analysis against account-wide free tier usage.
+
+    Every judged resource (see LimitEngine) gets its final status,
+    utilization is reported per limit, and each exceeded allowance
+    becomes a risk factor and a recommendation that raise the overall
+    risk to HIGH; risk reported by the scan itself is never lowered.
+    With the scan's tally, usage of resources that were already streamed
+    and dropped still counts.
+    """
+    resources = list(analysis_resources(analysis))
+    if tally is not None:
+        result = tally.judge(resources)
+    else:
+        result = (engine or LimitEngine()).apply(resources)
+    utilization = result.utilization
+    analysis['free_tier_utilization'] = utilization
+
+    exceeded = result.exceeded()
+    risk = analysis.setdefault('risk_assessment', {})
+    risk_factors = risk.setdefault('risk_factors', [])
+    recommendations = analysis.setdefault('recommendations', [])
+    for name in exceeded:
+        usage = utilization[name]
+        if f"{name} exceeded" not in risk_factors:
+            risk_factors.append(f"{name} exceeded")
+        recommendations.append(f"{name} is over its free tier allowance "
+                               f"({usage['used']:.0f}/{usage['limit']:.0f} {usage['unit']}) "
+                               f"across the account")
+    level = risk.get('overall_risk')
+    if exceeded or level not in RISK_LEVELS:
+        risk['overall_risk'] = RISK_LEVELS[-1] if exceeded else RISK_LEVELS[0]
+    return analysis
@@ -0,0 +1,84 @@
+"""Streaming newline-delimited JSON output."""
+
+import json
+import sys
+import threading
+from typing import Any, Dict, Iterable, Optional, TextIO
+
+from src.lib.scan_engine import ScanResult
+from src.lib.serialization import json_default
+
+
+def _as_dict(resource: Any) -> Dict[str, Any]:
+    """Get a plain dict for a resource model or already-decoded resource."""
+    if isinstance(resource, dict):
+        return resource
+    if hasattr(resource, "to_dict"):
+        return resource.to_dict()
+    return {"resource_id": str(resource)}
+
+
+class NdjsonWriter:
+    """Writes one JSON record per line and flushes it immediately."""
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream or sys.stdout
+        self.records = 0
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Write a single record."""
+        line = json.dumps(record, default=json_default, separators=(",", ":"))
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+            self.records += 1
+
+    def resource(self, resource: Any, record_type: str = "resource") -> None:
+        """Write a resource record."""
+        self.write({"type": record_type, **_as_dict(resource)})
+
+    def resources(self, resources: Iterable[Any],
+                  record_type: str = "resource") -> None:
+        """Write a record per resource."""
+        for resource in resources:
+            self.resource(resource, record_type)
+
+    def scan_result(self, result: ScanResult, account_id: Optional[str] = None) -> None:
+        """Stream a finished scan job's resources, then drop them from memory.
+
+        The merged analysis keeps per-service counts, so the final summary
+        stays correct while peak memory no longer grows with the inventory.
+        In multi-account scans every record carries its account_id.
+        """
+        extra = {"account_id": account_id} if account_id else {}
+        if result.error:
+            self.write({"type": "error", **extra, "region": result.job.region,
+                        "service": result.job.service, "error": result.error})
+            return
+
+        for region_data in result.analysis.get("regions_analyzed", []):
+            for service_data in region_data.get("services", {}).values():
+                resources = service_data.get("resources") or []
+                for resource in resources:
+                    self.write({"type": "resource", **extra, **_as_dict(resource)})
+                service_data["resources"] = []
+
+    def summary(self, results: Dict[str, Any]) -> None:
+        """Write the final summary record for an analysis or cleanup."""
+        summary = {key: value for key, value in results.items()
+                   if key not in ("regions_analyzed", "cleaned_resources")}
+        if "regions_analyzed" in results:
+            summary["regions_analyzed"] = [
+                {
+                    "region": region_data.get("region"),
+                    "services": {
+                        name: data.get("resource_count", 0)
+                        for name, data in region_data.get("services", {}).items()
+                    },
+                }
+                for region_data in results["regions_analyzed"]
+            ]
+        if "cleaned_resources" in results:
+            summary["cleaned_count"] = len(results["cleaned_resources"])
+        self.write({"type": "summary", **summary})
@@ -0,0 +1,325 @@
+"""Organization-wide scans: assume a role into each member account and scan in parallel."""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from src.lib.inventory_cache import credential_identity, default_cache_dir
+from src.lib.rate_limiter import RateLimiter
+from src.lib.scan_engine import RISK_LEVELS
+from src.models.aws_account import AWSAccount
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROLE_NAME = "OrganizationAccountAccessRole"
+DEFAULT_SESSION_NAME = "aws-free-guard"
+DEFAULT_MAX_ACCOUNTS = 4
+ASSUME_ROLE_DURATION = 3600  # seconds
+
+# botocore refreshes credentials 15 minutes before they expire, so cached
+# credentials closer to expiry than that are not handed out
+EXPIRY_MARGIN = 900  # seconds
+
+
+@dataclass(frozen=True)
+class MemberAccount:
+    """An account to scan; without a role it is scanned with the caller's credentials."""
+
+    account_id: str
+    name: str = ""
+    role_arn: Optional[str] = None
+
+
+@dataclass
+class AccountResult:
+    """Outcome of scanning one account."""
+
+    member: MemberAccount
+    analysis: Dict[str, Any]
+    elapsed: float
+    error: Optional[str] = None
+
+
+def parse_account_ids(values: Iterable[str]) -> List[str]:
+    """Parse account IDs given as repeated and/or comma-separated values."""
+    account_ids = []
+    for value in values or []:
+        for account_id in value.split(","):
+            account_id = account_id.strip()
+            if not account_id:
+                continue
+            if len(account_id) != 12 or not account_id.isdigit():
+                raise ValueError(f"Invalid AWS account ID '{account_id}'")
+            if account_id not in account_ids:
+                account_ids.append(account_id)
+    return account_ids
+
+
+def role_arn(account_id: str, role_name: str = DEFAULT_ROLE_NAME,
+             partition: str = "aws") -> str:
+    """Build the ARN of a role in a member account."""
+    return f"arn:{partition}:iam::{account_id}:role/{role_name}"
+
+
+def list_member_accounts(account: AWSAccount) -> List[Dict[str, str]]:
+    """List the active accounts of the caller's organization."""
+    organizations = account.get_client('organizations')
+    return [
+        {'account_id': item['Id'], 'name': item.get('Name', "")}
+        for page in organizations.get_paginator('list_accounts').paginate()
+        for item in page.get('Accounts', [])
+        if item.get('Status', "ACTIVE") == "ACTIVE"
+    ]
+
+
+def resolve_members(account: AWSAccount, account_ids: Optional[List[str]] = None,
+                    org: bool = False, role_name: str = DEFAULT_ROLE_NAME
+                    ) -> List[MemberAccount]:
+    """Build the list of accounts to scan; the caller's own account needs no role."""
+    caller = account.get_account_id()
+    found = list_member_accounts(account) if org else []
+    names = {item['account_id']: item['name'] for item in found}
+    selected = list(account_ids or []) + [item['account_id'] for item in found
+                                          if item['account_id'] not in (account_ids or [])]
+    return [MemberAccount(account_id, names.get(account_id, ""),
+                          None if account_id == caller else role_arn(account_id, role_name))
+            for account_id in selected]
+
+
+class CredentialCache:
+    """Assumed-role credentials kept in memory and on disk until close to expiry.
+
+    Entries are keyed on the source identity (the access key the role was
+    assumed with) too, so other base credentials never reuse them. Files
+    are readable by the owner only, like the AWS CLI's own cache.
+    """
+
+    def __init__(self, path: Optional[Path] = None, margin: float = EXPIRY_MARGIN):
+        self.path = Path(path) if path else default_cache_dir() / "sts"
+        self.margin = margin
+        self._memory: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(role: str, session_name: str, source: str) -> str:
+        """Get the cache key for a role session assumed from a source identity."""
+        return hashlib.sha256(f"{source}\n{role}\n{session_name}".encode()).hexdigest()[:32]
+
+    def _fresh(self, credentials: Optional[Dict[str, str]]) -> bool:
+        """Check that credentials stay valid for longer than the margin."""
+        if not credentials:
+            return False
+        expiry = datetime.fromisoformat(credentials['expiry_time'])
+        return expiry.timestamp() - time.time() > self.margin
+
+    def get(self, role: str, session_name: str, source: str) -> Optional[Dict[str, str]]:
+        """Get cached credentials for a role session, if still fresh."""
+        key = self._key(role, session_name, source)
+        with self._lock:
+            credentials = self._memory.get(key)
+            if credentials is None:
+                try:
+                    credentials = json.loads((self.path / f"{key}.json").read_text())
+                except (OSError, ValueError):
+                    credentials = None
+            if not self._fresh(credentials):
+                return None
+            self._memory[key] = credentials
+            return credentials
+
+    def put(self, role: str, session_name: str, source: str,
+            credentials: Dict[str, str]) -> None:
+        """Store credentials for a role session."""
+        key = self._key(role, session_name, source)
+        with self._lock:
+            self._memory[key] = credentials
+            try:
+                self.path.mkdir(parents=True, exist_ok=True, mode=0o700)
+                fd = os.open(self.path / f"{key}.json",
+                             os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, "w") as f:
+                    json.dump(credentials, f)
+            except OSError as e:
+                logger.warning(f"Could not cache credentials for {role}: {e}")
+
+
+def assume_role_credentials(account: AWSAccount, role: str,
+                            cache: CredentialCache,
+                            session_name: str = DEFAULT_SESSION_NAME,
+                            duration: int = ASSUME_ROLE_DURATION) -> Any:
+    """Get credentials for a role that botocore refreshes before they expire.
+
+    Nothing is fetched until the first call, and cached credentials are
+    reused across accounts' clients and across runs while they are fresh.
+    """
+    from botocore.credentials import DeferredRefreshableCredentials
+
+    def fetch() -> Dict[str, str]:
+        # Without a known source identity nothing is read from or written to the cache
+        source = credential_identity(account)
+        cached = cache.get(role, session_name, source) if source else None
+        if cached:
+            return cached
+        response = account.get_client('sts').assume_role(
+            RoleArn=role, RoleSessionName=session_name, DurationSeconds=duration)
+        issued = response['Credentials']
+        credentials = {
+            'access_key': issued['AccessKeyId'],
+            'secret_key': issued['SecretAccessKey'],
+            'token': issued['SessionToken'],
+            'expiry_time': issued['Expiration'].isoformat(),
+        }
+        if source:
+            cache.put(role, session_name, source, credentials)
+        return credentials
+
+    return DeferredRefreshableCredentials(refresh_using=fetch, method="assume-role")
+
+
+def member_account(account: AWSAccount, member: MemberAccount,
+                   cache: CredentialCache,
+                   session_name: str = DEFAULT_SESSION_NAME) -> AWSAccount:
+    """Build an AWSAccount for a member, with its own client pool and rate limits.
+
+    API rate limits apply per account, so each member gets a fresh limiter
+    with the same budgets.
+    """
+    credentials = None
+    if member.role_arn:
+        credentials = assume_role_credentials(account, member.role_arn, cache,
+                                              session_name)
+    rate_limiter = None
+    if account.rate_limiter is not None:
+        rate_limiter = RateLimiter(budgets=account.rate_limiter.budgets,
+                                   default_rate=account.rate_limiter.default_rate)
+    return AWSAccount(account_id=member.account_id,
+                      region=account.region,
+                      profile_name=account.profile_name,
+                      max_pool_connections=account.max_pool_connections,
+                      rate_limiter=rate_limiter,
+                      profiler=account.profiler,
+                      credentials=credentials)
+
+
+def scan_accounts(account: AWSAccount, members: List[MemberAccount],
+                  analyze: Callable[[AWSAccount, MemberAccount], Dict[str, Any]],
+                  max_accounts: int = DEFAULT_MAX_ACCOUNTS,
+                  cache: Optional[CredentialCache] = None,
+                  session_name: str = DEFAULT_SESSION_NAME,
+                  on_account: Optional[Callable[[AccountResult], None]] = None
+                  ) -> List[AccountResult]:
+    """Scan accounts in parallel, at most max_accounts at a time.
+
+    A failed role assumption or scan is recorded on that account's result;
+    the other accounts still complete.
+    """
+    if max_accounts < 1:
+        raise ValueError("max_accounts must be at least 1")
+    cache = cache or CredentialCache()
+
+    def scan(member: MemberAccount) -> AccountResult:
+        started = time.perf_counter()
+        try:
+            analysis = analyze(member_account(account, member, cache, session_name), member)
+            result = AccountResult(member, analysis or {}, time.perf_counter() - started)
+        except Exception as e:
+            logger.warning(f"Scan of account {member.account_id} failed: {e}")
+            result = AccountResult(member, {}, time.perf_counter() - started, error=str(e))
+        if on_account:
+            on_account(result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_accounts) as pool:
+        return list(pool.map(scan, members))
+
+
+def merge_account_analyses(results: List[AccountResult]) -> Dict[str, Any]:
+    """Merge per-account analyses into one org-wide report.
+
+    Regions, recommendations and risk factors are tagged with their account
+    so the report can be read without the per-account breakdown.
+    """
+    accounts = []
+    regions = []
+    recommendations: List[str] = []
+    risk_factors: List[str] = []
+    overall_risk = RISK_LEVELS[0]
+    total_resources = 0
+    total_cost = 0.0
+    errors = []
+    discovery: Optional[Dict[str, Any]] = None
+    region_pruning = []
+
+    for result in results:
+        member = result.member
+        analysis = result.analysis
+        risk = analysis.get('risk_assessment', {})
+        cost = analysis.get('cost_analysis', {}).get('total_monthly_cost', 0) or 0
+        accounts.append({
+            'account_id': member.account_id,
+            'name': member.name,
+            'total_resources_found': analysis.get('total_resources_found', 0),
+            'overall_risk': risk.get('overall_risk', "UNKNOWN") if not result.error
+            else "UNKNOWN",
+            'total_monthly_cost': cost,
+            'elapsed': result.elapsed,
+            'error': result.error,
+        })
+        if result.error:
+            errors.append({'account_id': member.account_id, 'error': result.error})
+            continue
+
+        total_resources += analysis.get('total_resources_found', 0)
+        total_cost += cost
+        for region_data in analysis.get('regions_analyzed', []):
+            regions.append({**region_data, 'account_id': member.account_id})
+        for recommendation in analysis.get('recommendations', []):
+            recommendations.append(f"{member.account_id}: {recommendation}")
+        for factor in risk.get('risk_factors', []):
+            risk_factors.append(f"{member.account_id}: {factor}")
+        level = risk.get('overall_risk')
+        if level in RISK_LEVELS and (RISK_LEVELS.index(level)
+                                     > RISK_LEVELS.index(overall_risk)):
+            overall_risk = level
+        for error in analysis.get('scan_errors', []):
+            errors.append({'account_id': member.account_id, **error})
+        if analysis.get('discovery'):
+            discovery = discovery or {'requests': 0, 'skipped_cells': 0,
+                                      'enumeration_calls_avoided': 0,
+                                      'api_calls_saved': 0, 'unverified_cells': []}
+            for key in ('requests', 'skipped_cells', 'enumeration_calls_avoided',
+                        'api_calls_saved'):
+                discovery[key] += analysis['discovery'].get(key, 0)
+            discovery['unverified_cells'].extend(
+                {'account_id': member.account_id, **cell}
+                for cell in analysis['discovery'].get('unverified_cells', []))
+        if analysis.get('region_pruning'):
+            region_pruning.append({'account_id': member.account_id,
+                                   **analysis['region_pruning']})
+
+    merged = {
+        'total_resources_found': total_resources,
+        'accounts': accounts,
+        'regions_analyzed': regions,
+        'recommendations': recommendations,
+        'risk_assessment': {
+            'overall_risk': overall_risk,
+            'risk_factors': risk_factors,
+        },
+        'cost_analysis': {'total_monthly_cost': total_cost},
+        'predictions': {},
+        'scan_errors': errors,
+    }
+    if discovery:
+        merged['discovery'] = discovery
+    if region_pruning:
+        merged['region_pruning'] = {'accounts': region_pruning}
+    return merged
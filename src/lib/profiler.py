@@ -0,0 +1,184 @@
+"""Run instrumentation: per-phase timing and per-(region, service) API call stats."""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.lib.rate_limiter import THROTTLING_ERROR_CODES
+
+_CONTEXT_KEY = "aws_free_guard_profile"
+_PAGED_KEY = "aws_free_guard_profile_paged"
+
+MAX_TRACE_EVENTS = 100000
+
+# Request or response fields that mark a call as one page of a listing
+PAGINATION_KEYS = ("NextToken", "nextToken", "Marker", "NextMarker", "ContinuationToken",
+                   "NextContinuationToken", "NextPageToken", "PaginationToken",
+                   "KeyMarker", "NextKeyMarker", "ExclusiveStartKey", "LastEvaluatedKey")
+
+
+def _new_stats() -> Dict[str, float]:
+    """Empty counters for one (region, service) pair."""
+    return {'calls': 0, 'pages': 0, 'bytes': 0, 'retries': 0, 'throttles': 0,
+            'errors': 0, 'api_time': 0.0}
+
+
+class RunProfiler:
+    """Collects API call statistics from botocore events and phase timings.
+
+    Handlers are registered on sessions like the rate limiter's, so every
+    client built from the account's pool is instrumented.
+    """
+
+    def __init__(self, max_trace_events: int = MAX_TRACE_EVENTS):
+        self.max_trace_events = max_trace_events
+        self.started = time.perf_counter()
+        self.stats: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self.phases: Dict[str, float] = {}
+        self.trace_events: List[Dict[str, Any]] = []
+        self.dropped_trace_events = 0
+        self._lock = threading.Lock()
+
+    def _now_us(self) -> float:
+        """Microseconds since the profiler started, for trace timestamps."""
+        return (time.perf_counter() - self.started) * 1e6
+
+    def _trace(self, event: Dict[str, Any]) -> None:
+        """Keep a trace event, up to the configured limit."""
+        if len(self.trace_events) < self.max_trace_events:
+            self.trace_events.append(event)
+        else:
+            self.dropped_trace_events += 1
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a phase of the run; repeated phases accumulate."""
+        start = self._now_us()
+        try:
+            yield
+        finally:
+            duration = self._now_us() - start
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + duration / 1e6
+                self._trace({'name': name, 'cat': "phase", 'ph': "X", 'ts': start,
+                             'dur': duration, 'pid': 1, 'tid': 0})
+
+    def attach(self, events: Any) -> None:
+        """Register the profiler on a boto3/botocore event emitter."""
+        events.register('before-parameter-build', self._before_parameter_build,
+                        unique_id='aws-free-guard-profiler-params')
+        events.register('before-call', self._before_call,
+                        unique_id='aws-free-guard-profiler-call')
+        events.register('after-call', self._after_call,
+                        unique_id='aws-free-guard-profiler-after-call')
+        events.register('after-call-error', self._after_call_error,
+                        unique_id='aws-free-guard-profiler-call-error')
+        # Seen for every attempt, unlike needs-retry which stops at botocore's
+        # own retry handler whenever it decides to retry
+        events.register('response-received', self._response_received,
+                        unique_id='aws-free-guard-profiler-response')
+
+    def _before_parameter_build(self, params: Optional[Dict[str, Any]] = None,
+                                context: Optional[Dict[str, Any]] = None,
+                                **kwargs: Any) -> None:
+        """Note whether the call continues a listing, before params are serialized."""
+        if context is not None:
+            context[_PAGED_KEY] = any(key in (params or {}) for key in PAGINATION_KEYS)
+
+    def _before_call(self, model: Any = None, context: Optional[Dict[str, Any]] = None,
+                     **kwargs: Any) -> None:
+        """Stamp the request context with its start time and identity."""
+        if context is None or model is None:
+            return
+        context[_CONTEXT_KEY] = {
+            'start': self._now_us(),
+            'service': model.service_model.service_name,
+            'operation': model.name,
+            'region': context.get('client_region') or "global",
+            'paged': context.pop(_PAGED_KEY, False),
+        }
+
+    def _finish(self, context: Optional[Dict[str, Any]],
+                **updates: int) -> Optional[Dict[str, float]]:
+        """Close out a call: add its duration and counters, and trace it."""
+        call = (context or {}).pop(_CONTEXT_KEY, None)
+        if call is None:
+            return None
+        duration = self._now_us() - call['start']
+        key = (call['region'], call['service'])
+        with self._lock:
+            stats = self.stats.setdefault(key, _new_stats())
+            stats['calls'] += 1
+            stats['api_time'] += duration / 1e6
+            for name, value in updates.items():
+                stats[name] += value
+            self._trace({'name': f"{call['service']}.{call['operation']}",
+                         'cat': call['service'], 'ph': "X", 'ts': call['start'],
+                         'dur': duration, 'pid': 1, 'tid': threading.get_ident(),
+                         'args': {'region': call['region'], **updates}})
+        return stats
+
+    def _after_call(self, http_response: Any = None,
+                    parsed: Optional[Dict[str, Any]] = None, model: Any = None,
+                    context: Optional[Dict[str, Any]] = None,
+                    **kwargs: Any) -> None:
+        """Record a call's response size, retries, error and whether it was a page."""
+        call = (context or {}).get(_CONTEXT_KEY)
+        if call is None:
+            return
+        parsed = parsed or {}
+        size = 0
+        headers = getattr(http_response, 'headers', None) or {}
+        if headers.get('content-length'):
+            size = int(headers['content-length'])
+        elif model is not None and not model.has_streaming_output:
+            size = len(getattr(http_response, 'content', b"") or b"")
+        paged = call['paged'] or any(parsed.get(key) for key in PAGINATION_KEYS)
+        self._finish(context,
+                     bytes=size,
+                     pages=1 if paged else 0,
+                     retries=parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0),
+                     errors=1 if 'Error' in parsed else 0)
+
+    def _after_call_error(self, context: Optional[Dict[str, Any]] = None,
+                          **kwargs: Any) -> None:
+        """Record a call that failed without a response, e.g. a connection error."""
+        self._finish(context, errors=1)
+
+    def _response_received(self, response_dict: Optional[Dict[str, Any]] = None,
+                           parsed_response: Optional[Dict[str, Any]] = None,
+                           context: Optional[Dict[str, Any]] = None,
+                           **kwargs: Any) -> None:
+        """Count throttled attempts, including ones botocore goes on to retry."""
+        call = (context or {}).get(_CONTEXT_KEY)
+        if call is None or response_dict is None:
+            return
+        code = (parsed_response or {}).get('Error', {}).get('Code')
+        if code in THROTTLING_ERROR_CODES or response_dict.get('status_code') == 429:
+            with self._lock:
+                key = (call['region'], call['service'])
+                self.stats.setdefault(key, _new_stats())['throttles'] += 1
+
+    def report(self) -> Dict[str, Any]:
+        """Get the phase timings and (region, service) rows ranked by API time."""
+        with self._lock:
+            rows = [{'region': region, 'service': service, **stats}
+                    for (region, service), stats in self.stats.items()]
+            phases = dict(self.phases)
+        rows.sort(key=lambda row: (-row['api_time'], row['region'], row['service']))
+        return {
+            'wall_time': time.perf_counter() - self.started,
+            'phases': phases,
+            'api_calls': sum(row['calls'] for row in rows),
+            'rows': rows,
+        }
+
+    def write_chrome_trace(self, path: str) -> None:
+        """Write the recorded spans in Chrome trace-event format (chrome://tracing)."""
+        with self._lock:
+            events = list(self.trace_events)
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': "ms",
+                       'otherData': {'dropped_events': self.dropped_trace_events}}, f)
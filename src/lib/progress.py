@@ -0,0 +1,173 @@
+"""Batched, rate-limited progress reporting for work spread across regions."""
+
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional
+
+DEFAULT_REFRESH_INTERVAL = 0.1  # seconds between rendered updates
+
+ALL_REGIONS = "all regions"
+
+
+@dataclass
+class RegionProgress:
+    """Completed tasks and resources seen in one region."""
+
+    region: str
+    started: float
+    total: int = 0
+    completed: int = 0
+    resources: int = 0
+    errors: int = 0
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        """Get the region's counters with its resource rate and ETA."""
+        elapsed = max(now - self.started, 1e-9)
+        remaining = max(self.total - self.completed, 0)
+        eta = None
+        if self.completed and remaining:
+            eta = remaining * elapsed / self.completed
+        elif not remaining:
+            eta = 0.0
+        return {
+            'region': self.region,
+            'total': self.total,
+            'completed': self.completed,
+            'resources': self.resources,
+            'errors': self.errors,
+            'resources_per_second': self.resources / elapsed,
+            'eta': eta,
+        }
+
+
+class ProgressTracker:
+    """Counts finished tasks per region and hands snapshots to a sink.
+
+    Workers only bump counters under a lock. The sink runs at most once per
+    interval, and never concurrently, so rendering cost does not grow with
+    the number of results streaming in.
+    """
+
+    def __init__(self, sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 interval: float = DEFAULT_REFRESH_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.sink = sink
+        self.interval = interval
+        self.clock = clock
+        self.regions: Dict[str, RegionProgress] = {}
+        self.flushes = 0
+        self._last_flush: Optional[float] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def _region(self, region: str) -> RegionProgress:
+        """Get a region's counters, creating them on first use."""
+        if region not in self.regions:
+            self.regions[region] = RegionProgress(region, self.clock())
+        return self.regions[region]
+
+    def start(self, totals: Dict[str, int]) -> None:
+        """Add the number of tasks expected in each region."""
+        with self._lock:
+            for region, total in totals.items():
+                self._region(region).total += total
+        self.flush()
+
+    def start_jobs(self, jobs: Iterable[Any]) -> None:
+        """Expect one task per (region, service) scan job."""
+        self.start(Counter(job.region for job in jobs))
+
+    def advance(self, region: str, tasks: int = 1, resources: int = 0,
+                error: bool = False) -> None:
+        """Record finished tasks; the sink only sees them on the next due flush."""
+        with self._lock:
+            progress = self._region(region)
+            progress.completed += tasks
+            progress.resources += resources
+            progress.errors += int(error)
+        self.maybe_flush()
+
+    def scan_result(self, result: Any) -> None:
+        """Record a finished scan job (usable as a scan engine on_result)."""
+        self.advance(result.job.region,
+                     resources=result.analysis.get('total_resources_found', 0),
+                     error=bool(result.error))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get per-region progress and the overall totals."""
+        now = self.clock()
+        with self._lock:
+            regions = [progress.to_dict(now) for progress in self.regions.values()]
+            started = min((p.started for p in self.regions.values()), default=now)
+
+        overall = RegionProgress(ALL_REGIONS, started)
+        for region in regions:
+            overall.total += region['total']
+            overall.completed += region['completed']
+            overall.resources += region['resources']
+            overall.errors += region['errors']
+        return {'overall': overall.to_dict(now), 'regions': regions}
+
+    def maybe_flush(self) -> None:
+        """Flush if the refresh interval has passed since the last one."""
+        last = self._last_flush
+        if last is None or self.clock() - last >= self.interval:
+            self.flush(force=False)
+
+    def flush(self, force: bool = True) -> None:
+        """Send a snapshot to the sink; a flush already in progress wins unless forced."""
+        if self.sink is None:
+            return
+        if not self._flush_lock.acquire(blocking=force):
+            return
+        try:
+            self._last_flush = self.clock()
+            self.flushes += 1
+            self.sink(self.snapshot())
+        finally:
+            self._flush_lock.release()
+
+    def close(self) -> None:
+        """Render the final state."""
+        self.flush()
+
+
+def _format_eta(seconds: Optional[float]) -> str:
+    """Format an ETA as m:ss, or -:-- while it is unknown."""
+    if seconds is None:
+        return "-:--"
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return f"{minutes}:{seconds:02d}"
+
+
+class RichProgressSink:
+    """Renders tracker snapshots as an overall task plus one subtask per region.
+
+    The rich Progress is created by the caller, so this module stays free
+    of rich imports.
+    """
+
+    def __init__(self, progress: Any, description: str = "Scanning"):
+        self.progress = progress
+        self.description = description
+        self.tasks: Dict[str, Any] = {}
+
+    def _update(self, key: str, state: Dict[str, Any], description: str) -> None:
+        """Create or update one rich task from a region's state."""
+        stats = (f"{state['resources']} resources, "
+                 f"{state['resources_per_second']:.1f}/s, "
+                 f"ETA {_format_eta(state['eta'])}")
+        if state['errors']:
+            stats += f", {state['errors']} failed"
+        if key not in self.tasks:
+            self.tasks[key] = self.progress.add_task(description, total=state['total'],
+                                                     stats=stats)
+        self.progress.update(self.tasks[key], total=state['total'],
+                             completed=state['completed'], stats=stats)
+
+    def __call__(self, snapshot: Dict[str, Any]) -> None:
+        self._update(ALL_REGIONS, snapshot['overall'], f"[bold]{self.description}")
+        for state in snapshot['regions']:
+            self._update(state['region'], state, f"  {state['region']}")
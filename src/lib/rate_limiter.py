@@ -0,0 +1,270 @@
+"""Adaptive per-(service, region) rate limiting for AWS API calls."""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+THROTTLING_ERROR_CODES = {
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestThrottledException",
+    "TooManyRequestsException",
+    "ProvisionedThroughputExceededException",
+    "RequestLimitExceeded",
+    "BandwidthLimitExceeded",
+    "RequestThrottled",
+    "SlowDown",
+    "PriorRequestNotComplete",
+}
+
+DEFAULT_RATE = 10.0  # requests per second
+
+# Steady-state request budgets, roughly matching published API rate limits
+DEFAULT_BUDGETS = {
+    "ec2": 20.0,
+    "s3": 50.0,
+    "lambda": 15.0,
+    "rds": 10.0,
+    "iam": 10.0,
+    "sts": 10.0,
+    "cloudwatch": 20.0,
+    "logs": 5.0,
+    "ce": 5.0,
+    "cloudtrail": 2.0,
+}
+
+MIN_RATE = 0.5
+BASE_BACKOFF = 0.2  # seconds
+MAX_BACKOFF = 20.0
+
+_SERVICE_CONTEXT_KEY = 'aws_free_guard_service'
+
+
+def is_throttling_error(error: Any) -> bool:
+    """Check whether an exception or error code means the call was throttled."""
+    if isinstance(error, str):
+        return error in THROTTLING_ERROR_CODES
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        return response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+    return False
+
+
+def backoff_delay(attempt: int, base: float = BASE_BACKOFF,
+                  cap: float = MAX_BACKOFF) -> float:
+    """Exponential backoff with full jitter for a retry attempt (1-based)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    """Token bucket whose refill rate adapts to throttling (AIMD)."""
+
+    def __init__(self, rate: float, min_rate: float = MIN_RATE):
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.tokens = max(1.0, rate)
+        self.throttle_events = 0
+        self.throttled_time = 0.0
+        self.requests = 0
+        self._consecutive_throttles = 0
+        self._cooldown_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens accrued since the last update."""
+        capacity = max(1.0, self.rate)
+        self.tokens = min(capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, waited: float = 0.0) -> float:
+        """Take a token if one is available; otherwise return how long to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._cooldown_until:
+                return self._cooldown_until - now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.requests += 1
+                self.throttled_time += waited
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self) -> float:
+        """Block until a request may be sent; return the time spent waiting."""
+        waited = 0.0
+        while True:
+            delay = self.try_acquire(waited)
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    async def acquire_async(self) -> float:
+        """Like acquire, but waits without blocking the event loop."""
+        import asyncio
+
+        waited = 0.0
+        while True:
+            delay = self.try_acquire(waited)
+            if not delay:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def on_throttle(self) -> None:
+        """Halve the rate and pause the bucket with exponential backoff."""
+        with self._lock:
+            self._consecutive_throttles += 1
+            self.throttle_events += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            delay = backoff_delay(self._consecutive_throttles)
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+
+    def on_success(self) -> None:
+        """Ramp the rate back towards its budget."""
+        with self._lock:
+            self._consecutive_throttles = 0
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class RateLimiter:
+    """Shared registry of adaptive token buckets keyed by (service, region)."""
+
+    def __init__(self, budgets: Optional[Dict[str, float]] = None,
+                 default_rate: float = DEFAULT_RATE):
+        self.budgets = dict(DEFAULT_BUDGETS)
+        if budgets:
+            self.budgets.update(budgets)
+        self.default_rate = default_rate
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, service: str, region: str) -> TokenBucket:
+        """Get the bucket for (service, region), creating it on first use."""
+        key = (service, region)
+        with self._lock:
+            if key not in self._buckets:
+                rate = self.budgets.get(service, self.default_rate)
+                self._buckets[key] = TokenBucket(rate)
+            return self._buckets[key]
+
+    def acquire(self, service: str, region: str) -> float:
+        """Wait for permission to call (service, region)."""
+        return self.bucket(service, region).acquire()
+
+    def record(self, service: str, region: str, throttled: bool) -> None:
+        """Feed a call outcome back into the bucket's rate."""
+        bucket = self.bucket(service, region)
+        if throttled:
+            logger.debug(f"Throttled by {service} in {region}, backing off")
+            bucket.on_throttle()
+        else:
+            bucket.on_success()
+
+    def attach(self, events: Any) -> None:
+        """Register the limiter on a boto3/botocore event emitter.
+
+        Handlers registered on a session are copied into every client the
+        session creates, so every attempt (including botocore's own
+        retries) passes through the bucket for its service and region.
+        """
+        events.register('before-call', self._before_call,
+                        unique_id='aws-free-guard-rate-limiter-call')
+        events.register('before-send', self._before_send,
+                        unique_id='aws-free-guard-rate-limiter-send')
+        events.register('needs-retry', self._needs_retry,
+                        unique_id='aws-free-guard-rate-limiter-retry')
+
+    def attach_async(self, events: Any) -> None:
+        """Register the limiter on an aiobotocore session; waits yield to the loop."""
+        events.register('before-call', self._before_call,
+                        unique_id='aws-free-guard-rate-limiter-call')
+        events.register('before-send', self._before_send_async,
+                        unique_id='aws-free-guard-rate-limiter-send')
+        events.register('needs-retry', self._needs_retry,
+                        unique_id='aws-free-guard-rate-limiter-retry')
+
+    @staticmethod
+    def _bucket_key(context: Dict[str, Any]) -> Tuple[str, str]:
+        """Get the (service, region) recorded in a request context."""
+        return (context.get(_SERVICE_CONTEXT_KEY, "unknown"),
+                context.get('client_region') or "global")
+
+    def _before_call(self, model: Any = None, context: Optional[Dict[str, Any]] = None,
+                     **kwargs: Any) -> None:
+        """Remember the service name for the per-attempt handlers."""
+        if context is not None and model is not None:
+            context[_SERVICE_CONTEXT_KEY] = model.service_model.service_name
+
+    def _before_send(self, request: Any = None, **kwargs: Any) -> None:
+        """Take a token before each HTTP attempt."""
+        context = getattr(request, 'context', None) or {}
+        self.acquire(*self._bucket_key(context))
+
+    async def _before_send_async(self, request: Any = None, **kwargs: Any) -> None:
+        """Take a token before each HTTP attempt, from a coroutine."""
+        context = getattr(request, 'context', None) or {}
+        await self.bucket(*self._bucket_key(context)).acquire_async()
+
+    def _needs_retry(self, response: Optional[Tuple[Any, Any]] = None,
+                     request_dict: Optional[Dict[str, Any]] = None,
+                     **kwargs: Any) -> None:
+        """Adapt the bucket rate from each attempt's outcome."""
+        if response is None:
+            return None
+        http_response, parsed = response
+        code = (parsed or {}).get('Error', {}).get('Code')
+        throttled = (code in THROTTLING_ERROR_CODES
+                     or getattr(http_response, 'status_code', None) == 429)
+        context = (request_dict or {}).get('context', {})
+        self.record(*self._bucket_key(context), throttled)
+        # Leave the retry decision to botocore
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get throttling totals and the busiest (service, region) buckets."""
+        with self._lock:
+            buckets = dict(self._buckets)
+        per_bucket = {
+            f"{service}/{region}": {
+                'requests': bucket.requests,
+                'throttle_events': bucket.throttle_events,
+                'throttled_time': round(bucket.throttled_time, 3),
+                'rate': round(bucket.rate, 2),
+            }
+            for (service, region), bucket in buckets.items()
+        }
+        return {
+            'throttled_time': round(sum(b.throttled_time for b in buckets.values()), 3),
+            'throttle_events': sum(b.throttle_events for b in buckets.values()),
+            'buckets': per_bucket,
+        }
+
+
+def parse_budgets(values: Optional[Iterable[str]]) -> Dict[str, float]:
+    """Parse SERVICE=RATE strings into a budget mapping."""
+    budgets = {}
+    for value in values or []:
+        service, _, rate = value.partition('=')
+        service = service.strip()
+        try:
+            parsed = float(rate)
+        except ValueError:
+            parsed = 0.0
+        if not service or parsed <= 0:
+            raise ValueError(f"Invalid rate limit '{value}', expected SERVICE=RATE")
+        budgets[service] = parsed
+    return budgets
@@ -0,0 +1,197 @@
+"""Region pruning: find the regions an account actually uses before scanning.
+
+One EC2 DescribeRegions call lists which regions are enabled, and one
+Cost Explorer query grouped by region shows where anything was used
+recently. Full scans then run only in active regions; a periodic deep
+sweep still covers the rest, so resources that Cost Explorer has not
+reported yet are eventually found.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from src.lib.inventory_cache import default_cache_dir
+from src.models.aws_account import DEFAULT_TEST_ACCOUNT_ID, AWSAccount
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOOKBACK_DAYS = 14
+DEFAULT_DEEP_SWEEP_DAYS = 7
+
+CE_REGION = "us-east-1"
+
+# Regions an account can use without opting in, or has opted into
+_ENABLED_STATUSES = ("opt-in-not-required", "opted-in")
+
+# Active regions
+HOME_REGION = "home region"
+RECENT_USAGE = "recent usage"
+DEEP_SWEEP = "deep sweep"
+PROBE_UNAVAILABLE = "usage probe unavailable"
+
+# Pruned regions
+NOT_ENABLED = "not enabled for the account"
+NO_RECENT_USAGE = "no recent usage"
+
+
+@dataclass
+class RegionPlan:
+    """Which regions to scan and which to skip, each with the reason why."""
+
+    active: Dict[str, str] = field(default_factory=dict)
+    pruned: Dict[str, str] = field(default_factory=dict)
+    deep_sweep: bool = False
+    requests: int = 0
+    lookback_days: int = DEFAULT_LOOKBACK_DAYS
+
+    @property
+    def scan_regions(self) -> List[str]:
+        """Get the regions to scan, in a stable order."""
+        return sorted(self.active)
+
+    def report(self) -> Dict[str, Any]:
+        """Summarize the plan for the analysis results."""
+        return {
+            'active': dict(sorted(self.active.items())),
+            'pruned': dict(sorted(self.pruned.items())),
+            'deep_sweep': self.deep_sweep,
+            'requests': self.requests,
+            'lookback_days': self.lookback_days,
+        }
+
+
+class RegionProbe:
+    """Plans region coverage from Cost Explorer usage and enabled regions.
+
+    UsageQuantity is used rather than cost, so regions whose usage is still
+    within the free tier count as active. Cost Explorer lags by up to a day
+    and charges per request; the deep sweep, run every deep_sweep_days
+    (never when 0), scans the pruned regions as well.
+    """
+
+    def __init__(self, lookback_days: int = DEFAULT_LOOKBACK_DAYS,
+                 deep_sweep_days: float = DEFAULT_DEEP_SWEEP_DAYS,
+                 state_path: Optional[Path] = None,
+                 clock: Callable[[], float] = time.time):
+        self.lookback_days = lookback_days
+        self.deep_sweep_days = deep_sweep_days
+        self.state_path = (Path(state_path) if state_path
+                           else default_cache_dir() / "region_sweeps.json")
+        self.clock = clock
+        self._lock = threading.Lock()
+
+    def _enabled_regions(self, account: AWSAccount, plan: RegionPlan) -> List[str]:
+        """List enabled regions, marking the ones the account has not opted into."""
+        plan.requests += 1
+        response = account.get_client('ec2').describe_regions(AllRegions=True)
+        enabled = []
+        for region in response.get('Regions', []):
+            if region.get('OptInStatus', "opt-in-not-required") in _ENABLED_STATUSES:
+                enabled.append(region['RegionName'])
+            else:
+                plan.pruned[region['RegionName']] = NOT_ENABLED
+        return enabled
+
+    def _used_regions(self, account: AWSAccount, account_id: str,
+                      plan: RegionPlan) -> set:
+        """Get the regions with any usage in the lookback window."""
+        end = date.fromtimestamp(self.clock()) + timedelta(days=1)
+        kwargs: Dict[str, Any] = {
+            'TimePeriod': {'Start': (end - timedelta(days=self.lookback_days)).isoformat(),
+                           'End': end.isoformat()},
+            'Granularity': 'MONTHLY',
+            'Metrics': ['UsageQuantity'],
+            'GroupBy': [{'Type': 'DIMENSION', 'Key': 'REGION'}],
+        }
+        if account_id != DEFAULT_TEST_ACCOUNT_ID:
+            # From a management account Cost Explorer covers the whole organization
+            kwargs['Filter'] = {'Dimensions': {'Key': 'LINKED_ACCOUNT',
+                                               'Values': [account_id]}}
+        ce = account.get_client('ce', CE_REGION)
+        used = set()
+        while True:
+            plan.requests += 1
+            response = ce.get_cost_and_usage(**kwargs)
+            for result in response.get('ResultsByTime', []):
+                for group in result.get('Groups', []):
+                    amount = float(group['Metrics']['UsageQuantity']['Amount'])
+                    if amount > 0:
+                        used.add(group['Keys'][0])
+            token = response.get('NextPageToken')
+            if not token:
+                return used
+            kwargs['NextPageToken'] = token
+
+    def _load_sweeps(self) -> Dict[str, float]:
+        """Read when each account last had a deep sweep."""
+        try:
+            return json.loads(self.state_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def sweep_due(self, account_id: str) -> bool:
+        """Check whether an account's pruned regions are due for a deep sweep."""
+        if not self.deep_sweep_days:
+            return False
+        with self._lock:
+            last = self._load_sweeps().get(account_id)
+        return last is None or self.clock() - last >= self.deep_sweep_days * 86400
+
+    def record_sweep(self, account_id: str) -> None:
+        """Remember that an account's pruned regions were just scanned."""
+        with self._lock:
+            sweeps = self._load_sweeps()
+            sweeps[account_id] = self.clock()
+            try:
+                self.state_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.state_path.with_suffix(f".{os.getpid()}.tmp")
+                tmp.write_text(json.dumps(sweeps))
+                os.replace(tmp, self.state_path)
+            except OSError as e:
+                logger.warning(f"Could not record deep sweep for {account_id}: {e}")
+
+    def plan(self, account: AWSAccount, regions: Optional[List[str]] = None,
+             account_id: Optional[str] = None) -> RegionPlan:
+        """Decide which regions to scan; without regions, all enabled ones are considered.
+
+        If Cost Explorer cannot be queried nothing is pruned for lack of
+        usage, since an empty answer would otherwise hide every region.
+        """
+        plan = RegionPlan(lookback_days=self.lookback_days)
+        if regions is None:
+            try:
+                regions = self._enabled_regions(account, plan)
+            except Exception as e:
+                from src.lib.scan_engine import list_regions
+
+                logger.warning(f"Could not check region opt-in status: {e}")
+                regions = list_regions(account)
+        account_id = account_id or account.get_account_id()
+
+        try:
+            used: Optional[set] = self._used_regions(account, account_id, plan)
+        except Exception as e:
+            logger.warning(f"Cost Explorer usage by region unavailable, "
+                           f"scanning every region: {e}")
+            used = None
+        plan.deep_sweep = used is not None and self.sweep_due(account_id)
+
+        for region in regions:
+            if region == account.region:
+                plan.active[region] = HOME_REGION
+            elif used is None:
+                plan.active[region] = PROBE_UNAVAILABLE
+            elif region in used:
+                plan.active[region] = RECENT_USAGE
+            elif plan.deep_sweep:
+                plan.active[region] = DEEP_SWEEP
+            else:
+                plan.pruned[region] = NO_RECENT_USAGE
+        return plan
@@ -0,0 +1,437 @@
+"""Concurrent region x service scan engine."""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from src.lib.rate_limiter import backoff_delay, is_throttling_error
+from src.models.aws_account import AWSAccount
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 16
+
+DEFAULT_THROTTLE_RETRIES = 3
+
+RISK_LEVELS = ["LOW", "MEDIUM", "HIGH"]
+
+
+@dataclass(frozen=True)
+class ScanJob:
+    """A single unit of scan work: one service (or all services) in one region."""
+
+    region: str
+    service: Optional[str] = None
+
+
+@dataclass
+class ScanResult:
+    """Outcome of a single scan job."""
+
+    job: ScanJob
+    analysis: Dict[str, Any]
+    elapsed: float
+    error: Optional[str] = None
+    retries: int = 0
+
+
+class ScanEngine:
+    """Bounded worker pool that fans scan jobs out across regions and services."""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS,
+                 max_per_region: Optional[int] = None,
+                 max_per_service: Optional[int] = None,
+                 throttle_retries: int = DEFAULT_THROTTLE_RETRIES,
+                 slots: Optional[threading.Semaphore] = None):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if max_per_region is not None and max_per_region < 1:
+            raise ValueError("max_per_region must be at least 1")
+        if max_per_service is not None and max_per_service < 1:
+            raise ValueError("max_per_service must be at least 1")
+
+        self.max_workers = max_workers
+        self.max_per_region = max_per_region
+        self.max_per_service = max_per_service
+        self.throttle_retries = throttle_retries
+        # Shared between engines (e.g. one per account) to cap their total concurrency
+        self.slots = slots
+
+    def _can_start(self, job: ScanJob, region_load: Dict[str, int],
+                   service_load: Dict[Optional[str], int]) -> bool:
+        """Check whether starting the job keeps every cap satisfied."""
+        if (self.max_per_region is not None
+                and region_load.get(job.region, 0) >= self.max_per_region):
+            return False
+        if (self.max_per_service is not None and job.service is not None
+                and service_load.get(job.service, 0) >= self.max_per_service):
+            return False
+        return True
+
+    def run(self, jobs: Iterable[ScanJob],
+            scan_fn: Callable[[ScanJob], Dict[str, Any]],
+            on_result: Optional[Callable[[ScanResult], None]] = None
+            ) -> List[ScanResult]:
+        """Run all jobs and return their results in submission order.
+
+        Jobs are only dispatched when the global, per-region and per-service
+        caps allow it, so a capped job never occupies an idle worker.
+        """
+        pending: Deque[ScanJob] = deque(jobs)
+        order = {job: index for index, job in enumerate(pending)}
+        results: Dict[ScanJob, ScanResult] = {}
+        region_load: Dict[str, int] = {}
+        service_load: Dict[Optional[str], int] = {}
+        running = {}
+
+        def execute(job: ScanJob) -> ScanResult:
+            started = time.perf_counter()
+            attempt = 0
+            while True:
+                try:
+                    with self.slots or nullcontext():
+                        analysis = scan_fn(job)
+                    return ScanResult(job, analysis or {},
+                                      time.perf_counter() - started,
+                                      retries=attempt)
+                except Exception as e:
+                    # Jobs still throttled after botocore's retries get rescheduled
+                    if is_throttling_error(e) and attempt < self.throttle_retries:
+                        attempt += 1
+                        time.sleep(backoff_delay(attempt))
+                        continue
+                    logger.warning(f"Scan of {job.service or 'all services'} in "
+                                   f"{job.region} failed: {e}")
+                    return ScanResult(job, {}, time.perf_counter() - started,
+                                      error=str(e), retries=attempt)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                skipped: Deque[ScanJob] = deque()
+                while pending and len(running) < self.max_workers:
+                    job = pending.popleft()
+                    if not self._can_start(job, region_load, service_load):
+                        skipped.append(job)
+                        continue
+                    region_load[job.region] = region_load.get(job.region, 0) + 1
+                    service_load[job.service] = service_load.get(job.service, 0) + 1
+                    running[pool.submit(execute, job)] = job
+                pending.extendleft(reversed(skipped))
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = running.pop(future)
+                    region_load[job.region] -= 1
+                    service_load[job.service] -= 1
+                    result = future.result()
+                    results[job] = result
+                    if on_result:
+                        on_result(result)
+
+        return sorted(results.values(), key=lambda r: order[r.job])
+
+
+def build_jobs(regions: Iterable[str],
+               services: Optional[Iterable[str]] = None) -> List[ScanJob]:
+    """Build the region x service job matrix.
+
+    Without an explicit service list each region becomes a single job that
+    covers every service the enforcer knows about.
+    """
+    service_list = list(services) if services else [None]
+    return [ScanJob(region, service) for region in regions
+            for service in service_list]
+
+
+def list_regions(account: AWSAccount) -> List[str]:
+    """List the regions enabled for the account."""
+    try:
+        ec2 = account.get_client('ec2')
+        return sorted(r['RegionName'] for r in ec2.describe_regions()['Regions'])
+    except Exception as e:
+        logger.warning(f"Could not list enabled regions, using defaults: {e}")
+        return sorted(account.get_session().get_available_regions('ec2'))
+
+
+def enforcer_scan_fn(account: AWSAccount, enforcer_factory: Callable[[AWSAccount], Any],
+                     dry_run: bool = False) -> Callable[[ScanJob], Dict[str, Any]]:
+    """Adapt an enforcer into a per-job scan function.
+
+    Each job runs a single-region analysis against a copy of the account
+    pinned to the job's region; copies share the account's client pool.
+    """
+    def scan(job: ScanJob) -> Dict[str, Any]:
+        regional = replace(account, region=job.region)
+        enforcer = enforcer_factory(regional)
+        return enforcer.comprehensive_analysis(
+            services=[job.service] if job.service else None,
+            include_all_regions=False,
+            dry_run=dry_run
+        )
+
+    return scan
+
+
+def _merge_unique(target: List[Any], items: Iterable[Any]) -> None:
+    """Append items to target, skipping duplicates while keeping order."""
+    for item in items:
+        if item not in target:
+            target.append(item)
+
+
+def merge_analyses(results: List[ScanResult]) -> Dict[str, Any]:
+    """Merge per-job analyses into the comprehensive_analysis result shape."""
+    regions: Dict[str, Dict[str, Any]] = {}
+    recommendations: List[str] = []
+    risk_factors: List[str] = []
+    overall_risk = RISK_LEVELS[0]
+    total_resources = 0
+    cost_analysis: Dict[str, Any] = {}
+    predictions: Dict[str, Any] = {}
+    errors = []
+
+    for result in results:
+        if result.error:
+            errors.append({
+                'region': result.job.region,
+                'service': result.job.service,
+                'error': result.error,
+            })
+            continue
+
+        analysis = result.analysis
+        total_resources += analysis.get('total_resources_found', 0)
+        _merge_unique(recommendations, analysis.get('recommendations', []))
+
+        for region_data in analysis.get('regions_analyzed', []):
+            name = region_data.get('region', result.job.region)
+            merged = regions.setdefault(name, {
+                'region': name, 'services': {}, 'recommendations': []
+            })
+            merged['services'].update(region_data.get('services', {}))
+            _merge_unique(merged['recommendations'],
+                          region_data.get('recommendations', []))
+
+        risk = analysis.get('risk_assessment', {})
+        level = risk.get('overall_risk')
+        if level in RISK_LEVELS and (RISK_LEVELS.index(level)
+                                     > RISK_LEVELS.index(overall_risk)):
+            overall_risk = level
+        _merge_unique(risk_factors, risk.get('risk_factors', []))
+
+        # Cost and predictions are account-wide, so any job's copy will do
+        if not cost_analysis and analysis.get('cost_analysis'):
+            cost_analysis = analysis['cost_analysis']
+        if not predictions and analysis.get('predictions'):
+            predictions = analysis['predictions']
+
+    return {
+        'total_resources_found': total_resources,
+        'regions_analyzed': list(regions.values()),
+        'recommendations': recommendations,
+        'risk_assessment': {
+            'overall_risk': overall_risk,
+            'risk_factors': risk_factors,
+        },
+        'cost_analysis': cost_analysis,
+        'predictions': predictions,
+        'scan_errors': errors,
+    }
+
+
+def _chain(*callbacks: Optional[Callable[[ScanResult], None]]
+           ) -> Callable[[ScanResult], None]:
+    """Combine result callbacks into one, skipping missing ones."""
+    present = [callback for callback in callbacks if callback]
+
+    def call_all(result: ScanResult) -> None:
+        for callback in present:
+            callback(result)
+    return call_all
+
+
+@dataclass
+class ScanOptions:
+    """Optional stages of a concurrent_analysis run; the defaults rescan everything.
+
+    engine runs the jobs (a ScanEngine unless given). With an inventory
+    cache only the missing or stale (region, service) cells are rescanned
+    (all of them with refresh); fresh cells are served from disk and
+    rescanned cells are written back. progress (a ProgressTracker) is told
+    the job matrix up front and then sees every result. With discovery (a
+    FastDiscovery), cells its inventory shows to be empty are answered
+    without calling the enforcer. With a scanner registry and an explicit
+    service list, registered services run their own scanners, only in the
+    regions they are available in. With a region probe (a RegionProbe),
+    regions without recent usage are left out unless a deep sweep is due.
+    An AsyncScanEngine runs registered async scanners on one event loop.
+    With a CPUStage, registered scanners' pages are converted in worker
+    processes; with a UsageCollector, their resources get usage from
+    CloudWatch. A UsageTally keeps the account-wide totals for resources
+    on_result has let go of.
+    """
+
+    engine: Optional[Any] = None
+    dry_run: bool = False
+    cache: Optional[Any] = None
+    max_age: Optional[float] = None
+    refresh: bool = False
+    progress: Optional[Any] = None
+    discovery: Optional[Any] = None
+    registry: Optional[Any] = None
+    region_probe: Optional[Any] = None
+    cpu_stage: Optional[Any] = None
+    usage_collector: Optional[Any] = None
+    tally: Optional[Any] = None
+
+
+def _account_id(account: AWSAccount, options: ScanOptions) -> str:
+    """Get the account ID through the cache's resolver when there is one."""
+    if options.cache is not None:
+        return options.cache.resolve_account_id(account)
+    return account.get_account_id()
+
+
+def _plan_jobs(account: AWSAccount, services: Optional[List[str]],
+               regions: Optional[List[str]], options: ScanOptions
+               ) -> Tuple[List[ScanJob], int, Optional[Any]]:
+    """Build the job matrix; return it with the cells pruned and the region plan."""
+    region_plan = None
+    if options.region_probe is not None:
+        region_plan = options.region_probe.plan(
+            account, regions,
+            account_id=(options.cache.resolve_account_id(account)
+                        if options.cache is not None else None))
+        regions = region_plan.scan_regions
+    else:
+        regions = regions or list_regions(account)
+    if options.registry is not None and services:
+        jobs, pruned = options.registry.jobs(account, regions, services)
+        return jobs, pruned, region_plan
+    return build_jobs(regions, services), 0, region_plan
+
+
+def _run_jobs(account: AWSAccount, enforcer_factory: Callable[[AWSAccount], Any],
+              jobs: List[ScanJob], services: Optional[List[str]], options: ScanOptions,
+              engine: Any, finish: Callable[[ScanResult], None]
+              ) -> Tuple[Dict[ScanJob, ScanResult], Optional[Any]]:
+    """Scan jobs on the engine; return the results and the async client pool, if any."""
+    if not jobs:
+        return {}, None
+    # The registry only applies to an explicit service list
+    registry = options.registry if services else None
+    if getattr(engine, 'asynchronous', False):
+        from src.lib.async_engine import AsyncClientPool
+        from src.lib.scanners import ScannerRegistry
+
+        clients = AsyncClientPool(account)
+        scan_fn = (registry or ScannerRegistry({})).async_scan_fn(
+            account, clients, enforcer_factory, options.dry_run, options.cpu_stage,
+            options.usage_collector)
+        return {r.job: r for r in engine.run(jobs, scan_fn, on_result=finish,
+                                             clients=clients)}, clients
+    if registry is not None:
+        scan_fn = registry.scan_fn(account, enforcer_factory, options.dry_run,
+                                   options.cpu_stage, options.usage_collector)
+    else:
+        scan_fn = enforcer_scan_fn(account, enforcer_factory, options.dry_run)
+    return {r.job: r for r in engine.run(jobs, scan_fn, on_result=finish)}, None
+
+
+def concurrent_analysis(account: AWSAccount,
+                        enforcer_factory: Callable[[AWSAccount], Any],
+                        services: Optional[List[str]] = None,
+                        regions: Optional[List[str]] = None,
+                        options: Optional[ScanOptions] = None,
+                        on_result: Optional[Callable[[ScanResult], None]] = None
+                        ) -> Dict[str, Any]:
+    """Analyze every region x service pair concurrently and merge the results.
+
+    on_result sees every job's result, cached or scanned, as soon as it is
+    available; see ScanOptions for the optional stages. Limits are judged
+    on the account-wide totals of all jobs, not per job. Skipped cells are
+    reported under 'discovery' and the region plan under 'region_pruning'.
+    """
+    from src.lib.limit_engine import UsageTally, evaluate_analysis
+
+    options = options or ScanOptions()
+    engine = options.engine or ScanEngine()
+    cache = options.cache
+    jobs, pruned, region_plan = _plan_jobs(account, services, regions, options)
+    if options.progress is not None:
+        options.progress.start_jobs(jobs)
+        on_result = _chain(options.progress.scan_result, on_result)
+    # Usage is tallied before on_result can drop the resources (e.g. NDJSON)
+    tally = options.tally if options.tally is not None else UsageTally()
+    on_result = _chain(tally.scan_result, on_result)
+
+    started = time.perf_counter()
+    cached: Dict[ScanJob, Dict[str, Any]] = {}
+    account_id = None
+    if cache is not None:
+        account_id = cache.resolve_account_id(account)
+        if not options.refresh:
+            cached = cache.lookup(account_id, jobs, options.max_age)
+
+    def finish(result: ScanResult) -> None:
+        if cache is not None and result.error is None:
+            cache.store(account_id, result.job, result.analysis)
+        on_result(result)
+
+    hits = {job: ScanResult(job, analysis, 0.0) for job, analysis in cached.items()}
+    for result in hits.values():
+        on_result(result)
+
+    stale = [job for job in jobs if job not in cached]
+    skipped: List[ScanJob] = []
+    if options.discovery is not None and stale:
+        from src.lib.discovery import empty_analysis
+
+        options.discovery.collect(account, sorted({job.region for job in stale}))
+        stale, skipped = options.discovery.prune(stale)
+        # Not cached: a later full scan should not be served inferred results
+        for job in skipped:
+            hits[job] = ScanResult(job, empty_analysis(job), 0.0)
+            on_result(hits[job])
+
+    scanned, async_clients = _run_jobs(account, enforcer_factory, stale, services,
+                                       options, engine, finish)
+
+    results = [scanned[job] if job in scanned else hits[job] for job in jobs]
+    analysis = evaluate_analysis(merge_analyses(results), tally=tally)
+    stats = analysis['scan_stats'] = {
+        'jobs': len(jobs),
+        'max_workers': engine.max_workers,
+        'wall_time': time.perf_counter() - started,
+        'job_time': sum(r.elapsed for r in results),
+        'clients': account.client_pool.stats(),
+        'cache_hits': len(cached),
+        'cache_refreshed': len(stale),
+        'job_retries': sum(r.retries for r in results),
+        'cells_pruned': pruned,
+    }
+    if async_clients is not None:
+        stats['async_clients'] = async_clients.stats()
+    if options.cpu_stage is not None:
+        stats['cpu_stage'] = options.cpu_stage.stats()
+    if options.usage_collector is not None:
+        stats['usage_metrics'] = options.usage_collector.stats()
+    if options.discovery is not None:
+        analysis['discovery'] = options.discovery.report(skipped)
+    if region_plan is not None:
+        analysis['region_pruning'] = region_plan.report()
+        stats['regions_pruned'] = len(region_plan.pruned)
+        if region_plan.deep_sweep and not any(r.error for r in results):
+            options.region_probe.record_sweep(_account_id(account, options))
+    if account.rate_limiter is not None:
+        stats['throttling'] = account.rate_limiter.stats()
+    if cached:
+        stats['oldest_cached_at'] = min(
+            a.get('cached_at', time.time()) for a in cached.values()
+        )
+    return analysis
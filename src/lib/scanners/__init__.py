@@ -0,0 +1,240 @@
+"""Registry of per-service scanners, loaded lazily from entry points.
+
+A scanner is a module (or object) with an ``analyze(account, region)``
+function returning ``{'resource_count', 'resources', ...}`` for one service
+in one region, and optionally ``clean(account, region, dry_run)`` and an
+``async def analyze_async(clients, region)`` for the async engine, given
+an AsyncClientPool. Scanners that split ``analyze`` into ``fetch(account,
+region)`` (raw pages) and ``convert(pages, region)`` (plus ``fetch_async``
+for the async engine) can have their pages converted in a CPUStage worker
+process. It may declare where it is available:
+
+* ``GLOBAL = True`` - scanned once, in the account's home region
+* ``REGIONS`` - an explicit collection of region names
+* ``ENDPOINT`` - a botocore service name whose endpoint data lists its regions
+
+Scanners are registered under the ``aws_free_guard.scanners`` entry point
+group and imported only when a run selects them. Services without a
+registered scanner fall back to the free tier enforcer.
+"""
+
+import asyncio
+import importlib
+import logging
+from dataclasses import replace
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.lib.scan_engine import ScanJob, enforcer_scan_fn
+from src.models.aws_account import AWSAccount
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "aws_free_guard.scanners"
+
+# Scanners shipped with the package; installed entry points may override them
+BUILTIN_SCANNERS = {
+    "ec2": "src.lib.scanners.ec2",
+    "s3": "src.lib.scanners.s3",
+    "lambda": "src.lib.scanners.awslambda",
+    "rds": "src.lib.scanners.rds",
+}
+
+
+def _import_target(target: str) -> Any:
+    """Import a "module" or "module:attribute" target."""
+    module_name, _, attribute = target.partition(":")
+    loaded = importlib.import_module(module_name)
+    return getattr(loaded, attribute) if attribute else loaded
+
+
+def _entry_point_targets() -> Dict[str, Any]:
+    """Get the installed scanner entry points by name, without loading them."""
+    from importlib.metadata import entry_points
+
+    found = entry_points()
+    if hasattr(found, "select"):
+        selected = found.select(group=ENTRY_POINT_GROUP)
+    else:
+        selected = found.get(ENTRY_POINT_GROUP, [])
+    return {entry_point.name: entry_point for entry_point in selected}
+
+
+class ScannerRegistry:
+    """Maps service names to scanners and decides where each one runs."""
+
+    def __init__(self, targets: Optional[Dict[str, Any]] = None):
+        # Values are import targets ("module:attr"), entry points or scanners
+        self.targets: Dict[str, Any] = dict(BUILTIN_SCANNERS if targets is None else targets)
+        self._loaded: Dict[str, Any] = {}
+
+    @classmethod
+    def discover(cls) -> "ScannerRegistry":
+        """Build a registry of the built-in scanners plus installed entry points."""
+        registry = cls()
+        try:
+            registry.targets.update(_entry_point_targets())
+        except Exception as e:
+            logger.warning(f"Could not read scanner entry points: {e}")
+        return registry
+
+    def __contains__(self, service: Optional[str]) -> bool:
+        return service in self.targets
+
+    def names(self) -> List[str]:
+        """Get the registered service names."""
+        return sorted(self.targets)
+
+    def load(self, service: str) -> Any:
+        """Import a service's scanner on first use."""
+        if service not in self._loaded:
+            target = self.targets[service]
+            if isinstance(target, str):
+                target = _import_target(target)
+            elif not hasattr(target, "analyze"):
+                target = target.load()
+            self._loaded[service] = target
+        return self._loaded[service]
+
+    def process_target(self, service: str) -> Optional[str]:
+        """Get the import target a worker process can load a scanner from, if any."""
+        target = self.targets[service]
+        if isinstance(target, str):
+            return target
+        # Entry points carry theirs; scanner objects can't be re-imported
+        return getattr(target, "value", None)
+
+    def regions_for(self, account: AWSAccount, service: str,
+                    regions: Iterable[str]) -> List[str]:
+        """Filter regions down to those the service's scanner is available in."""
+        regions = list(regions)
+        if service not in self:
+            return regions
+        scanner = self.load(service)
+        if getattr(scanner, "GLOBAL", False):
+            return [account.region]
+        available = getattr(scanner, "REGIONS", None)
+        endpoint = getattr(scanner, "ENDPOINT", None)
+        if available is None and endpoint:
+            # Endpoint data ships with botocore, so this makes no API call
+            available = account.get_session().get_available_regions(endpoint)
+        if available is None:
+            return regions
+        available = set(available)
+        return [region for region in regions if region in available]
+
+    def jobs(self, account: AWSAccount, regions: Iterable[str],
+             services: Iterable[str]) -> Tuple[List[ScanJob], int]:
+        """Build the (region, service) jobs; return them with the number of cells pruned.
+
+        A global service runs once instead of in every region, and a
+        regional one only where it is available.
+        """
+        regions = list(regions)
+        jobs = []
+        pruned = 0
+        for service in services:
+            supported = self.regions_for(account, service, regions)
+            jobs.extend(ScanJob(region, service) for region in supported)
+            pruned += max(len(regions) - len(supported), 0)
+        return jobs, pruned
+
+    def _staged_target(self, service: str, scanner: Any, fetch: str,
+                       cpu_stage: Optional[Any]) -> Optional[str]:
+        """Get the scanner's process target if its pages should go to the CPU stage."""
+        if cpu_stage is None or not hasattr(scanner, fetch) \
+                or not hasattr(scanner, "convert"):
+            return None
+        return self.process_target(service)
+
+    def scan_fn(self, account: AWSAccount, enforcer_factory: Callable[[AWSAccount], Any],
+                dry_run: bool = False, cpu_stage: Optional[Any] = None,
+                usage: Optional[Any] = None) -> Callable[[ScanJob], Dict[str, Any]]:
+        """Build the per-job scan function; unregistered services use the enforcer.
+
+        With a CPUStage, scanners that can be re-imported in a worker only
+        fetch pages in the scan thread and leave the rest to the stage. With
+        a UsageCollector, resources get their CloudWatch usage before the
+        scan's limits are evaluated.
+        """
+        fallback = enforcer_scan_fn(account, enforcer_factory, dry_run)
+
+        def scan(job: ScanJob) -> Dict[str, Any]:
+            if job.service not in self:
+                return fallback(job)
+            scanner = self.load(job.service)
+            regional = replace(account, region=job.region)
+            target = self._staged_target(job.service, scanner, "fetch", cpu_stage)
+            if target is None:
+                return _evaluate(job, regional, scanner.analyze(regional, job.region), usage)
+            analysis = cpu_stage.evaluate(target, job, scanner.fetch(regional, job.region))
+            if usage is None:
+                return analysis
+            return _evaluate(job, regional, _job_service_data(analysis, job), usage)
+
+        return scan
+
+    def async_scan_fn(self, account: AWSAccount, clients: Any,
+                      enforcer_factory: Callable[[AWSAccount], Any],
+                      dry_run: bool = False, cpu_stage: Optional[Any] = None,
+                      usage: Optional[Any] = None
+                      ) -> Callable[[ScanJob], Awaitable[Dict[str, Any]]]:
+        """Build the per-job coroutine for the async engine.
+
+        Scanners with analyze_async share the clients pool; everything else
+        (sync scanners, the enforcer) runs in the loop's worker threads.
+        """
+        sync_scan = self.scan_fn(account, enforcer_factory, dry_run, cpu_stage, usage)
+
+        async def scan(job: ScanJob) -> Dict[str, Any]:
+            loop = asyncio.get_running_loop()
+            scanner = self.load(job.service) if job.service in self else None
+            if scanner is None or not hasattr(scanner, "analyze_async"):
+                return await loop.run_in_executor(None, sync_scan, job)
+            target = self._staged_target(job.service, scanner, "fetch_async", cpu_stage)
+            if target is None:
+                service_data = await scanner.analyze_async(clients, job.region)
+            else:
+                pages = await scanner.fetch_async(clients, job.region)
+                analysis = await cpu_stage.evaluate_async(target, job, pages)
+                if usage is None:
+                    return analysis
+                service_data = _job_service_data(analysis, job)
+            # Usage collection blocks; keep it off the loop
+            return await loop.run_in_executor(None, _evaluate, job,
+                                              replace(account, region=job.region),
+                                              service_data, usage)
+
+        return scan
+
+
+def _job_service_data(analysis: Dict[str, Any], job: ScanJob) -> Dict[str, Any]:
+    """Get a job's service data back out of its scanner_analysis result."""
+    return analysis['regions_analyzed'][0]['services'][job.service]
+
+
+def _evaluate(job: ScanJob, account: AWSAccount, service_data: Dict[str, Any],
+              usage: Optional[Any] = None) -> Dict[str, Any]:
+    """Collect usage for a job's resources, if asked to, and wrap them up."""
+    if usage is not None:
+        usage.collect(account, service_data.get('resources') or [])
+    return scanner_analysis(job, service_data)
+
+
+def scanner_analysis(job: ScanJob, service_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrap one scanner's service data in the comprehensive_analysis shape.
+
+    A scanner only reports what exists and how much it is used; limits are
+    judged once, on the account-wide totals, after the jobs are merged.
+    """
+    resources = service_data.get('resources') or []
+    recommendations = list(service_data.get('recommendations', []))
+    return {
+        'total_resources_found': service_data.get('resource_count', len(resources)),
+        'regions_analyzed': [{
+            'region': job.region,
+            'services': {job.service: service_data},
+            'recommendations': recommendations,
+        }],
+        'recommendations': recommendations,
+        'risk_assessment': {'overall_risk': "LOW", 'risk_factors': []},
+    }
@@ -0,0 +1,44 @@
+"""Lambda function scanner."""
+
+from typing import Any, Dict, List
+
+from src.models.aws_account import AWSAccount
+from src.models.aws_resource import AWSResource
+
+ENDPOINT = "lambda"
+
+
+def _functions(page: Dict[str, Any], region: str) -> List[AWSResource]:
+    """Convert one ListFunctions page."""
+    return [AWSResource.from_catalog(function['FunctionName'], "lambda", "function", region)
+            for function in page.get('Functions', [])]
+
+
+def fetch(account: AWSAccount, region: str) -> List[Dict[str, Any]]:
+    """Fetch the raw ListFunctions pages."""
+    client = account.get_client('lambda', region)
+    return list(client.get_paginator('list_functions').paginate())
+
+
+async def fetch_async(clients: Any, region: str) -> List[Dict[str, Any]]:
+    """Fetch the raw pages through an AsyncClientPool."""
+    from src.lib.async_engine import pages
+
+    client = await clients.client('lambda', region)
+    return [page async for page in pages(client, 'list_functions')]
+
+
+def convert(pages: List[Dict[str, Any]], region: str) -> Dict[str, Any]:
+    """List functions from raw ListFunctions pages."""
+    resources = [resource for page in pages for resource in _functions(page, region)]
+    return {'resource_count': len(resources), 'resources': resources}
+
+
+def analyze(account: AWSAccount, region: str) -> Dict[str, Any]:
+    """List functions; request counts come from CloudWatch, not the Lambda API."""
+    return convert(fetch(account, region), region)
+
+
+async def analyze_async(clients: Any, region: str) -> Dict[str, Any]:
+    """List functions through an AsyncClientPool."""
+    return convert(await fetch_async(clients, region), region)
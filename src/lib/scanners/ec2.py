@@ -0,0 +1,69 @@
+"""EC2 instance scanner."""
+
+from typing import Any, Dict, List
+
+from src.lib.scanners.usage import hours_this_month
+from src.models.aws_account import AWSAccount
+from src.models.aws_resource import AWSResource, ResourceStatus
+
+ENDPOINT = "ec2"
+
+# Instances in these states still exist (and stopped ones keep their volumes)
+_LIVE_STATES = ["pending", "running", "stopping", "stopped"]
+
+_FILTERS = [{'Name': 'instance-state-name', 'Values': _LIVE_STATES}]
+
+# Only these types draw on the 750 free tier hours; others are billed
+FREE_TIER_INSTANCE_TYPES = frozenset({"t2.micro", "t3.micro"})
+
+
+def _instances(page: Dict[str, Any], region: str) -> List[AWSResource]:
+    """Convert one DescribeInstances page, with the hours each has run this month.
+
+    The hours are approximate (see hours_this_month). Instances of a type
+    outside the free tier are CHARGED and carry no free tier limits.
+    """
+    resources = []
+    for reservation in page.get('Reservations', []):
+        for instance in reservation.get('Instances', []):
+            usage = {}
+            if instance.get('State', {}).get('Name') == "running":
+                usage['hours'] = hours_this_month(instance['LaunchTime'])
+            if instance.get('InstanceType') in FREE_TIER_INSTANCE_TYPES:
+                resources.append(AWSResource.from_catalog(
+                    instance['InstanceId'], "ec2", "instance", region, usage))
+            else:
+                resources.append(AWSResource(instance['InstanceId'], "ec2", "instance",
+                                             region, usage,
+                                             status=ResourceStatus.CHARGED))
+    return resources
+
+
+def fetch(account: AWSAccount, region: str) -> List[Dict[str, Any]]:
+    """Fetch the raw DescribeInstances pages."""
+    ec2 = account.get_client('ec2', region)
+    return list(ec2.get_paginator('describe_instances').paginate(Filters=_FILTERS))
+
+
+async def fetch_async(clients: Any, region: str) -> List[Dict[str, Any]]:
+    """Fetch the raw pages through an AsyncClientPool."""
+    from src.lib.async_engine import pages
+
+    ec2 = await clients.client('ec2', region)
+    return [page async for page in pages(ec2, 'describe_instances', Filters=_FILTERS)]
+
+
+def convert(pages: List[Dict[str, Any]], region: str) -> Dict[str, Any]:
+    """List instances, with the hours each has run this month, from raw pages."""
+    resources = [resource for page in pages for resource in _instances(page, region)]
+    return {'resource_count': len(resources), 'resources': resources}
+
+
+def analyze(account: AWSAccount, region: str) -> Dict[str, Any]:
+    """List instances with the hours each has run this month."""
+    return convert(fetch(account, region), region)
+
+
+async def analyze_async(clients: Any, region: str) -> Dict[str, Any]:
+    """List instances through an AsyncClientPool."""
+    return convert(await fetch_async(clients, region), region)
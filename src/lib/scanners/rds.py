@@ -0,0 +1,64 @@
+"""RDS database instance scanner."""
+
+from typing import Any, Dict, List
+
+from src.lib.scanners.usage import hours_this_month
+from src.models.aws_account import AWSAccount
+from src.models.aws_resource import AWSResource, ResourceStatus
+
+ENDPOINT = "rds"
+
+# Only these classes draw on the 750 free tier hours; others are billed
+FREE_TIER_INSTANCE_CLASSES = frozenset({"db.t2.micro", "db.t3.micro", "db.t4g.micro"})
+
+
+def _db_instances(page: Dict[str, Any], region: str) -> List[AWSResource]:
+    """Convert one DescribeDBInstances page, with hours available this month.
+
+    The hours are approximate (see hours_this_month). Instances of a class
+    outside the free tier are CHARGED and carry no free tier limits.
+    """
+    resources = []
+    for instance in page.get('DBInstances', []):
+        usage = {}
+        if instance.get('DBInstanceStatus') == "available" and \
+                instance.get('InstanceCreateTime'):
+            usage['hours'] = hours_this_month(instance['InstanceCreateTime'])
+        identifier = instance['DBInstanceIdentifier']
+        if instance.get('DBInstanceClass') in FREE_TIER_INSTANCE_CLASSES:
+            resources.append(AWSResource.from_catalog(
+                identifier, "rds", "db_instance", region, usage))
+        else:
+            resources.append(AWSResource(identifier, "rds", "db_instance", region, usage,
+                                         status=ResourceStatus.CHARGED))
+    return resources
+
+
+def fetch(account: AWSAccount, region: str) -> List[Dict[str, Any]]:
+    """Fetch the raw DescribeDBInstances pages."""
+    rds = account.get_client('rds', region)
+    return list(rds.get_paginator('describe_db_instances').paginate())
+
+
+async def fetch_async(clients: Any, region: str) -> List[Dict[str, Any]]:
+    """Fetch the raw pages through an AsyncClientPool."""
+    from src.lib.async_engine import pages
+
+    rds = await clients.client('rds', region)
+    return [page async for page in pages(rds, 'describe_db_instances')]
+
+
+def convert(pages: List[Dict[str, Any]], region: str) -> Dict[str, Any]:
+    """List DB instances, with hours available this month, from raw pages."""
+    resources = [resource for page in pages for resource in _db_instances(page, region)]
+    return {'resource_count': len(resources), 'resources': resources}
+
+
+def analyze(account: AWSAccount, region: str) -> Dict[str, Any]:
+    """List DB instances with the hours each has been available this month."""
+    return convert(fetch(account, region), region)
+
+
+async def analyze_async(clients: Any, region: str) -> Dict[str, Any]:
+    """List DB instances through an AsyncClientPool."""
+    return convert(await fetch_async(clients, region), region)
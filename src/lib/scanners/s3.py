@@ -0,0 +1,43 @@
+"""S3 bucket scanner."""
+
+from typing import Any, Dict, List
+
+from src.models.aws_account import AWSAccount
+from src.models.aws_resource import AWSResource
+
+# ListBuckets returns every bucket whatever the endpoint, so scan once
+GLOBAL = True
+
+
+def _buckets(response: Dict[str, Any], region: str) -> List[AWSResource]:
+    """Convert a ListBuckets response, tagging buckets with their own region."""
+    return [AWSResource.from_catalog(bucket['Name'], "s3", "bucket",
+                                     bucket.get('BucketRegion') or region)
+            for bucket in response.get('Buckets', [])]
+
+
+def fetch(account: AWSAccount, region: str) -> List[Dict[str, Any]]:
+    """Fetch the ListBuckets response, as a single page."""
+    return [account.get_client('s3', region).list_buckets()]
+
+
+async def fetch_async(clients: Any, region: str) -> List[Dict[str, Any]]:
+    """Fetch the ListBuckets response through an AsyncClientPool."""
+    s3 = await clients.client('s3', region)
+    return [await s3.list_buckets()]
+
+
+def convert(pages: List[Dict[str, Any]], region: str) -> Dict[str, Any]:
+    """List buckets from raw ListBuckets responses."""
+    resources = [resource for page in pages for resource in _buckets(page, region)]
+    return {'resource_count': len(resources), 'resources': resources}
+
+
+def analyze(account: AWSAccount, region: str) -> Dict[str, Any]:
+    """List the account's buckets, tagged with the region each lives in."""
+    return convert(fetch(account, region), region)
+
+
+async def analyze_async(clients: Any, region: str) -> Dict[str, Any]:
+    """List the account's buckets through an AsyncClientPool."""
+    return convert(await fetch_async(clients, region), region)
@@ -0,0 +1,17 @@
+"""Usage helpers shared by scanners."""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def hours_this_month(since: datetime, now: Optional[datetime] = None) -> float:
+    """Hours from since (or the start of the month, if later) until now.
+
+    This is an approximation of billed hours: EC2's LaunchTime is the
+    last start, so hours run before a stop this month are missed, while
+    an RDS creation time also counts the hours a database was stopped.
+    """
+    now = now or datetime.now(timezone.utc)
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    started = max(since, month_start)
+    return max((now - started).total_seconds() / 3600, 0.0)
@@ -0,0 +1,10 @@
+"""JSON helpers shared by the cache, streaming output and snapshots."""
+
+from typing import Any
+
+
+def json_default(obj: Any) -> Any:
+    """Encode model objects found in analysis results."""
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    return str(obj)
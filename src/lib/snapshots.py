@@ -0,0 +1,274 @@
+"""Compact per-run resource snapshots and the changes between them.
+
+A snapshot is a gzipped JSON-lines file: a header, then one row per
+resource, sorted by (account, cell region, service, resource ID). Because
+both sides are sorted, a run is compared with an earlier snapshot by a
+single merge-join that streams the old file instead of loading it.
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from src.lib.inventory_cache import default_cache_dir
+from src.lib.scan_engine import ScanResult
+from src.models.aws_account import DEFAULT_TEST_ACCOUNT_ID
+
+SNAPSHOT_VERSION = 1
+
+# Snapshots kept per account; older ones are deleted when a new one is saved
+DEFAULT_KEEP = 20
+
+ADDED = "added"
+REMOVED = "removed"
+STATUS_CHANGED = "status_changed"
+
+# [account_id, cell_region, service, resource_id, resource_type, region, status, usage]
+Row = List[Any]
+Cell = Tuple[str, str, str]
+
+_KEY = 4
+
+
+def _status(resource: Any) -> str:
+    """Get a resource's status as its plain value."""
+    status = (resource.get('status') if isinstance(resource, dict)
+              else getattr(resource, 'status', None))
+    status = getattr(status, 'value', status)
+    return str(status) if status is not None else "unknown"
+
+
+def _row(account_id: str, cell_region: str, service: str, resource: Any) -> Row:
+    """Build a snapshot row from an AWSResource or an already-decoded resource."""
+    if isinstance(resource, dict):
+        fields = resource
+        usage = resource.get('current_usage') or {}
+    else:
+        fields = {'resource_id': getattr(resource, 'resource_id', str(resource)),
+                  'resource_type': getattr(resource, 'resource_type', None),
+                  'region': getattr(resource, 'region', None)}
+        usage = dict(getattr(resource, 'current_usage', None) or {})
+    return [account_id, cell_region, service, str(fields.get('resource_id')),
+            fields.get('resource_type'), fields.get('region'), _status(resource), usage]
+
+
+class SnapshotBuilder:
+    """Collects the resources of scan results as they arrive.
+
+    Pass scan_result as (or chain it into) a scan's on_result, before any
+    callback that drops resources. Resources are kept by reference and
+    turned into rows only when the snapshot is written, so statuses
+    settled after the scan (see settle) are the ones saved. Cells whose
+    scan failed are remembered, so their resources are neither reported as
+    removed nor lost.
+    """
+
+    def __init__(self) -> None:
+        # account_id -> [(cell_region, service, resource)]
+        self.resources: Dict[str, List[Tuple[str, str, Any]]] = {}
+        self.cells: Set[Cell] = set()
+        self.failed: Set[Cell] = set()
+        self._lock = threading.Lock()
+
+    def scan_result(self, result: ScanResult, account_id: Optional[str] = None) -> None:
+        """Record a finished scan job's resources."""
+        account_id = account_id or ""
+        cell = (account_id, result.job.region, result.job.service or "")
+        if result.error:
+            with self._lock:
+                self.failed.add(cell)
+            return
+        found = []
+        cells = {cell}
+        for region_data in result.analysis.get('regions_analyzed', []):
+            for service, service_data in region_data.get('services', {}).items():
+                # An all-services job covers each service it reports
+                cells.add((account_id, result.job.region, service))
+                found.extend((result.job.region, service, resource)
+                             for resource in service_data.get('resources') or [])
+        with self._lock:
+            self.resources.setdefault(account_id, []).extend(found)
+            self.cells.update(cells)
+
+    def settle(self, tally: Any, account_id: Optional[str] = None) -> None:
+        """Give an account's resources their statuses against a UsageTally's final totals."""
+        with self._lock:
+            found = list(self.resources.get(account_id or "", []))
+        tally.judge([resource for _, _, resource in found])
+
+    def covers(self, row: Row) -> bool:
+        """Check whether this run successfully scanned the cell a row belongs to."""
+        cell = (row[0], row[1], row[2])
+        whole_region = (row[0], row[1], "")
+        if cell in self.failed or whole_region in self.failed:
+            return False
+        return cell in self.cells or whole_region in self.cells
+
+    def sorted_rows(self) -> List[Row]:
+        """Get the collected resources as rows, in snapshot order."""
+        with self._lock:
+            rows = [_row(account_id, cell_region, service, resource)
+                    for account_id, found in self.resources.items()
+                    for cell_region, service, resource in found]
+        return sorted(rows, key=lambda row: row[:_KEY])
+
+
+def read_rows(path: Path) -> Iterator[Row]:
+    """Stream the rows of a snapshot file, in snapshot order."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(next(f, "{}"))
+        if header.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot format in {path}")
+        for line in f:
+            yield json.loads(line)
+
+
+def _change(kind: str, row: Row, previous: Optional[Row] = None) -> Dict[str, Any]:
+    """Describe one changed resource."""
+    change = {'change': kind, 'region': row[5] or row[1], 'service': row[2],
+              'resource_type': row[4], 'resource_id': row[3], 'status': row[6],
+              'current_usage': row[7]}
+    if row[0]:
+        change['account_id'] = row[0]
+    if previous is not None:
+        change['previous_status'] = previous[6]
+    return change
+
+
+def diff_rows(old: Iterable[Row], new: List[Row], builder: Optional[SnapshotBuilder] = None
+              ) -> Tuple[List[Dict[str, Any]], List[Row]]:
+    """Merge-join two sorted row streams into changes.
+
+    Returns the changes plus the old rows of cells this run did not scan
+    (per builder.covers), which are not compared and belong in the next
+    snapshot unchanged.
+    """
+    changes: List[Dict[str, Any]] = []
+    carried: List[Row] = []
+    old_rows = iter(old)
+    previous = next(old_rows, None)
+    for row in new:
+        key = row[:_KEY]
+        while previous is not None and previous[:_KEY] < key:
+            if builder is not None and not builder.covers(previous):
+                carried.append(previous)
+            else:
+                changes.append(_change(REMOVED, previous))
+            previous = next(old_rows, None)
+        if previous is not None and previous[:_KEY] == key:
+            if previous[6] != row[6]:
+                changes.append(_change(STATUS_CHANGED, row, previous))
+            previous = next(old_rows, None)
+        else:
+            changes.append(_change(ADDED, row))
+    while previous is not None:
+        if builder is not None and not builder.covers(previous):
+            carried.append(previous)
+        else:
+            changes.append(_change(REMOVED, previous))
+        previous = next(old_rows, None)
+    return changes, carried
+
+
+def summarize(changes: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Count changes by kind."""
+    counts = {ADDED: 0, REMOVED: 0, STATUS_CHANGED: 0}
+    for change in changes:
+        counts[change['change']] += 1
+    return counts
+
+
+def _check_account(account_id: str) -> None:
+    """Refuse the placeholder ID of a failed STS lookup, which could be any account."""
+    if account_id == DEFAULT_TEST_ACCOUNT_ID:
+        raise ValueError("Account ID unknown (STS lookup failed)")
+
+
+class SnapshotStore:
+    """Directory of snapshot files, named by account and creation time."""
+
+    def __init__(self, path: Optional[Path] = None, keep: int = DEFAULT_KEEP):
+        if keep < 1:
+            raise ValueError("keep must be at least 1")
+        self.path = Path(path) if path else default_cache_dir() / "snapshots"
+        self.keep = keep
+
+    def list(self, account_id: str) -> List[Path]:
+        """Get an account's snapshots, oldest first."""
+        _check_account(account_id)
+        if not self.path.is_dir():
+            return []
+        return sorted(self.path.glob(f"{account_id}-*.jsonl.gz"))
+
+    def latest(self, account_id: str) -> Optional[Path]:
+        """Get an account's most recent snapshot, if any."""
+        snapshots = self.list(account_id)
+        return snapshots[-1] if snapshots else None
+
+    def resolve(self, account_id: str, since: str) -> Optional[Path]:
+        """Find the snapshot named by --since: "last", a file path or a snapshot name.
+
+        "last" gives None when the account has no snapshot yet.
+        """
+        if since == "last":
+            return self.latest(account_id)
+        _check_account(account_id)
+        for candidate in (Path(since), self.path / since, self.path / f"{since}.jsonl.gz"):
+            if candidate.is_file():
+                return candidate
+        raise ValueError(f"No snapshot named {since!r} in {self.path}")
+
+    def save(self, account_id: str, rows: List[Row]) -> Path:
+        """Write sorted rows as a new snapshot and prune old ones."""
+        _check_account(account_id)
+        self.path.mkdir(parents=True, exist_ok=True)
+        created = time.time()
+        stamp = (time.strftime("%Y%m%dT%H%M%S", time.gmtime(created))
+                 + f"{int(created % 1 * 1e6):06d}")
+        path = self.path / f"{account_id}-{stamp}.jsonl.gz"
+        while path.exists():
+            # Same microsecond as the last one; names must still sort by age
+            stamp += "0"
+            path = self.path / f"{account_id}-{stamp}.jsonl.gz"
+        header = {'version': SNAPSHOT_VERSION, 'account_id': account_id,
+                  'created_at': created, 'rows': len(rows)}
+        # Write to a temporary file first so readers never see partial snapshots
+        fd, temp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, \
+                    gzip.GzipFile(fileobj=raw, mode="wb") as compressed:
+                compressed.write((json.dumps(header) + "\n").encode("utf-8"))
+                for row in rows:
+                    compressed.write((json.dumps(row, separators=(",", ":"), default=str)
+                                      + "\n").encode("utf-8"))
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        for stale in self.list(account_id)[:-self.keep]:
+            stale.unlink()
+        return path
+
+
+def compare_and_save(store: SnapshotStore, account_id: str, builder: SnapshotBuilder,
+                     since: Optional[str] = None) -> Dict[str, Any]:
+    """Save this run's snapshot and, with since, report the changes from that one."""
+    baseline = store.resolve(account_id, since) if since else store.latest(account_id)
+    rows = builder.sorted_rows()
+    changes: List[Dict[str, Any]] = []
+    carried: List[Row] = []
+    if baseline is not None:
+        changes, carried = diff_rows(read_rows(baseline), rows, builder)
+    if carried:
+        rows = sorted(rows + carried, key=lambda row: row[:_KEY])
+    saved = store.save(account_id, rows)
+    report = {'snapshot': saved.name, 'resources': len(rows)}
+    if since:
+        report.update({'since': baseline.name if baseline is not None else None,
+                       'counts': summarize(changes), 'changes': changes})
+    return report
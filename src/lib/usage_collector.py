@@ -0,0 +1,310 @@
+"""Bulk CloudWatch usage collection for scanned resources.
+
+Fills AWSResource.current_usage from CloudWatch with as few requests as
+possible: every query is aligned to the same daily period, up to 500
+queries go into each GetMetricData call, and closed periods are kept in a
+local SQLite store, so a rerun only asks for the current partial period.
+EC2 and RDS hours come from launch times in the scanners, not from here.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.lib.inventory_cache import InventoryCache, default_cache_dir
+from src.models.aws_account import DEFAULT_TEST_ACCOUNT_ID, AWSAccount
+from src.models.aws_resource import AWSResource
+
+logger = logging.getLogger(__name__)
+
+# Every query uses the same period, so results line up across metrics
+PERIOD = 86400
+
+# GetMetricData accepts at most 500 queries per request
+MAX_QUERIES_PER_REQUEST = 500
+
+# CloudWatch still accepts late datapoints for a while after a period ends
+SETTLE_SECONDS = 3 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metric_values (
+    account_id TEXT NOT NULL,
+    region TEXT NOT NULL,
+    query TEXT NOT NULL,
+    period INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (account_id, region, query, period)
+);
+CREATE TABLE IF NOT EXISTS metric_sync (
+    account_id TEXT NOT NULL,
+    region TEXT NOT NULL,
+    query TEXT NOT NULL,
+    closed_until INTEGER NOT NULL,
+    PRIMARY KEY (account_id, region, query)
+);
+"""
+
+
+@dataclass(frozen=True)
+class UsageMetric:
+    """A CloudWatch metric that measures one usage key of a resource type.
+
+    aggregate is "sum" to add up the month's periods or "latest" to take
+    the last one (e.g. bucket size); values are multiplied by scale.
+    """
+
+    usage_key: str
+    namespace: str
+    metric_name: str
+    stat: str
+    id_dimension: str
+    dimensions: Tuple[Tuple[str, str], ...] = ()
+    aggregate: str = "sum"
+    scale: float = 1.0
+
+    def query_key(self, resource_id: str) -> str:
+        """Identify this metric for one resource in the store."""
+        extra = "".join(f",{name}={value}" for name, value in self.dimensions)
+        return (f"{self.namespace}/{self.metric_name}/{self.stat}/"
+                f"{self.id_dimension}={resource_id}{extra}")
+
+    def stat_query(self, resource_id: str) -> Dict[str, Any]:
+        """Build the MetricStat part of a GetMetricData query."""
+        dimensions = [{'Name': self.id_dimension, 'Value': resource_id}]
+        dimensions.extend({'Name': name, 'Value': value} for name, value in self.dimensions)
+        return {
+            'Metric': {'Namespace': self.namespace, 'MetricName': self.metric_name,
+                       'Dimensions': dimensions},
+            'Period': PERIOD,
+            'Stat': self.stat,
+        }
+
+
+USAGE_METRICS: Dict[Tuple[str, str], Tuple[UsageMetric, ...]] = {
+    ("lambda", "function"): (
+        UsageMetric("requests", "AWS/Lambda", "Invocations", "Sum", "FunctionName"),
+    ),
+    ("s3", "bucket"): (
+        UsageMetric("GB", "AWS/S3", "BucketSizeBytes", "Average", "BucketName",
+                    (("StorageType", "StandardStorage"),), aggregate="latest",
+                    scale=1 / 1024 ** 3),
+        # Only published for buckets with an "EntireBucket" request metrics filter
+        UsageMetric("requests", "AWS/S3", "GetRequests", "Sum", "BucketName",
+                    (("FilterId", "EntireBucket"),)),
+    ),
+}
+
+
+@dataclass
+class _Query:
+    """One metric of one resource, with what is already known about it."""
+
+    resource: AWSResource
+    metric: UsageMetric
+    key: str
+    fetch_from: int
+    values: Dict[int, float]
+
+
+def month_start(now: float) -> int:
+    """Get the epoch second the UTC month containing now began."""
+    moment = datetime.fromtimestamp(now, timezone.utc)
+    return int(moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0).timestamp())
+
+
+def fetch_metric_data(cloudwatch: Any, queries: List[Dict[str, Any]], start: int,
+                      end: int, stats: Optional[Dict[str, int]] = None
+                      ) -> Dict[str, Dict[int, float]]:
+    """Run GetMetricData over [start, end), following NextToken, and key values by Id.
+
+    Each request is counted in stats['requests'] when given.
+    """
+    values: Dict[str, Dict[int, float]] = {}
+    kwargs = {
+        'MetricDataQueries': queries,
+        'StartTime': datetime.fromtimestamp(start, timezone.utc),
+        'EndTime': datetime.fromtimestamp(end, timezone.utc),
+        'ScanBy': 'TimestampAscending',
+    }
+    while True:
+        response = cloudwatch.get_metric_data(**kwargs)
+        if stats is not None:
+            stats['requests'] = stats.get('requests', 0) + 1
+        for result in response.get('MetricDataResults', []):
+            # A query's datapoints can be split across pages
+            series = values.setdefault(result['Id'], {})
+            for timestamp, value in zip(result.get('Timestamps', []),
+                                        result.get('Values', [])):
+                series[int(timestamp.timestamp())] = value
+        token = response.get('NextToken')
+        if not token:
+            return values
+        kwargs['NextToken'] = token
+
+
+class UsageCollector:
+    """Fills resource usage from CloudWatch, caching closed periods in SQLite.
+
+    Each (account, region, query) records the end of the periods already
+    fetched, so a rerun in the same month only fetches what came after,
+    normally just today's partial period. Account IDs come from the
+    inventory cache's resolver; when the STS lookup fails, nothing is read
+    from or written to the store. Safe to share between scan threads.
+    """
+
+    def __init__(self, path: Optional[Path] = None,
+                 clock: Callable[[], float] = time.time,
+                 cache: Optional[InventoryCache] = None):
+        self.path = Path(path) if path else default_cache_dir() / "metrics.db"
+        self.clock = clock
+        self.cache = cache or InventoryCache(self.path.with_name("inventory.db"))
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._stats = {'resources': 0, 'queries': 0, 'periods_cached': 0,
+                       'periods_fetched': 0, 'requests': 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection, creating the database on first use."""
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=10)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._initialized = True
+        return conn
+
+    def _load(self, account_id: str, region: str, since: int
+              ) -> Tuple[Dict[str, int], Dict[str, Dict[int, float]]]:
+        """Get each query's closed_until and its stored values since a time."""
+        with self._lock, closing(self._connect()) as conn:
+            synced = dict(conn.execute(
+                "SELECT query, closed_until FROM metric_sync "
+                "WHERE account_id = ? AND region = ? AND closed_until > ?",
+                (account_id, region, since)
+            ).fetchall())
+            values: Dict[str, Dict[int, float]] = {}
+            for query, period, value in conn.execute(
+                    "SELECT query, period, value FROM metric_values "
+                    "WHERE account_id = ? AND region = ? AND period >= ?",
+                    (account_id, region, since)):
+                values.setdefault(query, {})[period] = value
+        return synced, values
+
+    def _save(self, account_id: str, region: str, since: int, closed_until: int,
+              queries: List[_Query]) -> None:
+        """Store fetched closed periods and mark them synced; drop older months."""
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM metric_values WHERE account_id = ? AND region = ? AND period < ?",
+                (account_id, region, since)
+            )
+            conn.execute(
+                "DELETE FROM metric_sync "
+                "WHERE account_id = ? AND region = ? AND closed_until <= ?",
+                (account_id, region, since)
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO metric_values "
+                "(account_id, region, query, period, value) VALUES (?, ?, ?, ?, ?)",
+                ((account_id, region, query.key, period, value)
+                 for query in queries
+                 for period, value in query.values.items()
+                 if query.fetch_from <= period < closed_until)
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO metric_sync "
+                "(account_id, region, query, closed_until) VALUES (?, ?, ?, ?)",
+                ((account_id, region, query.key, closed_until) for query in queries)
+            )
+
+    def collect(self, account: AWSAccount, resources: Iterable[AWSResource]) -> int:
+        """Fill current_usage for every resource with usage metrics; return how many."""
+        by_region: Dict[Optional[str], List[AWSResource]] = {}
+        for resource in resources:
+            if (resource.service, resource.resource_type) in USAGE_METRICS:
+                by_region.setdefault(resource.region or account.region, []).append(resource)
+        if not by_region:
+            return 0
+
+        account_id = self.cache.resolve_account_id(account)
+        for region, regional in by_region.items():
+            self._collect_region(account, account_id, region, regional)
+        collected = sum(len(regional) for regional in by_region.values())
+        with self._lock:
+            self._stats['resources'] += collected
+        return collected
+
+    def _collect_region(self, account: AWSAccount, account_id: str, region: str,
+                        resources: List[AWSResource]) -> None:
+        """Fetch what is missing for one region's resources and apply it."""
+        now = self.clock()
+        since = month_start(now)
+        end = -(-int(now) // PERIOD) * PERIOD
+        # Periods that ended long enough ago to be final
+        closed_until = max(int(now - SETTLE_SECONDS) // PERIOD * PERIOD, since)
+
+        # The placeholder of a failed STS lookup could be any account
+        persist = account_id != DEFAULT_TEST_ACCOUNT_ID
+        synced, stored = self._load(account_id, region, since) if persist else ({}, {})
+        queries = []
+        for resource in resources:
+            for metric in USAGE_METRICS[(resource.service, resource.resource_type)]:
+                key = metric.query_key(resource.resource_id)
+                fetch_from = min(max(synced.get(key, since), since), closed_until)
+                queries.append(_Query(resource, metric, key, fetch_from,
+                                      dict(stored.get(key, {}))))
+
+        # Queries starting at the same time share requests
+        groups: Dict[int, List[_Query]] = {}
+        for query in queries:
+            groups.setdefault(query.fetch_from, []).append(query)
+
+        stats = {'requests': 0}
+        cloudwatch = account.get_client('cloudwatch', region)
+        for fetch_from, group in sorted(groups.items()):
+            for offset in range(0, len(group), MAX_QUERIES_PER_REQUEST):
+                batch = group[offset:offset + MAX_QUERIES_PER_REQUEST]
+                results = fetch_metric_data(
+                    cloudwatch,
+                    [{'Id': f"m{index}", 'MetricStat': query.metric.stat_query(
+                        query.resource.resource_id), 'ReturnData': True}
+                     for index, query in enumerate(batch)],
+                    fetch_from, end, stats)
+                for index, query in enumerate(batch):
+                    query.values.update(results.get(f"m{index}", {}))
+        if persist:
+            self._save(account_id, region, since, closed_until, queries)
+
+        for query in queries:
+            usage = _aggregate(query.metric, query.values)
+            if usage is not None:
+                query.resource.current_usage[query.metric.usage_key] = usage
+
+        with self._lock:
+            self._stats['queries'] += len(queries)
+            for query in queries:
+                self._stats['periods_cached'] += (query.fetch_from - since) // PERIOD
+                self._stats['periods_fetched'] += (end - query.fetch_from) // PERIOD
+            self._stats['requests'] += stats['requests']
+
+    def stats(self) -> Dict[str, int]:
+        """Get the resources, queries, periods and GetMetricData requests so far."""
+        with self._lock:
+            return dict(self._stats)
+
+
+def _aggregate(metric: UsageMetric, values: Dict[int, float]) -> Optional[float]:
+    """Reduce a month of period values to one usage figure."""
+    if metric.aggregate == "latest":
+        if not values:
+            return None
+        return values[max(values)] * metric.scale
+    # No datapoints means no activity for counters like invocations
+    return sum(values.values()) * metric.scale
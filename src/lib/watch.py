@@ -0,0 +1,128 @@
+"""Long-running watch mode: one baseline scan, then change-driven rescans."""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from src.lib.change_feed import ChangeEvent
+from src.lib.limit_engine import evaluate_analysis
+from src.lib.scan_engine import (ScanEngine, ScanJob, ScanResult, build_jobs,
+                                 enforcer_scan_fn, merge_analyses)
+from src.models.aws_account import AWSAccount
+
+logger = logging.getLogger(__name__)
+
+# Per-service cells let a change rescan one service instead of the whole region
+WATCH_SERVICES = ["ec2", "vpc", "s3", "lambda", "rds", "cloudwatch", "iam"]
+
+# Services whose events are reported from a single region, whatever the resource's
+GLOBAL_SERVICES = {"s3", "iam"}
+
+DEFAULT_POLL_INTERVAL = 10.0  # seconds
+
+
+class Watcher:
+    """Keeps a merged analysis current by rescanning only the cells that changed."""
+
+    def __init__(self, account: AWSAccount,
+                 enforcer_factory: Callable[[AWSAccount], Any],
+                 regions: List[str], feed: Any,
+                 services: Optional[List[str]] = None,
+                 engine: Optional[ScanEngine] = None,
+                 cache: Optional[Any] = None,
+                 on_transition: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 on_update: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.account = account
+        self.feed = feed
+        self.engine = engine or ScanEngine()
+        self.cache = cache
+        self.on_transition = on_transition
+        self.on_update = on_update
+        self.jobs = build_jobs(regions, services or WATCH_SERVICES)
+        self.cells: Dict[ScanJob, ScanResult] = {}
+        self.analysis: Dict[str, Any] = {}
+        self.stats = {'polls': 0, 'events': 0, 'rescans': 0}
+        self._scan_fn = enforcer_scan_fn(account, enforcer_factory)
+        self._account_id = cache.resolve_account_id(account) if cache is not None else None
+
+    @property
+    def risk(self) -> str:
+        """Current overall risk level."""
+        return self.analysis.get('risk_assessment', {}).get('overall_risk', "UNKNOWN")
+
+    def _scan(self, jobs: List[ScanJob]) -> None:
+        """Rescan cells and fold them into the merged analysis."""
+        for result in self.engine.run(jobs, self._scan_fn):
+            if result.error is None or result.job not in self.cells:
+                self.cells[result.job] = result
+            if self.cache is not None and result.error is None:
+                self.cache.store(self._account_id, result.job, result.analysis)
+        self.analysis = evaluate_analysis(merge_analyses(
+            [self.cells[job] for job in self.jobs if job in self.cells]))
+
+    def baseline(self) -> Dict[str, Any]:
+        """Run the initial full scan."""
+        self._scan(self.jobs)
+        self.stats['rescans'] += len(self.jobs)
+        return self.analysis
+
+    def affected_jobs(self, events: List[ChangeEvent]) -> List[ScanJob]:
+        """Map change events onto the watched cells they invalidate.
+
+        Global services (S3, IAM) report from a single region, so their
+        events from a region without a cell dirty every cell of the service;
+        other events from unwatched regions (e.g. on a shared bus) are dropped.
+        """
+        watched = set(self.jobs)
+        dirty: Set[ScanJob] = set()
+        for event in events:
+            job = ScanJob(event.region, event.service)
+            if job in watched:
+                dirty.add(job)
+            elif event.service in GLOBAL_SERVICES:
+                dirty.update(j for j in self.jobs if j.service == event.service)
+        return [job for job in self.jobs if job in dirty]
+
+    def step(self) -> Optional[Dict[str, Any]]:
+        """Poll the feed once; rescan affected cells and report any risk transition."""
+        events = self.feed.poll()
+        self.stats['polls'] += 1
+        self.stats['events'] += len(events)
+        jobs = self.affected_jobs(events)
+        if not jobs:
+            return None
+
+        previous = self.risk
+        self._scan(jobs)
+        self.stats['rescans'] += len(jobs)
+        update = {
+            'rescanned': [{'region': job.region, 'service': job.service} for job in jobs],
+            'events': len(events),
+            'risk': self.risk,
+        }
+        if self.on_update:
+            self.on_update(update)
+        if self.risk != previous:
+            transition = {
+                'from': previous,
+                'to': self.risk,
+                'risk_factors': self.analysis.get('risk_assessment', {}).get(
+                    'risk_factors', []),
+                'at': time.time(),
+            }
+            if self.on_transition:
+                self.on_transition(transition)
+            return transition
+        return None
+
+    def run(self, interval: float = DEFAULT_POLL_INTERVAL,
+            stop: Optional[threading.Event] = None) -> None:
+        """Poll the feed every interval seconds until stop is set."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                self.step()
+            except Exception as e:
+                logger.warning(f"Change feed poll failed: {e}")
+            stop.wait(interval)
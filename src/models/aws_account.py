@@ -1,11 +1,129 @@
 """AWS Account model."""
 
-from typing import Optional
-from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from dataclasses import dataclass, field
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_POOL_CONNECTIONS = 10
+
+DEFAULT_TEST_ACCOUNT_ID = "123456789012"
+
+_loader_lock = threading.Lock()
+_shared_loader = None
+
+
+def _get_shared_loader() -> Any:
+    """Get the process-wide botocore data loader, creating it on first use."""
+    global _shared_loader
+    with _loader_lock:
+        if _shared_loader is None:
+            from botocore.loaders import create_loader
+            _shared_loader = create_loader()
+        return _shared_loader
+
+
+class _FixedCredentialProvider:
+    """Credential provider that hands a session credentials obtained elsewhere."""
+
+    METHOD = "aws-free-guard"
+    CANONICAL_NAME = "aws-free-guard"
+
+    def __init__(self, credentials: Any):
+        self.credentials = credentials
+
+    def load(self) -> Any:
+        return self.credentials
+
+
+class ClientPool:
+    """Thread-safe pool of boto3 clients keyed by (service, region).
+
+    Every client is built from one shared session, so credentials (e.g. an
+    assume-role, SSO or MFA profile) are resolved once per account rather
+    than once per region.
+    """
+
+    def __init__(self, profile_name: Optional[str] = None,
+                 max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+                 rate_limiter: Optional[Any] = None,
+                 profiler: Optional[Any] = None,
+                 credentials: Optional[Any] = None,
+                 region: Optional[str] = None):
+        if max_pool_connections < 1:
+            raise ValueError("max_pool_connections must be at least 1")
+
+        self.profile_name = profile_name
+        self.max_pool_connections = max_pool_connections
+        self.rate_limiter = rate_limiter
+        self.profiler = profiler
+        self.credentials = credentials
+        self.region = region
+        self.clients_created = 0
+        self.clients_reused = 0
+        self._session = None
+        self._clients: Dict[Tuple[str, str], Any] = {}
+        self._config = None
+        self._lock = threading.RLock()
+
+    def session(self) -> Any:
+        """Get the shared boto3 session, building it once."""
+        with self._lock:
+            if self._session is None:
+                import boto3
+                import botocore.session
+
+                core = botocore.session.Session(profile=self.profile_name)
+                # Service models are parsed once per process, not per session
+                core.register_component('data_loader', _get_shared_loader())
+                if self.credentials is not None:
+                    # e.g. assumed-role credentials that refresh themselves
+                    from botocore.credentials import CredentialResolver
+                    core.register_component('credential_provider', CredentialResolver(
+                        [_FixedCredentialProvider(self.credentials)]))
+                if self.rate_limiter is not None:
+                    # Session handlers are inherited by every client it creates
+                    self.rate_limiter.attach(core)
+                if self.profiler is not None:
+                    self.profiler.attach(core)
+                self._session = boto3.Session(botocore_session=core,
+                                              region_name=self.region)
+            return self._session
+
+    def client(self, service: str, region: str) -> Any:
+        """Get a shared client for (service, region), creating it on first use.
+
+        boto3 clients are thread-safe once built, but building them from a
+        session is not, so creation happens under the pool lock.
+        """
+        key = (service, region)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.clients_reused += 1
+                return client
+
+            if self._config is None:
+                from botocore.config import Config
+                self._config = Config(max_pool_connections=self.max_pool_connections)
+
+            client = self.session().client(service, region_name=region,
+                                           config=self._config)
+            self._clients[key] = client
+            self.clients_created += 1
+            return client
+
+    def stats(self) -> Dict[str, int]:
+        """Get client creation and reuse counters."""
+        with self._lock:
+            return {
+                'clients_created': self.clients_created,
+                'clients_reused': self.clients_reused,
+                'sessions': int(self._session is not None),
+            }
+
 
 @dataclass
 class AWSAccount:
@@ -14,37 +132,50 @@ class AWSAccount:
     account_id: Optional[str] = None
     region: str = "us-east-1"
     profile_name: Optional[str] = None
+    max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS
+    rate_limiter: Optional[Any] = field(default=None, repr=False, compare=False)
+    profiler: Optional[Any] = field(default=None, repr=False, compare=False)
+    credentials: Optional[Any] = field(default=None, repr=False, compare=False)
+    client_pool: Optional[ClientPool] = field(default=None, repr=False,
+                                              compare=False)
 
-    def __post_init__(self):
+    def __post_init__(self) -> None:
         """Validate account data."""
         if self.account_id and not self._is_valid_account_id(self.account_id):
             raise ValueError("Invalid AWS account ID format")
 
+        # Copies made with dataclasses.replace() keep sharing the same pool
+        if self.client_pool is None:
+            self.client_pool = ClientPool(self.profile_name,
+                                          self.max_pool_connections,
+                                          self.rate_limiter,
+                                          self.profiler,
+                                          self.credentials,
+                                          self.region)
+
     @staticmethod
     def _is_valid_account_id(account_id: str) -> bool:
         """Validate AWS account ID format (12 digits)."""
         return len(account_id) == 12 and account_id.isdigit()
 
-    def get_account_id(self):
+    def get_account_id(self) -> str:
         """Get the account ID, fetching it from AWS if not provided."""
         if self.account_id:
             return self.account_id
-        
+
         # Get account ID from AWS credentials
         try:
-            session = self.get_session()
-            sts_client = session.client('sts')
+            sts_client = self.get_client('sts')
             return sts_client.get_caller_identity()['Account']
         except Exception as e:
             # For testing or when credentials are not available
             logger.warning(f"Could not get account ID from AWS: {e}")
-            return "123456789012"  # Default test account ID
+            return DEFAULT_TEST_ACCOUNT_ID
 
-    def get_session(self):
-        """Get boto3 session for this account."""
-        import boto3
+    def get_session(self) -> Any:
+        """Get the boto3 session shared by every region's clients."""
+        return self.client_pool.session()
 
-        if self.profile_name:
-            return boto3.Session(profile_name=self.profile_name, region_name=self.region)
-        else:
-            return boto3.Session(region_name=self.region)
+    def get_client(self, service: str, region: Optional[str] = None) -> Any:
+        """Get a pooled boto3 client for a service in a region."""
+        return self.client_pool.client(service, region or self.region)
@@ -1,9 +1,24 @@
 """AWS Resource model."""
 
-from typing import Dict, Any
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, fields
+from typing import Dict, Any, MutableMapping
 from enum import Enum
 
+from src.models.free_tier_limit import FreeTierLimit, SharedLimits
+
+
+def _with_slots(cls: type) -> type:
+    """Rebuild a dataclass with __slots__ for its fields.
+
+    dataclass(slots=True) needs Python 3.10; this does the same on 3.9.
+    """
+    names = tuple(field.name for field in fields(cls))
+    namespace = {key: value for key, value in cls.__dict__.items()
+                 if key not in names + ('__dict__', '__weakref__')}
+    namespace['__slots__'] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
 
 class ResourceStatus(Enum):
     """Status of AWS resource regarding free tier."""
@@ -12,19 +27,25 @@ class ResourceStatus(Enum):
     UNKNOWN = "unknown"
 
 
+@_with_slots
 @dataclass
 class AWSResource:
-    """Represents an AWS resource with free tier information."""
+    """Represents an AWS resource with free tier information.
+
+    Large inventories hold hundreds of thousands of these, so instances use
+    __slots__, intern their service/region/type strings and view the
+    shared catalog limits, copy-on-write, when their limits match them.
+    """
 
     resource_id: str
     service: str
     resource_type: str
     region: str
     current_usage: Dict[str, Any] = None
-    free_tier_limit: Dict[str, Any] = None
+    free_tier_limit: MutableMapping[str, Any] = None
     status: ResourceStatus = ResourceStatus.UNKNOWN
 
-    def __post_init__(self):
+    def __post_init__(self) -> None:
         """Validate resource data."""
         if not self.resource_id:
             raise ValueError("Resource ID is required")
@@ -33,10 +54,27 @@ class AWSResource:
         if not self.resource_type:
             raise ValueError("Resource type is required")
 
+        self.service = sys.intern(self.service)
+        self.resource_type = sys.intern(self.resource_type)
+        if isinstance(self.region, str):
+            self.region = sys.intern(self.region)
         if self.current_usage is None:
             self.current_usage = {}
         if self.free_tier_limit is None:
             self.free_tier_limit = {}
+        elif self.free_tier_limit:
+            # Each resource gets its own view, so a write only copies its limits
+            shared = FreeTierLimit.limits_for(self.service, self.resource_type)
+            if shared is not None and (self.free_tier_limit is shared
+                                       or self.free_tier_limit == shared):
+                self.free_tier_limit = SharedLimits(shared)
+
+    @classmethod
+    def from_catalog(cls, resource_id: str, service: str, resource_type: str,
+                     region: str, current_usage: Dict[str, Any] = None) -> 'AWSResource':
+        """Create a resource whose limits are the shared catalog limits for its type."""
+        return cls(resource_id, service, resource_type, region, current_usage,
+                   FreeTierLimit.limits_for(service, resource_type))
 
     def is_within_free_tier(self) -> bool:
         """Check if resource usage is within free tier limits."""
@@ -44,17 +82,30 @@ class AWSResource:
             return False
 
         # Simple check - in real implementation, this would be more complex
+        usage_data = self.current_usage
         for key, limit in self.free_tier_limit.items():
-            if key in self.current_usage:
-                usage = self.current_usage[key]
+            if key in usage_data:
+                usage = usage_data[key]
                 if isinstance(limit, (int, float)) and isinstance(usage, (int, float)):
                     if usage > limit:
                         return False
         return True
 
-    def update_status(self):
+    def update_status(self) -> None:
         """Update the resource status based on current usage."""
         if self.is_within_free_tier():
             self.status = ResourceStatus.FREE
         else:
             self.status = ResourceStatus.CHARGED
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            "resource_id": self.resource_id,
+            "service": self.service,
+            "resource_type": self.resource_type,
+            "region": self.region,
+            "current_usage": dict(self.current_usage),
+            "free_tier_limit": dict(self.free_tier_limit),
+            "status": self.status.value
+        }
@@ -1,7 +1,80 @@
 """Free Tier Limit model."""
 
-from typing import Dict, Any
-from dataclasses import dataclass
+from collections.abc import MutableMapping
+from typing import Dict, Any, Iterator, Optional, Tuple
+from dataclasses import dataclass, replace
+
+# Resource types the enforcer reports, mapped onto catalog limit names
+RESOURCE_TYPE_LIMITS = {
+    ("ec2", "instance"): ("ec2_instances",),
+    ("s3", "bucket"): ("s3_storage", "s3_requests"),
+    ("lambda", "function"): ("lambda_requests",),
+    ("rds", "db_instance"): ("rds_db_hours",),
+}
+
+_COMMON_LIMITS: Optional[Dict[str, 'FreeTierLimit']] = None
+_SHARED_LIMITS: Optional[Dict[Tuple[str, str], 'FrozenLimits']] = None
+
+
+class FrozenLimits(dict):
+    """Read-only usage-key -> limit dict, shared by every resource of a type.
+
+    Unlike a mappingproxy it is still a dict, so it serializes, pickles and
+    copies like one.
+    """
+
+    __slots__ = ()
+
+    def _read_only(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError("Shared free tier limits are read-only; assign a new dict instead")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self) -> Tuple[type, Tuple[Dict[str, Any]]]:
+        return (type(self), (dict(self),))
+
+
+class SharedLimits(MutableMapping[str, Any]):
+    """Copy-on-write view of a type's catalog limits, one per resource.
+
+    Reads go to the shared FrozenLimits; the first write copies them into
+    the resource's own dict, so changing one resource's limits never
+    leaks into the others. catalog is the shared mapping until then.
+    """
+
+    __slots__ = ('_limits', 'catalog')
+
+    def __init__(self, catalog: FrozenLimits):
+        self._limits: Dict[str, Any] = catalog
+        self.catalog: Optional[FrozenLimits] = catalog
+
+    def _own(self) -> Dict[str, Any]:
+        if self.catalog is not None:
+            self._limits, self.catalog = dict(self._limits), None
+        return self._limits
+
+    def __getitem__(self, key: str) -> Any:
+        return self._limits[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._own()[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._own()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._limits)
+
+    def __len__(self) -> int:
+        return len(self._limits)
+
+    def __repr__(self) -> str:
+        return repr(self._limits)
+
+    def __reduce__(self) -> Tuple[type, Tuple[Dict[str, Any]]]:
+        # Copies and unpickled resources get their own plain dict
+        return (dict, (dict(self._limits),))
 
 
 @dataclass
@@ -15,7 +88,7 @@ class FreeTierLimit:
     always_free: bool = False
     additional_limits: Dict[str, Any] = None
 
-    def __post_init__(self):
+    def __post_init__(self) -> None:
         """Validate limit data."""
         if not self.service:
             raise ValueError("Service is required")
@@ -35,7 +108,42 @@ class FreeTierLimit:
 
     @classmethod
     def get_common_limits(cls) -> Dict[str, 'FreeTierLimit']:
-        """Get common AWS free tier limits."""
+        """Get common AWS free tier limits.
+
+        The catalog is built once; callers get their own copies of the
+        limits, so changing one cannot leak into other callers.
+        """
+        global _COMMON_LIMITS
+        if _COMMON_LIMITS is None:
+            _COMMON_LIMITS = cls._build_common_limits()
+        return {name: replace(limit, additional_limits=dict(limit.additional_limits))
+                for name, limit in _COMMON_LIMITS.items()}
+
+    @classmethod
+    def limits_for(cls, service: str, resource_type: str) -> Optional[FrozenLimits]:
+        """Get the shared, read-only usage-key -> limit mapping for a resource type.
+
+        Resources reference it through a SharedLimits view instead of
+        carrying their own copy; None when the catalog has no limit for it.
+        """
+        global _SHARED_LIMITS
+        if _SHARED_LIMITS is None:
+            limits = cls.get_common_limits()
+            names: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+            for name, limit in limits.items():
+                key = (limit.service, limit.resource_type)
+                names[key] = names.get(key, ()) + (name,)
+            names.update(RESOURCE_TYPE_LIMITS)
+            _SHARED_LIMITS = {
+                key: FrozenLimits({limits[n].limit_unit: limits[n].limit_value
+                                       for n in group if n in limits})
+                for key, group in names.items()
+            }
+        return _SHARED_LIMITS.get((service, resource_type))
+
+    @classmethod
+    def _build_common_limits(cls) -> Dict[str, 'FreeTierLimit']:
+        """Build the common AWS free tier limits catalog."""
         return {
             "ec2_instances": cls(
                 service="ec2",
@@ -15,19 +15,19 @@ class OperationResult:
     errors: List[str] = None
     execution_time: Optional[float] = None
 
-    def __post_init__(self):
+    def __post_init__(self) -> None:
         """Initialize lists if None."""
         if self.affected_resources is None:
             self.affected_resources = []
         if self.errors is None:
             self.errors = []
 
-    def add_error(self, error: str):
+    def add_error(self, error: str) -> None:
         """Add an error to the result."""
         self.errors.append(error)
         self.success = False
 
-    def add_affected_resource(self, resource_id: str):
+    def add_affected_resource(self, resource_id: str) -> None:
         """Add an affected resource."""
         self.affected_resources.append(resource_id)
 
@@ -0,0 +1 @@
+# Performance tests (<5s execution targets)
@@ -0,0 +1,353 @@
+"""Synthetic AWS accounts served to botocore offline, for CLI benchmarks.
+
+Requests still go through botocore's full stack (parameter validation,
+serialization, signing, retries, event handlers); only the HTTP send is
+replaced. A before-send handler sleeps for the injected latency and
+answers with a minimal body, and a before-parse handler merges the
+synthetic response into what botocore parses, so no wire format has to be
+generated. Throttling is injected per request identity, so the same
+account always sees the same throttled calls and the same API call count.
+
+Run one scenario in a fresh interpreter, so peak RSS is the scenario's own:
+
+    python -m tests.performance.synthetic_aws free --regions 10 --resources 50
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ACCOUNT_ID = "111122223333"
+
+# Services the synthetic account holds resources for (those with scanners)
+SERVICES = ("ec2", "s3", "lambda", "rds")
+
+# Cost Explorer SERVICE dimension values for the synthetic daily costs
+COST_SERVICES = ("Amazon Elastic Compute Cloud - Compute", "Amazon Simple Storage Service",
+                 "AWS Lambda", "Amazon Relational Database Service")
+
+# Page sizes of the real APIs' defaults
+PAGE_SIZES = {"DescribeInstances": 100, "ListFunctions": 50, "DescribeDBInstances": 100}
+
+_CONTEXT_KEY = "synthetic_aws"
+
+
+class _Body:
+    """Raw HTTP body stand-in for AWSResponse."""
+
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def stream(self, **kwargs):
+        yield self.content
+
+
+def default_regions(count: int) -> List[str]:
+    """Pick count real region names, so endpoint-based region filtering applies."""
+    from botocore.session import get_session
+
+    regions = sorted(get_session().get_available_regions('ec2'))
+    preferred = [r for r in ("us-east-1", "us-west-2", "eu-west-1") if r in regions]
+    rest = [r for r in regions if r not in preferred]
+    return (preferred + rest)[:count]
+
+
+class SyntheticAccount:
+    """A deterministic account: resources_per_cell resources of each service per region."""
+
+    def __init__(self, regions: List[str], resources_per_cell: int = 50,
+                 services: Tuple[str, ...] = SERVICES, cost_days: int = 400,
+                 seed: int = 0, account_id: str = ACCOUNT_ID):
+        self.regions = list(regions)
+        self.resources_per_cell = resources_per_cell
+        self.services = tuple(services)
+        self.cost_days = cost_days
+        self.seed = seed
+        self.account_id = account_id
+
+    def _rng(self, *key: Any) -> random.Random:
+        """Get a generator seeded for one slice of the account."""
+        return random.Random(f"{self.seed}:{':'.join(map(str, key))}")
+
+    def _count(self, service: str, region: str) -> int:
+        """Number of resources of a service in a region."""
+        if service not in self.services or region not in self.regions:
+            return 0
+        return self.resources_per_cell
+
+    def instances(self, region: str) -> List[Dict[str, Any]]:
+        """EC2 instances, mostly running, launched within the last 60 days."""
+        rng = self._rng("ec2", region)
+        now = datetime.now(timezone.utc)
+        return [{
+            'InstanceId': f"i-{region.replace('-', '')}{i:08x}",
+            'InstanceType': rng.choice(["t2.micro", "t3.micro", "t3.small"]),
+            'State': {'Name': rng.choice(["running", "running", "running", "stopped"])},
+            'LaunchTime': now - timedelta(hours=rng.randint(1, 1440)),
+        } for i in range(self._count("ec2", region))]
+
+    def buckets(self) -> List[Dict[str, Any]]:
+        """S3 buckets of every region, as ListBuckets returns them."""
+        created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        return [{'Name': f"bucket-{region}-{i}", 'CreationDate': created,
+                 'BucketRegion': region}
+                for region in self.regions for i in range(self._count("s3", region))]
+
+    def functions(self, region: str) -> List[Dict[str, Any]]:
+        """Lambda functions."""
+        rng = self._rng("lambda", region)
+        return [{'FunctionName': f"fn-{region}-{i}", 'Runtime': "python3.12",
+                 'MemorySize': rng.choice([128, 256, 512])}
+                for i in range(self._count("lambda", region))]
+
+    def db_instances(self, region: str) -> List[Dict[str, Any]]:
+        """RDS instances."""
+        rng = self._rng("rds", region)
+        created = datetime.now(timezone.utc) - timedelta(days=30)
+        return [{'DBInstanceIdentifier': f"db-{region}-{i}",
+                 'DBInstanceClass': "db.t3.micro",
+                 'DBInstanceStatus': rng.choice(["available", "stopped"]),
+                 'InstanceCreateTime': created}
+                for i in range(self._count("rds", region))]
+
+    def daily_costs(self, start: str, end: str) -> List[Dict[str, Any]]:
+        """Cost Explorer DAILY results per service over [start, end)."""
+        day, last = date.fromisoformat(start), date.fromisoformat(end)
+        oldest = date.today() - timedelta(days=self.cost_days)
+        results = []
+        while day < last:
+            groups = []
+            if day >= oldest:
+                rng = self._rng("cost", day.isoformat())
+                groups = [{'Keys': [service], 'Metrics': {'UnblendedCost': {
+                    'Amount': f"{rng.uniform(0, 2):.4f}", 'Unit': "USD"}}}
+                    for service in COST_SERVICES]
+            results.append({'TimePeriod': {'Start': day.isoformat(),
+                                           'End': (day + timedelta(days=1)).isoformat()},
+                            'Groups': groups, 'Estimated': False})
+            day += timedelta(days=1)
+        return results
+
+
+def _page(items: List[Dict[str, Any]], token: Optional[str], size: int,
+          items_key: str, token_key: str) -> Dict[str, Any]:
+    """Serve one page of a listing; tokens are offsets."""
+    offset = int(token or 0)
+    response: Dict[str, Any] = {items_key: items[offset:offset + size]}
+    if offset + size < len(items):
+        response[token_key] = str(offset + size)
+    return response
+
+
+class SyntheticAWS:
+    """Answers botocore requests from a SyntheticAccount, with latency and throttling."""
+
+    def __init__(self, account: SyntheticAccount, latency: float = 0.01,
+                 throttle_rate: float = 0.0):
+        self.account = account
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.calls: Dict[str, int] = {}
+        self.throttles = 0
+        self.unmodeled: Dict[str, int] = {}
+        self._attempts: Dict[str, int] = {}
+        self._pending = threading.local()
+        self._lock = threading.Lock()
+        self._handlers: Dict[str, Callable[[str, Dict[str, Any]], Dict[str, Any]]] = {
+            "sts.GetCallerIdentity": self._caller_identity,
+            "ec2.DescribeRegions": self._regions,
+            "ec2.DescribeInstances": self._instances,
+            "s3.ListBuckets": lambda region, params: {'Buckets': account.buckets()},
+            "lambda.ListFunctions": self._functions,
+            "rds.DescribeDBInstances": self._db_instances,
+            "ce.GetCostAndUsage": self._costs,
+        }
+
+    def attach(self, events):
+        """Register on a session's event emitter, like the rate limiter and profiler."""
+        events.register('before-parameter-build', self._before_parameter_build,
+                        unique_id='synthetic-aws-params')
+        events.register('before-send', self._before_send, unique_id='synthetic-aws-send')
+        events.register('before-parse', self._before_parse, unique_id='synthetic-aws-parse')
+
+    def install(self):
+        """Attach to every session the account client pools create."""
+        from src.models.aws_account import ClientPool
+
+        original = ClientPool.session
+
+        def session(pool):
+            boto_session = original(pool)
+            self.attach(boto_session._session)
+            return boto_session
+
+        ClientPool.session = session
+
+    def _caller_identity(self, region, params):
+        account_id = self.account.account_id
+        return {'Account': account_id, 'UserId': "AIDASYNTHETIC",
+                'Arn': f"arn:aws:iam::{account_id}:user/benchmark"}
+
+    def _regions(self, region, params):
+        return {'Regions': [{'RegionName': name, 'Endpoint': f"ec2.{name}.amazonaws.com",
+                             'OptInStatus': "opt-in-not-required"}
+                            for name in self.account.regions]}
+
+    def _instances(self, region, params):
+        page = _page(self.account.instances(region), params.get('NextToken'),
+                     PAGE_SIZES["DescribeInstances"], 'Instances', 'NextToken')
+        page['Reservations'] = [{'ReservationId': f"r-{i}", 'Instances': [instance]}
+                                for i, instance in enumerate(page.pop('Instances'))]
+        return page
+
+    def _functions(self, region, params):
+        return _page(self.account.functions(region), params.get('Marker'),
+                     PAGE_SIZES["ListFunctions"], 'Functions', 'NextMarker')
+
+    def _db_instances(self, region, params):
+        return _page(self.account.db_instances(region), params.get('Marker'),
+                     PAGE_SIZES["DescribeDBInstances"], 'DBInstances', 'Marker')
+
+    def _costs(self, region, params):
+        period = params['TimePeriod']
+        return {'ResultsByTime': self.account.daily_costs(period['Start'], period['End']),
+                'GroupDefinitions': params.get('GroupBy', [])}
+
+    def _before_parameter_build(self, params=None, model=None, context=None, **kwargs):
+        """Remember the API parameters; the send handler only sees the serialized body."""
+        if context is not None and model is not None:
+            context[_CONTEXT_KEY] = (f"{model.service_model.endpoint_prefix}.{model.name}",
+                                     model.service_model.protocol, dict(params or {}))
+
+    def _throttled(self, operation: str, region: str, params: Dict[str, Any]) -> bool:
+        """Throttle the first attempt of a fixed share of distinct requests."""
+        if not self.throttle_rate:
+            return False
+        key = f"{operation}|{region}|{json.dumps(params, sort_keys=True, default=str)}"
+        with self._lock:
+            attempt = self._attempts.get(key, 0) + 1
+            self._attempts[key] = attempt
+        bucket = int(hashlib.sha256(key.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+        return attempt == 1 and bucket < self.throttle_rate
+
+    def _before_send(self, request=None, **kwargs):
+        """Answer an HTTP attempt after the injected latency."""
+        from botocore.awsrequest import AWSResponse
+
+        context = getattr(request, 'context', None) or {}
+        if _CONTEXT_KEY not in context:
+            return None
+        operation, protocol, params = context[_CONTEXT_KEY]
+        region = context.get('client_region') or "us-east-1"
+        time.sleep(self.latency)
+
+        status = 200
+        if self._throttled(operation, region, params):
+            status = 400
+            parsed = {'Error': {'Code': "ThrottlingException", 'Message': "Rate exceeded"}}
+        elif operation in self._handlers:
+            parsed = self._handlers[operation](region, params)
+        else:
+            parsed = {}
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            self.throttles += status == 400
+            if operation not in self._handlers:
+                self.unmodeled[operation] = self.unmodeled.get(operation, 0) + 1
+        self._pending.parsed = parsed
+
+        name = operation.split(".", 1)[1]
+        if protocol in ("json", "rest-json"):
+            body = b"{}"
+        elif protocol == "query":
+            body = f"<{name}Response><{name}Result/></{name}Response>".encode()
+        else:
+            body = f"<{name}Response/>".encode()
+        return AWSResponse(request.url, status, {}, _Body(body))
+
+    def _before_parse(self, customized_response_dict=None, **kwargs):
+        """Hand botocore the synthetic response for the attempt just sent."""
+        parsed = getattr(self._pending, 'parsed', None)
+        if parsed is not None and customized_response_dict is not None:
+            customized_response_dict.update(parsed)
+            self._pending.parsed = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the API calls served, by operation, and the throttled attempts."""
+        with self._lock:
+            return {'api_calls': sum(self.calls.values()),
+                    'calls': dict(sorted(self.calls.items())),
+                    'throttles': self.throttles,
+                    'unmodeled': dict(sorted(self.unmodeled.items()))}
+
+
+# CLI arguments for each benchmark scenario
+SCENARIOS = {
+    "free": ["free", "--all-regions", "--scanners", "registry", "--services", "ec2",
+             "--services", "s3", "--services", "lambda", "--services", "rds",
+             "--output", "json"],
+    "cost": ["cost", "--days", "90", "--output", "json"],
+}
+
+
+def run_scenario(name: str, regions: int = 10, resources: int = 50,
+                 latency: float = 0.01, throttle_rate: float = 0.02,
+                 seed: int = 0) -> Dict[str, Any]:
+    """Run one CLI command against a synthetic account and measure it."""
+    import resource
+
+    from click.testing import CliRunner
+
+    # botocore's retry jitter comes from the random module
+    random.seed(seed)
+    backend = SyntheticAWS(SyntheticAccount(default_regions(regions), resources, seed=seed),
+                           latency=latency, throttle_rate=throttle_rate)
+    backend.install()
+
+    from src.cli.main import cli
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = {'AWS_ACCESS_KEY_ID': "testing", 'AWS_SECRET_ACCESS_KEY': "testing",
+               'AWS_DEFAULT_REGION': "us-east-1", 'AWS_FREE_GUARD_CACHE_DIR': cache_dir,
+               'AWS_RETRY_MODE': "legacy", 'AWS_CONFIG_FILE': os.devnull,
+               'AWS_SHARED_CREDENTIALS_FILE': os.devnull}
+        started = time.perf_counter()
+        result = CliRunner().invoke(cli, ["--region", "us-east-1", *SCENARIOS[name]],
+                                    env=env, catch_exceptions=True)
+        wall_time = time.perf_counter() - started
+
+    # ru_maxrss is in KiB on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {'scenario': name, 'exit_code': result.exit_code,
+            'wall_time': wall_time, 'peak_rss_mb': peak_rss,
+            'error': (repr(result.exception) or result.output[-500:]) if result.exit_code
+            else None,
+            **backend.stats()}
+
+
+def main(argv: Optional[List[str]] = None):
+    """Run a scenario and print its measurements as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--regions", type=int, default=10)
+    parser.add_argument("--resources", type=int, default=50,
+                        help="resources per service per region")
+    parser.add_argument("--latency", type=float, default=0.01,
+                        help="seconds added to every API attempt")
+    parser.add_argument("--throttle-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    json.dump(run_scenario(args.scenario, args.regions, args.resources, args.latency,
+                           args.throttle_rate, args.seed), sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Benchmark: CLI commands end to end against a synthetic account, checked against a baseline.
+
+Each scenario runs in a fresh interpreter (see synthetic_aws) with 10
+regions x 50 resources per service, 10ms of latency per API attempt and
+2% of requests throttled once. API call counts are deterministic and must
+match the baseline exactly. Wall time and peak RSS depend on the machine,
+so they are compared as ratios to the reference scenario (cost: startup,
+one client and one request) run in the same session, and may drift
+within the baseline's tolerances.
+
+Set AWS_FREE_GUARD_UPDATE_BASELINE=1 to record new baselines after an
+intended change.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.models.aws_account import AWSAccount
+from tests.performance.synthetic_aws import SyntheticAccount, SyntheticAWS
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "cli_baseline.json")
+UPDATE_BASELINE = os.environ.get("AWS_FREE_GUARD_UPDATE_BASELINE") == "1"
+
+SCENARIO_ARGS = ["--regions", "10", "--resources", "50", "--latency", "0.01",
+                 "--throttle-rate", "0.02", "--seed", "0"]
+
+# Scenario the others' wall time and peak RSS are measured against
+REFERENCE = "cost"
+
+
+def _run(scenario):
+    """Run a scenario in a subprocess and return its measurements."""
+    completed = subprocess.run(
+        [sys.executable, "-m", "tests.performance.synthetic_aws", scenario, *SCENARIO_ARGS],
+        cwd=REPO_ROOT, capture_output=True, text=True, timeout=300,
+    )
+    assert completed.returncode == 0, completed.stderr
+    return json.loads(completed.stdout)
+
+
+def _load_baseline():
+    """Read the stored baseline."""
+    with open(BASELINE_PATH) as f:
+        return json.load(f)
+
+
+def _ratios(result, reference):
+    """Get a scenario's wall time and peak RSS relative to the reference run."""
+    return {'wall_time_ratio': result['wall_time'] / reference['wall_time'],
+            'peak_rss_ratio': result['peak_rss_mb'] / reference['peak_rss_mb']}
+
+
+def _save_baseline(scenario, result, reference):
+    """Record a scenario's measurements as its new baseline."""
+    baseline = _load_baseline()
+    entry = {'api_calls': result['api_calls'], 'calls': result['calls']}
+    if scenario != REFERENCE:
+        entry.update({name: round(ratio, 3)
+                      for name, ratio in _ratios(result, reference).items()})
+    baseline['scenarios'][scenario] = entry
+    with open(BASELINE_PATH, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+@pytest.fixture(scope="module")
+def reference():
+    """Measurements of the reference scenario on this machine."""
+    result = _run(REFERENCE)
+    assert result['exit_code'] == 0, result['error']
+    return result
+
+
+@pytest.mark.parametrize("scenario", ["free", REFERENCE])
+def test_cli_scenario_matches_baseline(scenario, reference):
+    """API calls match the baseline; relative wall time and RSS stay within tolerance."""
+    result = reference if scenario == REFERENCE else _run(scenario)
+    assert result['exit_code'] == 0, result['error']
+    if UPDATE_BASELINE:
+        _save_baseline(scenario, result, reference)
+        return
+
+    baseline = _load_baseline()
+    expected = baseline['scenarios'].get(scenario)
+    if expected is None:
+        pytest.skip(f"no baseline for {scenario}; record one with "
+                    f"AWS_FREE_GUARD_UPDATE_BASELINE=1")
+    tolerance = baseline['tolerance']
+    assert result['calls'] == expected['calls']
+    assert result['api_calls'] == expected['api_calls']
+    if scenario == REFERENCE:
+        return
+    ratios = _ratios(result, reference)
+    assert ratios['wall_time_ratio'] <= (expected['wall_time_ratio']
+                                         * (1 + tolerance['wall_time']))
+    assert ratios['peak_rss_ratio'] <= (expected['peak_rss_ratio']
+                                        * (1 + tolerance['peak_rss']))
+
+
+@pytest.fixture
+def account(monkeypatch):
+    """Account with fake credentials."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    return AWSAccount(account_id="111122223333", region="us-east-1")
+
+
+def test_synthetic_backend_pages_and_throttles(account):
+    """Listings are paged like the real APIs and throttled requests are retried."""
+    from src.lib.scanners import ec2
+
+    backend = SyntheticAWS(SyntheticAccount(["us-east-1"], resources_per_cell=250),
+                           latency=0, throttle_rate=1.0)
+    backend.attach(account.get_session()._session)
+
+    data = ec2.analyze(account, "us-east-1")
+
+    assert data['resource_count'] == 250
+    # Three pages, each throttled once and then retried
+    assert backend.stats()['calls'] == {'ec2.DescribeInstances': 6}
+    assert backend.stats()['throttles'] == 3
@@ -0,0 +1,44 @@
+"""Benchmark: batched streaming forecasts over thousands of synthetic series."""
+
+import random
+import time
+from datetime import date, timedelta
+
+from src.lib.forecast import ForecastBatch, month_end
+
+SERIES = 2000
+DAYS = 90
+
+
+def _synthetic_day(rng, index, bases, slopes):
+    """One day of spend per series: trend, a monthly spike and noise."""
+    day_of_month = (index % 30) + 1
+    return [max(0.0, base + slope * index + (5.0 if day_of_month == 1 else 0.0)
+                + rng.gauss(0, 0.1))
+            for base, slope in zip(bases, slopes)]
+
+
+def test_forecasts_thousands_of_series():
+    """Streaming 90 days into 2000 series and projecting a month stays fast."""
+    rng = random.Random(7)
+    bases = [rng.uniform(0, 5) for _ in range(SERIES)]
+    slopes = [rng.uniform(-0.01, 0.05) for _ in range(SERIES)]
+    days = [_synthetic_day(rng, index, bases, slopes) for index in range(DAYS)]
+    batch = ForecastBatch([f"account-{i}" for i in range(SERIES)])
+    start = date(2026, 1, 1)
+
+    started = time.perf_counter()
+    for index, values in enumerate(days):
+        batch.update(start + timedelta(days=index), values)
+    per_update = (time.perf_counter() - started) / (SERIES * DAYS)
+
+    today = start + timedelta(days=DAYS - 1)
+    started = time.perf_counter()
+    next_month = batch.forecast_total(month_end(today), month_end(month_end(today)))
+    projection = time.perf_counter() - started
+
+    print(f"{per_update * 1e6:.2f}us per series-day update, "
+          f"{projection * 1000:.0f}ms to project {SERIES} series")
+    assert len(next_month) == SERIES
+    assert per_update < 20e-6
+    assert projection < 2.0
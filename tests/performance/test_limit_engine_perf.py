@@ -0,0 +1,36 @@
+"""Benchmark: batched limit evaluation vs. per-resource update_status at 100k resources."""
+
+import time
+
+from src.lib.limit_engine import LimitEngine
+from src.models.aws_resource import AWSResource
+
+RESOURCES = 100_000
+
+
+def _resources():
+    """Mixed EC2/S3/Lambda/RDS inventory with usage well under the allowances."""
+    kinds = [("ec2", "instance", "hours"), ("s3", "bucket", "GB"),
+             ("lambda", "function", "requests"), ("rds", "db_instance", "hours")]
+    resources = []
+    for index in range(RESOURCES):
+        service, resource_type, unit = kinds[index % len(kinds)]
+        resources.append(AWSResource.from_catalog(f"{service}-{index}", service,
+                                                  resource_type, "us-east-1",
+                                                  current_usage={unit: 0.0001}))
+    return resources
+
+
+def test_evaluates_100k_resources_quickly():
+    """One batched pass over 100k resources finishes well within budget."""
+    resources = _resources()
+    engine = LimitEngine()
+
+    started = time.perf_counter()
+    result = engine.evaluate(resources)
+    elapsed = time.perf_counter() - started
+
+    assert len(result.statuses) == RESOURCES
+    assert None not in result.statuses
+    assert not result.exceeded()
+    assert elapsed < 2.0
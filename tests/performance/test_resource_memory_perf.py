@@ -0,0 +1,53 @@
+"""Benchmark: bytes per resource for the compact model vs. a plain dataclass."""
+
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from src.models.aws_resource import AWSResource, ResourceStatus
+
+RESOURCES = 50_000
+REGIONS = ["us-east-1", "us-west-2", "eu-west-1"]
+
+
+@dataclass
+class LegacyResource:
+    """The previous AWSResource layout: __dict__ plus two dicts per instance."""
+
+    resource_id: str
+    service: str
+    resource_type: str
+    region: str
+    current_usage: Dict[str, Any] = None
+    free_tier_limit: Dict[str, Any] = None
+    status: ResourceStatus = ResourceStatus.UNKNOWN
+
+    def __post_init__(self):
+        if self.current_usage is None:
+            self.current_usage = {}
+        if self.free_tier_limit is None:
+            self.free_tier_limit = {}
+
+
+def _bytes_per_resource(factory):
+    """Allocate RESOURCES instances and return the traced bytes per object."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    resources = [
+        # Field strings are built at runtime, as they are when parsed from API responses
+        factory(f"i-{index:017x}", "".join(["e", "c2"]), "".join(["inst", "ance"]),
+                "".join(REGIONS[index % len(REGIONS)]), None, {"hours": 750})
+        for index in range(RESOURCES)
+    ]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    used = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    assert len(resources) == RESOURCES
+    return used / RESOURCES
+
+
+def test_compact_resource_memory():
+    """The slotted, interned model uses markedly less memory per resource."""
+    legacy = _bytes_per_resource(LegacyResource)
+    compact = _bytes_per_resource(AWSResource)
+    assert compact < legacy * 0.5
@@ -0,0 +1,57 @@
+"""Benchmark: scan engine wall time vs. worker count on a stubbed botocore backend."""
+
+import time
+
+import boto3
+from botocore.stub import Stubber
+
+from src.lib.scan_engine import ScanEngine, build_jobs
+
+API_LATENCY = 0.02
+REGIONS = ["us-east-1", "us-west-2", "eu-west-1", "ap-south-1"]
+SERVICES = ["ec2-a", "ec2-b", "ec2-c", "ec2-d", "ec2-e", "ec2-f"]
+
+
+def _stubbed_clients(jobs):
+    """Create one stubbed EC2 client per job with injected API latency."""
+    session = boto3.Session(aws_access_key_id="testing",
+                            aws_secret_access_key="testing")
+    clients = {}
+    for job in jobs:
+        client = session.client('ec2', region_name=job.region)
+        client.meta.events.register(
+            'before-parameter-build.ec2.DescribeInstances',
+            lambda **kwargs: time.sleep(API_LATENCY)
+        )
+        stubber = Stubber(client)
+        stubber.add_response('describe_instances', {'Reservations': []})
+        stubber.activate()
+        clients[job] = client
+    return clients
+
+
+def _timed_run(workers):
+    """Run the job matrix with the given worker count and return wall time."""
+    jobs = build_jobs(REGIONS, SERVICES)
+    clients = _stubbed_clients(jobs)
+
+    def scan(job):
+        reservations = clients[job].describe_instances()['Reservations']
+        return {'total_resources_found': len(reservations)}
+
+    started = time.perf_counter()
+    results = ScanEngine(max_workers=workers).run(jobs, scan)
+    elapsed = time.perf_counter() - started
+
+    assert all(r.error is None for r in results)
+    return elapsed
+
+
+def test_wall_time_scales_with_workers():
+    """Wall time shrinks roughly in proportion to the worker count."""
+    timings = {workers: _timed_run(workers) for workers in (1, 4, 12)}
+
+    job_count = len(REGIONS) * len(SERVICES)
+    assert timings[1] >= job_count * API_LATENCY
+    assert timings[4] < timings[1] / 2.5
+    assert timings[12] < timings[4]
@@ -0,0 +1,51 @@
+"""Benchmark: CLI startup import time, measured with python -X importtime."""
+
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Cumulative import time budget for src.cli.main, in microseconds
+STARTUP_BUDGET_US = int(os.environ.get("AWS_FREE_GUARD_STARTUP_BUDGET_US", 250_000))
+
+# Modules that must only be imported once a subcommand actually needs them
+HEAVY_MODULES = ("rich", "boto3", "botocore", "sqlite3", "src.lib.aws_free",
+                 "src.lib.aws_clean")
+
+
+def _importtime(*args):
+    """Run python -X importtime and return {module: cumulative microseconds}."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=REPO_ROOT, capture_output=True, text=True, timeout=60,
+    )
+    modules = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def _heavy(modules):
+    """Heavy modules (or their submodules) that were imported."""
+    return sorted(name for name in modules
+                  if any(name == heavy or name.startswith(heavy + ".")
+                         for heavy in HEAVY_MODULES))
+
+
+def test_cli_import_stays_within_budget():
+    """Importing the CLI entry point skips heavy modules and stays in budget."""
+    modules = _importtime("-c", "import src.cli.main")
+    assert "src.cli.main" in modules
+    assert _heavy(modules) == []
+    assert modules["src.cli.main"] < STARTUP_BUDGET_US
+
+
+def test_help_does_not_load_subcommand_dependencies():
+    """--help is answered by click alone."""
+    modules = _importtime("-m", "src.cli.main", "--help")
+    assert _heavy(modules) == []
@@ -0,0 +1,232 @@
+"""Unit tests for the asyncio scan engine."""
+
+import asyncio
+import threading
+import types
+
+import pytest
+from botocore.exceptions import ClientError
+
+from src.lib.async_engine import AsyncScanEngine, pages
+from src.lib.scan_engine import ScanJob, ScanOptions, build_jobs, concurrent_analysis
+from src.lib.scanners import ScannerRegistry
+from src.models.aws_account import AWSAccount
+
+
+@pytest.fixture
+def account(monkeypatch):
+    """Account with fake credentials."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    return AWSAccount(account_id="111122223333", region="us-east-1")
+
+
+def _analysis(job):
+    """Minimal analysis for one job."""
+    return {'total_resources_found': 1,
+            'regions_analyzed': [{'region': job.region, 'services': {}}]}
+
+
+def test_run_respects_caps_and_keeps_order():
+    """In-flight jobs never exceed the global or per-region caps."""
+    active = {'total': 0, 'regions': {}}
+    peak = {'total': 0, 'region': 0}
+
+    async def scan(job):
+        active['total'] += 1
+        active['regions'][job.region] = active['regions'].get(job.region, 0) + 1
+        peak['total'] = max(peak['total'], active['total'])
+        peak['region'] = max(peak['region'], active['regions'][job.region])
+        await asyncio.sleep(0.005)
+        active['total'] -= 1
+        active['regions'][job.region] -= 1
+        return _analysis(job)
+
+    jobs = build_jobs([f"region-{i}" for i in range(4)], ["ec2", "s3", "rds", "sqs"])
+    results = AsyncScanEngine(max_in_flight=6, max_per_region=2).run(jobs, scan)
+
+    assert [r.job for r in results] == jobs
+    assert all(r.error is None for r in results)
+    assert peak['total'] == 6
+    assert peak['region'] <= 2
+
+
+def test_slow_result_processing_pauses_scans():
+    """With a full result queue, no new scans start until results are consumed."""
+    started = []
+    consumed = []
+
+    async def scan(job):
+        started.append(job)
+        return _analysis(job)
+
+    def on_result(result):
+        # Blocks the loop like heavy processing would
+        assert len(started) - len(consumed) <= 2 + 1 + 1
+        consumed.append(result)
+
+    jobs = build_jobs([f"region-{i}" for i in range(20)], ["ec2"])
+    results = AsyncScanEngine(max_in_flight=2, result_queue_size=1).run(
+        jobs, scan, on_result=on_result)
+
+    assert len(results) == len(consumed) == 20
+
+
+def test_throttled_jobs_are_retried(monkeypatch):
+    """Jobs still throttled after botocore's retries are rescheduled."""
+    monkeypatch.setattr("src.lib.async_engine.backoff_delay", lambda attempt: 0)
+    attempts = []
+
+    async def scan(job):
+        attempts.append(job)
+        if len(attempts) < 3:
+            raise ClientError({'Error': {'Code': "Throttling", 'Message': ""}},
+                              "DescribeInstances")
+        return _analysis(job)
+
+    result, = AsyncScanEngine().run([ScanJob("us-east-1", "ec2")], scan)
+
+    assert result.error is None
+    assert result.retries == 2
+
+
+def test_on_result_errors_do_not_hang_the_engine():
+    """A failing callback is raised once every scan has finished."""
+    async def scan(job):
+        return _analysis(job)
+
+    def on_result(result):
+        raise RuntimeError("display failed")
+
+    jobs = build_jobs([f"region-{i}" for i in range(10)], ["ec2"])
+    with pytest.raises(RuntimeError, match="display failed"):
+        AsyncScanEngine(max_in_flight=2, result_queue_size=1).run(jobs, scan,
+                                                                   on_result=on_result)
+
+
+def test_on_result_runs_off_the_loop():
+    """Result processing happens in a worker thread, in completion order."""
+    loop_threads = []
+    callback_threads = []
+
+    async def scan(job):
+        loop_threads.append(threading.get_ident())
+        return _analysis(job)
+
+    def on_result(result):
+        callback_threads.append(threading.get_ident())
+
+    jobs = build_jobs(["us-east-1", "eu-west-1"], ["ec2"])
+    results = AsyncScanEngine().run(jobs, scan, on_result=on_result)
+
+    assert len(results) == len(callback_threads) == 2
+    assert not set(callback_threads) & set(loop_threads)
+
+
+def test_async_credentials_stay_refreshable():
+    """Assumed-role credentials are renewed through the botocore object, not frozen."""
+    pytest.importorskip("aiobotocore")
+    from datetime import datetime, timedelta, timezone
+
+    from botocore.credentials import DeferredRefreshableCredentials
+
+    from src.lib.async_engine import _AsyncCredentialProvider
+
+    fetched = []
+
+    def fetch():
+        fetched.append(len(fetched))
+        # Already inside the refresh window, so every freeze renews them
+        expiry = datetime.now(timezone.utc) + timedelta(minutes=5)
+        return {'access_key': f"AKIA{len(fetched)}", 'secret_key': "secret",
+                'token': "token", 'expiry_time': expiry.isoformat()}
+
+    credentials = DeferredRefreshableCredentials(refresh_using=fetch, method="assume-role")
+
+    async def main():
+        loaded = await _AsyncCredentialProvider(credentials).load()
+        first = await loaded.get_frozen_credentials()
+        second = await loaded.get_frozen_credentials()
+        return first.access_key, second.access_key
+
+    first, second = asyncio.run(main())
+
+    assert first != second
+    assert len(fetched) >= 2
+
+
+class _Paginator:
+    """Async paginator over canned pages that records how far it has fetched."""
+
+    def __init__(self, count, fetched):
+        self.count = count
+        self.fetched = fetched
+
+    async def paginate(self, **params):
+        for number in range(self.count):
+            await asyncio.sleep(0)
+            self.fetched.append(number)
+            yield {'Items': [number], **params}
+
+
+def test_pages_prefetch_a_bounded_number_of_pages():
+    """Pages arrive in order while at most prefetch pages are fetched ahead."""
+    fetched = []
+    client = types.SimpleNamespace(get_paginator=lambda name: _Paginator(10, fetched))
+
+    async def main():
+        seen = []
+        async for page in pages(client, 'list_things', prefetch=2, Filter="x"):
+            # Queued pages plus the one the fetcher holds while blocked
+            assert len(fetched) - len(seen) <= 2 + 2
+            seen.append(page['Items'][0])
+            assert page['Filter'] == "x"
+        return seen
+
+    assert asyncio.run(main()) == list(range(10))
+
+
+def test_pages_raise_fetch_errors():
+    """A failing page request surfaces in the consumer."""
+    class Failing:
+        async def paginate(self, **params):
+            yield {'Items': [0]}
+            raise RuntimeError("page 2 failed")
+
+    client = types.SimpleNamespace(get_paginator=lambda name: Failing())
+
+    async def main():
+        return [page async for page in pages(client, 'list_things')]
+
+    with pytest.raises(RuntimeError, match="page 2 failed"):
+        asyncio.run(main())
+
+
+def test_concurrent_analysis_on_the_async_engine(account):
+    """Async scanners run on the loop; the rest run in threads; results merge as usual."""
+    loop_thread = []
+    sync_threads = []
+
+    async def analyze_async(clients, region):
+        loop_thread.append(threading.get_ident())
+        return {'resource_count': 2, 'resources': []}
+
+    def analyze(target, region):
+        sync_threads.append(threading.get_ident())
+        return {'resource_count': 1, 'resources': []}
+
+    registry = ScannerRegistry({
+        "fast": types.SimpleNamespace(analyze=analyze, analyze_async=analyze_async),
+        "slow": types.SimpleNamespace(analyze=analyze),
+    })
+
+    analysis = concurrent_analysis(account, None, services=["fast", "slow"],
+                                   regions=["us-east-1", "eu-west-1"],
+                                   options=ScanOptions(engine=AsyncScanEngine(),
+                                                       registry=registry))
+
+    assert analysis['total_resources_found'] == 6
+    assert len(loop_thread) == 2 and len(set(loop_thread)) == 1
+    assert len(sync_threads) == 2 and loop_thread[0] not in sync_threads
+    assert analysis['scan_stats']['async_clients'] == {'clients_created': 0,
+                                                       'clients_reused': 0}
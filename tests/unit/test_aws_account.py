@@ -0,0 +1,89 @@
+"""Unit tests for the AWS account model and its client pool."""
+
+import threading
+from dataclasses import replace
+
+import pytest
+
+from src.models.aws_account import AWSAccount, ClientPool
+
+
+@pytest.fixture(autouse=True)
+def fake_credentials(monkeypatch):
+    """Keep boto3 away from real credentials."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+
+
+def test_invalid_account_id():
+    """Account IDs must be 12 digits."""
+    with pytest.raises(ValueError):
+        AWSAccount(account_id="1234")
+
+
+def test_session_built_once():
+    """The session is reused across calls."""
+    account = AWSAccount(region="eu-west-1")
+    assert account.get_session() is account.get_session()
+    assert account.get_session().region_name == "eu-west-1"
+
+
+def test_clients_pooled_by_service_and_region():
+    """Clients are created once per (service, region) and then reused."""
+    account = AWSAccount()
+    first = account.get_client('s3')
+    assert account.get_client('s3') is first
+    assert account.get_client('s3', 'eu-west-1') is not first
+    assert account.client_pool.stats()['clients_created'] == 2
+    assert account.client_pool.stats()['clients_reused'] == 1
+
+
+def test_max_pool_connections_applied():
+    """Clients are configured with the account's connection pool size."""
+    account = AWSAccount(max_pool_connections=32)
+    assert account.get_client('ec2').meta.config.max_pool_connections == 32
+
+
+def test_region_copies_share_pool():
+    """Region-pinned copies share the parent's pool but use their own region."""
+    account = AWSAccount()
+    regional = replace(account, region="ap-south-1")
+    assert regional.client_pool is account.client_pool
+    assert regional.get_session() is account.get_session()
+    assert regional.get_client('ec2').meta.region_name == "ap-south-1"
+
+
+def test_credentials_resolved_once_across_regions():
+    """Every region's clients sign with the one session's credentials."""
+    pool = ClientPool()
+    east = pool.client('ec2', 'us-east-1')
+    west = pool.client('ec2', 'eu-west-1')
+    assert east._request_signer._credentials is west._request_signer._credentials
+    assert pool.stats()['sessions'] == 1
+
+
+def test_concurrent_access_creates_one_client():
+    """Threads racing for the same client all get the same instance."""
+    pool = ClientPool()
+    barrier = threading.Barrier(8)
+    clients = []
+
+    def worker():
+        barrier.wait()
+        clients.append(pool.client('sqs', 'us-east-1'))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(client) for client in clients}) == 1
+    assert pool.stats()['clients_created'] == 1
+    assert pool.stats()['clients_reused'] == 7
+
+
+def test_invalid_pool_size():
+    """Pool size must be positive."""
+    with pytest.raises(ValueError):
+        ClientPool(max_pool_connections=0)
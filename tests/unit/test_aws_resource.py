@@ -0,0 +1,68 @@
+"""Unit tests for the compact AWSResource model."""
+
+import copy
+import dataclasses
+import json
+import pickle
+
+import pytest
+
+from src.models.aws_resource import AWSResource, ResourceStatus
+
+
+def test_slots_and_interned_fields():
+    """Resources have no per-instance __dict__ and share field strings."""
+    first = AWSResource("i-1", "ec2", "instance", "".join(["us-", "east-1"]))
+    second = AWSResource("i-2", "ec2", "instance", "".join(["us-east", "-1"]))
+    assert not hasattr(first, "__dict__")
+    assert dataclasses.is_dataclass(first)
+    assert first.region is second.region
+
+
+def test_usage_keeps_mutations():
+    """Every resource gets its own usage dict."""
+    resource = AWSResource("i-1", "ec2", "instance", "us-east-1")
+    other = AWSResource("i-2", "ec2", "instance", "us-east-1")
+    assert resource.to_dict()["current_usage"] == {}
+    resource.current_usage["hours"] = 10
+    assert resource.to_dict()["current_usage"] == {"hours": 10}
+    assert other.current_usage == {}
+
+
+def test_catalog_limits_shared():
+    """Limits equal to the catalog view one shared mapping, copied on write."""
+    first = AWSResource.from_catalog("i-1", "ec2", "instance", "us-east-1")
+    second = AWSResource("i-2", "ec2", "instance", "us-east-1",
+                         free_tier_limit={"hours": 750})
+    assert first.free_tier_limit.catalog is second.free_tier_limit.catalog
+
+    first.free_tier_limit["hours"] = 1
+    assert first.free_tier_limit == {"hours": 1}
+    assert first.free_tier_limit.catalog is None
+    assert second.free_tier_limit == {"hours": 750}
+    assert AWSResource.from_catalog("i-3", "ec2", "instance",
+                                    "us-east-1").free_tier_limit == {"hours": 750}
+
+    # Shared limits still behave as dicts when copied or serialized
+    assert pickle.loads(pickle.dumps(second)) == second
+    assert copy.deepcopy(second).free_tier_limit == {"hours": 750}
+    assert json.dumps(second.to_dict()["free_tier_limit"]) == '{"hours": 750}'
+
+    second.current_usage["hours"] = 800
+    second.update_status()
+    assert second.status == ResourceStatus.CHARGED
+
+
+def test_resources_without_limits_can_be_given_some():
+    """A resource without limits has its own dict, not a shared one."""
+    resource = AWSResource("q-1", "sqs", "queue", "us-east-1")
+    resource.free_tier_limit["requests"] = 5
+    assert AWSResource("q-2", "sqs", "queue", "us-east-1").free_tier_limit == {}
+
+
+def test_equality_and_validation():
+    """Value equality matches the previous dataclass behaviour."""
+    assert AWSResource("b", "s3", "bucket", "eu-west-1") == \
+        AWSResource("b", "s3", "bucket", "eu-west-1", current_usage={})
+    with pytest.raises(ValueError, match="Service is required"):
+        AWSResource("b", "", "bucket", "eu-west-1")
@@ -0,0 +1,124 @@
+"""Unit tests for content-addressed backups."""
+
+import json
+
+import pytest
+from botocore.exceptions import ClientError
+
+from src.lib.backup import ObjectStore, backup_jobs, run_backup
+from src.lib.scan_engine import ScanEngine, ScanJob
+from src.models.aws_account import AWSAccount
+
+
+class FakePaginator:
+    """Paginator over canned pages."""
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    def paginate(self, **kwargs):
+        return iter(self.pages)
+
+
+class FakeClient:
+    """Client answering paginated describe calls from a {operation: pages} map."""
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    def get_paginator(self, operation):
+        return FakePaginator(self.pages.get(operation, [{}]))
+
+    def list_buckets(self):
+        return self.pages['list_buckets'][0]
+
+
+def _account(clients):
+    """Account whose pool hands out a fake client per (service, region)."""
+    account = AWSAccount(account_id="111122223333")
+    account.get_client = lambda service, region=None: clients[(service, region)]
+    return account
+
+
+def _ec2(instance_type="t2.micro"):
+    """EC2 client with one instance (in a reservation) and one volume."""
+    return FakeClient({
+        'describe_instances': [{'Reservations': [{'Instances': [
+            {'InstanceId': "i-1", 'InstanceType': instance_type}]}]}],
+        'describe_volumes': [{'Volumes': [{'VolumeId': "vol-1", 'Size': 8}]}],
+    })
+
+
+def test_backup_jobs_run_global_services_once():
+    """Regional services fan out per region; S3 and IAM run once."""
+    jobs = backup_jobs(["us-east-1", "eu-west-1"], ["ec2", "s3"], home_region="us-east-1")
+    assert jobs == [ScanJob("us-east-1", "s3"), ScanJob("us-east-1", "ec2"),
+                    ScanJob("eu-west-1", "ec2")]
+    with pytest.raises(ValueError, match="sqs"):
+        backup_jobs(["us-east-1"], ["sqs"])
+
+
+def test_object_store_dedups_by_content(tmp_path):
+    """Identical documents map to one object; key order does not matter."""
+    store = ObjectStore(tmp_path)
+    digest, written = store.put({'a': 1, 'b': [1, 2]})
+    again, rewritten = store.put({'b': [1, 2], 'a': 1})
+    assert (digest, written, rewritten) == (again, True, False)
+    assert store.get(digest) == {'a': 1, 'b': [1, 2]}
+
+
+def test_repeated_backup_only_writes_changes(tmp_path):
+    """A second run rewrites nothing but the configurations that changed."""
+    clients = {("ec2", r): _ec2() for r in ("us-east-1", "eu-west-1")}
+    account = _account(clients)
+    engine = ScanEngine(max_workers=4)
+
+    first = run_backup(account, tmp_path, ["us-east-1", "eu-west-1"], ["ec2"], engine)
+    assert (first['resources'], first['written'], first['unchanged']) == (4, 4, 0)
+
+    clients[("ec2", "eu-west-1")] = _ec2(instance_type="t3.large")
+    second = run_backup(account, tmp_path, ["us-east-1", "eu-west-1"], ["ec2"], engine)
+    assert (second['written'], second['unchanged']) == (1, 3)
+
+    latest = (tmp_path / "LATEST").read_text().strip()
+    manifest = json.loads((tmp_path / latest).read_text())
+    changed = [e for e in manifest['entries']
+               if e['region'] == "eu-west-1" and e['resource_id'] == "i-1"][0]
+    config = ObjectStore(tmp_path).get(changed['sha256'])['config']
+    assert config['InstanceType'] == "t3.large"
+
+
+def test_backup_reports_failed_jobs(tmp_path):
+    """A failing service is listed in the manifest without aborting the run."""
+    class DeniedClient:
+        def get_paginator(self, operation):
+            raise RuntimeError("AccessDenied")
+
+    account = _account({("ec2", "us-east-1"): _ec2(),
+                        ("lambda", "us-east-1"): DeniedClient()})
+    manifest = run_backup(account, tmp_path, ["us-east-1"], ["ec2", "lambda"])
+    assert manifest['resources'] == 2
+    assert manifest['errors'] == [{'region': "us-east-1", 'service': "lambda",
+                                   'error': "AccessDenied"}]
+
+
+def test_bucket_backup_includes_its_configuration(tmp_path):
+    """Buckets are backed up with their policy, versioning and lifecycle."""
+    class S3Client(FakeClient):
+        def get_bucket_policy(self, Bucket):
+            raise ClientError({'Error': {'Code': "NoSuchBucketPolicy"}}, "GetBucketPolicy")
+
+        def get_bucket_versioning(self, Bucket):
+            return {'Status': "Enabled", 'ResponseMetadata': {}}
+
+        def get_bucket_lifecycle_configuration(self, Bucket):
+            return {'Rules': [{'ID': "expire", 'Status': "Enabled"}]}
+
+    account = _account({("s3", "us-east-1"): S3Client(
+        {'list_buckets': [{'Buckets': [{'Name': "logs"}]}]})})
+    manifest = run_backup(account, tmp_path, ["us-east-1"], ["s3"])
+
+    config = ObjectStore(tmp_path).get(manifest['entries'][0]['sha256'])['config']
+    assert config == {'Name': "logs", 'Policy': None, 'Versioning': {'Status': "Enabled"},
+                      'Lifecycle': {'Rules': [{'ID': "expire", 'Status': "Enabled"}]}}
+    assert not list(tmp_path.glob("**/*.tmp"))
@@ -0,0 +1,181 @@
+"""Unit tests for batched bulk deletion."""
+
+import threading
+import time
+
+from src.lib.bulk_delete import (
+    chunked,
+    delete_ecr_images,
+    delete_snapshots,
+    empty_bucket,
+    empty_containers,
+    run_pipeline,
+)
+from src.models.aws_account import AWSAccount
+
+
+class FakePaginator:
+    """Yields pre-built pages and records how many were requested."""
+
+    def __init__(self, pages, client):
+        self.pages = pages
+        self.client = client
+
+    def paginate(self, **kwargs):
+        for page in self.pages:
+            self.client.pages_listed += 1
+            yield page
+
+
+class FakeS3:
+    """S3 client stand-in with versioned listings and DeleteObjects."""
+
+    def __init__(self, pages, fail_keys=()):
+        self.pages = pages
+        self.fail_keys = set(fail_keys)
+        self.pages_listed = 0
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def get_paginator(self, operation):
+        assert operation == 'list_object_versions'
+        return FakePaginator(self.pages, self)
+
+    def delete_objects(self, Bucket, Delete):
+        with self.lock:
+            self.batches.append(len(Delete['Objects']))
+        return {'Errors': [{'Key': o['Key'], 'Code': 'AccessDenied'}
+                           for o in Delete['Objects'] if o['Key'] in self.fail_keys]}
+
+
+def _account(client):
+    """Account whose pool hands out the given fake client."""
+    account = AWSAccount(account_id="111122223333")
+    account.get_client = lambda service, region=None: client
+    return account
+
+
+def _version_pages(total, page_size=1000, markers_every=0):
+    """Build ListObjectVersions pages with optional delete markers."""
+    pages = []
+    for start in range(0, total, page_size):
+        keys = range(start, min(total, start + page_size))
+        page = {'Versions': [{'Key': f"k{i}", 'VersionId': "v1"} for i in keys]}
+        if markers_every:
+            page['DeleteMarkers'] = [{'Key': f"k{i}", 'VersionId': "dm"}
+                                     for i in keys if i % markers_every == 0]
+        pages.append(page)
+    return pages
+
+
+def test_chunked():
+    """Streams are regrouped into fixed-size batches."""
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_empty_bucket_batches_1000_keys():
+    """Versions and delete markers go out in DeleteObjects calls of 1000 keys."""
+    s3 = FakeS3(_version_pages(2500, markers_every=10))
+    result = empty_bucket(_account(s3), "bucket", max_workers=4)
+
+    assert result.deleted == 2750
+    assert result.requests == 3
+    assert sorted(s3.batches) == [750, 1000, 1000]
+
+
+def test_empty_bucket_reports_key_errors():
+    """Per-key failures are counted without failing the whole run."""
+    s3 = FakeS3(_version_pages(10), fail_keys={"k3"})
+    result = empty_bucket(_account(s3), "bucket")
+
+    assert result.deleted == 9
+    assert result.failed == 1
+    assert result.errors == ["k3: AccessDenied"]
+
+
+def test_empty_bucket_dry_run():
+    """Dry runs count keys without deleting anything."""
+    s3 = FakeS3(_version_pages(1500))
+    result = empty_bucket(_account(s3), "bucket", dry_run=True)
+    assert result.deleted == 1500
+    assert s3.batches == []
+
+
+def test_empty_containers_reports_each_bucket():
+    """Each requested bucket is emptied and reported under its own operation."""
+    s3 = FakeS3(_version_pages(5))
+    results = empty_containers(_account(s3), buckets=["a", "b"])
+
+    assert [(r.operation, r.deleted) for r in results] == [
+        ("empty_bucket:a", 5), ("empty_bucket:b", 5)]
+
+
+def test_pipeline_bounds_in_flight_batches():
+    """Listing pauses while too many batches are waiting to be deleted."""
+    produced = []
+    gate = threading.Event()
+
+    def batches():
+        for index in range(10):
+            produced.append(index)
+            yield [index]
+
+    def delete_batch(batch):
+        gate.wait(1)
+        return []
+
+    threading.Timer(0.2, gate.set).start()
+    result = run_pipeline("test", batches(), delete_batch, max_workers=2,
+                          max_in_flight=3)
+    assert result.deleted == 10
+    assert result.requests == 10
+
+
+def test_pipeline_overlaps_listing_and_deleting():
+    """Slow listing and slow deletion run concurrently, not back to back."""
+    def batches():
+        for index in range(5):
+            time.sleep(0.05)
+            yield [index]
+
+    def delete_batch(batch):
+        time.sleep(0.05)
+        return []
+
+    started = time.perf_counter()
+    run_pipeline("test", batches(), delete_batch, max_workers=2)
+    assert time.perf_counter() - started < 0.45
+
+
+def test_ecr_batch_delete():
+    """ECR images are removed with BatchDeleteImage in batches of 100."""
+    class FakeECR:
+        pages_listed = 0
+        calls = []
+
+        def get_paginator(self, operation):
+            ids = [{'imageDigest': f"sha256:{i}"} for i in range(250)]
+            return FakePaginator([{'imageIds': ids[:200]}, {'imageIds': ids[200:]}], self)
+
+        def batch_delete_image(self, repositoryName, imageIds):
+            self.calls.append(len(imageIds))
+            return {'failures': []}
+
+    ecr = FakeECR()
+    result = delete_ecr_images(_account(ecr), "repo", max_workers=1)
+    assert result.deleted == 250
+    assert ecr.calls == [100, 100, 50]
+
+
+def test_per_item_deletes_run_concurrently():
+    """Services without batch APIs fall back to concurrent single deletes."""
+    barrier = threading.Barrier(4, timeout=2)
+
+    class FakeEC2:
+        def delete_snapshot(self, SnapshotId):
+            barrier.wait()
+
+    result = delete_snapshots(_account(FakeEC2()), [f"snap-{i}" for i in range(4)],
+                              max_workers=4)
+    assert result.deleted == 4
+    assert result.failed == 0
@@ -0,0 +1,100 @@
+"""Unit tests for the incremental Cost Explorer store."""
+
+from datetime import date, timedelta
+
+import pytest
+
+from src.lib.cost_store import RESTATEMENT_DAYS, CostStore, analyze_costs
+from src.models.aws_account import AWSAccount
+
+ACCOUNT_ID = "111122223333"
+TODAY = date(2026, 3, 31)
+
+
+class FakeCostExplorer:
+    """Cost Explorer stand-in: $1/day for EC2, $0.5/day for S3, two days per page."""
+
+    def __init__(self, ec2_daily=1.0):
+        self.ec2_daily = ec2_daily
+        self.periods = []
+
+    def get_cost_and_usage(self, TimePeriod, Granularity, Metrics, GroupBy,
+                           NextPageToken=None):
+        start = date.fromisoformat(NextPageToken or TimePeriod['Start'])
+        end = date.fromisoformat(TimePeriod['End'])
+        if NextPageToken is None:
+            self.periods.append((TimePeriod['Start'], TimePeriod['End']))
+        page_end = min(end, start + timedelta(days=2))
+        results = []
+        day = start
+        while day < page_end:
+            results.append({'TimePeriod': {'Start': day.isoformat()}, 'Groups': [
+                {'Keys': ["Amazon EC2"], 'Metrics': {'UnblendedCost': {
+                    'Amount': str(self.ec2_daily), 'Unit': "USD"}}},
+                {'Keys': ["Amazon S3"], 'Metrics': {'UnblendedCost': {
+                    'Amount': "0.5", 'Unit': "USD"}}},
+            ]})
+            day += timedelta(days=1)
+        response = {'ResultsByTime': results}
+        if page_end < end:
+            response['NextPageToken'] = page_end.isoformat()
+        return response
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Cost store in a temporary directory."""
+    return CostStore(tmp_path / "costs.db")
+
+
+def _account(ce):
+    """Account whose pool hands out the fake Cost Explorer client."""
+    account = AWSAccount(account_id=ACCOUNT_ID)
+    account.get_client = lambda service, region=None: ce
+    return account
+
+
+def test_first_run_fetches_window_and_aggregates(store):
+    """The first run fetches the whole window and sums it per service."""
+    ce = FakeCostExplorer()
+    result = analyze_costs(_account(ce), 30, store, today=TODAY)
+
+    assert ce.periods == [("2026-03-02", "2026-04-01")]
+    assert result['sync'] == {'days_fetched': 30, 'requests': 15}
+    assert result['service_breakdown'] == {"Amazon EC2": 30.0, "Amazon S3": 15.0}
+    assert result['total_monthly_cost'] == pytest.approx(45.0)
+    assert len(result['daily_costs']) == 30
+
+
+def test_next_run_fetches_only_new_and_restated_days(store):
+    """A later run asks only for days since the last sync, replacing restated ones."""
+    analyze_costs(_account(FakeCostExplorer()), 30, store, today=TODAY)
+
+    ce = FakeCostExplorer(ec2_daily=2.0)
+    result = analyze_costs(_account(ce), 30, store, today=TODAY + timedelta(days=2))
+
+    assert ce.periods == [("2026-03-29", "2026-04-03")]
+    assert result['sync']['days_fetched'] == RESTATEMENT_DAYS + 2
+    # 25 days at the original $1 plus 5 refetched days at $2
+    assert result['service_breakdown']["Amazon EC2"] == pytest.approx(35.0)
+
+
+def test_larger_window_backfills_only_older_days(store):
+    """Widening --days fetches the older days; the synced ones come from disk."""
+    analyze_costs(_account(FakeCostExplorer()), 30, store, today=TODAY)
+
+    ce = FakeCostExplorer()
+    result = analyze_costs(_account(ce), 90, store, today=TODAY)
+    assert ce.periods[0] == ("2026-01-01", "2026-03-02")
+    assert result['service_breakdown']["Amazon EC2"] == pytest.approx(90.0)
+    assert result['total_monthly_cost'] == pytest.approx(45.0)
+
+    ce = FakeCostExplorer()
+    analyze_costs(_account(ce), 7, store, today=TODAY)
+    assert ce.periods == [(str(TODAY + timedelta(days=1 - RESTATEMENT_DAYS)), "2026-04-01")]
+
+
+def test_days_validated(store):
+    """Windows beyond Cost Explorer's daily lookback are rejected."""
+    with pytest.raises(ValueError):
+        analyze_costs(_account(FakeCostExplorer()), 400, store, today=TODAY)
@@ -0,0 +1,129 @@
+"""Unit tests for the process pool CPU stage."""
+
+import asyncio
+import types
+from datetime import datetime, timezone
+
+import pytest
+from botocore.stub import Stubber
+
+from src.lib.cpu_stage import CPUStage, pack_resources, unpack_resources
+from src.lib.scan_engine import ScanJob, ScanOptions, concurrent_analysis
+from src.lib.scanners import ScannerRegistry
+from src.models.aws_account import AWSAccount
+from src.models.aws_resource import AWSResource, ResourceStatus
+from src.models.free_tier_limit import FreeTierLimit
+
+
+@pytest.fixture
+def account(monkeypatch):
+    """Account with fake credentials."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    return AWSAccount(account_id="111122223333", region="us-east-1")
+
+
+@pytest.fixture(scope="module")
+def stage():
+    """A two-process stage shared by the tests that need workers."""
+    with CPUStage(2) as cpu_stage:
+        yield cpu_stage
+
+
+def test_packed_resources_round_trip():
+    """Unpacking restores every field, including shared catalog limits."""
+    resources = [
+        AWSResource.from_catalog("i-1", "ec2", "instance", "us-east-1", {'hours': 12.5}),
+        AWSResource.from_catalog("bucket", "s3", "bucket", "eu-west-1"),
+        AWSResource("fn", "lambda", "function", "us-east-1", {'requests': 5},
+                    {'requests': 1}, ResourceStatus.CHARGED),
+        AWSResource("vol", "ebs", "volume", None, status=ResourceStatus.FREE),
+    ]
+
+    packed = pack_resources(resources)
+    unpacked = unpack_resources(packed)
+
+    assert len(packed) == 4
+    assert unpacked == resources
+    assert unpacked[0].free_tier_limit.catalog is FreeTierLimit.limits_for("ec2",
+                                                                           "instance")
+    assert [r.to_dict() for r in unpacked] == [r.to_dict() for r in resources]
+
+
+def _stub_functions(account, count):
+    """Stub two ListFunctions pages."""
+    functions = [{'FunctionName': f"fn-{index}"} for index in range(count)]
+    half = count // 2
+    lam = Stubber(account.get_client('lambda', 'us-east-1'))
+    lam.add_response('list_functions', {'Functions': functions[:half], 'NextMarker': "m"})
+    lam.add_response('list_functions', {'Functions': functions[half:]})
+    return lam
+
+
+def _stub_instances(account):
+    """Stub one DescribeInstances page of stopped instances."""
+    launched = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    ec2 = Stubber(account.get_client('ec2', 'us-east-1'))
+    ec2.add_response('describe_instances', {'Reservations': [{'Instances': [
+        {'InstanceId': f"i-{index}", 'LaunchTime': launched, 'State': {'Name': "stopped"}}
+        for index in range(40)
+    ]}]})
+    return ec2
+
+
+def _scan(account, **kwargs):
+    """Scan EC2 and Lambda in one region with stubbed responses."""
+    with _stub_functions(account, 30), _stub_instances(account):
+        return concurrent_analysis(account, None, services=["ec2", "lambda"],
+                                   regions=["us-east-1"], options=ScanOptions(
+                                       registry=ScannerRegistry(), **kwargs))
+
+
+def test_report_matches_the_single_process_path(account, stage):
+    """The staged scan produces the same analysis as the in-thread one."""
+    expected = _scan(account)
+    staged = _scan(account, cpu_stage=stage)
+
+    for key in ('total_resources_found', 'regions_analyzed', 'recommendations',
+                'risk_assessment', 'scan_errors'):
+        assert staged[key] == expected[key]
+    resources = staged['regions_analyzed'][0]['services']['lambda']['resources']
+    assert all(isinstance(resource, AWSResource) for resource in resources)
+    assert staged['scan_stats']['cpu_stage']['workers'] == 2
+    assert staged['scan_stats']['cpu_stage']['resources'] >= 70
+
+
+def test_async_scan_fn_awaits_the_stage(account, stage):
+    """Async scanners fetch on the loop and await the worker's analysis."""
+    async def fetch_async(clients, region):
+        return [{'Functions': [{'FunctionName': "fn"}],
+                 'ResponseMetadata': {'HTTPStatusCode': 200}}]
+
+    from src.lib.scanners import awslambda
+
+    scanner = types.SimpleNamespace(fetch_async=fetch_async, convert=awslambda.convert,
+                                    analyze=awslambda.analyze,
+                                    analyze_async=awslambda.analyze_async)
+    entry_point = types.SimpleNamespace(value="src.lib.scanners.awslambda",
+                                        load=lambda: scanner)
+    registry = ScannerRegistry({"lambda": entry_point})
+    scan = registry.async_scan_fn(account, None, None, cpu_stage=stage)
+
+    analysis = asyncio.run(scan(ScanJob("us-east-1", "lambda")))
+
+    resource, = analysis['regions_analyzed'][0]['services']['lambda']['resources']
+    assert resource.resource_id == "fn"
+
+
+def test_scanner_objects_stay_in_process(account):
+    """Scanners a worker cannot import run in the scan thread."""
+    stage = CPUStage(1)
+    registry = ScannerRegistry({"custom": types.SimpleNamespace(
+        fetch=lambda account, region: [], convert=lambda pages, region: {},
+        analyze=lambda account, region: {'resource_count': 0, 'resources': []})})
+
+    analysis = registry.scan_fn(account, None, cpu_stage=stage)(ScanJob("us-east-1", "custom"))
+
+    assert analysis['total_resources_found'] == 0
+    assert stage.stats()['jobs'] == 0
+    assert stage._executor is None
@@ -0,0 +1,250 @@
+"""Unit tests for the dependency-ordered deletion planner."""
+
+import threading
+import time
+
+import pytest
+from botocore.stub import ANY, Stubber
+
+from src.lib.deletion_planner import (
+    DeletionNode,
+    DeletionPlan,
+    build_network_plan,
+    describe_plan,
+    merge_clean_results,
+    plan_applies,
+)
+from src.models.aws_account import AWSAccount
+
+
+def _node(resource_id, depends_on=(), seconds=1.0, delete=None, resource_type="thing"):
+    """Build a node with a no-op delete by default."""
+    return DeletionNode(resource_id, "ec2", resource_type, "us-east-1",
+                        delete or (lambda: None), depends_on=set(depends_on),
+                        estimated_seconds=seconds)
+
+
+def _vpc_plan():
+    """instance -> volume/eni -> security group/subnet -> vpc."""
+    plan = DeletionPlan()
+    plan.add(_node("i-1", seconds=60))
+    plan.add(_node("vol-1", ["i-1"], seconds=2))
+    plan.add(_node("eni-1", ["i-1"], seconds=2))
+    plan.add(_node("sg-1", ["i-1", "eni-1"]))
+    plan.add(_node("subnet-1", ["i-1", "eni-1"]))
+    plan.add(_node("vpc-1", ["sg-1", "subnet-1"]))
+    return plan
+
+
+def test_levels_follow_dependencies():
+    """Each level only depends on earlier ones."""
+    levels = [[n.resource_id for n in level] for level in _vpc_plan().levels()]
+    assert levels == [["i-1"], ["eni-1", "vol-1"], ["sg-1", "subnet-1"], ["vpc-1"]]
+
+
+def test_unplanned_dependencies_are_ignored():
+    """Dependencies on resources outside the plan do not block a node."""
+    plan = DeletionPlan()
+    plan.add(_node("vol-1", ["i-gone"]))
+    assert [[n.resource_id for n in level] for level in plan.levels()] == [["vol-1"]]
+
+
+def test_cycle_detected():
+    """A dependency cycle is reported instead of looping forever."""
+    plan = DeletionPlan()
+    plan.add(_node("a", ["b"]))
+    plan.add(_node("b", ["a"]))
+    with pytest.raises(ValueError, match="cycle"):
+        plan.levels()
+
+
+def test_critical_path():
+    """The critical path is the longest chain of estimated time."""
+    seconds, path = _vpc_plan().critical_path()
+    assert seconds == 64
+    assert [n.resource_id for n in path] == ["i-1", "eni-1", "sg-1", "vpc-1"]
+
+
+def test_execute_runs_level_in_parallel():
+    """Nodes of the same level are deleted concurrently."""
+    barrier = threading.Barrier(4, timeout=2)
+    plan = DeletionPlan()
+    for index in range(4):
+        plan.add(_node(f"snap-{index}", delete=barrier.wait))
+
+    started = time.perf_counter()
+    results = plan.execute(max_workers=4)
+    assert len(results['cleaned_resources']) == 4
+    assert time.perf_counter() - started < 2
+
+
+def test_execute_does_not_wait_for_the_whole_level():
+    """A node starts once its own dependencies are gone, not its whole level."""
+    dependent_done = threading.Event()
+
+    def slow():
+        # Only finishes once vol-1, a level below it, has been deleted
+        if not dependent_done.wait(timeout=2):
+            raise RuntimeError("vol-1 waited for i-slow")
+
+    plan = DeletionPlan()
+    plan.add(_node("i-slow", delete=slow))
+    plan.add(_node("i-fast"))
+    plan.add(_node("vol-1", ["i-fast"], delete=dependent_done.set))
+
+    results = plan.execute(max_workers=4)
+    assert results['failed_resources'] == []
+    assert len(results['cleaned_resources']) == 3
+
+
+def test_execute_skips_dependents_of_failures():
+    """When a deletion fails, everything that depends on it is skipped."""
+    order = []
+
+    def failing():
+        raise RuntimeError("DependencyViolation")
+
+    plan = _vpc_plan()
+    plan.nodes["us-east-1:eni-1"].delete = failing
+    for key, node in plan.nodes.items():
+        if node.resource_id != "eni-1":
+            node.delete = lambda rid=node.resource_id: order.append(rid)
+
+    finished = {}
+    results = plan.execute(max_workers=2,
+                           on_finished=lambda node, error: finished.update(
+                               {node.resource_id: error}))
+    assert [r['resource_id'] for r in results['failed_resources']] == ["eni-1"]
+    assert {r['resource_id'] for r in results['skipped_resources']} == {
+        "sg-1", "subnet-1", "vpc-1"}
+    assert order == ["i-1", "vol-1"]
+    assert set(finished) == {node.resource_id for node in plan.nodes.values()}
+    assert finished["i-1"] is None
+    assert "DependencyViolation" in finished["eni-1"]
+    assert finished["vpc-1"].startswith("skipped")
+
+
+def test_describe_plan():
+    """The plan description lists levels, dependencies and critical path."""
+    description = describe_plan(_vpc_plan())
+    assert description['resources'] == 6
+    assert description['levels'][2][0]['depends_on'] == ["eni-1", "i-1"]
+    assert description['critical_path'] == ["i-1", "eni-1", "sg-1", "vpc-1"]
+
+
+def test_merge_clean_results_dedups():
+    """Resources removed by the plan are not counted twice."""
+    merged = merge_clean_results(
+        {'cleaned_resources': [{'resource_id': "vpc-1"}],
+         'failed_resources': [{'resource_id': "sg-1"}]},
+        {'cleaned_resources': [{'resource_id': "vpc-1"}, {'resource_id': "bucket"}]}
+    )
+    assert [r['resource_id'] for r in merged['cleaned_resources']] == ["vpc-1", "bucket"]
+    assert merged['failed_resources'] == [{'resource_id': "sg-1"}]
+
+
+def test_plan_applies():
+    """The network plan only runs when EC2/VPC resources are in scope."""
+    assert plan_applies(None)
+    assert plan_applies(["vpc", "s3"])
+    assert not plan_applies(["s3"])
+
+
+def test_build_network_plan_from_describe_calls(monkeypatch):
+    """Discovery turns a VPC stack into a correctly ordered plan."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    account = AWSAccount(account_id="111122223333")
+    ec2 = account.get_client('ec2', 'us-east-1')
+
+    with Stubber(ec2) as stubber:
+        stubber.add_response('describe_vpcs', {'Vpcs': [
+            {'VpcId': "vpc-1", 'IsDefault': False},
+            {'VpcId': "vpc-default", 'IsDefault': True},
+        ]})
+        stubber.add_response('describe_instances', {'Reservations': [{'Instances': [
+            {'InstanceId': "i-1", 'VpcId': "vpc-1", 'SubnetId': "subnet-1"},
+        ]}]}, {'Filters': ANY})
+        stubber.add_response('describe_volumes', {'Volumes': [
+            {'VolumeId': "vol-data", 'State': "in-use", 'Attachments': [
+                {'InstanceId': "i-1", 'DeleteOnTermination': False}]},
+            {'VolumeId': "vol-root", 'State': "in-use", 'Attachments': [
+                {'InstanceId': "i-1", 'DeleteOnTermination': True}]},
+        ]}, {'Filters': [{'Name': 'attachment.instance-id', 'Values': ["i-1"]}]})
+        stubber.add_response('describe_network_interfaces', {'NetworkInterfaces': [
+            {'NetworkInterfaceId': "eni-1", 'VpcId': "vpc-1", 'SubnetId': "subnet-1"},
+            {'NetworkInterfaceId': "eni-elb", 'VpcId': "vpc-1", 'SubnetId': "subnet-1",
+             'RequesterManaged': True},
+        ]}, {'Filters': ANY})
+        stubber.add_response('describe_nat_gateways', {'NatGateways': [
+            {'NatGatewayId': "nat-1", 'VpcId': "vpc-1", 'SubnetId': "subnet-1",
+             'NatGatewayAddresses': [{'AllocationId': "eipalloc-1"}]},
+        ]}, {'Filter': ANY})
+        stubber.add_response('describe_vpc_endpoints', {'VpcEndpoints': [
+            {'VpcEndpointId': "vpce-1", 'VpcId': "vpc-1", 'State': "available",
+             'SubnetIds': ["subnet-1"], 'Groups': [{'GroupId': "sg-1"}]},
+        ]}, {'Filters': ANY})
+        stubber.add_response('describe_security_groups', {'SecurityGroups': [
+            {'GroupId': "sg-default", 'GroupName': "default", 'VpcId': "vpc-1",
+             'IpPermissions': [{'IpProtocol': "-1",
+                                'UserIdGroupPairs': [{'GroupId': "sg-1"}]}]},
+            {'GroupId': "sg-1", 'GroupName': "web", 'VpcId': "vpc-1",
+             'IpPermissions': [{'IpProtocol': "tcp", 'FromPort': 5432, 'ToPort': 5432,
+                                'UserIdGroupPairs': [{'GroupId': "sg-2"}]}]},
+            {'GroupId': "sg-2", 'GroupName': "db", 'VpcId': "vpc-1",
+             'IpPermissions': [{'IpProtocol': "tcp", 'FromPort': 443, 'ToPort': 443,
+                                'UserIdGroupPairs': [{'GroupId': "sg-1"}]}]},
+        ]}, {'Filters': ANY})
+        stubber.add_response('describe_subnets', {'Subnets': [
+            {'SubnetId': "subnet-1", 'VpcId': "vpc-1"},
+        ]}, {'Filters': ANY})
+        stubber.add_response('describe_route_tables', {'RouteTables': [
+            {'RouteTableId': "rtb-main", 'VpcId': "vpc-1",
+             'Associations': [{'Main': True, 'RouteTableAssociationId': "rtbassoc-main"}]},
+            {'RouteTableId': "rtb-1", 'VpcId': "vpc-1",
+             'Associations': [{'Main': False, 'SubnetId': "subnet-1",
+                               'RouteTableAssociationId': "rtbassoc-1"}]},
+        ]}, {'Filters': ANY})
+        stubber.add_response('describe_internet_gateways', {'InternetGateways': [
+            {'InternetGatewayId': "igw-1", 'Attachments': [{'VpcId': "vpc-1"}]},
+        ]}, {'Filters': ANY})
+
+        plan = build_network_plan(account, 'us-east-1')
+
+    levels = [[n.resource_id for n in level] for level in plan.levels()]
+    assert levels == [
+        ["eni-1", "i-1", "nat-1", "rtb-1", "vpce-1"],
+        ["eipalloc-1", "igw-1", "sg-1", "sg-2", "subnet-1", "vol-data"],
+        ["vpc-1"],
+    ]
+
+    # Rules pointing at a group are revoked before it is deleted, so the
+    # mutually referencing sg-1 and sg-2 need no ordering
+    with Stubber(ec2) as stubber:
+        stubber.add_response('revoke_security_group_ingress', {}, {
+            'GroupId': "sg-default", 'IpPermissions': [
+                {'IpProtocol': "-1", 'UserIdGroupPairs': [{'GroupId': "sg-1"}]}]})
+        stubber.add_response('revoke_security_group_ingress', {}, {
+            'GroupId': "sg-2", 'IpPermissions': [
+                {'IpProtocol': "tcp", 'FromPort': 443, 'ToPort': 443,
+                 'UserIdGroupPairs': [{'GroupId': "sg-1"}]}]})
+        stubber.add_response('delete_security_group', {}, {'GroupId': "sg-1"})
+        plan.nodes["us-east-1:sg-1"].delete()
+        stubber.assert_no_pending_responses()
+
+
+def test_build_network_plan_without_vpcs(monkeypatch):
+    """A region with only the default VPC plans nothing, volumes included."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    account = AWSAccount(account_id="111122223333")
+    ec2 = account.get_client('ec2', 'us-east-1')
+
+    with Stubber(ec2) as stubber:
+        stubber.add_response('describe_vpcs', {'Vpcs': [
+            {'VpcId': "vpc-default", 'IsDefault': True},
+        ]})
+        plan = build_network_plan(account, 'us-east-1')
+        stubber.assert_no_pending_responses()
+
+    assert plan.nodes == {}
@@ -0,0 +1,138 @@
+"""Unit tests for fast discovery."""
+
+import json
+from contextlib import ExitStack
+
+import pytest
+from botocore.stub import ANY, Stubber
+
+from src.lib.discovery import FastDiscovery, service_for_arn
+from src.lib.scan_engine import ScanJob, ScanOptions, build_jobs, concurrent_analysis
+from src.models.aws_account import AWSAccount
+
+
+@pytest.fixture
+def account(monkeypatch):
+    """Account with fake credentials."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    return AWSAccount(account_id="111122223333")
+
+
+def _stub_inventory(account, stack):
+    """Config records everything in us-east-1; eu-west-1 only has the tagging API."""
+    east = stack.enter_context(Stubber(account.get_client('config', 'us-east-1')))
+    east.add_response('describe_configuration_recorder_status', {
+        'ConfigurationRecordersStatus': [{'name': "default", 'recording': True}]})
+    east.add_response('describe_configuration_recorders', {'ConfigurationRecorders': [
+        {'name': "default", 'recordingGroup': {'allSupported': True}}]})
+    east.add_response('select_resource_config', {
+        'Results': [json.dumps({'resourceType': "AWS::EC2::Instance", 'COUNT(*)': 2})],
+        'NextToken': "page-2"}, {'Expression': ANY})
+    east.add_response('select_resource_config', {
+        'Results': [json.dumps({'resourceType': "AWS::EC2::VPC", 'COUNT(*)': 1})]},
+        {'Expression': ANY, 'NextToken': "page-2"})
+
+    west = stack.enter_context(Stubber(account.get_client('config', 'eu-west-1')))
+    west.add_response('describe_configuration_recorder_status',
+                      {'ConfigurationRecordersStatus': []})
+
+    tagging = stack.enter_context(Stubber(
+        account.get_client('resourcegroupstaggingapi', 'eu-west-1')))
+    tagging.add_response('get_resources', {'ResourceTagMappingList': [
+        {'ResourceARN': "arn:aws:lambda:eu-west-1:111122223333:function:etl"},
+        {'ResourceARN': "arn:aws:ec2:eu-west-1:111122223333:security-group/sg-1"},
+    ]}, {'ResourcesPerPage': 100})
+    return [east, west, tagging]
+
+
+def test_service_for_arn():
+    """ARNs map onto the scanned service, including EC2 network resources."""
+    assert service_for_arn("arn:aws:ec2:us-east-1:1:instance/i-1") == "ec2"
+    assert service_for_arn("arn:aws:ec2:us-east-1:1:subnet/subnet-1") == "vpc"
+    assert service_for_arn("arn:aws:logs:us-east-1:1:log-group:/app") == "cloudwatch"
+    assert service_for_arn("arn:aws:sqs:us-east-1:1:queue") == "sqs"
+    assert service_for_arn("arn:aws:kms:us-east-1:1:key/k") is None
+    assert service_for_arn("not-an-arn") is None
+
+
+def test_prune_uses_config_then_tags(account):
+    """Empty cells are skipped; tag-only evidence is flagged as unverified."""
+    discovery = FastDiscovery(use_tagging=True)
+    with ExitStack() as stack:
+        stubbers = _stub_inventory(account, stack)
+        discovery.collect(account, ["us-east-1", "eu-west-1"])
+        for stubber in stubbers:
+            stubber.assert_no_pending_responses()
+
+    jobs = build_jobs(["us-east-1", "eu-west-1"], ["ec2", "vpc", "lambda", "s3"])
+    scan, skipped = discovery.prune(jobs)
+
+    assert scan == [ScanJob("us-east-1", "ec2"), ScanJob("us-east-1", "vpc"),
+                    ScanJob("us-east-1", "s3"), ScanJob("eu-west-1", "vpc"),
+                    ScanJob("eu-west-1", "lambda"), ScanJob("eu-west-1", "s3")]
+    report = discovery.report(skipped)
+    assert report['sources'] == {'us-east-1': "config", 'eu-west-1': "tagging"}
+    assert report['requests'] == 6
+    assert report['skipped_cells'] == 2
+    assert report['api_calls_saved'] == 3 + 1 - 6
+    assert report['unverified_cells'] == [{'region': "eu-west-1", 'service': "ec2"}]
+
+
+def test_tags_do_not_prune_by_default(account):
+    """Without use_tagging, regions without Config are scanned in full."""
+    discovery = FastDiscovery()
+    with ExitStack() as stack:
+        east, west, tagging = _stub_inventory(account, stack)
+        discovery.collect(account, ["us-east-1", "eu-west-1"])
+        east.assert_no_pending_responses()
+        west.assert_no_pending_responses()
+
+    scan, skipped = discovery.prune(build_jobs(["eu-west-1"], ["ec2", "lambda"]))
+    assert scan == [ScanJob("eu-west-1", "ec2"), ScanJob("eu-west-1", "lambda")]
+    assert discovery.report(skipped)['sources']['eu-west-1'] == "none"
+
+
+def test_partial_recorder_only_covers_recorded_services(account):
+    """A recorder limited to some types only rules out services it fully records."""
+    discovery = FastDiscovery(use_tagging=False)
+    with Stubber(account.get_client('config', 'us-east-1')) as stubber:
+        stubber.add_response('describe_configuration_recorder_status', {
+            'ConfigurationRecordersStatus': [{'name': "default", 'recording': True}]})
+        stubber.add_response('describe_configuration_recorders', {
+            'ConfigurationRecorders': [{'name': "default", 'recordingGroup': {
+                'allSupported': False, 'resourceTypes': ["AWS::Lambda::Function"]}}]})
+        stubber.add_response('select_resource_config', {'Results': []},
+                             {'Expression': ANY})
+        discovery.collect(account, ["us-east-1"])
+
+    scan, skipped = discovery.prune(build_jobs(["us-east-1"], ["ec2", "lambda"]))
+    assert scan == [ScanJob("us-east-1", "ec2")]
+    assert skipped == [ScanJob("us-east-1", "lambda")]
+
+
+def test_concurrent_analysis_skips_empty_cells(account):
+    """Skipped cells never reach the enforcer but still appear in the merge."""
+    scanned = []
+
+    class FakeEnforcer:
+        def __init__(self, target):
+            self.account = target
+
+        def comprehensive_analysis(self, services=None, include_all_regions=False,
+                                   dry_run=False):
+            scanned.append((self.account.region, services[0]))
+            return {'total_resources_found': 1}
+
+    with ExitStack() as stack:
+        _stub_inventory(account, stack)
+        analysis = concurrent_analysis(account, FakeEnforcer, services=["ec2", "lambda"],
+                                       regions=["us-east-1", "eu-west-1"],
+                                       options=ScanOptions(
+                                           discovery=FastDiscovery(use_tagging=True)))
+
+    assert sorted(scanned) == [("eu-west-1", "lambda"), ("us-east-1", "ec2")]
+    assert analysis['total_resources_found'] == 2
+    assert analysis['discovery']['skipped_cells'] == 2
+    regions = {r['region']: r['services'] for r in analysis['regions_analyzed']}
+    assert regions['us-east-1']['lambda']['resource_count'] == 0
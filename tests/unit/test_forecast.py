@@ -0,0 +1,93 @@
+"""Unit tests for the streaming spend forecaster."""
+
+from datetime import date, timedelta
+
+import pytest
+
+from src.lib.cost_store import CostStore
+from src.lib.forecast import ForecastBatch, forecast_costs, month_end
+
+ACCOUNT_ID = "111122223333"
+START = date(2026, 1, 1)
+
+
+def _feed(batch, days, value_for):
+    """Feed days of values computed by value_for(day_index, series_index)."""
+    for index in range(days):
+        batch.update(START + timedelta(days=index),
+                     [value_for(index, i) for i in range(len(batch.keys))])
+
+
+def test_month_end():
+    """month_end gives the first day of the following month."""
+    assert month_end(date(2026, 2, 10)) == date(2026, 3, 1)
+    assert month_end(date(2026, 12, 31)) == date(2027, 1, 1)
+
+
+def test_linear_trend_per_series():
+    """Each series gets its own rolling trend from shared x sums."""
+    batch = ForecastBatch(["flat", "growing"], window=14)
+    _feed(batch, 40, lambda day, i: 2.0 if i == 0 else 1.0 + 0.5 * day)
+
+    flat, growing = batch.forecast(START + timedelta(days=45))
+    assert flat == pytest.approx(2.0, abs=0.05)
+    assert growing == pytest.approx(1.0 + 0.5 * 45, rel=0.02)
+
+
+def test_day_of_month_seasonality():
+    """A spend spike on the 1st of each month is learned and projected."""
+    batch = ForecastBatch(["billing"], window=28, seasonal_alpha=0.5)
+    for index in range(120):
+        day = START + timedelta(days=index)
+        batch.update(day, [30.0 if day.day == 1 else 1.0])
+
+    first, = batch.forecast(date(2026, 6, 1))
+    mid, = batch.forecast(date(2026, 6, 15))
+    assert first > 10 * mid
+
+
+def test_state_round_trip_matches_continuous_run():
+    """Saving and restoring state gives the same result as one long stream."""
+    value_for = lambda day, i: (day % 7) + i  # noqa: E731
+    continuous = ForecastBatch(["a", "b"])
+    _feed(continuous, 60, value_for)
+
+    resumed = ForecastBatch(["a", "b"])
+    _feed(resumed, 30, value_for)
+    resumed = ForecastBatch.from_state(resumed.to_state())
+    for index in range(30, 60):
+        resumed.update(START + timedelta(days=index),
+                       [value_for(index, i) for i in range(2)])
+
+    target = START + timedelta(days=70)
+    assert list(resumed.forecast(target)) == pytest.approx(list(continuous.forecast(target)))
+
+
+def test_exhaustion_dates():
+    """Cumulative forecasts crossing an allowance give the exhaustion day."""
+    batch = ForecastBatch(["cheap", "busy"], window=7)
+    _feed(batch, 14, lambda day, i: 1.0 if i == 0 else 10.0)
+    start = START + timedelta(days=14)
+    dates = batch.exhaustion_dates(start, start + timedelta(days=10), [0, 0], [100, 25])
+    assert dates == [None, start + timedelta(days=2)]
+
+
+def test_forecast_costs_is_incremental(tmp_path):
+    """Later runs only feed the days that settled since the saved state."""
+    store = CostStore(tmp_path / "costs.db")
+    today = date(2026, 3, 20)
+    rows = [((today - timedelta(days=n)).isoformat(), "Amazon EC2", 1.0, "USD")
+            for n in range(120)]
+    store.replace_range(ACCOUNT_ID, today - timedelta(days=119),
+                        today + timedelta(days=1), rows)
+
+    predictions = forecast_costs(store, ACCOUNT_ID, today)
+    ec2 = predictions['services']["Amazon EC2"]
+    assert ec2['month_to_date'] == pytest.approx(20.0)
+    assert ec2['end_of_month'] == pytest.approx(31.0, rel=0.01)
+    assert predictions['next_month_prediction'] == pytest.approx(30.0, rel=0.01)
+    assert ec2['first_charge_on'] == "2026-03-01"
+
+    observed = store.load_forecast(ACCOUNT_ID)['observed']
+    forecast_costs(store, ACCOUNT_ID, today + timedelta(days=2))
+    assert store.load_forecast(ACCOUNT_ID)['observed'] == observed + 2
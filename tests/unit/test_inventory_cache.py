@@ -0,0 +1,178 @@
+"""Unit tests for the on-disk inventory cache."""
+
+import time
+
+import pytest
+
+from src.lib.inventory_cache import InventoryCache, default_cache_dir
+from src.lib.scan_engine import ScanJob, ScanOptions, concurrent_analysis
+from src.models.aws_account import AWSAccount
+from src.models.aws_resource import AWSResource, ResourceStatus
+
+ACCOUNT_ID = "111122223333"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Inventory cache in a temporary directory."""
+    return InventoryCache(tmp_path / "inventory.db", ttls={"ec2": 60, "iam": 3600})
+
+
+class CountingEnforcer:
+    """Enforcer stand-in that records which services were scanned."""
+
+    calls = []
+
+    def __init__(self, account):
+        self.account = account
+
+    def comprehensive_analysis(self, services=None, include_all_regions=False,
+                               dry_run=False):
+        service = services[0] if services else "ec2"
+        CountingEnforcer.calls.append((self.account.region, service))
+        resource = AWSResource(f"{service}-1", service, "thing", self.account.region,
+                               status=ResourceStatus.CHARGED)
+        return {
+            'total_resources_found': 1,
+            'regions_analyzed': [{
+                'region': self.account.region,
+                'services': {service: {'resource_count': 1, 'resources': [resource]}},
+            }],
+            'risk_assessment': {'overall_risk': "MEDIUM", 'risk_factors': []},
+        }
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    """Clear recorded enforcer calls between tests."""
+    CountingEnforcer.calls = []
+
+
+def test_default_cache_dir(monkeypatch, tmp_path):
+    """The cache directory follows XDG unless explicitly overridden."""
+    monkeypatch.delenv("AWS_FREE_GUARD_CACHE_DIR", raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert default_cache_dir() == tmp_path / "aws-free-guard"
+    monkeypatch.setenv("AWS_FREE_GUARD_CACHE_DIR", str(tmp_path / "custom"))
+    assert default_cache_dir() == tmp_path / "custom"
+
+
+def test_store_and_lookup_roundtrip(cache):
+    """Stored analyses come back as plain JSON with resources serialized."""
+    job = ScanJob("us-east-1", "ec2")
+    resource = AWSResource("i-1", "ec2", "instance", "us-east-1",
+                           status=ResourceStatus.FREE)
+    cache.store(ACCOUNT_ID, job, {'regions_analyzed': [{'resources': [resource]}]})
+
+    cached = cache.lookup(ACCOUNT_ID, [job])[job]
+    assert cached['regions_analyzed'][0]['resources'][0]['status'] == "free"
+    assert cached['cached_at'] <= time.time()
+
+
+def test_per_service_ttl(cache, monkeypatch):
+    """Each service expires according to its own TTL."""
+    ec2, iam = ScanJob("us-east-1", "ec2"), ScanJob("us-east-1", "iam")
+    cache.store(ACCOUNT_ID, ec2, {})
+    cache.store(ACCOUNT_ID, iam, {})
+
+    later = time.time() + 120
+    monkeypatch.setattr("src.lib.inventory_cache.time.time", lambda: later)
+    assert set(cache.lookup(ACCOUNT_ID, [ec2, iam])) == {iam}
+    assert cache.lookup(ACCOUNT_ID, [ec2, iam], max_age=600).keys() == {ec2, iam}
+
+
+def test_accounts_are_isolated(cache):
+    """Cells are keyed by account ID."""
+    job = ScanJob("us-east-1", "ec2")
+    cache.store(ACCOUNT_ID, job, {})
+    assert cache.lookup("444455556666", [job]) == {}
+    cache.invalidate(ACCOUNT_ID)
+    assert cache.lookup(ACCOUNT_ID, [job]) == {}
+
+
+def test_incremental_refresh(cache):
+    """Only missing or stale cells are rescanned."""
+    account = AWSAccount(account_id=ACCOUNT_ID)
+    first = concurrent_analysis(account, CountingEnforcer, services=["ec2", "iam"],
+                                regions=["us-east-1"], options=ScanOptions(cache=cache))
+    assert first['scan_stats']['cache_refreshed'] == 2
+
+    second = concurrent_analysis(account, CountingEnforcer,
+                                 services=["ec2", "iam", "s3"],
+                                 regions=["us-east-1"],
+                                 options=ScanOptions(cache=cache))
+    assert CountingEnforcer.calls[2:] == [("us-east-1", "s3")]
+    assert second['scan_stats']['cache_hits'] == 2
+    assert second['total_resources_found'] == 3
+    assert second['risk_assessment']['overall_risk'] == "MEDIUM"
+
+    concurrent_analysis(account, CountingEnforcer, services=["ec2"],
+                        regions=["us-east-1"],
+                        options=ScanOptions(cache=cache, refresh=True))
+    assert CountingEnforcer.calls[-1] == ("us-east-1", "ec2")
+
+
+@pytest.fixture
+def profiles(monkeypatch, tmp_path):
+    """Credentials file with two named profiles; env credentials for the implicit one."""
+    credentials = tmp_path / "credentials"
+    credentials.write_text("[sandbox]\naws_access_key_id = AKIASANDBOX\n"
+                           "aws_secret_access_key = secret\n"
+                           "[broken]\naws_access_key_id = AKIABROKEN\n"
+                           "aws_secret_access_key = secret\n")
+    monkeypatch.setenv("AWS_SHARED_CREDENTIALS_FILE", str(credentials))
+    monkeypatch.setenv("AWS_CONFIG_FILE", str(tmp_path / "config"))
+    monkeypatch.delenv("AWS_PROFILE", raising=False)
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "AKIAFIRST")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "secret")
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """Record STS lookups, answering with an account ID per access key."""
+    made = []
+
+    def fake_get_account_id(self):
+        key = self.get_session().get_credentials().access_key
+        made.append(key)
+        return {"AKIAFIRST": ACCOUNT_ID, "AKIASECOND": "444455556666",
+                "AKIASANDBOX": ACCOUNT_ID}.get(key, "123456789012")
+
+    monkeypatch.setattr(AWSAccount, "get_account_id", fake_get_account_id)
+    return made
+
+
+def test_resolve_account_id_is_cached(cache, profiles, lookups):
+    """An explicit profile's STS lookup is made once and kept on disk."""
+    account = AWSAccount(profile_name="sandbox")
+    assert cache.resolve_account_id(account) == ACCOUNT_ID
+    assert cache.resolve_account_id(account) == ACCOUNT_ID
+    assert InventoryCache(cache.path).resolve_account_id(
+        AWSAccount(profile_name="sandbox")) == ACCOUNT_ID
+    assert lookups == ["AKIASANDBOX"]
+
+
+def test_account_id_follows_credentials(cache, profiles, lookups, monkeypatch):
+    """Implicit credentials are keyed by access key and cached on disk too."""
+    assert cache.resolve_account_id(AWSAccount()) == ACCOUNT_ID
+
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "AKIASECOND")
+    assert cache.resolve_account_id(AWSAccount()) == "444455556666"
+
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "AKIAFIRST")
+    assert cache.resolve_account_id(AWSAccount()) == ACCOUNT_ID
+    assert InventoryCache(cache.path).resolve_account_id(AWSAccount()) == ACCOUNT_ID
+    assert lookups == ["AKIAFIRST", "AKIASECOND"]
+
+
+def test_placeholder_account_id_not_cached(cache, profiles, lookups):
+    """A failed STS lookup is retried, and nothing is stored under the placeholder."""
+    account = AWSAccount(profile_name="broken")
+    account_id = cache.resolve_account_id(account)
+    assert account_id == "123456789012"
+    assert cache.resolve_account_id(account) == account_id
+    assert lookups == ["AKIABROKEN", "AKIABROKEN"]
+
+    job = ScanJob("us-east-1", "ec2")
+    cache.store(account_id, job, {'total_resources_found': 1})
+    assert cache.lookup(account_id, [job], max_age=60) == {}
@@ -0,0 +1,127 @@
+"""Unit tests for the batched free tier limit engine."""
+
+from src.lib.limit_engine import LimitCatalog, LimitEngine, UsageTally, evaluate_analysis
+from src.models.aws_resource import AWSResource, ResourceStatus
+from src.models.free_tier_limit import FreeTierLimit
+
+
+def _instance(index, hours):
+    """Scanner-built EC2 instance reporting its monthly hours."""
+    return AWSResource.from_catalog(f"i-{index}", "ec2", "instance", "us-east-1",
+                                    current_usage={"hours": hours})
+
+
+def test_common_limits_are_copies():
+    """Callers get their own limits; changing one leaves the catalog alone."""
+    first = FreeTierLimit.get_common_limits()
+    first["ec2_instances"].limit_value = 0
+    first["ec2_instances"].additional_limits["burst"] = 1
+
+    second = FreeTierLimit.get_common_limits()
+    assert second["ec2_instances"].limit_value == 750
+    assert second["ec2_instances"].additional_limits == {}
+
+
+def test_catalog_index():
+    """Enforcer resource types resolve to their catalog limits."""
+    catalog = LimitCatalog.common()
+    names = [catalog.names[i] for i in catalog.lookup("s3", "bucket")]
+    assert names == ["s3_storage", "s3_requests"]
+    assert catalog.lookup("sqs", "queue") == ()
+
+
+def test_account_wide_aggregation():
+    """Hours are judged on the account total, not per instance."""
+    engine = LimitEngine()
+    result = engine.evaluate([_instance(0, 300), _instance(1, 300)])
+    assert result.statuses == [ResourceStatus.FREE, ResourceStatus.FREE]
+    assert result.utilization["ec2_instances"]["percent"] == 80.0
+
+    result = engine.evaluate([_instance(0, 400), _instance(1, 400)])
+    assert result.statuses == [ResourceStatus.CHARGED, ResourceStatus.CHARGED]
+    assert result.exceeded() == ["ec2_instances"]
+
+
+def test_statuses_set_elsewhere_are_kept():
+    """Enforcer resources and resources without usage data are not judged."""
+    enforced = AWSResource("i-big", "ec2", "instance", "us-east-1",
+                           status=ResourceStatus.CHARGED)
+    own_limits = AWSResource("q-1", "sqs", "queue", "us-east-1",
+                             current_usage={"requests": 10},
+                             free_tier_limit={"requests": 5},
+                             status=ResourceStatus.FREE)
+    group = AWSResource("sg-1", "ec2", "security_group", "us-east-1",
+                        status=ResourceStatus.FREE)
+    no_usage = AWSResource.from_catalog("bucket", "s3", "bucket", "us-east-1")
+    resources = [enforced, own_limits, group, no_usage, _instance(0, 800)]
+    analysis = {'regions_analyzed': [
+        {'region': "us-east-1", 'services': {'ec2': {'resources': resources}}}]}
+
+    evaluate_analysis(analysis)
+
+    assert [r.status for r in resources] == [
+        ResourceStatus.CHARGED, ResourceStatus.FREE, ResourceStatus.FREE,
+        ResourceStatus.UNKNOWN, ResourceStatus.CHARGED]
+    assert analysis['free_tier_utilization']["ec2_instances"]['used'] == 800
+    assert analysis['risk_assessment']['risk_factors'] == ["ec2_instances exceeded"]
+
+
+def test_enforcer_resources_leave_the_risk_alone():
+    """Without judged usage, nothing is exceeded and the scan's risk stands."""
+    enforced = AWSResource("i-big", "ec2", "instance", "us-east-1",
+                           current_usage={"hours": 5000},
+                           status=ResourceStatus.CHARGED)
+    analysis = {'regions_analyzed': [
+        {'region': "us-east-1", 'services': {'ec2': {'resources': [enforced]}}}],
+        'risk_assessment': {'overall_risk': "LOW", 'risk_factors': []}}
+
+    evaluate_analysis(analysis)
+
+    assert enforced.status == ResourceStatus.CHARGED
+    assert analysis['risk_assessment'] == {'overall_risk': "LOW", 'risk_factors': []}
+
+
+def test_evaluate_analysis_updates_resources():
+    """Analysis results get statuses applied and utilization attached."""
+    instance = _instance(0, 100)
+    analysis = {'regions_analyzed': [
+        {'region': "us-east-1", 'services': {'ec2': {'resources': [instance, {"raw": 1}]}}}
+    ]}
+    evaluate_analysis(analysis)
+    assert instance.status == ResourceStatus.FREE
+    assert analysis['free_tier_utilization']["ec2_instances"]['used'] == 100
+
+
+def test_evaluate_analysis_judges_the_account_total():
+    """Decoded resources count too, and an exceeded allowance raises the risk."""
+    cached = _instance(1, 400).to_dict()
+    instance = _instance(0, 400)
+    analysis = {'regions_analyzed': [
+        {'region': "us-east-1", 'services': {'ec2': {'resources': [instance]}}},
+        {'region': "eu-west-1", 'services': {'ec2': {'resources': [cached]}}},
+    ], 'risk_assessment': {'overall_risk': "LOW", 'risk_factors': []}}
+
+    evaluate_analysis(analysis)
+
+    assert instance.status == ResourceStatus.CHARGED
+    assert cached['status'] == "charged"
+    assert analysis['risk_assessment'] == {'overall_risk': "HIGH",
+                                           'risk_factors': ["ec2_instances exceeded"]}
+    assert "800/750 hours" in analysis['recommendations'][0]
+
+
+def test_tally_statuses_only_get_worse():
+    """Streamed results are judged on the totals so far, then settled at the end."""
+    tally = UsageTally()
+    first, second = _instance(0, 400), _instance(1, 400)
+    tally.add([first])
+    assert first.status == ResourceStatus.FREE
+    tally.add([second])
+    assert second.status == ResourceStatus.CHARGED
+
+    # The first instance was already streamed and dropped from the analysis
+    analysis = {'regions_analyzed': [
+        {'region': "eu-west-1", 'services': {'ec2': {'resources': [second]}}}]}
+    evaluate_analysis(analysis, tally=tally)
+    assert analysis['free_tier_utilization']["ec2_instances"]['used'] == 800
+    assert analysis['risk_assessment']['overall_risk'] == "HIGH"
@@ -0,0 +1,87 @@
+"""Unit tests for streaming NDJSON output."""
+
+import io
+import json
+
+from src.lib.ndjson_output import NdjsonWriter
+from src.lib.scan_engine import ScanEngine, ScanJob, ScanResult, build_jobs, merge_analyses
+from src.models.aws_resource import AWSResource, ResourceStatus
+
+
+def _lines(stream):
+    """Decode every line written to the stream."""
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def _analysis(region, service, count):
+    """Build a single-job analysis with count resources."""
+    resources = [AWSResource(f"{service}-{i}", service, "thing", region,
+                             status=ResourceStatus.FREE) for i in range(count)]
+    return {
+        'total_resources_found': count,
+        'regions_analyzed': [{
+            'region': region,
+            'services': {service: {'resource_count': count, 'resources': resources}},
+        }],
+    }
+
+
+def test_scan_result_streams_and_releases_resources():
+    """Resources are written immediately and dropped from the analysis."""
+    stream = io.StringIO()
+    writer = NdjsonWriter(stream)
+    result = ScanResult(ScanJob("us-east-1", "ec2"), _analysis("us-east-1", "ec2", 3), 0.0)
+
+    writer.scan_result(result)
+
+    records = _lines(stream)
+    assert [r['resource_id'] for r in records] == ["ec2-0", "ec2-1", "ec2-2"]
+    assert records[0]['type'] == "resource"
+    assert records[0]['status'] == "free"
+    service = result.analysis['regions_analyzed'][0]['services']['ec2']
+    assert service['resources'] == []
+    assert service['resource_count'] == 3
+
+
+def test_errors_are_records():
+    """Failed jobs become error records instead of aborting the stream."""
+    stream = io.StringIO()
+    NdjsonWriter(stream).scan_result(ScanResult(ScanJob("eu-west-1", "s3"), {}, 0.0,
+                                                error="AccessDenied"))
+    assert _lines(stream) == [{"type": "error", "region": "eu-west-1",
+                               "service": "s3", "error": "AccessDenied"}]
+
+
+def test_summary_follows_streamed_resources():
+    """The summary record comes last and keeps per-service counts."""
+    stream = io.StringIO()
+    writer = NdjsonWriter(stream)
+    jobs = build_jobs(["us-east-1", "eu-west-1"], ["ec2"])
+    results = ScanEngine(max_workers=2).run(
+        jobs, lambda job: _analysis(job.region, job.service, 2),
+        on_result=writer.scan_result
+    )
+    writer.summary(merge_analyses(results))
+
+    records = _lines(stream)
+    assert [r['type'] for r in records] == ["resource"] * 4 + ["summary"]
+    summary = records[-1]
+    assert summary['total_resources_found'] == 4
+    assert summary['regions_analyzed'] == [
+        {"region": "us-east-1", "services": {"ec2": 2}},
+        {"region": "eu-west-1", "services": {"ec2": 2}},
+    ]
+
+
+def test_cleaned_resources():
+    """Cleaned resources get their own record type and a count in the summary."""
+    stream = io.StringIO()
+    writer = NdjsonWriter(stream)
+    results = {'cleaned_resources': [{'resource_id': "vol-1", 'service': "ec2"}]}
+    writer.resources(results['cleaned_resources'], record_type="cleaned")
+    writer.summary(results)
+
+    records = _lines(stream)
+    assert records[0] == {"type": "cleaned", "resource_id": "vol-1", "service": "ec2"}
+    assert records[1] == {"type": "summary", "cleaned_count": 1}
+    assert writer.records == 2
@@ -0,0 +1,194 @@
+"""Unit tests for organization-wide scanning."""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from botocore.stub import Stubber
+
+from src.lib.organization import (
+    AccountResult,
+    CredentialCache,
+    MemberAccount,
+    assume_role_credentials,
+    member_account,
+    merge_account_analyses,
+    parse_account_ids,
+    resolve_members,
+    role_arn,
+    scan_accounts,
+)
+from src.lib.rate_limiter import RateLimiter
+from src.models.aws_account import AWSAccount
+
+CALLER = "111122223333"
+MEMBER = "444455556666"
+
+
+@pytest.fixture
+def account(monkeypatch):
+    """Management account with fake credentials."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    return AWSAccount(account_id=CALLER, rate_limiter=RateLimiter(budgets={'ec2': 3}))
+
+
+def _issued(minutes: int, key: str = "ASIAMEMBER000000"):
+    """Build an AssumeRole response expiring in the given number of minutes."""
+    return {'Credentials': {
+        'AccessKeyId': key,
+        'SecretAccessKey': "secret",
+        'SessionToken': "token",
+        'Expiration': datetime.now(timezone.utc) + timedelta(minutes=minutes),
+    }}
+
+
+def _metadata(minutes: int):
+    """Cached credential metadata expiring in the given number of minutes."""
+    expiry = datetime.now(timezone.utc) + timedelta(minutes=minutes)
+    return {'access_key': "ASIA", 'secret_key': "s", 'token': "t",
+            'expiry_time': expiry.isoformat()}
+
+
+def test_parse_account_ids():
+    """IDs may be repeated or comma-separated; duplicates are dropped."""
+    assert parse_account_ids([f"{CALLER},{MEMBER}", CALLER]) == [CALLER, MEMBER]
+    with pytest.raises(ValueError):
+        parse_account_ids(["12345"])
+
+
+def test_credential_cache_expiry_and_persistence(tmp_path):
+    """Credentials are reused across instances until close to expiry."""
+    cache = CredentialCache(tmp_path)
+    cache.put("role-a", "session", "AKIASOURCE", _metadata(60))
+    cache.put("role-b", "session", "AKIASOURCE", _metadata(5))
+
+    reloaded = CredentialCache(tmp_path)
+    assert reloaded.get("role-a", "session", "AKIASOURCE")['access_key'] == "ASIA"
+    assert reloaded.get("role-b", "session", "AKIASOURCE") is None
+    assert reloaded.get("role-a", "other-session", "AKIASOURCE") is None
+    # Another principal never gets the credentials
+    assert reloaded.get("role-a", "session", "AKIAOTHER") is None
+
+    for path in tmp_path.iterdir():
+        assert os.stat(path).st_mode & 0o777 == 0o600
+
+
+def test_assumed_credentials_are_cached(account, tmp_path):
+    """Only the first account built for a role calls STS."""
+    cache = CredentialCache(tmp_path)
+    role = role_arn(MEMBER)
+    with Stubber(account.get_client('sts')) as stubber:
+        stubber.add_response('assume_role', _issued(60), {
+            'RoleArn': role, 'RoleSessionName': "aws-free-guard",
+            'DurationSeconds': 3600})
+        first = assume_role_credentials(account, role, cache)
+        second = assume_role_credentials(account, role, cache)
+        assert first.get_frozen_credentials().access_key == "ASIAMEMBER000000"
+        assert second.get_frozen_credentials().access_key == "ASIAMEMBER000000"
+        stubber.assert_no_pending_responses()
+
+
+def test_cached_credentials_follow_the_source_identity(account, tmp_path, monkeypatch):
+    """Switching base credentials assumes the role again instead of reusing the cache."""
+    cache = CredentialCache(tmp_path)
+    role = role_arn(MEMBER)
+    cache.put(role, "aws-free-guard", "testing", _metadata(60))
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "AKIAOTHER")
+    other = AWSAccount(account_id=CALLER)
+
+    with Stubber(other.get_client('sts')) as stubber:
+        stubber.add_response('assume_role', _issued(60, key="ASIAOTHER0000000"), {
+            'RoleArn': role, 'RoleSessionName': "aws-free-guard",
+            'DurationSeconds': 3600})
+        credentials = assume_role_credentials(other, role, cache)
+        assert credentials.get_frozen_credentials().access_key == "ASIAOTHER0000000"
+        stubber.assert_no_pending_responses()
+
+
+def test_member_account_uses_role_and_own_limiter(account, tmp_path):
+    """Member clients sign with assumed credentials and have their own buckets."""
+    member = MemberAccount(MEMBER, "sandbox", role_arn(MEMBER))
+    cache = CredentialCache(tmp_path)
+    cache.put(member.role_arn, "aws-free-guard", "testing", _metadata(60))
+
+    target = member_account(account, member, cache)
+    assert target.account_id == MEMBER
+    assert target.get_session().get_credentials().access_key == "ASIA"
+    assert target.rate_limiter is not account.rate_limiter
+    assert target.rate_limiter.budgets['ec2'] == 3
+
+    own = member_account(account, MemberAccount(CALLER), cache)
+    assert own.get_session().get_credentials().access_key == "testing"
+
+
+def test_resolve_members_from_organization(account):
+    """Active org accounts are listed; the caller's own account needs no role."""
+    with Stubber(account.get_client('organizations')) as stubber:
+        stubber.add_response('list_accounts', {'Accounts': [
+            {'Id': CALLER, 'Name': "management", 'Status': "ACTIVE"},
+            {'Id': MEMBER, 'Name': "sandbox", 'Status': "ACTIVE"},
+            {'Id': "777788889999", 'Name': "closed", 'Status': "SUSPENDED"},
+        ]})
+        members = resolve_members(account, org=True, role_name="Auditor")
+
+    assert members == [
+        MemberAccount(CALLER, "management", None),
+        MemberAccount(MEMBER, "sandbox", f"arn:aws:iam::{MEMBER}:role/Auditor"),
+    ]
+
+
+def test_scan_accounts_in_parallel_with_cap(account, tmp_path):
+    """Accounts run concurrently up to max_accounts; failures stay per account."""
+    members = [MemberAccount(f"{index:012d}") for index in range(1, 7)]
+    members.append(MemberAccount("999999999999"))
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def analyze(target, member):
+        with lock:
+            running.append(member)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(member)
+        if member.account_id == "999999999999":
+            raise RuntimeError("AccessDenied")
+        return {'total_resources_found': 1}
+
+    results = scan_accounts(account, members, analyze, max_accounts=3,
+                            cache=CredentialCache(tmp_path))
+
+    assert max(peak) == 3
+    assert [r.member for r in results] == members
+    assert results[-1].error == "AccessDenied"
+
+
+def test_merge_account_analyses():
+    """Per-account analyses roll up into one report tagged by account."""
+    def analysis(risk, cost):
+        return {
+            'total_resources_found': 2,
+            'regions_analyzed': [{'region': "us-east-1", 'services': {}}],
+            'recommendations': ["Stop idle instances"],
+            'risk_assessment': {'overall_risk': risk, 'risk_factors': ["EC2 hours"]},
+            'cost_analysis': {'total_monthly_cost': cost},
+        }
+
+    merged = merge_account_analyses([
+        AccountResult(MemberAccount(CALLER), analysis("LOW", 1.5), 1.0),
+        AccountResult(MemberAccount(MEMBER), analysis("HIGH", 2.0), 1.0),
+        AccountResult(MemberAccount("777788889999"), {}, 0.1, error="AccessDenied"),
+    ])
+
+    assert merged['total_resources_found'] == 4
+    assert merged['cost_analysis']['total_monthly_cost'] == 3.5
+    assert merged['risk_assessment']['overall_risk'] == "HIGH"
+    assert f"{MEMBER}: EC2 hours" in merged['risk_assessment']['risk_factors']
+    assert [r['account_id'] for r in merged['regions_analyzed']] == [CALLER, MEMBER]
+    assert [a['overall_risk'] for a in merged['accounts']] == ["LOW", "HIGH", "UNKNOWN"]
+    assert merged['scan_errors'] == [{'account_id': "777788889999",
+                                      'error': "AccessDenied"}]
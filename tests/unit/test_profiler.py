@@ -0,0 +1,107 @@
+"""Unit tests for run profiling."""
+
+import json
+
+import pytest
+from botocore.awsrequest import AWSResponse
+
+from src.lib.profiler import RunProfiler
+from src.models.aws_account import AWSAccount
+
+
+class _RawBody:
+    """Minimal urllib3-style body for a canned HTTP response."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def stream(self, **kwargs):
+        yield self.body
+
+
+def _sqs_client(monkeypatch, profiler, responses):
+    """Build a pooled SQS client that answers with canned (status, body) pairs."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    account = AWSAccount(account_id="111122223333", profiler=profiler)
+    client = account.get_client('sqs', 'eu-west-1')
+    pending = [(status, json.dumps(body).encode()) for status, body in responses]
+
+    def send(request, **kwargs):
+        status, body = pending.pop(0)
+        return AWSResponse(request.url, status, {'content-length': str(len(body))},
+                           _RawBody(body))
+
+    client.meta.events.register('before-send', send)
+    return client
+
+
+def test_counts_calls_pages_and_bytes(monkeypatch):
+    """Paginated calls are counted as pages under their (region, service)."""
+    profiler = RunProfiler()
+    client = _sqs_client(monkeypatch, profiler, [
+        (200, {'QueueUrls': ["q1"], 'NextToken': "t"}),
+        (200, {'QueueUrls': ["q2"]}),
+    ])
+
+    with profiler.phase("scan"):
+        list(client.get_paginator('list_queues').paginate())
+
+    report = profiler.report()
+    assert report['api_calls'] == 2
+    assert "scan" in report['phases']
+    (row,) = report['rows']
+    assert (row['region'], row['service']) == ("eu-west-1", "sqs")
+    assert row['pages'] == 2
+    assert row['bytes'] > 0
+    assert row['errors'] == 0
+
+
+def test_counts_throttles_retries_and_errors(monkeypatch):
+    """Throttled attempts and botocore retries are attributed to the call."""
+    profiler = RunProfiler()
+    throttled = {'__type': "com.amazonaws.sqs#ThrottlingException", 'message': "slow down"}
+    denied = {'__type': "com.amazonaws.sqs#AccessDenied", 'message': "no"}
+    client = _sqs_client(monkeypatch, profiler, [
+        (400, throttled),
+        (200, {'QueueUrls': []}),
+        (403, denied),
+    ])
+
+    client.list_queues()
+    with pytest.raises(Exception):
+        client.list_queues()
+
+    (row,) = profiler.report()['rows']
+    assert row['calls'] == 2
+    assert row['throttles'] == 1
+    assert row['retries'] == 1
+    assert row['errors'] == 1
+
+
+def test_rows_ranked_by_api_time():
+    """The busiest (region, service) pair comes first."""
+    profiler = RunProfiler()
+    for key, seconds in ((("us-east-1", "s3"), 1.0), (("us-west-2", "ec2"), 5.0)):
+        profiler.stats[key] = {'calls': 1, 'pages': 0, 'bytes': 0, 'retries': 0,
+                               'throttles': 0, 'errors': 0, 'api_time': seconds}
+
+    assert [row['service'] for row in profiler.report()['rows']] == ["ec2", "s3"]
+
+
+def test_chrome_trace(tmp_path):
+    """Phases are written as complete events in Chrome trace format."""
+    profiler = RunProfiler(max_trace_events=1)
+    with profiler.phase("scan"):
+        pass
+    with profiler.phase("render"):
+        pass
+
+    path = tmp_path / "trace.json"
+    profiler.write_chrome_trace(str(path))
+    trace = json.loads(path.read_text())
+    assert [event['name'] for event in trace['traceEvents']] == ["scan"]
+    assert trace['traceEvents'][0]['ph'] == "X"
+    assert trace['otherData']['dropped_events'] == 1
+    assert set(profiler.phases) == {"scan", "render"}
@@ -0,0 +1,138 @@
+"""Unit tests for batched progress reporting."""
+
+import threading
+
+from src.lib.progress import ALL_REGIONS, ProgressTracker, RichProgressSink
+from src.lib.scan_engine import ScanJob, ScanOptions, ScanResult, concurrent_analysis
+from src.models.aws_account import AWSAccount
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_snapshot_rates_and_eta():
+    """Per-region rate and ETA come from completed tasks over elapsed time."""
+    clock = FakeClock()
+    tracker = ProgressTracker(clock=clock)
+    tracker.start({"us-east-1": 4, "eu-west-1": 2})
+    clock.now = 10.0
+    tracker.advance("us-east-1", resources=50)
+    tracker.advance("eu-west-1", tasks=2, resources=10)
+
+    snapshot = tracker.snapshot()
+    east, west = snapshot['regions']
+    assert east['completed'] == 1
+    assert east['resources_per_second'] == 5.0
+    assert east['eta'] == 30.0
+    assert west['eta'] == 0.0
+    assert snapshot['overall']['region'] == ALL_REGIONS
+    assert snapshot['overall']['total'] == 6
+    assert snapshot['overall']['resources'] == 60
+
+
+def test_updates_are_batched():
+    """Thousands of updates within one interval reach the sink only once."""
+    clock = FakeClock()
+    rendered = []
+    tracker = ProgressTracker(rendered.append, interval=0.1, clock=clock)
+    tracker.start({"us-east-1": 5000})
+    assert len(rendered) == 1
+
+    for _ in range(5000):
+        tracker.advance("us-east-1", resources=1)
+    assert len(rendered) == 1
+
+    clock.now = 0.2
+    tracker.advance("us-east-1", tasks=0)
+    tracker.close()
+    assert len(rendered) == 3
+    assert rendered[-1]['overall']['completed'] == 5000
+
+
+def test_sink_never_runs_concurrently():
+    """A worker does not wait on, or overlap with, a flush in progress."""
+    entered = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_sink(snapshot):
+        calls.append(snapshot)
+        entered.set()
+        release.wait(5)
+
+    tracker = ProgressTracker(slow_sink, interval=0)
+    rendering = threading.Thread(target=tracker.flush)
+    rendering.start()
+    entered.wait(5)
+    tracker.advance("us-east-1")
+    release.set()
+    rendering.join()
+
+    assert len(calls) == 1
+    assert tracker.regions["us-east-1"].completed == 1
+
+
+def test_rich_sink_tasks_per_region():
+    """The sink keeps one task for the overall bar and one per region."""
+    class FakeProgress:
+        def __init__(self):
+            self.tasks = {}
+
+        def add_task(self, description, total=None, **fields):
+            self.tasks[len(self.tasks)] = {'description': description}
+            return len(self.tasks) - 1
+
+        def update(self, task_id, **fields):
+            self.tasks[task_id].update(fields)
+
+    progress = FakeProgress()
+    tracker = ProgressTracker(RichProgressSink(progress), interval=0)
+    tracker.start({"us-east-1": 2, "eu-west-1": 1})
+    tracker.advance("eu-west-1", resources=3, error=True)
+
+    assert len(progress.tasks) == 3
+    overall, _, west = progress.tasks.values()
+    assert overall['total'] == 3 and overall['completed'] == 1
+    assert west['completed'] == 1
+    assert "3 resources" in west['stats'] and "1 failed" in west['stats']
+
+
+def test_concurrent_analysis_reports_progress():
+    """The job matrix is announced up front and every result advances it."""
+    class FakeEnforcer:
+        def __init__(self, account):
+            self.account = account
+
+        def comprehensive_analysis(self, services=None, include_all_regions=False,
+                                   dry_run=False):
+            return {'total_resources_found': 2}
+
+    snapshots = []
+    tracker = ProgressTracker(snapshots.append, interval=0)
+    concurrent_analysis(AWSAccount(account_id="111122223333"), FakeEnforcer,
+                        services=["ec2", "s3"], regions=["us-east-1", "eu-west-1"],
+                        options=ScanOptions(progress=tracker))
+
+    assert snapshots[0]['overall']['total'] == 4
+    assert snapshots[0]['overall']['completed'] == 0
+    final = tracker.snapshot()['overall']
+    assert final['completed'] == 4
+    assert final['resources'] == 8
+
+
+def test_scan_result_counts_errors():
+    """Failed jobs still count as finished, and as errors."""
+    tracker = ProgressTracker()
+    tracker.start({"us-east-1": 1})
+    tracker.scan_result(ScanResult(ScanJob("us-east-1", "ec2"), {}, 0.1, error="boom"))
+
+    (region,) = tracker.snapshot()['regions']
+    assert region['completed'] == 1
+    assert region['errors'] == 1
@@ -0,0 +1,140 @@
+"""Unit tests for the adaptive rate limiter."""
+
+import time
+
+import pytest
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from src.lib.rate_limiter import (
+    RateLimiter,
+    TokenBucket,
+    is_throttling_error,
+    parse_budgets,
+)
+from src.lib.scan_engine import ScanEngine, ScanJob
+from src.models.aws_account import ClientPool
+
+
+def _client_error(code):
+    """Build a botocore ClientError with the given code."""
+    return ClientError({'Error': {'Code': code, 'Message': code}}, 'DescribeInstances')
+
+
+def test_is_throttling_error():
+    """Throttling codes are recognised on exceptions and raw codes."""
+    assert is_throttling_error(_client_error("RequestLimitExceeded"))
+    assert is_throttling_error("Throttling")
+    assert not is_throttling_error(_client_error("AccessDenied"))
+    assert not is_throttling_error(RuntimeError("boom"))
+
+
+def test_bucket_enforces_rate():
+    """After the initial burst, requests are spaced by the bucket rate."""
+    bucket = TokenBucket(rate=20)
+    started = time.monotonic()
+    for _ in range(30):
+        bucket.acquire()
+    elapsed = time.monotonic() - started
+
+    assert elapsed >= 0.4
+    assert bucket.requests == 30
+    assert bucket.throttled_time > 0
+
+
+def test_async_acquire_shares_the_bucket_without_blocking_the_loop():
+    """Coroutines waiting for tokens let other tasks run."""
+    import asyncio
+
+    bucket = TokenBucket(rate=20)
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.05)
+
+    async def main():
+        started = time.monotonic()
+        ticking = asyncio.ensure_future(ticker())
+        for _ in range(30):
+            await bucket.acquire_async()
+        await ticking
+        return time.monotonic() - started
+
+    assert asyncio.run(main()) >= 0.4
+    assert len(ticks) == 5
+    assert bucket.requests == 30
+
+
+def test_bucket_adapts_to_throttling():
+    """Throttling halves the rate; successes ramp it back up to the budget."""
+    bucket = TokenBucket(rate=8)
+    bucket.on_throttle()
+    bucket.on_throttle()
+    assert bucket.rate == 2
+    assert bucket.throttle_events == 2
+
+    for _ in range(40):
+        bucket.on_success()
+    assert bucket.rate == 8
+
+
+def test_limiter_budgets_per_service():
+    """Each (service, region) gets its own bucket sized from the budgets."""
+    limiter = RateLimiter(budgets={'ec2': 3}, default_rate=7)
+    assert limiter.bucket('ec2', 'us-east-1').max_rate == 3
+    assert limiter.bucket('sqs', 'us-east-1').max_rate == 7
+    assert limiter.bucket('ec2', 'us-east-1') is not limiter.bucket('ec2', 'eu-west-1')
+
+
+def test_needs_retry_handler_records_throttles():
+    """Throttled responses seen by botocore slow the matching bucket down."""
+    limiter = RateLimiter(budgets={'ec2': 10})
+    context = {'aws_free_guard_service': 'ec2', 'client_region': 'us-east-1'}
+    response = (None, {'Error': {'Code': 'RequestLimitExceeded'}})
+
+    assert limiter._needs_retry(response=response,
+                                request_dict={'context': context}) is None
+    stats = limiter.stats()
+    assert stats['throttle_events'] == 1
+    assert stats['buckets']['ec2/us-east-1']['rate'] == 5
+
+
+def test_pool_clients_pass_through_limiter(monkeypatch):
+    """Clients built by the pool take a token for every attempt."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    limiter = RateLimiter()
+    client = ClientPool(rate_limiter=limiter).session().client(
+        'sqs', region_name='eu-west-1', endpoint_url='http://127.0.0.1:9',
+        config=Config(retries={'max_attempts': 0}, connect_timeout=0.1)
+    )
+    with pytest.raises(Exception):
+        client.list_queues()
+
+    assert limiter.stats()['buckets']['sqs/eu-west-1']['requests'] == 1
+
+
+def test_engine_reschedules_throttled_jobs(monkeypatch):
+    """Jobs that are still throttled after botocore retries are retried."""
+    monkeypatch.setattr("src.lib.scan_engine.backoff_delay", lambda attempt: 0)
+    attempts = []
+
+    def scan(job):
+        attempts.append(job)
+        if len(attempts) < 3:
+            raise _client_error("Throttling")
+        return {'total_resources_found': 1}
+
+    result = ScanEngine(max_workers=1).run([ScanJob("us-east-1", "ec2")], scan)[0]
+    assert result.error is None
+    assert result.retries == 2
+
+
+def test_parse_budgets():
+    """Budgets are parsed from SERVICE=RATE strings."""
+    assert parse_budgets(["ec2=5", " s3 = 12.5"]) == {'ec2': 5.0, 's3': 12.5}
+    for bad in (["ec2"], ["ec2=fast"], ["=3"], ["ec2=0"]):
+        with pytest.raises(ValueError):
+            parse_budgets(bad)
@@ -0,0 +1,126 @@
+"""Unit tests for region pruning."""
+
+from datetime import datetime
+
+import pytest
+from botocore.stub import Stubber
+
+from src.lib.region_probe import (DEEP_SWEEP, HOME_REGION, NO_RECENT_USAGE, NOT_ENABLED,
+                                  PROBE_UNAVAILABLE, RECENT_USAGE, RegionProbe)
+from src.lib.scan_engine import ScanOptions, concurrent_analysis
+from src.models.aws_account import AWSAccount
+
+NOW = datetime(2024, 3, 15, 12).timestamp()
+
+
+@pytest.fixture
+def account(monkeypatch):
+    """Account with fake credentials."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    return AWSAccount(account_id="111122223333", region="us-east-1")
+
+
+def _usage(*regions):
+    """A Cost Explorer response with usage in the given regions."""
+    groups = [{'Keys': [region], 'Metrics': {'UsageQuantity': {'Amount': "3.5",
+                                                               'Unit': "N/A"}}}
+              for region in regions]
+    groups.append({'Keys': ["ap-south-1"], 'Metrics': {'UsageQuantity': {
+        'Amount': "0", 'Unit': "N/A"}}})
+    return {'ResultsByTime': [{'TimePeriod': {'Start': "2024-03-02", 'End': "2024-03-16"},
+                               'Groups': groups}]}
+
+
+def _stub_probe(ce, ec2=None):
+    """Stub the opt-in listing and one page of usage by region."""
+    if ec2 is not None:
+        ec2.add_response('describe_regions', {'Regions': [
+            {'RegionName': "us-east-1", 'OptInStatus': "opt-in-not-required"},
+            {'RegionName': "eu-west-1", 'OptInStatus': "opt-in-not-required"},
+            {'RegionName': "ap-south-1", 'OptInStatus': "opt-in-not-required"},
+            {'RegionName': "af-south-1", 'OptInStatus': "not-opted-in"},
+            {'RegionName': "me-south-1", 'OptInStatus': "opted-in"},
+        ]}, {'AllRegions': True})
+    ce.add_response('get_cost_and_usage', _usage("eu-west-1", "global"), {
+        'TimePeriod': {'Start': "2024-03-02", 'End': "2024-03-16"},
+        'Granularity': "MONTHLY",
+        'Metrics': ["UsageQuantity"],
+        'GroupBy': [{'Type': "DIMENSION", 'Key': "REGION"}],
+        'Filter': {'Dimensions': {'Key': "LINKED_ACCOUNT", 'Values': ["111122223333"]}},
+    })
+
+
+def test_plan_prunes_idle_and_disabled_regions(account, tmp_path):
+    """Only the home region and regions with usage are scanned; reasons are kept."""
+    probe = RegionProbe(deep_sweep_days=0, state_path=tmp_path / "sweeps.json",
+                        clock=lambda: NOW)
+    with Stubber(account.get_client('ec2')) as ec2, \
+            Stubber(account.get_client('ce', 'us-east-1')) as ce:
+        _stub_probe(ce, ec2)
+        plan = probe.plan(account)
+
+    assert plan.scan_regions == ["eu-west-1", "us-east-1"]
+    assert plan.active == {'us-east-1': HOME_REGION, 'eu-west-1': RECENT_USAGE}
+    assert plan.pruned == {'af-south-1': NOT_ENABLED, 'ap-south-1': NO_RECENT_USAGE,
+                           'me-south-1': NO_RECENT_USAGE}
+    assert plan.requests == 2
+    assert not plan.deep_sweep
+
+
+def test_deep_sweep_scans_pruned_regions_periodically(account, tmp_path):
+    """A due deep sweep keeps every region; once recorded it is not due again."""
+    now = [NOW]
+    probe = RegionProbe(deep_sweep_days=7, state_path=tmp_path / "sweeps.json",
+                        clock=lambda: now[0])
+    regions = ["us-east-1", "eu-west-1", "ap-south-1"]
+
+    with Stubber(account.get_client('ce', 'us-east-1')) as ce:
+        _stub_probe(ce)
+        plan = probe.plan(account, regions)
+    assert plan.deep_sweep
+    assert plan.active['ap-south-1'] == DEEP_SWEEP
+
+    probe.record_sweep("111122223333")
+    now[0] += 6 * 86400
+    assert not probe.sweep_due("111122223333")
+    now[0] += 86400
+    assert probe.sweep_due("111122223333")
+
+
+def test_probe_failure_prunes_nothing(account, tmp_path):
+    """Without Cost Explorer data every requested region is still scanned."""
+    probe = RegionProbe(state_path=tmp_path / "sweeps.json", clock=lambda: NOW)
+    with Stubber(account.get_client('ce', 'us-east-1')) as ce:
+        ce.add_client_error('get_cost_and_usage', "AccessDeniedException")
+        plan = probe.plan(account, ["us-east-1", "eu-west-1"])
+
+    assert plan.pruned == {}
+    assert plan.active == {'us-east-1': HOME_REGION, 'eu-west-1': PROBE_UNAVAILABLE}
+    assert not plan.deep_sweep
+
+
+def test_concurrent_analysis_scans_only_active_regions(account, tmp_path):
+    """The scan matrix covers active regions and the plan is reported."""
+    scanned = []
+
+    class Enforcer:
+        def __init__(self, target):
+            self.region = target.region
+
+        def comprehensive_analysis(self, **kwargs):
+            scanned.append(self.region)
+            return {'total_resources_found': 0, 'regions_analyzed': [],
+                    'recommendations': [], 'risk_assessment': {'overall_risk': "LOW"}}
+
+    probe = RegionProbe(deep_sweep_days=0, state_path=tmp_path / "sweeps.json",
+                        clock=lambda: NOW)
+    with Stubber(account.get_client('ce', 'us-east-1')) as ce:
+        _stub_probe(ce)
+        analysis = concurrent_analysis(account, Enforcer,
+                                       regions=["us-east-1", "eu-west-1", "ap-south-1"],
+                                       options=ScanOptions(region_probe=probe))
+
+    assert sorted(scanned) == ["eu-west-1", "us-east-1"]
+    assert analysis['region_pruning']['pruned'] == {'ap-south-1': NO_RECENT_USAGE}
+    assert analysis['scan_stats']['regions_pruned'] == 1
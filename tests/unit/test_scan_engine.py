@@ -0,0 +1,163 @@
+"""Unit tests for the concurrent scan engine."""
+
+import threading
+import time
+
+import pytest
+
+from src.lib.scan_engine import (
+    ScanEngine,
+    ScanJob,
+    ScanResult,
+    build_jobs,
+    concurrent_analysis,
+    merge_analyses,
+)
+from src.models.aws_account import AWSAccount
+
+
+def _analysis(region, service, count=1, risk="LOW"):
+    """Build a single-region analysis result like comprehensive_analysis."""
+    return {
+        'total_resources_found': count,
+        'regions_analyzed': [{
+            'region': region,
+            'services': {service: {'resource_count': count, 'resources': []}},
+            'recommendations': [f"Review {service}"],
+        }],
+        'recommendations': [f"Review {service}"],
+        'risk_assessment': {'overall_risk': risk, 'risk_factors': [risk.lower()]},
+        'cost_analysis': {'total_monthly_cost': 1.5},
+        'predictions': {'next_month_prediction': 2.0},
+    }
+
+
+def test_build_jobs_matrix():
+    """Jobs cover every region x service pair."""
+    jobs = build_jobs(["us-east-1", "eu-west-1"], ["ec2", "s3"])
+    assert len(jobs) == 4
+    assert ScanJob("eu-west-1", "s3") in jobs
+
+
+def test_build_jobs_without_services():
+    """Without services each region becomes one all-services job."""
+    assert build_jobs(["us-east-1"]) == [ScanJob("us-east-1", None)]
+
+
+def test_run_respects_caps():
+    """Concurrency never exceeds the global, per-region or per-service caps."""
+    lock = threading.Lock()
+    active = {'total': 0, 'regions': {}, 'services': {}}
+    peak = {'total': 0, 'region': 0, 'service': 0}
+
+    def scan(job):
+        with lock:
+            active['total'] += 1
+            active['regions'][job.region] = active['regions'].get(job.region, 0) + 1
+            active['services'][job.service] = active['services'].get(job.service, 0) + 1
+            peak['total'] = max(peak['total'], active['total'])
+            peak['region'] = max(peak['region'], active['regions'][job.region])
+            peak['service'] = max(peak['service'], active['services'][job.service])
+        time.sleep(0.01)
+        with lock:
+            active['total'] -= 1
+            active['regions'][job.region] -= 1
+            active['services'][job.service] -= 1
+        return _analysis(job.region, job.service)
+
+    engine = ScanEngine(max_workers=6, max_per_region=2, max_per_service=3)
+    jobs = build_jobs([f"region-{i}" for i in range(4)], ["ec2", "s3", "rds"])
+    results = engine.run(jobs, scan)
+
+    assert [r.job for r in results] == jobs
+    assert peak['total'] <= 6
+    assert peak['region'] <= 2
+    assert peak['service'] <= 3
+
+
+def test_shared_slots_cap_engines_together():
+    """Engines sharing a semaphore never exceed it in total."""
+    lock = threading.Lock()
+    active = [0]
+    peak = [0]
+
+    def scan(job):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+        return _analysis(job.region, job.service)
+
+    slots = threading.BoundedSemaphore(3)
+    engines = [ScanEngine(max_workers=4, slots=slots) for _ in range(3)]
+    jobs = build_jobs(["us-east-1", "eu-west-1"], ["ec2", "s3", "rds"])
+    threads = [threading.Thread(target=engine.run, args=(jobs, scan)) for engine in engines]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] == 3
+
+
+def test_run_records_errors():
+    """A failing job is reported without aborting the others."""
+    def scan(job):
+        if job.service == "s3":
+            raise RuntimeError("AccessDenied")
+        return _analysis(job.region, job.service)
+
+    results = ScanEngine(max_workers=2).run(build_jobs(["us-east-1"], ["ec2", "s3"]), scan)
+    assert results[0].error is None
+    assert results[1].error == "AccessDenied"
+
+
+def test_invalid_caps():
+    """Caps must be positive."""
+    with pytest.raises(ValueError):
+        ScanEngine(max_workers=0)
+    with pytest.raises(ValueError):
+        ScanEngine(max_per_region=0)
+
+
+def test_merge_analyses_shape():
+    """Merged results keep the structure _display_detailed_table consumes."""
+    results = [
+        ScanResult(ScanJob("us-east-1", "ec2"), _analysis("us-east-1", "ec2", 2), 0.1),
+        ScanResult(ScanJob("us-east-1", "s3"), _analysis("us-east-1", "s3", 3, "HIGH"), 0.1),
+        ScanResult(ScanJob("eu-west-1", "ec2"), _analysis("eu-west-1", "ec2", 1, "MEDIUM"), 0.1),
+        ScanResult(ScanJob("eu-west-1", "s3"), {}, 0.1, error="boom"),
+    ]
+    merged = merge_analyses(results)
+
+    assert merged['total_resources_found'] == 6
+    assert [r['region'] for r in merged['regions_analyzed']] == ["us-east-1", "eu-west-1"]
+    assert set(merged['regions_analyzed'][0]['services']) == {"ec2", "s3"}
+    assert merged['risk_assessment']['overall_risk'] == "HIGH"
+    assert merged['recommendations'] == ["Review ec2", "Review s3"]
+    assert merged['cost_analysis'] == {'total_monthly_cost': 1.5}
+    assert merged['scan_errors'] == [
+        {'region': "eu-west-1", 'service': "s3", 'error': "boom"}
+    ]
+
+
+def test_concurrent_analysis_pins_region():
+    """Each job gets an account copy pinned to its region."""
+    class FakeEnforcer:
+        def __init__(self, account):
+            self.account = account
+
+        def comprehensive_analysis(self, services=None, include_all_regions=False,
+                                   dry_run=False):
+            assert include_all_regions is False
+            return _analysis(self.account.region, services[0])
+
+    account = AWSAccount(account_id="111122223333")
+    analysis = concurrent_analysis(account, FakeEnforcer, services=["ec2"],
+                                   regions=["us-east-1", "ap-south-1"])
+
+    assert [r['region'] for r in analysis['regions_analyzed']] == ["us-east-1", "ap-south-1"]
+    assert analysis['scan_stats']['jobs'] == 2
+    assert account.region == "us-east-1"
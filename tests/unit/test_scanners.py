@@ -0,0 +1,191 @@
+"""Unit tests for the service scanner registry."""
+
+import sys
+import types
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from botocore.stub import ANY, Stubber
+
+from src.lib.scan_engine import ScanJob, ScanOptions, concurrent_analysis
+from src.lib.scanners import ScannerRegistry
+from src.lib.scanners.usage import hours_this_month
+from src.models.aws_account import AWSAccount
+from src.models.aws_resource import AWSResource, ResourceStatus
+
+
+@pytest.fixture
+def account(monkeypatch):
+    """Account with fake credentials."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    return AWSAccount(account_id="111122223333", region="us-east-1")
+
+
+def _scanner(name, **attributes):
+    """Build a throwaway scanner module."""
+    module = types.ModuleType(f"tests_scanner_{name}")
+    module.analyze = attributes.pop('analyze', lambda account, region: {
+        'resource_count': 0, 'resources': []})
+    for key, value in attributes.items():
+        setattr(module, key, value)
+    return module
+
+
+def test_scanners_load_lazily(monkeypatch):
+    """A scanner module is only imported once a run needs it."""
+    monkeypatch.delitem(sys.modules, "src.lib.scanners.rds", raising=False)
+    registry = ScannerRegistry()
+
+    assert "rds" in registry
+    assert "src.lib.scanners.rds" not in sys.modules
+
+    scanner = registry.load("rds")
+    assert "src.lib.scanners.rds" in sys.modules
+    assert registry.load("rds") is scanner
+
+
+def test_discover_keeps_builtins(monkeypatch):
+    """Installed entry points are merged over the built-in scanners."""
+    custom = types.SimpleNamespace(name="custom", load=lambda: _scanner("custom"))
+    monkeypatch.setattr("src.lib.scanners._entry_point_targets",
+                        lambda: {"custom": custom})
+
+    registry = ScannerRegistry.discover()
+
+    assert registry.names() == ["custom", "ec2", "lambda", "rds", "s3"]
+    assert registry.load("custom").__name__ == "tests_scanner_custom"
+
+
+def test_jobs_prune_unavailable_regions(account):
+    """Global scanners run once; regional ones only where they are available."""
+    registry = ScannerRegistry({
+        "global": _scanner("global", GLOBAL=True),
+        "listed": _scanner("listed", REGIONS={"eu-west-1"}),
+        "anywhere": _scanner("anywhere"),
+    })
+    regions = ["us-east-1", "eu-west-1", "ap-south-1"]
+
+    jobs, pruned = registry.jobs(account, regions, ["global", "listed", "anywhere", "sqs"])
+
+    assert jobs == [ScanJob("us-east-1", "global"), ScanJob("eu-west-1", "listed"),
+                    ScanJob("us-east-1", "anywhere"), ScanJob("eu-west-1", "anywhere"),
+                    ScanJob("ap-south-1", "anywhere"), ScanJob("us-east-1", "sqs"),
+                    ScanJob("eu-west-1", "sqs"), ScanJob("ap-south-1", "sqs")]
+    assert pruned == 4
+
+
+def test_endpoint_regions_come_from_botocore(account):
+    """ENDPOINT scanners use botocore's bundled endpoint data."""
+    registry = ScannerRegistry()
+
+    regions = registry.regions_for(account, "ec2", ["us-east-1", "mars-north-1"])
+
+    assert regions == ["us-east-1"]
+
+
+def test_unregistered_services_fall_back_to_enforcer(account):
+    """Services without a scanner still go through the enforcer."""
+    calls = []
+
+    class Enforcer:
+        def __init__(self, target):
+            self.region = target.region
+
+        def comprehensive_analysis(self, services=None, **kwargs):
+            calls.append((self.region, services))
+            return {'total_resources_found': 1, 'regions_analyzed': [],
+                    'recommendations': [], 'risk_assessment': {'overall_risk': "LOW"}}
+
+    scanned = []
+
+    def analyze(target, region):
+        scanned.append((target.region, region))
+        return {'resource_count': 0, 'resources': []}
+
+    registry = ScannerRegistry({"custom": _scanner("custom", analyze=analyze)})
+
+    analysis = concurrent_analysis(account, Enforcer, services=["custom", "sqs"],
+                                   regions=["us-east-1"],
+                                   options=ScanOptions(registry=registry))
+
+    assert scanned == [("us-east-1", "us-east-1")]
+    assert calls == [("us-east-1", ["sqs"])]
+    assert analysis['total_resources_found'] == 1
+    assert analysis['scan_stats']['cells_pruned'] == 0
+
+
+def test_limits_are_judged_across_regions(account):
+    """Usage under the allowance in each region still exceeds it in total."""
+    found = {}
+
+    def analyze(target, region):
+        found[region] = AWSResource.from_catalog(f"i-{region}", "ec2", "instance",
+                                                 region, {'hours': 500})
+        return {'resource_count': 1, 'resources': [found[region]]}
+
+    registry = ScannerRegistry({"ec2": _scanner("ec2", analyze=analyze)})
+
+    analysis = concurrent_analysis(account, None, services=["ec2"],
+                                   regions=["us-east-1", "eu-west-1"],
+                                   options=ScanOptions(registry=registry))
+
+    assert analysis['total_resources_found'] == 2
+    assert analysis['risk_assessment']['overall_risk'] == "HIGH"
+    assert all(r.status == ResourceStatus.CHARGED for r in found.values())
+    assert any("1000/750 hours" in r for r in analysis['recommendations'])
+
+
+def test_ec2_scanner_counts_running_hours(account):
+    """The EC2 scanner reports hours only for running instances."""
+    from src.lib.scanners import ec2
+
+    launched = datetime.now(timezone.utc) - timedelta(minutes=30)
+    client = account.get_client('ec2', 'us-east-1')
+    with Stubber(client) as stubber:
+        stubber.add_response('describe_instances', {'Reservations': [{'Instances': [
+            {'InstanceId': "i-running", 'InstanceType': "t2.micro",
+             'State': {'Name': "running"}, 'LaunchTime': launched},
+            {'InstanceId': "i-stopped", 'InstanceType': "t3.micro",
+             'State': {'Name': "stopped"}, 'LaunchTime': launched},
+            {'InstanceId': "i-large", 'InstanceType': "m5.large",
+             'State': {'Name': "running"}, 'LaunchTime': launched},
+        ]}]}, {'Filters': ANY})
+
+        data = ec2.analyze(account, 'us-east-1')
+
+    running, stopped, large = data['resources']
+    assert data['resource_count'] == 3
+    assert 0 < running.current_usage['hours'] < 0.6
+    assert stopped.current_usage == {}
+    # Types outside the free tier are billed from the first hour
+    assert large.status == ResourceStatus.CHARGED
+    assert not large.free_tier_limit
+    assert running.status == ResourceStatus.UNKNOWN
+
+
+def test_rds_scanner_charges_classes_outside_the_free_tier():
+    """Only micro DB classes are left for the limit engine to judge."""
+    from src.lib.scanners import rds
+
+    created = datetime.now(timezone.utc) - timedelta(hours=2)
+    page = {'DBInstances': [
+        {'DBInstanceIdentifier': "small", 'DBInstanceClass': "db.t3.micro",
+         'DBInstanceStatus': "available", 'InstanceCreateTime': created},
+        {'DBInstanceIdentifier': "big", 'DBInstanceClass': "db.r5.xlarge",
+         'DBInstanceStatus': "available", 'InstanceCreateTime': created},
+    ]}
+
+    small, big = rds.convert([page], 'us-east-1')['resources']
+
+    assert small.free_tier_limit and small.status == ResourceStatus.UNKNOWN
+    assert big.status == ResourceStatus.CHARGED
+    assert 1.9 < big.current_usage['hours'] < 2.1
+
+
+def test_hours_this_month_starts_at_month_start():
+    """Instances launched last month only count this month's hours."""
+    now = datetime(2024, 3, 2, 12, tzinfo=timezone.utc)
+
+    assert hours_this_month(datetime(2024, 2, 10, tzinfo=timezone.utc), now) == 36
+    assert hours_this_month(datetime(2024, 3, 2, 11, tzinfo=timezone.utc), now) == 1
@@ -0,0 +1,125 @@
+"""Unit tests for run snapshots and --since diffs."""
+
+import gzip
+import json
+
+import pytest
+
+from src.lib.scan_engine import ScanJob, ScanResult
+from src.lib.snapshots import (ADDED, REMOVED, STATUS_CHANGED, SnapshotBuilder,
+                               SnapshotStore, compare_and_save, diff_rows, read_rows)
+from src.models.aws_resource import AWSResource, ResourceStatus
+
+
+def _result(region, service, *resources, error=None):
+    """A scan result with the given resources in one service."""
+    analysis = {} if error else {'regions_analyzed': [
+        {'region': region, 'services': {service: {'resources': list(resources)}}}]}
+    return ScanResult(ScanJob(region, service), analysis, 0.0, error=error)
+
+
+def _instance(resource_id, status=ResourceStatus.FREE, region="us-east-1"):
+    """An EC2 instance resource."""
+    return AWSResource("i-" + resource_id, "ec2", "instance", region, {'hours': 1.0},
+                       status=status)
+
+
+def _builder(*results):
+    """A builder that has seen the given results."""
+    builder = SnapshotBuilder()
+    for result in results:
+        builder.scan_result(result)
+    return builder
+
+
+def test_merge_join_finds_added_removed_and_status_changes():
+    """Each kind of change is reported once; unchanged resources are not."""
+    old = _builder(_result("us-east-1", "ec2", _instance("a"), _instance("b"),
+                           _instance("c"))).sorted_rows()
+    new = _builder(_result("us-east-1", "ec2", _instance("b"),
+                           _instance("c", ResourceStatus.CHARGED),
+                           _instance("d")))
+
+    changes, carried = diff_rows(iter(old), new.sorted_rows(), new)
+
+    assert [(c['change'], c['resource_id']) for c in changes] == [
+        (REMOVED, "i-a"), (STATUS_CHANGED, "i-c"), (ADDED, "i-d")]
+    assert changes[1]['previous_status'] == "free"
+    assert changes[1]['status'] == "charged"
+    assert carried == []
+
+
+def test_cells_not_scanned_are_carried_not_removed():
+    """Failed or skipped cells keep their old rows and report no removals."""
+    old = _builder(_result("us-east-1", "ec2", _instance("a")),
+                   _result("eu-west-1", "ec2", _instance("b", region="eu-west-1")),
+                   _result("us-east-1", "lambda", AWSResource(
+                       "fn", "lambda", "function", "us-east-1"))).sorted_rows()
+    new = _builder(_result("us-east-1", "ec2", _instance("a")),
+                   _result("us-east-1", "lambda", error="AccessDenied"))
+
+    changes, carried = diff_rows(iter(old), new.sorted_rows(), new)
+
+    assert changes == []
+    assert sorted(row[3] for row in carried) == ["fn", "i-b"]
+
+
+def test_decoded_resources_match_models():
+    """Cached (decoded) resources produce the same rows as live ones."""
+    live = _builder(_result("us-east-1", "ec2", _instance("a"))).sorted_rows()
+    cached = _builder(_result("us-east-1", "ec2", _instance("a").to_dict())).sorted_rows()
+
+    assert live == cached
+
+
+def test_settled_statuses_are_saved():
+    """Statuses settled after the scan reach the rows, even for dropped resources."""
+    from src.lib.limit_engine import UsageTally
+
+    tally = UsageTally()
+    builder = SnapshotBuilder()
+    for region in ("us-east-1", "eu-west-1"):
+        result = _result(region, "ec2", AWSResource.from_catalog(
+            "i-" + region, "ec2", "instance", region, {'hours': 500}))
+        tally.scan_result(result)
+        builder.scan_result(result)
+        # Like NDJSON output, which lets go of each result once written
+        result.analysis.clear()
+
+    builder.settle(tally)
+
+    assert [row[6] for row in builder.sorted_rows()] == ["charged", "charged"]
+
+
+def test_since_last_compares_with_the_previous_run(tmp_path):
+    """Every run saves a sorted snapshot; --since last diffs against the newest."""
+    store = SnapshotStore(tmp_path)
+    first = compare_and_save(store, "111122223333", _builder(
+        _result("us-east-1", "ec2", _instance("b"), _instance("a"))))
+    assert 'changes' not in first
+
+    report = compare_and_save(store, "111122223333", _builder(
+        _result("us-east-1", "ec2", _instance("a"))), since="last")
+
+    assert report['since'] == first['snapshot']
+    assert report['counts'] == {ADDED: 0, REMOVED: 1, STATUS_CHANGED: 0}
+    assert [row[3] for row in read_rows(store.latest("111122223333"))] == ["i-a"]
+    with gzip.open(tmp_path / first['snapshot'], "rt") as f:
+        assert json.loads(next(f))['rows'] == 2
+
+
+def test_named_snapshots_and_retention(tmp_path):
+    """Snapshots resolve by name or path, and only the newest are kept."""
+    store = SnapshotStore(tmp_path, keep=2)
+    names = [compare_and_save(store, "111122223333", _builder())['snapshot']
+             for _ in range(3)]
+
+    assert [path.name for path in store.list("111122223333")] == names[1:]
+    assert store.resolve("111122223333", names[1]) == tmp_path / names[1]
+    assert store.resolve("111122223333", str(tmp_path / names[2])) == tmp_path / names[2]
+    assert store.resolve("444455556666", "last") is None
+    with pytest.raises(ValueError):
+        store.resolve("111122223333", names[0])
+    # The placeholder of a failed STS lookup never reads or writes snapshots
+    with pytest.raises(ValueError):
+        store.resolve("123456789012", "last")
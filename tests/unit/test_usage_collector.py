@@ -0,0 +1,151 @@
+"""Unit tests for bulk CloudWatch usage collection."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from botocore.stub import ANY, Stubber
+
+from src.lib.scan_engine import ScanOptions, concurrent_analysis
+from src.lib.scanners import ScannerRegistry
+from src.lib.usage_collector import UsageCollector
+from src.models.aws_account import DEFAULT_TEST_ACCOUNT_ID, AWSAccount
+from src.models.aws_resource import AWSResource
+
+MONTH_START = datetime(2024, 3, 1, tzinfo=timezone.utc)
+TODAY = datetime(2024, 3, 15, tzinfo=timezone.utc)
+NOW = (TODAY + timedelta(hours=12)).timestamp()
+
+
+@pytest.fixture
+def account(monkeypatch):
+    """Account with fake credentials."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    return AWSAccount(account_id="111122223333", region="us-east-1")
+
+
+def _functions(count):
+    """Lambda function resources in us-east-1."""
+    return [AWSResource.from_catalog(f"fn-{index}", "lambda", "function", "us-east-1")
+            for index in range(count)]
+
+
+def _result(index, *points):
+    """One MetricDataResult with (datetime, value) points."""
+    return {'Id': f"m{index}", 'Timestamps': [point for point, _ in points],
+            'Values': [value for _, value in points]}
+
+
+def _request(start, token=None):
+    """Expected GetMetricData parameters for a window starting at start."""
+    params = {'MetricDataQueries': ANY, 'StartTime': start,
+              'EndTime': TODAY + timedelta(days=1), 'ScanBy': "TimestampAscending"}
+    if token:
+        params['NextToken'] = token
+    return params
+
+
+def test_queries_are_batched_and_paged(account, tmp_path):
+    """501 functions take two requests plus one continuation page."""
+    collector = UsageCollector(tmp_path / "metrics.db", clock=lambda: NOW)
+    resources = _functions(501)
+    day = MONTH_START + timedelta(days=1)
+    client = account.get_client('cloudwatch', 'us-east-1')
+    batches = []
+    client.meta.events.register(
+        'before-parameter-build.cloudwatch.GetMetricData',
+        lambda params, **kwargs: batches.append(len(params['MetricDataQueries'])))
+
+    with Stubber(client) as cloudwatch:
+        cloudwatch.add_response('get_metric_data', {
+            'MetricDataResults': [_result(0, (MONTH_START, 10.0))], 'NextToken': "page-2",
+        }, _request(MONTH_START))
+        cloudwatch.add_response('get_metric_data', {
+            'MetricDataResults': [_result(0, (day, 5.0)), _result(499, (TODAY, 1.0))],
+        }, _request(MONTH_START, "page-2"))
+        cloudwatch.add_response('get_metric_data', {
+            'MetricDataResults': [_result(0, (day, 7.0))],
+        }, _request(MONTH_START))
+        assert collector.collect(account, resources) == 501
+
+    assert batches == [500, 500, 1]
+
+    assert resources[0].current_usage == {'requests': 15.0}
+    assert resources[1].current_usage == {'requests': 0}
+    assert resources[499].current_usage == {'requests': 1.0}
+    assert resources[500].current_usage == {'requests': 7.0}
+    assert collector.stats()['requests'] == 3
+
+
+def test_rerun_fetches_only_the_partial_period(account, tmp_path):
+    """Closed days come from the store; only today is requested again."""
+    now = [NOW]
+    collector = UsageCollector(tmp_path / "metrics.db", clock=lambda: now[0])
+    first, = _functions(1)
+    with Stubber(account.get_client('cloudwatch', 'us-east-1')) as cloudwatch:
+        cloudwatch.add_response('get_metric_data', {'MetricDataResults': [
+            _result(0, (MONTH_START, 100.0), (TODAY, 3.0))]}, _request(MONTH_START))
+        collector.collect(account, [first])
+    assert first.current_usage['requests'] == 103.0
+
+    now[0] += 3600
+    again, = _functions(1)
+    with Stubber(account.get_client('cloudwatch', 'us-east-1')) as cloudwatch:
+        cloudwatch.add_response('get_metric_data', {'MetricDataResults': [
+            _result(0, (TODAY, 4.0))]}, _request(TODAY))
+        collector.collect(account, [again])
+
+    assert again.current_usage['requests'] == 104.0
+    assert collector.stats()['periods_cached'] == 14
+
+
+def test_unknown_account_is_never_stored(account, tmp_path):
+    """Without a real account ID, no run reads or writes the metric store."""
+    unknown = AWSAccount(account_id=DEFAULT_TEST_ACCOUNT_ID, region="us-east-1",
+                         client_pool=account.client_pool)
+    collector = UsageCollector(tmp_path / "metrics.db", clock=lambda: NOW)
+    for _ in range(2):
+        function, = _functions(1)
+        with Stubber(account.get_client('cloudwatch', 'us-east-1')) as cloudwatch:
+            cloudwatch.add_response('get_metric_data', {'MetricDataResults': [
+                _result(0, (MONTH_START, 100.0))]}, _request(MONTH_START))
+            collector.collect(unknown, [function])
+        assert function.current_usage['requests'] == 100.0
+
+    assert collector.stats()['periods_cached'] == 0
+    assert not (tmp_path / "metrics.db").exists()
+
+
+def test_bucket_usage_is_read_in_the_bucket_region(account, tmp_path):
+    """Bucket size takes the latest day in GB; missing sizes are left unset."""
+    collector = UsageCollector(tmp_path / "metrics.db", clock=lambda: NOW)
+    buckets = [AWSResource.from_catalog("logs", "s3", "bucket", "eu-west-1"),
+               AWSResource.from_catalog("empty", "s3", "bucket", "eu-west-1")]
+    with Stubber(account.get_client('cloudwatch', 'eu-west-1')) as cloudwatch:
+        cloudwatch.add_response('get_metric_data', {'MetricDataResults': [
+            _result(0, (MONTH_START, 1024 ** 3), (TODAY - timedelta(days=1), 3 * 1024 ** 3)),
+            _result(1, (TODAY, 40.0)),
+        ]}, _request(MONTH_START))
+        collector.collect(account, buckets)
+
+    assert buckets[0].current_usage == {'GB': 3.0, 'requests': 40.0}
+    assert buckets[1].current_usage == {'requests': 0}
+
+
+def test_collected_usage_feeds_limit_evaluation(account, tmp_path):
+    """A scan with usage metrics flags functions over the request allowance."""
+    collector = UsageCollector(tmp_path / "metrics.db", clock=lambda: NOW)
+    lam = Stubber(account.get_client('lambda', 'us-east-1'))
+    lam.add_response('list_functions', {'Functions': [{'FunctionName': "busy"}]})
+    cloudwatch = Stubber(account.get_client('cloudwatch', 'us-east-1'))
+    cloudwatch.add_response('get_metric_data', {'MetricDataResults': [
+        _result(0, (MONTH_START, 1500000.0))]}, _request(MONTH_START))
+
+    with lam, cloudwatch:
+        analysis = concurrent_analysis(account, None, services=["lambda"],
+                                       regions=["us-east-1"],
+                                       options=ScanOptions(registry=ScannerRegistry(),
+                                                           usage_collector=collector))
+
+    assert analysis['risk_assessment']['overall_risk'] == "HIGH"
+    assert analysis['scan_stats']['usage_metrics']['resources'] == 1
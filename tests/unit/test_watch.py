@@ -0,0 +1,171 @@
+"""Unit tests for change feeds and the watch loop."""
+
+import json
+
+from src.lib import change_feed
+from src.lib.change_feed import (ChangeEvent, CloudTrailFeed, FileFeed, SqsFeed,
+                                 events_from_eventbridge, services_for_source)
+from src.lib.scan_engine import ScanEngine
+from src.lib.watch import Watcher
+from src.models.aws_account import AWSAccount
+
+# Risk per (region, service) that the fake enforcer reports
+RISKS = {}
+SCANS = []
+
+
+class FakeEnforcer:
+    """Enforcer stand-in whose risk for a cell is read from RISKS."""
+
+    def __init__(self, account):
+        self.account = account
+
+    def comprehensive_analysis(self, services=None, include_all_regions=False,
+                               dry_run=False):
+        service = services[0]
+        SCANS.append((self.account.region, service))
+        risk = RISKS.get((self.account.region, service), "LOW")
+        return {
+            'total_resources_found': 1,
+            'regions_analyzed': [{'region': self.account.region,
+                                  'services': {service: {'resource_count': 1}}}],
+            'risk_assessment': {'overall_risk': risk,
+                                'risk_factors': [f"{service} busy"] if risk != "LOW" else []},
+        }
+
+
+class ListFeed:
+    """Feed that hands out queued batches of events."""
+
+    def __init__(self):
+        self.batches = []
+
+    def poll(self):
+        return self.batches.pop(0) if self.batches else []
+
+
+def _watcher(feed, transitions):
+    """Watcher over two regions and two services with the fake enforcer."""
+    RISKS.clear()
+    SCANS.clear()
+    return Watcher(AWSAccount(account_id="111122223333"), FakeEnforcer,
+                   ["us-east-1", "eu-west-1"], feed, services=["ec2", "s3"],
+                   engine=ScanEngine(max_workers=2), on_transition=transitions.append)
+
+
+def test_source_mapping():
+    """Event sources map onto the services the enforcer scans."""
+    assert services_for_source("ec2.amazonaws.com") == ("ec2", "vpc")
+    assert services_for_source("aws.lambda") == ("lambda",)
+    assert services_for_source("monitoring.amazonaws.com") == ("cloudwatch",)
+
+
+def test_eventbridge_cloudtrail_event():
+    """CloudTrail events delivered through EventBridge use their detail fields."""
+    changes = events_from_eventbridge({
+        'id': "e-1", 'source': "aws.s3", 'region': "us-east-1",
+        'detail': {'eventSource': "s3.amazonaws.com", 'awsRegion': "eu-west-1",
+                   'eventName': "CreateBucket"},
+        'resources': ["arn:aws:s3:::bucket"],
+    })
+    assert changes == [ChangeEvent("eu-west-1", "s3", "CreateBucket",
+                                   "arn:aws:s3:::bucket", "e-1")]
+
+
+def test_only_changed_cells_are_rescanned():
+    """After the baseline, an event rescans just its (region, service) cell."""
+    feed = ListFeed()
+    transitions = []
+    watcher = _watcher(feed, transitions)
+    watcher.baseline()
+    assert len(SCANS) == 4 and watcher.risk == "LOW"
+
+    SCANS.clear()
+    RISKS[("eu-west-1", "ec2")] = "HIGH"
+    feed.batches.append([ChangeEvent("eu-west-1", "ec2", "RunInstances")])
+    transition = watcher.step()
+
+    assert SCANS == [("eu-west-1", "ec2")]
+    assert transition['from'] == "LOW" and transition['to'] == "HIGH"
+    assert transitions == [transition]
+    assert watcher.step() is None
+
+
+def test_global_service_event_dirties_every_region():
+    """An S3 event from a region without a cell rescans every S3 cell."""
+    feed = ListFeed()
+    watcher = _watcher(feed, [])
+    watcher.baseline()
+    SCANS.clear()
+    feed.batches.append([ChangeEvent("ap-south-1", "s3", "PutBucketPolicy")])
+    watcher.step()
+    assert sorted(SCANS) == [("eu-west-1", "s3"), ("us-east-1", "s3")]
+    assert watcher.affected_jobs([ChangeEvent("us-east-1", "sqs")]) == []
+    # Regional services from unwatched regions are dropped, not fanned out
+    assert watcher.affected_jobs([ChangeEvent("ap-south-1", "ec2")]) == []
+
+
+def test_file_feed_tails_new_lines(tmp_path):
+    """The file feed only returns complete lines appended since the last poll."""
+    path = tmp_path / "events.ndjson"
+    event = {'source': "aws.ec2", 'region': "us-east-1", 'detail-type': "x"}
+    path.write_text(json.dumps(event) + "\n" + '{"source": "aws.la')
+    feed = FileFeed(str(path))
+    assert [c.service for c in feed.poll()] == ["ec2", "vpc"]
+
+    with open(path, "a") as f:
+        f.write('mbda", "region": "us-east-1"}\n')
+    assert [c.service for c in feed.poll()] == ["lambda"]
+    assert feed.poll() == []
+
+
+def test_sqs_feed_drains_and_deletes():
+    """Messages are parsed and deleted in batches until the queue is empty."""
+    class FakeSQS:
+        def __init__(self):
+            self.queue = [{'Body': json.dumps({'source': "aws.rds", 'region': "us-east-1"}),
+                           'ReceiptHandle': f"r{i}"} for i in range(12)]
+            self.deleted = []
+
+        def receive_message(self, QueueUrl, MaxNumberOfMessages, WaitTimeSeconds):
+            batch, self.queue = self.queue[:10], self.queue[10:]
+            return {'Messages': batch}
+
+        def delete_message_batch(self, QueueUrl, Entries):
+            self.deleted.extend(e['ReceiptHandle'] for e in Entries)
+
+    sqs = FakeSQS()
+    account = AWSAccount(account_id="111122223333")
+    account.get_client = lambda service, region=None: sqs
+    changes = SqsFeed(account, "https://queue").poll()
+    assert len(changes) == 12
+    assert len(sqs.deleted) == 12
+
+
+def test_cloudtrail_feed_forgets_oldest_events_first(monkeypatch):
+    """Past the limit only the oldest event IDs are forgotten."""
+    class FakeCloudTrail:
+        def __init__(self):
+            self.events = []
+
+        def get_paginator(self, operation):
+            return self
+
+        def paginate(self, **kwargs):
+            return [{'Events': [{'EventId': event_id, 'EventName': "PutObject",
+                                 'EventSource': "s3.amazonaws.com"}
+                                for event_id in self.events]}]
+
+    monkeypatch.setattr(change_feed, "MAX_SEEN_EVENT_IDS", 3)
+    cloudtrail = FakeCloudTrail()
+    account = AWSAccount(account_id="111122223333")
+    account.get_client = lambda service, region=None: cloudtrail
+    feed = CloudTrailFeed(account, ["us-east-1"])
+
+    cloudtrail.events = ["e1", "e2", "e3"]
+    assert [c.event_id for c in feed.poll()] == ["e1", "e2", "e3"]
+    cloudtrail.events = ["e2", "e3", "e4"]
+    assert [c.event_id for c in feed.poll()] == ["e4"]
+    # e1 was evicted; e3 and e4 are still remembered
+    cloudtrail.events = ["e1", "e3", "e4"]
+    assert [c.event_id for c in feed.poll()] == ["e1"]